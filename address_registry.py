@@ -0,0 +1,255 @@
+"""
+Address registry for Network Simulator
+Hash indexes from IP and MAC addresses to devices, kept up to date as devices
+are created, removed or renumbered, so per-packet address resolution is a dict
+lookup instead of a scan over every device, port and hub
+"""
+
+import weakref
+
+
+def _ip_key(ip):
+    """Normalize an IP address for indexing ("192.168.1.10/24" and "192.168.1.10" match)"""
+    return ip.split("/", 1)[0] if isinstance(ip, str) else ip
+
+
+class AddressRegistry:
+    """
+    IP -> device and MAC -> device indexes
+
+    Devices are held by weak reference, so a device that is no longer used by
+    any topology drops out of the indexes by itself. Several devices may share
+    an address (e.g. the same private subnet behind different routers); lookups
+    then return the most recently registered one, and lookup_all_ip() returns
+    them all so callers can pick the one on their own segment.
+    """
+
+    def __init__(self):
+        """Initialize empty indexes"""
+        self._by_ip = {}  # IP -> list of weak references to devices
+        self._by_mac = {}  # MAC -> list of weak references to devices
+        self._segments = weakref.WeakKeyDictionary()  # Device -> switches and hubs it is attached to
+
+    @staticmethod
+    def _add(index, key, device):
+        """Add a device under a key, most recent last"""
+        refs = index.get(key)
+        if refs is None:
+            refs = index[key] = []
+        else:
+            refs[:] = [ref for ref in refs if ref() is not None and ref() is not device]
+
+        def _drop(ref, index=index, key=key):
+            live = [r for r in index.get(key, ()) if r is not ref]
+            if live:
+                index[key] = live
+            else:
+                index.pop(key, None)
+
+        refs.append(weakref.ref(device, _drop))
+
+    @staticmethod
+    def _remove(index, key, device):
+        """Remove a device from under a key"""
+        refs = index.get(key)
+        if refs is None:
+            return
+        refs[:] = [ref for ref in refs if ref() is not None and ref() is not device]
+        if not refs:
+            del index[key]
+
+    def register(self, device, ip=None, mac=None):
+        """
+        Index a device under its addresses
+
+        Args:
+            device: Device object
+            ip (str, optional): IP address
+            mac (optional): MAC address
+        """
+        if ip is not None:
+            self._add(self._by_ip, _ip_key(ip), device)
+        if mac is not None:
+            self._add(self._by_mac, mac, device)
+
+    def unregister(self, device, ip=None, mac=None):
+        """
+        Remove a device from the indexes
+
+        Args:
+            device: Device object
+            ip (str, optional): IP address it was registered under
+            mac (optional): MAC address it was registered under
+        """
+        if ip is not None:
+            self._remove(self._by_ip, _ip_key(ip), device)
+        if mac is not None:
+            self._remove(self._by_mac, mac, device)
+        self._segments.pop(device, None)
+
+    def update_ip(self, device, old_ip, new_ip):
+        """
+        Move a device to a new IP address
+
+        Args:
+            device: Device object
+            old_ip (str): Previous IP address (None if it had none)
+            new_ip (str): New IP address (None to remove it)
+        """
+        if old_ip is not None:
+            self._remove(self._by_ip, _ip_key(old_ip), device)
+        if new_ip is not None:
+            self._add(self._by_ip, _ip_key(new_ip), device)
+
+    def update_mac(self, device, old_mac, new_mac):
+        """
+        Move a device to a new MAC address
+
+        Args:
+            device: Device object
+            old_mac: Previous MAC address (None if it had none)
+            new_mac: New MAC address (None to remove it)
+        """
+        if old_mac is not None:
+            self._remove(self._by_mac, old_mac, device)
+        if new_mac is not None:
+            self._add(self._by_mac, new_mac, device)
+
+    def lookup_ip(self, ip):
+        """
+        Find the device with an IP address
+
+        Args:
+            ip (str): IP address (a "/len" suffix is ignored)
+
+        Returns:
+            Device, or None if no live device has the address
+        """
+        refs = self._by_ip.get(_ip_key(ip))
+        if refs:
+            for ref in reversed(refs):
+                device = ref()
+                if device is not None:
+                    return device
+        return None
+
+    def lookup_all_ip(self, ip):
+        """
+        Find every device with an IP address
+
+        Args:
+            ip (str): IP address
+
+        Returns:
+            list: Devices, most recently registered last
+        """
+        return [device for device in (ref() for ref in self._by_ip.get(_ip_key(ip), ())) if device is not None]
+
+    def lookup_mac(self, mac):
+        """
+        Find the device with a MAC address
+
+        Args:
+            mac: MAC address
+
+        Returns:
+            Device, or None if no live device has the address
+        """
+        refs = self._by_mac.get(mac)
+        if refs:
+            for ref in reversed(refs):
+                device = ref()
+                if device is not None:
+                    return device
+        return None
+
+    def attach(self, device, segment):
+        """
+        Record that a device is plugged into a switch or hub
+
+        Args:
+            device: Device object
+            segment: Switch or Hub
+        """
+        segments = self._segments.get(device)
+        if segments is None:
+            self._segments[device] = [segment]
+        elif not any(s is segment for s in segments):
+            segments.append(segment)
+
+    def detach(self, device, segment):
+        """
+        Record that a device was unplugged from a switch or hub
+
+        Args:
+            device: Device object
+            segment: Switch or Hub
+        """
+        segments = self._segments.get(device)
+        if segments is not None:
+            segments[:] = [s for s in segments if s is not segment]
+
+    def get_segments(self, device):
+        """
+        Get the switches and hubs a device is plugged into
+
+        Args:
+            device: Device object
+
+        Returns:
+            list: Switches and hubs
+        """
+        return list(self._segments.get(device, ()))
+
+    def find_on_segments(self, ip, segments):
+        """
+        Find a device with an IP address that is attached to one of some segments
+
+        Args:
+            ip (str): IP address
+            segments (iterable): Switches and hubs to accept
+
+        Returns:
+            tuple: (device, segment), or (None, None)
+        """
+        refs = self._by_ip.get(_ip_key(ip))
+        if not refs:
+            return None, None
+        for ref in reversed(refs):
+            device = ref()
+            if device is None:
+                continue
+            for segment in self._segments.get(device, ()):
+                if any(segment is s for s in segments):
+                    return device, segment
+        return None, None
+
+    def __len__(self):
+        return len(self._by_ip)
+
+
+_default_registry = AddressRegistry()
+
+
+def get_address_registry():
+    """
+    Get the shared address registry
+
+    Returns:
+        AddressRegistry: The process-wide default registry
+    """
+    return _default_registry
+
+
+def set_address_registry(registry):
+    """
+    Replace the shared address registry
+
+    Devices register with the shared registry when they are created, so this
+    should be called before building a topology.
+
+    Args:
+        registry (AddressRegistry): Registry to use from now on
+    """
+    global _default_registry
+    _default_registry = registry
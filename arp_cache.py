@@ -0,0 +1,204 @@
+"""
+ARP cache for Network Simulator
+IP -> MAC cache with entry lifetimes on the simulation clock, LRU eviction at a
+fixed capacity, queues for packets waiting on a resolution in progress, and
+negative caching of addresses nobody answered for
+"""
+
+from collections import OrderedDict, deque
+from event_scheduler import get_scheduler
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_TTL = 300.0  # Seconds a resolved entry stays valid
+DEFAULT_NEGATIVE_TTL = 20.0  # Seconds an unanswered address is not asked for again
+DEFAULT_MAX_PENDING = 3  # Packets held per address while its resolution is in progress
+
+
+def _ip_key(ip):
+    """Cache key of an address: interface addresses such as "10.0.0.5/24" are stored without the prefix length"""
+    return ip.split("/", 1)[0] if isinstance(ip, str) else ip
+
+
+class ARPCache:
+    """
+    ARP cache of one device
+
+    Entries expire lazily: an expired entry is dropped when it is next looked
+    up, so a large cache costs nothing on the clock while idle. When the cache
+    is full, the least recently used entry is evicted. Permanent entries (the
+    device's own address, static entries) never expire and are not evicted.
+    Addresses may be given with a prefix length ("10.0.0.5/24"), which is
+    ignored, as in the address registry.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_pending=DEFAULT_MAX_PENDING, scheduler=None):
+        """
+        Initialize the cache
+
+        Args:
+            capacity (int): Maximum number of dynamic entries
+            ttl (float): Lifetime of a resolved entry in simulated seconds
+            negative_ttl (float): Lifetime of a negative (unresolved) entry
+            max_pending (int): Packets queued per address while it is being resolved
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_pending = max_pending
+        self.scheduler = scheduler or get_scheduler()
+        self._entries = OrderedDict()  # IP -> (MAC, expiry time), least recently used first
+        self._static = {}  # IP -> MAC, never expire
+        self._negative = {}  # IP -> expiry time
+        self._pending = {}  # IP -> deque of packets waiting for the resolution
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, ip):
+        """
+        Look up the MAC address for an IP address
+
+        Args:
+            ip (str): IP address
+
+        Returns:
+            MAC address, or None if there is no valid entry
+        """
+        ip = _ip_key(ip)
+        mac = self._static.get(ip)
+        if mac is not None:
+            self.hits += 1
+            return mac
+        entry = self._entries.get(ip)
+        if entry is not None:
+            if entry[1] > self.scheduler.now:
+                self._entries.move_to_end(ip)
+                self.hits += 1
+                return entry[0]
+            del self._entries[ip]
+        self.misses += 1
+        return None
+
+    def add(self, ip, mac, permanent=False):
+        """
+        Store a resolved address
+
+        Args:
+            ip (str): IP address
+            mac: MAC address
+            permanent (bool): Never expire or evict this entry
+
+        Returns:
+            list: Packets that were waiting for this address, in arrival order
+        """
+        ip = _ip_key(ip)
+        self._negative.pop(ip, None)
+        if permanent:
+            self._entries.pop(ip, None)
+            self._static[ip] = mac
+        elif ip not in self._static:
+            entries = self._entries
+            if ip in entries:
+                entries.move_to_end(ip)
+            elif len(entries) >= self.capacity:
+                entries.popitem(last=False)
+                self.evictions += 1
+            entries[ip] = (mac, self.scheduler.now + self.ttl)
+        return list(self._pending.pop(ip, ()))
+
+    def add_negative(self, ip):
+        """
+        Remember that an address could not be resolved
+
+        Args:
+            ip (str): IP address
+
+        Returns:
+            list: Packets that were waiting for this address (now undeliverable)
+        """
+        ip = _ip_key(ip)
+        self._negative[ip] = self.scheduler.now + self.negative_ttl
+        return list(self._pending.pop(ip, ()))
+
+    def is_negative(self, ip):
+        """
+        Check if an address recently failed to resolve
+
+        Args:
+            ip (str): IP address
+
+        Returns:
+            bool: True while the negative entry is valid
+        """
+        ip = _ip_key(ip)
+        expiry = self._negative.get(ip)
+        if expiry is None:
+            return False
+        if expiry > self.scheduler.now:
+            return True
+        del self._negative[ip]
+        return False
+
+    def queue_packet(self, ip, packet):
+        """
+        Hold a packet until an address is resolved
+
+        Args:
+            ip (str): IP address being resolved
+            packet: Packet (or any object) to release when the address resolves
+
+        Returns:
+            bool: True if this is the first packet for the address, meaning the
+                caller should send the ARP request; False if a request is already
+                outstanding (the packet is queued, or dropped when the queue is full)
+        """
+        ip = _ip_key(ip)
+        queue = self._pending.get(ip)
+        if queue is None:
+            self._pending[ip] = deque([packet], maxlen=self.max_pending)
+            return True
+        queue.append(packet)  # A full queue drops its oldest packet, as in Linux
+        return False
+
+    def is_pending(self, ip):
+        """Check if a resolution for an address is in progress"""
+        return _ip_key(ip) in self._pending
+
+    def remove(self, ip):
+        """
+        Remove an entry of any kind
+
+        Args:
+            ip (str): IP address
+        """
+        ip = _ip_key(ip)
+        self._entries.pop(ip, None)
+        self._static.pop(ip, None)
+        self._negative.pop(ip, None)
+
+    def clear(self):
+        """Remove all dynamic and negative entries (permanent entries stay)"""
+        self._entries.clear()
+        self._negative.clear()
+
+    def items(self):
+        """
+        Get the valid entries
+
+        Returns:
+            list: (IP, MAC) pairs, permanent entries first
+        """
+        now = self.scheduler.now
+        return list(self._static.items()) + [(ip, mac) for ip, (mac, expiry) in self._entries.items() if expiry > now]
+
+    def __contains__(self, ip):
+        ip = _ip_key(ip)
+        if ip in self._static:
+            return True
+        entry = self._entries.get(ip)
+        return entry is not None and entry[1] > self.scheduler.now
+
+    def __len__(self):
+        return len(self._static) + len(self._entries)
@@ -0,0 +1,853 @@
+"""
+asyncio socket API for Network Simulator
+Lets applications talk to a simulated TransportLayer through the usual asyncio
+calls (open_connection, start_server, create_datagram_endpoint, stream
+readers and writers) while an event loop runs on the simulation clock, so
+thousands of simulated clients can run as coroutines
+
+Example:
+    async def handle(reader, writer):
+        writer.write(await reader.readline())
+        writer.close()
+
+    async def main():
+        server = await async_sockets.start_server(handle, "10.0.0.2", 80)
+        reader, writer = await async_sockets.open_connection("10.0.0.2", 80)
+        writer.write(b"hello\\n")
+        print(await reader.readline())
+
+    async_sockets.run(main())
+
+Time inside the loop is simulated time: asyncio.sleep(5) advances the
+simulation clock by five seconds without waiting, and TCP segments and
+datagrams take the TransportLayer's one-way delay to arrive. The loop does
+no real I/O and must only be used from its own thread.
+"""
+
+import argparse
+import asyncio
+import errno
+import itertools
+import selectors
+import sys
+from collections import deque
+import sim_logging
+from event_scheduler import get_scheduler
+from sim_logging import get_logger
+from tcp_congestion import DEFAULT_MSS
+from tcp_state_machine import DEFAULT_WINDOW, SEQ_MODULUS, WILDCARD_IP, ConnectionState
+from transport_layer import TCPConnection, TransportLayer
+
+_log = get_logger("SOCKET")
+
+_OPEN_STATES = (ConnectionState.SYN_RECEIVED, ConnectionState.ESTABLISHED, ConnectionState.CLOSE_WAIT)
+_SENDING_STATES = (ConnectionState.ESTABLISHED, ConnectionState.CLOSE_WAIT)
+_WRITE_HIGH_WATER = 64 * 1024  # Default write buffer limits, as in asyncio
+# Transitions caused by the peer's FIN
+_PEER_FIN = {
+    (ConnectionState.SYN_RECEIVED, ConnectionState.CLOSE_WAIT),
+    (ConnectionState.ESTABLISHED, ConnectionState.CLOSE_WAIT),
+    (ConnectionState.FIN_WAIT_1, ConnectionState.CLOSING),
+    (ConnectionState.FIN_WAIT_2, ConnectionState.TIME_WAIT),
+}
+
+_socket_ids = itertools.count(1)  # Owners of ephemeral ports taken by sockets
+_transport_layer = None
+
+
+def get_transport_layer():
+    """
+    Get the TransportLayer used when none is given
+
+    Returns:
+        TransportLayer: Shared transport layer (created on first use)
+    """
+    global _transport_layer
+    if _transport_layer is None:
+        _transport_layer = TransportLayer()
+    return _transport_layer
+
+
+def set_transport_layer(stack):
+    """
+    Replace the shared TransportLayer, e.g. with a fresh one per run
+
+    Args:
+        stack (TransportLayer): Transport layer to use, or None to create a new one on next use
+    """
+    global _transport_layer
+    _transport_layer = stack
+
+
+class _SimulatedSelector(selectors.BaseSelector):
+    """
+    Selector that advances the simulation instead of waiting for I/O
+
+    Where a real selector would block for up to timeout seconds, this one
+    runs simulation events for up to timeout simulated seconds, returning
+    early once an event has given the event loop something to do.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.woken = False
+        self._map = {}
+
+    def register(self, fileobj, events, data=None):
+        key = selectors.SelectorKey(fileobj, fileobj if isinstance(fileobj, int) else fileobj.fileno(), events, data)
+        self._map[fileobj] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self._map.pop(fileobj)
+
+    def get_map(self):
+        return self._map
+
+    def select(self, timeout=None):
+        scheduler = self.scheduler
+        if timeout is not None and timeout <= 0:
+            return []
+        deadline = None if timeout is None else scheduler.now + timeout
+        self.woken = False
+        while True:
+            next_time = scheduler.peek_time()
+            if next_time is None or (deadline is not None and next_time > deadline):
+                break
+            scheduler.step()
+            if self.woken:
+                return []
+        if deadline is None:
+            raise RuntimeError("Simulation has no pending events: every coroutine is waiting for something that cannot happen")
+        scheduler.run(until=deadline)
+        return []
+
+    def close(self):
+        self._map.clear()
+
+
+class SimEventLoop(asyncio.SelectorEventLoop):
+    """
+    asyncio event loop whose clock is the simulation clock
+
+    loop.time() is the scheduler's virtual time, timers (asyncio.sleep,
+    wait_for timeouts, call_later) fire in virtual time, and whenever no
+    coroutine is ready the loop runs simulation events instead of waiting.
+    """
+
+    def __init__(self, scheduler=None):
+        """
+        Initialize the loop
+
+        Args:
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+        """
+        self.scheduler = scheduler or get_scheduler()
+        self._sim_selector = _SimulatedSelector(self.scheduler)
+        super().__init__(self._sim_selector)
+
+    def time(self):
+        return self.scheduler.now
+
+    def call_soon(self, callback, *args, context=None):
+        self._sim_selector.woken = True
+        return super().call_soon(callback, *args, context=context)
+
+    def call_at(self, when, callback, *args, context=None):
+        self._sim_selector.woken = True
+        return super().call_at(when, callback, *args, context=context)
+
+
+def new_event_loop(stack=None):
+    """
+    Create an event loop on the clock of a TransportLayer
+
+    Args:
+        stack (TransportLayer, optional): Transport layer (default: the shared one)
+
+    Returns:
+        SimEventLoop: New event loop
+    """
+    return SimEventLoop((stack or get_transport_layer()).scheduler)
+
+
+def run(main, stack=None):
+    """
+    Run a coroutine to completion on a simulation event loop, like asyncio.run()
+
+    Args:
+        main (coroutine): Coroutine to run
+        stack (TransportLayer, optional): Transport layer whose clock is used (default: the shared one)
+
+    Returns:
+        Result of the coroutine
+    """
+    loop = new_event_loop(stack)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def _allocate_port(stack, ip, port):
+    """
+    Reserve a local port for a socket
+
+    Returns:
+        tuple: (port, owner) where owner is the PortManager process ID, or None
+            if the port was given by the caller
+    """
+    if port:
+        return port, None
+    owner = f"socket-{next(_socket_ids)}"
+    port = stack.port_manager.allocate_ephemeral_port(owner, ip)
+    if port is None:
+        raise OSError(errno.EADDRNOTAVAIL, f"No ephemeral ports left on {ip}")
+    return port, owner
+
+
+class _SegmentCounter:
+    """
+    Flow control stand-in through which a TCPConnection runs the congestion
+    control of a byte stream
+
+    The TCP state machine carries the bytes; this only numbers the segments
+    a _StreamTransport sends and counts how many the peer has acknowledged,
+    in the form TCPConnection.process_ack() reads. ACKs are cumulative byte
+    counts. The state machine does not resend data, so nothing is
+    retransmitted here: losses only shrink the congestion window.
+    """
+
+    seq_space = sys.maxsize  # Segments are numbered without wrapping
+
+    def __init__(self, scheduler, window_size):
+        self.scheduler = scheduler
+        self.window_size = window_size
+        self.timeout = 1.0  # Set by the connection's RTO estimator; no timer runs here
+        self.acked_total = 0
+        self._ends = deque()  # Byte count at the end of each unacknowledged segment
+        self._sent_bytes = 0
+        self._acked_bytes = 0
+
+    @property
+    def sent_total(self):
+        return self.acked_total + len(self._ends)
+
+    @property
+    def outstanding(self):
+        return len(self._ends)
+
+    def can_send(self):
+        return False  # Data goes through _StreamTransport._push(), never the connection's queue
+
+    def sent(self, size):
+        """
+        Count a segment sent by the transport
+
+        Args:
+            size (int): Bytes in the segment
+
+        Returns:
+            int: Number of the segment
+        """
+        self._sent_bytes += size
+        self._ends.append(self._sent_bytes)
+        return self.sent_total - 1
+
+    def process_ack(self, acked_bytes):
+        """Acknowledge every segment that ends at or below a cumulative byte count"""
+        self._acked_bytes = acked_bytes
+        acked = []
+        while self._ends and self._ends[0] <= acked_bytes:
+            self._ends.popleft()
+            acked.append(self.acked_total)
+            self.acked_total += 1
+        return acked
+
+    def is_duplicate_ack(self, acked_bytes):
+        return bool(self._ends) and acked_bytes == self._acked_bytes
+
+    def retransmit_oldest(self):
+        return None
+
+    def handle_timeout(self):
+        return []
+
+
+class _StreamTransport(asyncio.Transport):
+    """
+    asyncio transport over one connection of the TCP state machine
+
+    Written data is buffered and sent as far as the smaller of the congestion
+    window and the peer's receive window allows; the rest goes out as ACKs
+    arrive. The congestion window is a TCPConnection's, fed through a
+    _SegmentCounter, so duplicate ACKs and recovery behave as on any other
+    connection. The protocol is paused above the write buffer's high
+    water mark, which is what makes StreamWriter.drain() wait. Pausing
+    reading closes our receive window so the peer stops sending.
+    """
+
+    def __init__(self, stack, tcb, protocol, loop, owner=None, server=None):
+        """
+        Initialize the transport and take over the connection's callbacks
+
+        Args:
+            stack (TransportLayer): Transport layer owning the connection
+            tcb (TCB): Established connection
+            protocol (asyncio.Protocol): Protocol receiving the data
+            loop (asyncio.AbstractEventLoop): Event loop
+            owner (str, optional): PortManager owner of an ephemeral local port,
+                released when the connection is gone
+            server (Server, optional): Server that accepted the connection
+        """
+        super().__init__({"peername": (tcb.remote_ip, tcb.remote_port), "sockname": (tcb.local_ip, tcb.local_port)})
+        self._stack = stack
+        self._tcb = tcb
+        self._protocol = protocol
+        self._loop = loop
+        self._owner = owner
+        self._server = server
+        self._closing = False
+        self._lost = False
+        self._paused = None  # Payloads held back while reading is paused
+        self._buffer = bytearray()  # Written but not yet sent
+        self._fin_pending = False  # Send a FIN once the buffer is empty
+        self._segments = _SegmentCounter(stack.scheduler, DEFAULT_WINDOW // DEFAULT_MSS)
+        self._connection = TCPConnection(tcb.local_port, tcb.remote_port, tcb.remote_ip, owner, self._segments)
+        self._acked_bytes = 0
+        self._peer_window = tcb.snd_wnd
+        self._high_water = _WRITE_HIGH_WATER
+        self._low_water = _WRITE_HIGH_WATER // 4
+        self._writing_paused = False
+        tcb.on_data = self._on_data
+        tcb.on_state = self._on_state
+        tcb.on_ack = self._on_ack
+
+    def get_protocol(self):
+        return self._protocol
+
+    def set_protocol(self, protocol):
+        self._protocol = protocol
+
+    def is_closing(self):
+        return self._closing
+
+    def is_reading(self):
+        return self._paused is None and not self._closing
+
+    def pause_reading(self):
+        if self._paused is None:
+            self._paused = []
+            self._stack.tcp.set_receive_window(self._tcb, 0)
+
+    def resume_reading(self):
+        if self._paused is None:
+            return
+        paused, self._paused = self._paused, None
+        for payload in paused:
+            self._protocol.data_received(payload)
+        if self._paused is None:
+            self._stack.tcp.set_receive_window(self._tcb, DEFAULT_WINDOW)
+
+    def get_write_buffer_size(self):
+        return len(self._buffer)
+
+    def get_write_buffer_limits(self):
+        return self._low_water, self._high_water
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        if high is None:
+            high = _WRITE_HIGH_WATER if low is None else 4 * low
+        if low is None:
+            low = high // 4
+        if not high >= low >= 0:
+            raise ValueError(f"high ({high!r}) must be >= low ({low!r}) must be >= 0")
+        self._high_water, self._low_water = high, low
+        self._update_writing()
+
+    def write(self, data):
+        if self._closing or self._fin_pending:
+            return
+        if data:
+            self._buffer += data
+            self._push()
+            self._update_writing()
+
+    def can_write_eof(self):
+        return True
+
+    def write_eof(self):
+        """Send a FIN after the buffered data but keep receiving (TCP half-close)"""
+        if not self._closing and not self._fin_pending:
+            self._fin_pending = True
+            self._push()
+
+    def close(self):
+        """Send the buffered data, then a FIN"""
+        if self._closing:
+            return
+        self._closing = True
+        if self._tcb.state in _OPEN_STATES and not self._fin_pending:
+            self._fin_pending = True
+            self._push()
+        if not self._fin_pending:
+            self._loop.call_soon(self._connection_lost, None)
+
+    def abort(self):
+        if self._lost:
+            return
+        self._closing = True
+        self._buffer.clear()
+        self._fin_pending = False
+        self._stack.tcp.abort(self._tcb)
+        self._loop.call_soon(self._connection_lost, None)
+
+    def _push(self):
+        """Send buffered data within the congestion and receive windows, then a pending FIN"""
+        tcb = self._tcb
+        if tcb.state not in _SENDING_STATES:
+            return
+        limit = min(int(self._connection.congestion.window() * DEFAULT_MSS), tcb.snd_wnd)
+        in_flight = (tcb.snd_nxt - tcb.snd_una) % SEQ_MODULUS
+        buffer = self._buffer
+        while buffer and in_flight < limit:
+            size = min(DEFAULT_MSS, limit - in_flight, len(buffer))
+            self._stack.tcp.send(tcb, bytes(buffer[:size]))
+            self._connection.record_send(self._segments.sent(size))
+            del buffer[:size]
+            in_flight += size
+        if self._fin_pending and not buffer:
+            self._fin_pending = False
+            self._stack.tcp.close(tcb)
+            if self._closing:
+                self._loop.call_soon(self._connection_lost, None)
+
+    def _update_writing(self):
+        """Pause or resume the protocol's writing around the buffer limits"""
+        size = len(self._buffer)
+        if not self._writing_paused and size > self._high_water:
+            self._writing_paused = True
+            self._protocol.pause_writing()
+        elif self._writing_paused and size <= self._low_water:
+            self._writing_paused = False
+            self._protocol.resume_writing()
+
+    def _on_ack(self, tcb, acked):
+        if acked or tcb.snd_wnd == self._peer_window:  # A bare window update is no duplicate ACK
+            self._acked_bytes += acked
+            self._connection.process_ack(self._acked_bytes)
+        self._peer_window = tcb.snd_wnd
+        self._push()
+        self._update_writing()
+
+    def _on_data(self, tcb, payload):
+        if self._closing:
+            return
+        if self._paused is not None:
+            self._paused.append(payload)
+        else:
+            self._protocol.data_received(payload)
+
+    def _on_state(self, tcb, old_state):
+        state = tcb.state
+        if (old_state, state) in _PEER_FIN and not self._closing:
+            if not self._protocol.eof_received():
+                self.close()
+        if state == ConnectionState.TIME_WAIT:
+            self._release(self._stack.scheduler.now + 2 * self._stack.tcp.msl)
+        elif state == ConnectionState.CLOSED:
+            self._release()
+            self._buffer.clear()
+            if self._fin_pending:
+                self._fin_pending = False
+                if self._closing:
+                    self._loop.call_soon(self._connection_lost, None)
+            if not self._closing and old_state not in (ConnectionState.LAST_ACK, ConnectionState.TIME_WAIT):
+                self._closing = True
+                self._loop.call_soon(self._connection_lost, ConnectionResetError("Connection reset by peer"))
+            self._update_writing()
+
+    def _connection_lost(self, exc):
+        if self._lost:
+            return
+        self._lost = True
+        self._protocol.connection_lost(exc)
+        if self._server is not None:
+            self._server._detach()
+
+    def _release(self, hold_until=None):
+        """Give an ephemeral local port back once the connection no longer needs it"""
+        if self._owner is None:
+            return
+        port_manager, tcb = self._stack.port_manager, self._tcb
+        if hold_until is not None:
+            port_manager.hold_port(tcb.local_port, hold_until, tcb.local_ip)
+        port_manager.deallocate_port(tcb.local_port, self._owner, tcb.local_ip)
+        self._owner = None
+
+
+async def create_connection(protocol_factory, host, port, local_addr=None, stack=None):
+    """
+    Open a TCP connection, like loop.create_connection()
+
+    Args:
+        protocol_factory (callable): Returns the asyncio.Protocol for the connection
+        host (str): Remote IP address
+        port (int): Remote port
+        local_addr (tuple, optional): (ip, port) to bind; port 0 takes an ephemeral port
+        stack (TransportLayer, optional): Transport layer (default: the shared one)
+
+    Returns:
+        tuple: (transport, protocol)
+
+    Raises:
+        ConnectionRefusedError: If the remote port is not listening
+        TimeoutError: If the handshake gives up after its retransmissions
+    """
+    loop = asyncio.get_running_loop()
+    stack = stack or get_transport_layer()
+    local_ip, local_port = local_addr or (WILDCARD_IP, 0)
+    local_port, owner = _allocate_port(stack, local_ip, local_port)
+    connected = loop.create_future()
+
+    def on_handshake(tcb, old_state):
+        if tcb.state == ConnectionState.ESTABLISHED and not connected.done():
+            # Take over the connection at once: the peer may send data right away
+            protocol = protocol_factory()
+            transport = _StreamTransport(stack, tcb, protocol, loop, owner)
+            protocol.connection_made(transport)
+            connected.set_result((transport, protocol))
+        elif tcb.state == ConnectionState.CLOSED:
+            if owner is not None:
+                stack.port_manager.deallocate_port(local_port, owner, local_ip)
+            if connected.done():
+                return
+            if old_state == ConnectionState.SYN_SENT and tcb.retries >= stack.tcp.max_retries:
+                connected.set_exception(TimeoutError(f"Connection to {host}:{port} timed out"))
+            else:
+                connected.set_exception(ConnectionRefusedError(errno.ECONNREFUSED, f"Connection to {host}:{port} refused"))
+
+    tcb = stack.tcp.connect(local_ip, local_port, host, port, on_state=on_handshake)
+    if tcb is None:
+        if owner is not None:
+            stack.port_manager.deallocate_port(local_port, owner, local_ip)
+        raise OSError(errno.EADDRINUSE, f"{local_ip}:{local_port} → {host}:{port} is in use")
+    try:
+        return await connected
+    except asyncio.CancelledError:
+        if tcb.state in (ConnectionState.SYN_SENT, ConnectionState.SYN_RECEIVED):
+            stack.tcp.abort(tcb)
+        elif connected.done() and not connected.cancelled() and connected.exception() is None:
+            connected.result()[0].abort()
+        raise
+
+
+class Server(asyncio.AbstractServer):
+    """A listening TCP socket, like the object returned by loop.create_server()"""
+
+    def __init__(self, stack, host, port, protocol_factory, loop):
+        self._stack = stack
+        self._host = host
+        self._port = port
+        self._protocol_factory = protocol_factory
+        self._loop = loop
+        self._serving = False
+        self._closed = loop.create_future()
+        self._waiters = []
+        self.active_connections = 0
+        self.connections_accepted = 0
+
+    @property
+    def sockets(self):
+        """Listening addresses as (ip, port) tuples"""
+        return [(self._host, self._port)] if self._serving else []
+
+    def _accept(self, tcb):
+        self.connections_accepted += 1
+        self.active_connections += 1
+        protocol = self._protocol_factory()
+        transport = _StreamTransport(self._stack, tcb, protocol, self._loop, server=self)
+        protocol.connection_made(transport)
+
+    def _detach(self):
+        """Account for an accepted connection that is gone"""
+        self.active_connections -= 1
+        if self.active_connections == 0 and not self._serving:
+            self._wake_waiters()
+
+    def _wake_waiters(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def get_loop(self):
+        return self._loop
+
+    def is_serving(self):
+        return self._serving
+
+    async def start_serving(self):
+        if not self._serving:
+            self._serving = True
+            self._stack.tcp.listen(self._host, self._port, self._accept)
+
+    async def serve_forever(self):
+        await self.start_serving()
+        await asyncio.shield(self._closed)
+
+    def close(self):
+        """Stop listening; accepted connections stay open"""
+        if self._serving:
+            self._serving = False
+            self._stack.tcp.unlisten(self._host, self._port)
+        if not self._closed.done():
+            self._closed.set_result(None)
+        if self.active_connections == 0:
+            self._wake_waiters()
+
+    async def wait_closed(self):
+        """Wait until the server is closed and every accepted connection is gone"""
+        await asyncio.shield(self._closed)
+        if self.active_connections:
+            waiter = self._loop.create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+
+async def create_server(protocol_factory, host=WILDCARD_IP, port=0, stack=None, start_serving=True):
+    """
+    Listen for TCP connections, like loop.create_server()
+
+    Args:
+        protocol_factory (callable): Returns the asyncio.Protocol for each accepted connection
+        host (str): Local IP address, or WILDCARD_IP for every address
+        port (int): Local port
+        stack (TransportLayer, optional): Transport layer (default: the shared one)
+        start_serving (bool): Start listening at once
+
+    Returns:
+        Server: The listening server
+    """
+    loop = asyncio.get_running_loop()
+    stack = stack or get_transport_layer()
+    if (host, port) in stack.tcp.listeners:
+        raise OSError(errno.EADDRINUSE, f"{host}:{port} is already listening")
+    server = Server(stack, host, port, protocol_factory, loop)
+    if start_serving:
+        await server.start_serving()
+    _log.info("[SOCKET] ▶ Serving on {}:{}", host, port)
+    return server
+
+
+async def open_connection(host, port, limit=2 ** 16, **kwargs):
+    """
+    Open a TCP connection as a stream pair, like asyncio.open_connection()
+
+    Args:
+        host (str): Remote IP address
+        port (int): Remote port
+        limit (int): Buffer limit of the StreamReader
+        **kwargs: Passed to create_connection() (local_addr, stack)
+
+    Returns:
+        tuple: (asyncio.StreamReader, asyncio.StreamWriter)
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit, loop=loop)
+    protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+    transport, _ = await create_connection(lambda: protocol, host, port, **kwargs)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def start_server(client_connected_cb, host=WILDCARD_IP, port=0, limit=2 ** 16, **kwargs):
+    """
+    Serve TCP connections as stream pairs, like asyncio.start_server()
+
+    Args:
+        client_connected_cb (callable): Called (or awaited) as cb(reader, writer) for each connection
+        host (str): Local IP address, or WILDCARD_IP for every address
+        port (int): Local port
+        limit (int): Buffer limit of each StreamReader
+        **kwargs: Passed to create_server() (stack, start_serving)
+
+    Returns:
+        Server: The listening server
+    """
+    loop = asyncio.get_running_loop()
+
+    def factory():
+        reader = asyncio.StreamReader(limit=limit, loop=loop)
+        return asyncio.StreamReaderProtocol(reader, client_connected_cb, loop=loop)
+
+    return await create_server(factory, host, port, **kwargs)
+
+
+class _DatagramTransport(asyncio.DatagramTransport):
+    """asyncio transport over a UDP socket of a TransportLayer"""
+
+    def __init__(self, stack, socket, protocol, loop, remote_addr=None, owner=None):
+        """
+        Initialize the transport and take over the socket's arriving datagrams
+
+        Args:
+            stack (TransportLayer): Transport layer the socket is bound on
+            socket (UDPSocket): Bound socket
+            protocol (asyncio.DatagramProtocol): Protocol receiving the datagrams
+            loop (asyncio.AbstractEventLoop): Event loop
+            remote_addr (tuple, optional): (ip, port) of the only peer to talk to
+            owner (str, optional): PortManager owner of an ephemeral local port
+        """
+        super().__init__({"sockname": (socket.local_ip, socket.local_port), "peername": remote_addr})
+        self._stack = stack
+        self._socket = socket
+        self._protocol = protocol
+        self._loop = loop
+        self._remote_addr = remote_addr
+        self._owner = owner
+        self._closing = False
+        socket.on_datagram = self._on_datagram
+
+    def get_protocol(self):
+        return self._protocol
+
+    def set_protocol(self, protocol):
+        self._protocol = protocol
+
+    def is_closing(self):
+        return self._closing
+
+    def get_write_buffer_size(self):
+        return 0  # Datagrams are never queued
+
+    def sendto(self, data, addr=None):
+        """
+        Send a datagram; it arrives after the transport layer's one-way delay
+
+        Args:
+            data (bytes): Payload
+            addr (tuple, optional): (ip, port) destination (default: the connected remote address)
+        """
+        if self._closing:
+            return
+        addr = addr or self._remote_addr
+        if addr is None:
+            raise ValueError("No destination address for an unconnected datagram endpoint")
+        self._stack.send_udp_datagram(self._socket, bytes(data), *addr)
+
+    def close(self):
+        if self._closing:
+            return
+        self._closing = True
+        socket = self._socket
+        self._stack.close_udp_socket(socket)
+        if self._owner is not None:
+            self._stack.port_manager.deallocate_port(socket.local_port, self._owner, socket.local_ip)
+        self._loop.call_soon(self._protocol.connection_lost, None)
+
+    def abort(self):
+        self.close()
+
+    def _on_datagram(self, data, source):
+        if self._remote_addr is not None and self._remote_addr != source:
+            return  # Connected endpoints only accept datagrams from their peer
+        if isinstance(data, str):
+            data = data.encode("utf-8")  # Sent by a process through send_udp_data()
+        self._protocol.datagram_received(data, source)
+
+
+async def create_datagram_endpoint(protocol_factory, local_addr=None, remote_addr=None, stack=None):
+    """
+    Bind a UDP endpoint, like loop.create_datagram_endpoint()
+
+    The endpoint is an ordinary UDP socket of the transport layer, so it
+    exchanges datagrams with processes using send_udp_data() as well as with
+    other endpoints.
+
+    Args:
+        protocol_factory (callable): Returns the asyncio.DatagramProtocol for the endpoint
+        local_addr (tuple, optional): (ip, port) to bind; port 0 takes an ephemeral port
+        remote_addr (tuple, optional): (ip, port) of the only peer to talk to
+        stack (TransportLayer, optional): Transport layer (default: the shared one)
+
+    Returns:
+        tuple: (transport, protocol)
+    """
+    loop = asyncio.get_running_loop()
+    stack = stack or get_transport_layer()
+    ip, port = local_addr or (WILDCARD_IP, 0)
+    if port and (ip, port) in stack.udp_sockets:
+        raise OSError(errno.EADDRINUSE, f"{ip}:{port} is already bound")
+    port, owner = _allocate_port(stack, ip, port)
+    socket = stack.bind_udp_socket(owner or f"socket-{next(_socket_ids)}", ip, port)
+    if socket is None:
+        if owner is not None:
+            stack.port_manager.deallocate_port(port, owner, ip)
+        raise OSError(errno.EADDRINUSE, f"{ip}:{port} is already bound")
+    protocol = protocol_factory()
+    transport = _DatagramTransport(stack, socket, protocol, loop, tuple(remote_addr) if remote_addr else None, owner)
+    protocol.connection_made(transport)
+    return transport, protocol
+
+
+async def _echo_benchmark(clients, messages, server_ip, port):
+    """Echo server plus many concurrent clients; returns (replies, sim seconds)"""
+    async def echo(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            writer.write(line)
+        writer.close()
+
+    async def client(index):
+        reader, writer = await open_connection(server_ip, port, local_addr=(f"10.1.{index // 250}.{index % 250 + 1}", 0))
+        replies = 0
+        for n in range(messages):
+            writer.write(f"client {index} message {n}\n".encode())
+            if await reader.readline():
+                replies += 1
+        writer.close()
+        await writer.wait_closed()
+        return replies
+
+    loop = asyncio.get_running_loop()
+    server = await start_server(echo, server_ip, port)
+    start = loop.time()
+    replies = await asyncio.gather(*(client(i) for i in range(clients)))
+    server.close()
+    await server.wait_closed()
+    return sum(replies), loop.time() - start
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run echo clients as coroutines against a simulated server")
+    parser.add_argument("--clients", type=int, default=1000, help="Concurrent clients (default: 1000)")
+    parser.add_argument("--messages", type=int, default=5, help="Messages per client (default: 5)")
+    parser.add_argument("--delay", type=float, default=10.0, help="One-way delay in ms (default: 10)")
+    args = parser.parse_args(argv)
+
+    sim_logging.disable_output()
+    stack = TransportLayer()
+    stack.tcp.delay = args.delay / 1000
+    set_transport_layer(stack)
+    replies, elapsed = run(_echo_benchmark(args.clients, args.messages, "10.0.0.1", 7), stack)
+    print(f"[SOCKET] ✓ {replies}/{args.clients * args.messages} echoes from {args.clients} clients "
+          f"in {elapsed:.3f} simulated seconds ({stack.tcp.segments_sent} segments)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
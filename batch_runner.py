@@ -0,0 +1,280 @@
+"""
+Headless batch runner for the Network Simulator
+Runs scenario files (topology, traffic, duration, seed) without any input() prompts
+and writes the results as JSON, so scenarios can be run back to back in CI
+
+Example scenario file:
+    {
+        "name": "two-routers",
+        "seed": 42,
+        "duration": 60.0,
+        "topology": {"routers": [{"switches": [{"hubs": [2]}]}, {"direct_devices": 2}]},
+        "traffic": [
+            {"source": "A", "destination": "C", "message": "Hello there", "start": 0.0,
+             "interval": 5.0, "count": 3}
+        ],
+        "settings": {"window_size": 4, "error_probability": 0.3}
+    }
+
+Instead of error_probability, "settings" may give every end device a
+bit-error channel: {"channel": {"model": "gilbert", "p": 0.001, "r": 0.1}}
+takes the model and its options as in channel_model.make_channel().
+
+Usage:
+    python batch_runner.py scenario1.json [scenario2.json ...] -o results.json [--quiet]
+        [--trace trace.log] [--log-level DEBUG|INFO|WARNING|ERROR]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import sim_logging
+from channel_model import make_channel
+from network_simulator import NetworkSimulator
+from event_scheduler import EventScheduler, get_scheduler, set_scheduler
+from address_registry import AddressRegistry, get_address_registry, set_address_registry
+from rng_service import RNGService, get_rng_service, set_rng_service
+
+
+def load_scenario(path):
+    """
+    Load a scenario file
+
+    Args:
+        path (str): Path to a JSON scenario file
+
+    Returns:
+        dict: Scenario specification
+    """
+    with open(path) as f:
+        scenario = json.load(f)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+
+def expand_traffic(traffic):
+    """
+    Expand traffic entries into individual transfers ordered by start time
+
+    Args:
+        traffic (list): Traffic entries with source, destination, message and
+            optional start, interval and count
+
+    Returns:
+        list: (start_time, flow_index, entry) tuples sorted by start time
+    """
+    transfers = []
+    for index, entry in enumerate(traffic):
+        start = float(entry.get("start", 0.0))
+        interval = float(entry.get("interval", 0.0))
+        for n in range(int(entry.get("count", 1))):
+            transfers.append((start + n * interval, index, entry))
+    transfers.sort(key=lambda transfer: (transfer[0], transfer[1]))
+    return transfers
+
+
+# Scenario "settings" applied to the simulator, and to every end device
+SIMULATOR_SETTINGS = ("window_size", "timeout", "max_retries", "max_nak_rounds")
+DEVICE_SETTINGS = ("error_probability",)
+
+
+def apply_settings(simulator, settings):
+    """
+    Apply scenario settings to a simulator and its devices
+
+    Args:
+        simulator (NetworkSimulator): Simulator with its topology built
+        settings (dict): Setting name -> value
+
+    Returns:
+        list: Names of unknown settings
+    """
+    unknown = []
+    for name, value in settings.items():
+        if name in SIMULATOR_SETTINGS:
+            setattr(simulator, name, value)
+        elif name in DEVICE_SETTINGS:
+            for device in simulator.devices:
+                setattr(device, name, value)
+        elif name == "channel":
+            options = dict(value)
+            model = options.pop("model", "ber")
+            for device in simulator.devices:
+                # Named per device, so every receiver draws from its own stream
+                device.channel = make_channel(model, name=f"{model}/{device.device_name}", **options)
+        else:
+            unknown.append(name)
+    return unknown
+
+
+def run_scenario(scenario):
+    """
+    Run one scenario on a fresh simulation clock
+
+    Transfers run one after another in start-time order; a transfer whose
+    start time has not been reached yet waits for the clock to get there.
+    With a duration, transfers starting later are skipped and a transfer still
+    running at that time stops sending. The shared RNG service, scheduler and
+    address registry are put back afterwards.
+
+    Args:
+        scenario (dict): Scenario specification
+
+    Returns:
+        dict: Machine-readable results for the scenario
+    """
+    saved = get_rng_service(), get_scheduler(), get_address_registry()
+    try:
+        return _run_scenario(scenario)
+    finally:
+        set_rng_service(saved[0])
+        set_scheduler(saved[1])
+        set_address_registry(saved[2])
+
+
+def _run_scenario(scenario):
+    """Run one scenario with the shared services replaced (see run_scenario())"""
+    seed = scenario.get("seed")
+    duration = scenario.get("duration")
+    rng_service = RNGService(seed)
+    set_rng_service(rng_service)  # Every component draws from its own stream of this seed
+
+    scheduler = EventScheduler()
+    set_scheduler(scheduler)  # Components pick up the scheduler when they are created
+    set_address_registry(AddressRegistry())  # Fresh address indexes for the scenario's devices
+    simulator = NetworkSimulator()
+
+    results = {
+        "scenario": scenario.get("name"),
+        "seed": rng_service.seed,
+        "duration": duration,
+        "devices": 0,
+        "transfers": [],
+        "errors": [],
+    }
+
+    if not simulator.build_topology_from_spec(scenario.get("topology", {})):
+        results["errors"].append("invalid topology")
+        return results
+    results["devices"] = len(simulator.devices)
+    for name in apply_settings(simulator, scenario.get("settings", {})):
+        results["errors"].append(f"unknown setting: {name}")
+
+    for start_time, flow_index, entry in expand_traffic(scenario.get("traffic", [])):
+        if duration is not None and start_time > duration:
+            break
+        if scheduler.now < start_time:
+            scheduler.run(until=start_time)
+        if duration is not None and scheduler.now > duration:
+            break
+
+        source = simulator.find_device(entry.get("source"))
+        destination = simulator.find_device(entry.get("destination"))
+        if source is None or destination is None:
+            results["errors"].append(
+                f"flow {flow_index}: unknown device {entry.get('source')} -> {entry.get('destination')}")
+            continue
+
+        simulator.set_sender_and_receiver(source, destination)
+        message = entry.get("message") or f"Hello from {source.get_device_name()} to {destination.get_device_name()}"
+        stats = simulator.transfer_data(message, deadline=duration)
+        stats.update({
+            "flow": flow_index,
+            "source": source.get_device_name(),
+            "destination": destination.get_device_name(),
+            "scheduled_time": start_time,
+        })
+        results["transfers"].append(stats)
+
+    transfers = results["transfers"]
+    results["summary"] = {
+        "transfers": len(transfers),
+        "delivered": sum(1 for t in transfers if t["delivered"]),
+        "frames": sum(t["frames"] for t in transfers),
+        "transmissions": sum(t["transmissions"] for t in transfers),
+        "acks": sum(t["acks"] for t in transfers),
+        "naks": sum(t["naks"] for t in transfers),
+        "sim_time": scheduler.now,
+        "events_processed": scheduler.events_processed,
+    }
+    return results
+
+
+def run_scenarios(paths, quiet=False):
+    """
+    Run several scenario files back to back
+
+    Args:
+        paths (list): Paths to JSON scenario files
+        quiet (bool): Suppress the simulator's console output while the
+            scenarios run (it is restored afterwards)
+
+    Returns:
+        list: Results of each scenario, in order
+    """
+    all_results = []
+    if quiet:
+        console = sim_logging.set_console_output(False)
+    try:
+        for path in paths:
+            scenario = load_scenario(path)
+            if quiet:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    results = run_scenario(scenario)
+            else:
+                results = run_scenario(scenario)
+            results["file"] = path
+            all_results.append(results)
+    finally:
+        if quiet:
+            sim_logging.set_console_output(*console)
+    return all_results
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run Network Simulator scenarios without user interaction")
+    parser.add_argument("scenarios", nargs="+", help="JSON scenario files")
+    parser.add_argument("-o", "--output", help="Results file (default: print to stdout)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress simulator output")
+    parser.add_argument("--trace", help="Write simulator log messages to this file")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Minimum level of simulator log messages (default: INFO)")
+    args = parser.parse_args(argv)
+
+    level = getattr(sim_logging, args.log_level)
+    sink = None
+    if args.trace:
+        sink = sim_logging.add_file_sink(args.trace, level=level)
+        sim_logging.set_level(level)
+    elif args.quiet:
+        sim_logging.disable_output()  # Nothing to write, so skip formatting altogether
+    else:
+        sim_logging.set_level(level)
+
+    try:
+        all_results = run_scenarios(args.scenarios, quiet=args.quiet)
+    finally:
+        if sink is not None:
+            sim_logging.remove_sink(sink)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(all_results, f, indent=2)
+        for results in all_results:
+            summary = results.get("summary", {})
+            print(f"[BATCH] ✓ {results['scenario']}: {summary.get('delivered', 0)}/"
+                  f"{summary.get('transfers', 0)} transfers delivered")
+        print(f"[BATCH] ✓ Results written to {args.output}")
+    else:
+        json.dump(all_results, sys.stdout, indent=2)
+        print()
+
+    failed = any(results["errors"] for results in all_results)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+TCP bottleneck experiments for Network Simulator
+Bulk transfers over the transport layer's TCPConnection that run on the
+simulation clock through a Router output queue, to compare the congestion
+control algorithms of tcp_congestion.
+
+Run this module to compare algorithms sharing one bottleneck:
+    python bottleneck_bench.py --flows reno cubic --queue red --duration 30
+"""
+
+import argparse
+import sys
+import sim_logging
+from event_scheduler import EventScheduler, get_scheduler, set_scheduler
+from link import Link
+from rng_service import RNGService, get_rng_service, set_rng_service
+from router import Router
+from checksum_for_datalink import ChecksumForDataLink
+from tcp_congestion import ALGORITHMS, DEFAULT_MSS
+from tcp_state_machine import ConnectionState
+from transport_layer import TCPConnection
+
+HEADER_BYTES = 40  # TCP/IP headers added to every segment on the wire
+SEQ_SPACE = 2 ** 32  # Sequence numbers as in the frame header
+
+
+class TCPFlow:
+    """
+    Bulk TCP transfer over a TCPConnection, on the simulation clock
+
+    The sender is the transport layer's TCPConnection with Go-Back-N flow
+    control, so windows, fast retransmit and recovery, retransmission
+    timeouts, RTT and delivery-rate samples and pacing are the same as for
+    any other connection. Each segment counts as mss bytes on the wire. The
+    receiver buffers out-of-order segments and sends cumulative ACKs that
+    echo the send time of the segment that triggered them.
+    """
+
+    def __init__(self, name, algorithm, send, ack_delay, total_segments=None, mss=DEFAULT_MSS,
+                 start=0.0, rto=None, window=4096):
+        """
+        Initialize the flow
+
+        Args:
+            name (str): Flow name
+            algorithm (Reno): Congestion control algorithm (or a name for make_congestion_control())
+            send (callable): Called as send(flow, segment, size, deliver) to put a
+                segment on the forward path; the path calls deliver(segment) when it arrives
+            ack_delay (float): One-way delay of the (uncongested) return path
+            total_segments (int, optional): Segments to transfer (default: unlimited)
+            mss (int): Payload bytes per segment
+            start (float): Simulation time the transfer starts
+            rto (RTOEstimator, optional): Timeout estimator
+            window (int): Receive window in segments
+        """
+        self.name = name
+        self.send = send
+        self.ack_delay = ack_delay
+        self.total_segments = total_segments
+        self.mss = mss
+        self.scheduler = get_scheduler()
+        # The handshake is not part of the experiment: the connection starts established
+        self.connection = TCPConnection(0, 0, name, name, "gbn", algorithm if isinstance(algorithm, str) else "reno",
+                                        self._transmit, window_size=window, timeout=1.0, max_retries=15, seq_space=SEQ_SPACE)
+        self.connection.state = ConnectionState.ESTABLISHED
+        self.connection.mss = 1  # One character of data per segment
+        if not isinstance(algorithm, str):
+            self.connection.congestion = algorithm
+        if rto is not None:
+            self.connection.rto = rto
+        self.cc = self.connection.congestion
+        self.rto = self.connection.rto
+        self._queued = 0  # Segments handed to the connection so far
+
+        # Receiver state
+        self.rcv_nxt = 0
+        self._out_of_order = set()
+
+        # Statistics
+        self.started = start
+        self.scheduler.schedule_at(max(start, self.scheduler.now), self._start)
+
+    def flight(self):
+        """Segments sent and not yet acknowledged"""
+        return self.connection.flow_control.outstanding
+
+    def _fill(self):
+        """Keep about a window of segments queued behind the connection; returns the segments it sends now"""
+        connection = self.connection
+        window = connection.flow_control.window_size
+        queued = len(connection.send_queue)
+        if queued > window // 2:
+            return []
+        wanted = window - queued
+        if self.total_segments is not None:
+            wanted = min(wanted, self.total_segments - self._queued)
+        if wanted <= 0:
+            return []
+        self._queued += wanted
+        return connection.send_data("x" * wanted)[1]
+
+    def _start(self):
+        segments = self._fill()
+        if segments:
+            self._transmit(segments)
+
+    def _transmit(self, segments):
+        """Put segments on the path (the connection's on_send)"""
+        now = self.scheduler.now
+        for segment in segments:
+            self.send(self, (segment, now), self.mss + HEADER_BYTES, self._receive)
+
+    def _receive(self, packet):
+        """Receiver: accept a segment and send a cumulative ACK back"""
+        segment, sent_time = packet
+        seq = ChecksumForDataLink.get_sequence_number(segment.split(b"|", 1)[1])
+        if seq == self.rcv_nxt:
+            self.rcv_nxt += 1
+            while self.rcv_nxt in self._out_of_order:
+                self._out_of_order.remove(self.rcv_nxt)
+                self.rcv_nxt += 1
+        elif seq > self.rcv_nxt:
+            self._out_of_order.add(seq)
+        self.scheduler.schedule(self.ack_delay, self._on_ack, (self.rcv_nxt - 1) % SEQ_SPACE, sent_time)
+
+    def _on_ack(self, ack, echoed_time):
+        """Sender: hand a cumulative ACK (last segment received in order) to the connection"""
+        _, segments = self.connection.process_ack(ack, self.scheduler.now - echoed_time)
+        segments.extend(self._fill())
+        if segments:
+            self._transmit(segments)
+
+    def summary(self, now=None):
+        """
+        Get the flow statistics
+
+        Args:
+            now (float, optional): End of the measurement (default: the current time)
+
+        Returns:
+            dict: Goodput, retransmissions, timeouts, RTT and window
+        """
+        now = self.scheduler.now if now is None else now
+        elapsed = now - self.started
+        connection = self.connection
+        statistics = connection.flow_control.get_statistics()
+        return {
+            "flow": self.name,
+            "algorithm": connection.congestion.name,
+            "delivered_segments": self.rcv_nxt,
+            "goodput_mbps": self.rcv_nxt * self.mss * 8 / elapsed / 1e6 if elapsed > 0 else 0.0,
+            "segments_sent": statistics["segments_sent"] + statistics["segments_retransmitted"],
+            "retransmissions": statistics["segments_retransmitted"],
+            "fast_retransmits": connection.fast_retransmits,
+            "timeouts": connection.timeouts,
+            "srtt_ms": connection.rto.srtt * 1000 if connection.rto.srtt is not None else None,
+            "cwnd": connection.congestion.cwnd,
+        }
+
+
+def jain_fairness(values):
+    """
+    Jain's fairness index of some allocations
+
+    Args:
+        values (list): Throughput of each flow
+
+    Returns:
+        float: From 1/n (one flow gets everything) to 1.0 (equal shares)
+    """
+    total = sum(values)
+    squares = sum(value * value for value in values)
+    return total * total / (len(values) * squares) if squares else 1.0
+
+
+def run_bottleneck(algorithms=("reno", "cubic"), bandwidth=10e6, delay=0.02, queue="drop_tail",
+                   queue_options=None, duration=30.0, mss=DEFAULT_MSS, stagger=0.0, seed=1):
+    """
+    Run bulk TCP flows through one Router output queue and measure them
+
+    Each flow sends through the same router interface, whose Link has the
+    bottleneck bandwidth and delay; ACKs come back over an uncongested path
+    with the same delay. The run uses its own clock and random streams and
+    leaves the shared ones as it found them.
+
+    Args:
+        algorithms (list): Congestion control name of each flow
+        bandwidth (float): Bottleneck rate in bits per second
+        delay (float): One-way propagation delay in seconds
+        queue (str): Router queue discipline ("drop_tail", "red", "codel", "drr")
+        queue_options (dict, optional): Queue parameters (default limit: one
+            bandwidth-delay product of packets)
+        duration (float): Simulated seconds to run
+        mss (int): Payload bytes per segment
+        stagger (float): Delay between the starts of consecutive flows
+        seed (int): Seed for the run's random streams
+
+    Returns:
+        dict: Per-flow summaries, total goodput, link utilization, router drops
+            and Jain's fairness index
+    """
+    previous_scheduler, previous_rng = get_scheduler(), get_rng_service()
+    scheduler = EventScheduler()
+    set_scheduler(scheduler)
+    set_rng_service(RNGService(seed))
+    try:
+        size = mss + HEADER_BYTES
+        options = dict(queue_options or {})
+        options.setdefault("limit", max(4, int(bandwidth * 2 * delay / (8 * size))))
+        router = Router(0, "bottleneck")
+        router.set_queue_discipline(queue, **options)
+        interface = "interface bottleneck"
+        link = Link(router, "receiver", bandwidth=bandwidth, delay=delay, mtu=max(size, 1500), name="bottleneck")
+        router.attach_link(interface, link)
+
+        carried = [0]  # Bytes sent over the bottleneck, retransmissions included
+
+        def send(flow, segment, size, deliver):
+            def done(packet, sent):
+                if sent:
+                    carried[0] += size
+                    scheduler.schedule(link.delay, deliver, packet)
+            router.enqueue_packet(interface, segment, size, traffic_class=flow.name, on_done=done)
+
+        flows = [TCPFlow(f"{index}-{name}", name, send, delay, mss=mss, start=index * stagger)
+                 for index, name in enumerate(algorithms)]
+        scheduler.run(until=duration)
+    finally:
+        set_scheduler(previous_scheduler)
+        set_rng_service(previous_rng)
+
+    summaries = [flow.summary(duration) for flow in flows]
+    goodputs = [summary["goodput_mbps"] for summary in summaries]
+    return {
+        "flows": summaries,
+        "total_goodput_mbps": sum(goodputs),
+        "link_utilization": min(1.0, carried[0] * 8 / (bandwidth * duration)),
+        "router_drops": router.packets_dropped,
+        "fairness": jain_fairness(goodputs),
+    }
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run TCP flows through a shared Router bottleneck")
+    parser.add_argument("--flows", nargs="+", default=["reno", "cubic"], choices=sorted(ALGORITHMS),
+                        help="Congestion control of each flow (default: reno cubic)")
+    parser.add_argument("--bandwidth", type=float, default=10.0, help="Bottleneck rate in Mb/s (default: 10)")
+    parser.add_argument("--delay", type=float, default=20.0, help="One-way delay in ms (default: 20)")
+    parser.add_argument("--queue", default="drop_tail", help="Router queue discipline (default: drop_tail)")
+    parser.add_argument("--limit", type=int, help="Queue limit in packets (default: one BDP)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Simulated seconds (default: 30)")
+    parser.add_argument("--stagger", type=float, default=0.0, help="Seconds between flow starts")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args(argv)
+
+    sim_logging.disable_output()
+    result = run_bottleneck(args.flows, args.bandwidth * 1e6, args.delay / 1000, args.queue,
+                            {"limit": args.limit} if args.limit else None, args.duration,
+                            stagger=args.stagger, seed=args.seed)
+    for flow in result["flows"]:
+        print(f"[TCP] ▶ {flow['flow']:<12} {flow['goodput_mbps']:6.2f} Mb/s, {flow['retransmissions']} retransmissions "
+              f"({flow['fast_retransmits']} fast, {flow['timeouts']} timeouts), srtt {flow['srtt_ms'] or 0:.1f} ms")
+    print(f"[TCP] ✓ Total {result['total_goodput_mbps']:.2f} Mb/s, utilization {result['link_utilization']:.1%}, "
+          f"{result['router_drops']} drops, fairness {result['fairness']:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,26 @@ Checksum for Data Link implementation for Network Simulator
 Replaces CRC with a simpler checksum implementation
 """
 
+from frame_format import Frame, build_frame
+from internet_checksum import internet_checksum, update_checksum_bytes
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("DATA LINK")
+
 class ChecksumForDataLink:
-    def __init__(self):
-        """Initialize Checksum for Data Link"""
+    def __init__(self, rng=None, channel=None):
+        """
+        Initialize Checksum for Data Link
+        
+        Args:
+            rng (random.Random, optional): Stream for simulated bit errors
+                (default: the shared "datalink/checksum" stream)
+            channel (BitErrorChannel, optional): Channel model that corrupts binary
+                frames instead of the single-bit flip (see channel_model)
+        """
+        self.rng = rng or get_rng("datalink/checksum")
+        self.channel = channel
         self.original_text = ""
         self.checksum_value = ""
         self.sent_copy = ""
@@ -25,12 +42,8 @@ class ChecksumForDataLink:
         Returns:
             str: Binary representation
         """
-        binary = ""
-        for char in text:
-            # Convert each character to its ASCII value, then to binary
-            # Remove '0b' prefix and pad to 8 bits
-            binary += format(ord(char), '08b')
-        return binary
+        # Convert each character to its ASCII value, then to 8-bit binary
+        return ''.join(format(ord(char), '08b') for char in text)
     
     def binary_to_text(self, binary):
         """
@@ -42,17 +55,12 @@ class ChecksumForDataLink:
         Returns:
             str: Text representation
         """
-        text = ""
         # Process 8 bits at a time
-        for i in range(0, len(binary), 8):
-            if i + 8 <= len(binary):
-                byte = binary[i:i+8]
-                text += chr(int(byte, 2))
-        return text
+        return ''.join(chr(int(binary[i:i+8], 2)) for i in range(0, len(binary) - 7, 8))
     
     def calculate_checksum(self, text):
         """
-        Calculate a simple checksum for the given text
+        Calculate the Internet checksum (RFC 1071) for the given text
         
         Args:
             text (str): Text to calculate checksum for
@@ -60,43 +68,58 @@ class ChecksumForDataLink:
         Returns:
             str: Binary checksum (16 bits)
         """
-        # Convert to binary
-        binary = self.text_to_binary(text)
-        
-        # Pad to multiple of 16 bits
-        while len(binary) % 16 != 0:
-            binary += '0'
-        
-        # Calculate one's complement sum
-        checksum = 0
-        for i in range(0, len(binary), 16):
-            if i + 16 <= len(binary):
-                chunk = binary[i:i+16]
-                chunk_value = int(chunk, 2)
-                checksum = (checksum + chunk_value) & 0xFFFF  # Keep it 16 bits
-        
-        # One's complement of the sum
-        checksum = checksum ^ 0xFFFF
+        return format(internet_checksum(text), '016b')
+    
+    def update_checksum(self, checksum, offset, old_text, new_text):
+        """
+        Update a checksum after part of the text changed (RFC 1624), without rescanning the text
         
-        # Convert to binary (16 bits)
-        return format(checksum, '016b')
+        Args:
+            checksum (str): Current binary checksum (16 bits)
+            offset (int): Byte offset of the changed part
+            old_text (str): Old contents of the changed part
+            new_text (str): New contents (same encoded length)
+            
+        Returns:
+            str: Updated binary checksum (16 bits)
+        """
+        updated = update_checksum_bytes(int(checksum, 2), offset,
+                                        old_text.encode('utf-8'), new_text.encode('utf-8'))
+        return format(updated, '016b')
     
     def create_frame(self, data, seq_num):
         """
-        Create a frame with sequence number and checksum
+        Create a binary frame with sequence number and checksum
+        
+        See frame_format for the layout; the payload may contain any bytes,
+        including '|'.
         
         Args:
-            data (str): Data to send
+            data (str or bytes): Data to send
             seq_num (int): Sequence number
             
         Returns:
-            str: Framed data with checksum
+            bytes: Frame with header and checksum
         """
-        # Format: SEQ|data|CHECKSUM where SEQ is a single digit (0-9)
-        frame_data = f"{seq_num % 10}|{data}"
-        checksum = self.calculate_checksum(frame_data)
-        framed_data = f"{frame_data}|CHECKSUM|{checksum}"
-        return framed_data
+        return build_frame(data, seq_num)
+    
+    @staticmethod
+    def get_sequence_number(frame):
+        """
+        Read the sequence number of a frame without verifying it
+        
+        Args:
+            frame (bytes or str): Binary frame or legacy "SEQ|data|CHECKSUM|value" string
+            
+        Returns:
+            int: Sequence number, or -1 if it cannot be read
+        """
+        try:
+            if isinstance(frame, str):
+                return int(frame.split("|", 1)[0])
+            return Frame(frame).seq_num
+        except ValueError:
+            return -1
     
     def sender_code(self, text, seq_num=None):
         """
@@ -127,13 +150,16 @@ class ChecksumForDataLink:
             can_send = seq_num >= self.window_base or seq_num < window_end
         
         if not can_send:
-            print(f"\n[DATA LINK] ⚠ Cannot send frame {seq_num} - outside window {self.window_base}-{window_end}")
+            _log.warning("\n[DATA LINK] ⚠ Cannot send frame {} - outside window {}-{}", seq_num, self.window_base, window_end)
             return None
         
-        print(f"\n[DATA LINK] ▶ Creating frame {seq_num} with data: {text}")
+        _log.info("\n[DATA LINK] ▶ Creating frame {} with data: {}", seq_num, text)
         
-        # Calculate checksum
-        frame = self.create_frame(text, seq_num)
+        # A retransmission of a buffered frame reuses it instead of recomputing the checksum
+        payload = text.encode('utf-8') if isinstance(text, str) else text
+        frame = self.frame_buffer.get(seq_num)
+        if frame is None or Frame(frame).payload != payload:
+            frame = self.create_frame(payload, seq_num)
         self.sent_copy = frame
         
         # Store the frame in the buffer for possible retransmission
@@ -143,12 +169,9 @@ class ChecksumForDataLink:
         if seq_num == self.sequence_number:
             self.sequence_number = (self.sequence_number + 1) % 10
         
-        # Get the checksum part for logging
-        checksum = frame.split("|CHECKSUM|")[1]
-        
-        print(f"[DATA LINK] ▶ Frame {seq_num}: {text}")
-        print(f"[DATA LINK] ▶ Checksum: {checksum}")
-        print(f"[DATA LINK] ▶ Window: base={self.window_base}, size={self.window_size}, next={self.sequence_number}")
+        _log.info("[DATA LINK] ▶ Frame {}: {}", seq_num, text)
+        _log.info("[DATA LINK] ▶ Checksum: {:016b}", Frame(frame).checksum)
+        _log.info("[DATA LINK] ▶ Window: base={}, size={}, next={}", self.window_base, self.window_size, self.sequence_number)
         
         return frame
     
@@ -157,16 +180,19 @@ class ChecksumForDataLink:
         Verify if a frame's checksum is valid
         
         Args:
-            frame (str): Frame to verify
+            frame (bytes or str): Binary frame, or legacy "SEQ|data|CHECKSUM|value" string
             
         Returns:
             tuple: (is_valid, seq_num, data)
         """
+        if not isinstance(frame, str):
+            return self._verify_binary_frame(frame)
+        
         try:
             # Parse the frame: SEQ|data|CHECKSUM|value
             parts = frame.split("|")
             if len(parts) < 4 or parts[2] != "CHECKSUM":
-                print("[DATA LINK] ⚠ ERROR: Invalid frame format")
+                _log.warning("[DATA LINK] ⚠ ERROR: Invalid frame format")
                 return False, -1, None
             
             seq_num = int(parts[0])
@@ -180,29 +206,61 @@ class ChecksumForDataLink:
             is_valid = (calculated_checksum == received_checksum)
             
             if not is_valid:
-                print(f"[DATA LINK] ❌ CHECKSUM ERROR: Received {received_checksum}, calculated {calculated_checksum}")
-                print(f"[DATA LINK] ❌ Frame {seq_num} is corrupt")
+                _log.error("[DATA LINK] ❌ CHECKSUM ERROR: Received {}, calculated {}", received_checksum, calculated_checksum)
+                _log.error("[DATA LINK] ❌ Frame {} is corrupt", seq_num)
             else:
-                print(f"[DATA LINK] ✓ Checksum verified for frame {seq_num}")
+                _log.info("[DATA LINK] ✓ Checksum verified for frame {}", seq_num)
             
             return is_valid, seq_num, data
             
         except Exception as e:
-            print(f"[DATA LINK] ⚠ ERROR processing frame: {e}")
+            _log.warning("[DATA LINK] ⚠ ERROR processing frame: {}", e)
             return False, -1, None
     
+    def _verify_binary_frame(self, frame):
+        """
+        Verify a binary frame, reading the header in place
+        
+        Args:
+            frame (bytes): Binary frame
+            
+        Returns:
+            tuple: (is_valid, seq_num, data)
+        """
+        try:
+            view = Frame(frame)
+        except (TypeError, ValueError) as e:
+            _log.warning("[DATA LINK] ⚠ ERROR processing frame: {}", e)
+            return False, -1, None
+        
+        if not view.is_well_formed():
+            _log.warning("[DATA LINK] ⚠ ERROR: Invalid frame format")
+            return False, -1, None
+        
+        seq_num = view.seq_num
+        data = view.payload_text()
+        
+        if not view.verify():
+            _log.error("[DATA LINK] ❌ CHECKSUM ERROR: Frame checksum {:016b} does not match its contents", view.checksum)
+            _log.error("[DATA LINK] ❌ Frame {} is corrupt", seq_num)
+            return False, seq_num, data
+        
+        _log.info("[DATA LINK] ✓ Checksum verified for frame {}", seq_num)
+        return True, seq_num, data
+    
     def receiver_code(self, frame, error_probability):
         """
         Process received frame and introduce random bit error based on probability
         
         Args:
-            frame (str): Frame received
+            frame (bytes or str): Frame received
             error_probability (float): Probability for bit flipping (0-1)
             
         Returns:
-            str: Possibly modified frame
+            bytes or str: The same frame, or a corrupted copy of it
         """
-        import random
+        if not isinstance(frame, str):
+            return self._corrupt_binary_frame(frame, error_probability)
         
         # Create a copy of original frame
         modified_frame = frame
@@ -214,12 +272,12 @@ class ChecksumForDataLink:
             checksum_keyword = frame.split("|")[2]
             checksum_part = frame.split("|")[3]
             
-            print(f"\n[DATA LINK] ▶ Received frame: {seq_part}|{data_part}")
-            print(f"[DATA LINK] ▶ Frame checksum: {checksum_part}")
+            _log.info("\n[DATA LINK] ▶ Received frame: {}|{}", seq_part, data_part)
+            _log.info("[DATA LINK] ▶ Frame checksum: {}", checksum_part)
             
             # With a certain probability, introduce an error
-            error_chance = random.random()
-            print(f"[DATA LINK] ▶ Error probability: {error_probability:.2f}, Random value: {error_chance:.2f}")
+            error_chance = self.rng.random()
+            _log.info("[DATA LINK] ▶ Error probability: {:.2f}, Random value: {:.2f}", error_probability, error_chance)
             
             if error_chance < error_probability:
                 # Convert data part to binary for bit flipping
@@ -227,7 +285,7 @@ class ChecksumForDataLink:
                 binary_list = list(binary_data)
                 
                 # Randomly select a bit to flip
-                bit_to_flip = random.randint(0, len(binary_list) - 1)
+                bit_to_flip = self.rng.randint(0, len(binary_list) - 1)
                 
                 # Flip the bit (0->1 or 1->0)
                 original_bit = binary_list[bit_to_flip]
@@ -245,17 +303,85 @@ class ChecksumForDataLink:
                 bit_in_byte = bit_to_flip % 8
                 affected_char = data_part[byte_position:byte_position+1] if byte_position < len(data_part) else "?"
                 
-                print(f"[DATA LINK] ⚠ BIT ERROR: Bit flipped at position {bit_to_flip}")
-                print(f"[DATA LINK] ⚠ Affected byte {byte_position}, bit {bit_in_byte} in character '{affected_char}'")
-                print(f"[DATA LINK] ⚠ Original: {data_part}, Modified: {modified_text}")
+                _log.warning("[DATA LINK] ⚠ BIT ERROR: Bit flipped at position {}", bit_to_flip)
+                _log.warning("[DATA LINK] ⚠ Affected byte {}, bit {} in character '{}'", byte_position, bit_in_byte, affected_char)
+                _log.warning("[DATA LINK] ⚠ Original: {}, Modified: {}", data_part, modified_text)
             else:
-                print(f"[DATA LINK] ✓ No transmission errors introduced")
+                _log.info("[DATA LINK] ✓ No transmission errors introduced")
                 
         except Exception as e:
-            print(f"[DATA LINK] ⚠ ERROR: Frame format incorrect: {e}")
+            _log.warning("[DATA LINK] ⚠ ERROR: Frame format incorrect: {}", e)
             
         return modified_frame
     
+    def _corrupt_binary_frame(self, frame, error_probability):
+        """
+        Possibly flip one payload bit of a binary frame
+        
+        The frame is only copied when a bit is actually flipped, so the sender's
+        buffered copy is never modified.
+        
+        Args:
+            frame (bytes): Binary frame
+            error_probability (float): Probability for bit flipping (0-1)
+            
+        Returns:
+            bytes: The same frame, or a corrupted copy
+        """
+        try:
+            view = Frame(frame)
+            payload_length = view.payload_length
+        except (TypeError, ValueError) as e:
+            _log.warning("[DATA LINK] ⚠ ERROR: Frame format incorrect: {}", e)
+            return frame
+        
+        _log.info("\n[DATA LINK] ▶ Received frame: {}|{}", view.seq_num, view.payload_text())
+        _log.info("[DATA LINK] ▶ Frame checksum: {:016b}", view.checksum)
+        
+        if self.channel is not None:
+            return self._corrupt_with_channel(frame, payload_length)
+        
+        # With a certain probability, introduce an error
+        error_chance = self.rng.random()
+        _log.info("[DATA LINK] ▶ Error probability: {:.2f}, Random value: {:.2f}", error_probability, error_chance)
+        
+        if error_chance >= error_probability or payload_length == 0:
+            _log.info("[DATA LINK] ✓ No transmission errors introduced")
+            return frame
+        
+        bit_to_flip = self.rng.randint(0, payload_length * 8 - 1)
+        byte_position = bit_to_flip // 8
+        bit_in_byte = bit_to_flip % 8
+        
+        corrupted = bytearray(frame)
+        index = len(corrupted) - payload_length + byte_position
+        original_byte = corrupted[index]
+        corrupted[index] ^= 0x80 >> bit_in_byte
+        
+        _log.warning("[DATA LINK] ⚠ BIT ERROR: Bit flipped at position {}", bit_to_flip)
+        _log.warning("[DATA LINK] ⚠ Affected byte {}, bit {} (0x{:02x} -> 0x{:02x})", byte_position, bit_in_byte, original_byte, corrupted[index])
+        return bytes(corrupted)
+    
+    def _corrupt_with_channel(self, frame, payload_length):
+        """
+        Send the payload of a binary frame through the channel model
+        
+        Args:
+            frame (bytes): Binary frame
+            payload_length (int): Payload size in bytes
+            
+        Returns:
+            bytes: The same frame, or a corrupted copy
+        """
+        header = len(frame) - payload_length
+        (payload,), (mask,) = self.channel.apply([frame[header:]])
+        flipped = sum(bin(byte).count("1") for byte in mask)
+        if not flipped:
+            _log.info("[DATA LINK] ✓ No transmission errors introduced")
+            return frame
+        _log.warning("[DATA LINK] ⚠ BIT ERROR: {} bit(s) flipped by the {} channel", flipped, self.channel.name)
+        return frame[:header] + payload
+    
     def process_ack(self, ack):
         """
         Process an acknowledgment and update the send window
@@ -267,7 +393,7 @@ class ChecksumForDataLink:
             list: Sequence numbers that were ACKed
         """
         if not ack.startswith("ACK"):
-            print(f"[DATA LINK] ⚠ Invalid ACK format: {ack}")
+            _log.warning("[DATA LINK] ⚠ Invalid ACK format: {}", ack)
             return []
             
         try:
@@ -275,9 +401,10 @@ class ChecksumForDataLink:
             ack_num = int(ack[3:])
             acked_frames = []
             
-            print(f"[DATA LINK] ▶ Received ACK for frame {ack_num}")
-            print(f"[DATA LINK] ▶ Current window base: {self.window_base}")
-            print(f"[DATA LINK] ▶ Current frame buffer: {list(self.frame_buffer.keys())}")
+            _log.info("[DATA LINK] ▶ Received ACK for frame {}", ack_num)
+            _log.info("[DATA LINK] ▶ Current window base: {}", self.window_base)
+            if _log.is_enabled():  # Skip building the list when nobody sees it
+                _log.info("[DATA LINK] ▶ Current frame buffer: {}", list(self.frame_buffer.keys()))
             
             # Go-Back-N uses cumulative ACKs
             # Move the window base to ack_num + 1
@@ -288,7 +415,7 @@ class ChecksumForDataLink:
                     if seq in self.frame_buffer:
                         del self.frame_buffer[seq]
                         acked_frames.append(seq)
-                        print(f"[DATA LINK] ✓ Frame {seq} acknowledged and removed from buffer")
+                        _log.info("[DATA LINK] ✓ Frame {} acknowledged and removed from buffer", seq)
             else:
                 # Wrap-around case
                 # First, remove frames from window_base to 9
@@ -296,24 +423,25 @@ class ChecksumForDataLink:
                     if seq in self.frame_buffer:
                         del self.frame_buffer[seq]
                         acked_frames.append(seq)
-                        print(f"[DATA LINK] ✓ Frame {seq} acknowledged and removed from buffer")
+                        _log.info("[DATA LINK] ✓ Frame {} acknowledged and removed from buffer", seq)
                 
                 # Then remove frames from 0 to ack_num
                 for seq in range(0, ack_num + 1):
                     if seq in self.frame_buffer:
                         del self.frame_buffer[seq]
                         acked_frames.append(seq)
-                        print(f"[DATA LINK] ✓ Frame {seq} acknowledged and removed from buffer")
+                        _log.info("[DATA LINK] ✓ Frame {} acknowledged and removed from buffer", seq)
             
             # Update window base
             self.window_base = (ack_num + 1) % 10
-            print(f"[DATA LINK] ▶ New window base: {self.window_base}")
-            print(f"[DATA LINK] ▶ Updated frame buffer: {list(self.frame_buffer.keys())}")
+            _log.info("[DATA LINK] ▶ New window base: {}", self.window_base)
+            if _log.is_enabled():
+                _log.info("[DATA LINK] ▶ Updated frame buffer: {}", list(self.frame_buffer.keys()))
             
             return acked_frames
             
         except Exception as e:
-            print(f"[DATA LINK] ⚠ ERROR processing ACK: {e}")
+            _log.warning("[DATA LINK] ⚠ ERROR processing ACK: {}", e)
             return []
     
     def handle_nak(self, nak):
@@ -327,15 +455,16 @@ class ChecksumForDataLink:
             list: Sequence numbers to resend
         """
         if not nak.startswith("NAK"):
-            print(f"[DATA LINK] ⚠ Invalid NAK format: {nak}")
+            _log.warning("[DATA LINK] ⚠ Invalid NAK format: {}", nak)
             return []
             
         try:
             # Extract the NAK number
             nak_num = int(nak[3:])
             
-            print(f"[DATA LINK] ▶ Received NAK for frame {nak_num}")
-            print(f"[DATA LINK] ▶ Current frame buffer: {list(self.frame_buffer.keys())}")
+            _log.info("[DATA LINK] ▶ Received NAK for frame {}", nak_num)
+            if _log.is_enabled():
+                _log.info("[DATA LINK] ▶ Current frame buffer: {}", list(self.frame_buffer.keys()))
             
             # Go-Back-N: resend all frames from NAK sequence onward that are in the buffer
             to_resend = []
@@ -344,11 +473,11 @@ class ChecksumForDataLink:
                    (nak_num + self.window_size >= 10 and seq < (nak_num + self.window_size) % 10):
                     to_resend.append(seq)
             
-            print(f"[DATA LINK] ▶ Will resend frames: {to_resend}")
+            _log.info("[DATA LINK] ▶ Will resend frames: {}", to_resend)
             return to_resend
             
         except Exception as e:
-            print(f"[DATA LINK] ⚠ ERROR processing NAK: {e}")
+            _log.warning("[DATA LINK] ⚠ ERROR processing NAK: {}", e)
             return []
     
     def get_next_frames_to_send(self):
@@ -373,17 +502,17 @@ class ChecksumForDataLink:
                 if seq >= self.window_base or seq < window_end:
                     to_send.append(seq)
         
-        print(f"[DATA LINK] ▶ Available frames to send within window: {to_send}")
+        _log.info("[DATA LINK] ▶ Available frames to send within window: {}", to_send)
         return to_send
         
     def print_window_status(self):
         """Print the current status of the sliding window"""
-        print(f"[DATA LINK] === GO-BACK-N WINDOW STATUS ===")
-        print(f"[DATA LINK] ▶ Window base: {self.window_base}")
-        print(f"[DATA LINK] ▶ Window size: {self.window_size}")
-        print(f"[DATA LINK] ▶ Window end: {(self.window_base + self.window_size) % 10}")
-        print(f"[DATA LINK] ▶ Next sequence number: {self.sequence_number}")
-        print(f"[DATA LINK] ▶ Frames in buffer: {list(self.frame_buffer.keys())}")
+        _log.info("[DATA LINK] === GO-BACK-N WINDOW STATUS ===")
+        _log.info("[DATA LINK] ▶ Window base: {}", self.window_base)
+        _log.info("[DATA LINK] ▶ Window size: {}", self.window_size)
+        _log.info("[DATA LINK] ▶ Window end: {}", (self.window_base + self.window_size) % 10)
+        _log.info("[DATA LINK] ▶ Next sequence number: {}", self.sequence_number)
+        _log.info("[DATA LINK] ▶ Frames in buffer: {}", list(self.frame_buffer.keys()))
         
         # Visual representation of the window
         window_repr = []
@@ -400,4 +529,4 @@ class ChecksumForDataLink:
             status = "✓" if i in self.frame_buffer else " "
             window_repr.append(f"{marker}{i}{status}")
             
-        print(f"[DATA LINK] ▶ Window: {''.join(window_repr)}")
+        _log.info("[DATA LINK] ▶ Window: {}", ''.join(window_repr))
@@ -4,7 +4,8 @@ Provides better CLI interaction and visualization
 """
 
 import time
-import random
+from event_scheduler import get_scheduler
+from rng_service import get_rng
 
 class CLIUtils:
     @staticmethod
@@ -67,8 +68,8 @@ class CLIUtils:
             min_time (float): Minimum delay time
             max_time (float): Maximum delay time
         """
-        delay = random.uniform(min_time, max_time)
-        time.sleep(delay)
+        delay = get_rng("cli/delay").uniform(min_time, max_time)
+        get_scheduler().sleep(delay)
         return delay
     
     @staticmethod
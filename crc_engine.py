@@ -0,0 +1,301 @@
+"""
+Table-driven CRC engine for Network Simulator
+Computes CRCs over bytes with 256-entry lookup tables and slicing-by-N, and checks
+whole batches of frames at once with NumPy when it is installed
+"""
+
+import binascii
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batches fall back to a per-frame loop
+    np = None
+
+
+def _reflect(value, width):
+    """
+    Reverse the bit order of a value
+
+    Args:
+        value (int): Value to reflect
+        width (int): Number of bits to reflect
+
+    Returns:
+        int: Reflected value
+    """
+    result = 0
+    for _ in range(width):
+        result = (result << 1) | (value & 1)
+        value >>= 1
+    return result
+
+
+class CRCEngine:
+    """
+    CRC calculator for one polynomial
+
+    Parameters follow the usual Rocksoft model (width, poly, init, refin,
+    refout, xorout). Data is processed N bytes per step using N lookup tables
+    (slicing-by-N), with a byte-at-a-time loop for the remaining bytes.
+    """
+
+    def __init__(self, name, width, poly, init=0, refin=False, refout=False, xorout=0, slices=8):
+        """
+        Initialize the engine and build its lookup tables
+
+        Args:
+            name (str): Name of the CRC, e.g. "CRC-32"
+            width (int): CRC width in bits (8 or more)
+            poly (int): Generator polynomial without the top bit, e.g. 0x07 for CRC-8
+            init (int): Initial register value
+            refin (bool): Whether input bytes are reflected
+            refout (bool): Whether the final value is reflected
+            xorout (int): Value XORed into the final CRC
+            slices (int): Number of bytes processed per step (slicing-by-N)
+        """
+        if width < 8:
+            raise ValueError(f"CRC width must be at least 8 bits, got {width}")
+        self.name = name
+        self.width = width
+        self.poly = poly
+        self.init = init
+        self.refin = refin
+        self.refout = refout
+        self.xorout = xorout
+        self.mask = (1 << width) - 1
+        # Slices must cover the whole register for the slicing step to be valid
+        self.slices = max(slices, (width + 7) // 8)
+        self.tables = self._build_tables()
+        self.table = self.tables[0]
+        self._native = self._find_native()
+
+    @property
+    def divisor(self):
+        """Generator polynomial as a binary string including the top bit (e.g. "100000111")"""
+        return format((1 << self.width) | self.poly, "b")
+
+    def _build_tables(self):
+        """
+        Build the byte table and the additional slicing tables
+
+        Returns:
+            list: self.slices tables of 256 entries; table k gives the effect of a
+                byte followed by k zero bytes
+        """
+        width, mask = self.width, self.mask
+        table = []
+        if self.refin:
+            poly = _reflect(self.poly, width)
+            for byte in range(256):
+                crc = byte
+                for _ in range(8):
+                    crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+                table.append(crc)
+        else:
+            top = 1 << (width - 1)
+            for byte in range(256):
+                crc = byte << (width - 8)
+                for _ in range(8):
+                    crc = ((crc << 1) ^ self.poly) & mask if crc & top else (crc << 1) & mask
+                table.append(crc)
+
+        tables = [table]
+        shift = width - 8
+        for _ in range(1, self.slices):
+            previous = tables[-1]
+            if self.refin:
+                tables.append([(crc >> 8) ^ table[crc & 0xFF] for crc in previous])
+            else:
+                tables.append([((crc << 8) & mask) ^ table[crc >> shift] for crc in previous])
+        return tables
+
+    def _find_native(self):
+        """
+        Find a C implementation of this exact CRC in the standard library
+
+        Returns:
+            callable: Function taking bytes and returning the CRC, or None
+        """
+        params = (self.width, self.poly, self.init, self.refin, self.refout, self.xorout)
+        if params == (32, 0x04C11DB7, 0xFFFFFFFF, True, True, 0xFFFFFFFF):
+            return zlib.crc32
+        if params[:2] == (16, 0x1021) and not self.refin and not self.refout and self.xorout == 0:
+            init = self.init
+            return lambda data: binascii.crc_hqx(data, init)
+        return None
+
+    def _update(self, crc, data):
+        """
+        Feed data into a raw (not yet finalized) CRC register
+
+        Args:
+            crc (int): Register value
+            data (bytes): Data to process
+
+        Returns:
+            int: New register value
+        """
+        tables, table = self.tables, self.table
+        n = self.slices
+        length = len(data)
+        end = length - length % n
+
+        if self.refin:
+            for i in range(0, end, n):
+                x = crc ^ int.from_bytes(data[i:i + n], "little")
+                crc = 0
+                for k in range(n):
+                    crc ^= tables[n - 1 - k][(x >> (8 * k)) & 0xFF]
+            for byte in data[end:]:
+                crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+        else:
+            mask, shift = self.mask, self.width - 8
+            align = 8 * n - self.width
+            for i in range(0, end, n):
+                x = (crc << align) ^ int.from_bytes(data[i:i + n], "big")
+                crc = 0
+                for k in range(n):
+                    crc ^= tables[k][(x >> (8 * k)) & 0xFF]
+            for byte in data[end:]:
+                crc = ((crc << 8) & mask) ^ table[((crc >> shift) ^ byte) & 0xFF]
+        return crc
+
+    def _finalize(self, crc):
+        """Apply output reflection and the final XOR to a register value"""
+        if self.refout != self.refin:
+            crc = _reflect(crc, self.width)
+        return crc ^ self.xorout
+
+    def compute(self, data):
+        """
+        Compute the CRC of some data
+
+        Args:
+            data (bytes or str): Data to protect; strings are UTF-8 encoded
+
+        Returns:
+            int: CRC value
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if self._native is not None:
+            return self._native(data)
+        return self._finalize(self._update(self.init, data))
+
+    def compute_table(self, data):
+        """
+        Compute the CRC with the pure-Python table path, bypassing any C implementation
+
+        Args:
+            data (bytes or str): Data to protect; strings are UTF-8 encoded
+
+        Returns:
+            int: CRC value
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return self._finalize(self._update(self.init, data))
+
+    def verify(self, data, crc):
+        """
+        Check data against a received CRC
+
+        Args:
+            data (bytes or str): Received data
+            crc (int): Received CRC value
+
+        Returns:
+            bool: True if the CRC matches
+        """
+        return self.compute(data) == crc
+
+    def compute_batch(self, frames):
+        """
+        Compute the CRCs of many frames in one call
+
+        With NumPy, all frames are processed together one byte column at a time,
+        so the Python-level loop runs once per byte position instead of once per byte.
+
+        Args:
+            frames (list or numpy.ndarray): Frames as bytes or str, or a uint8
+                array with one equal-length frame per row
+
+        Returns:
+            list: CRC value of each frame, in order
+        """
+        if np is not None and isinstance(frames, np.ndarray) and frames.ndim == 2:
+            data = frames.astype(np.uint8, copy=False)
+            max_length = data.shape[1]
+            starts = np.zeros(len(data), dtype=np.int64)
+        else:
+            frames = [f.encode("utf-8") if isinstance(f, str) else bytes(f) for f in frames]
+            if np is None or len(frames) < 2:
+                return [self.compute(f) for f in frames]
+
+            lengths = np.fromiter((len(f) for f in frames), dtype=np.int64, count=len(frames))
+            max_length = int(lengths.max()) if len(frames) else 0
+            # Right-align frames so every frame ends at the last column
+            data = np.zeros((len(frames), max_length), dtype=np.uint8)
+            for row, frame in enumerate(frames):
+                if frame:
+                    data[row, max_length - len(frame):] = np.frombuffer(frame, dtype=np.uint8)
+            starts = max_length - lengths
+
+        aligned = not starts.any()  # All frames start in the first column
+        table = np.array(self.table, dtype=np.uint64)
+        crc = np.full(len(data), self.init, dtype=np.uint64)
+        mask = np.uint64(self.mask)
+        eight = np.uint64(8)
+        shift = np.uint64(self.width - 8)
+        for column in range(max_length):
+            byte = data[:, column].astype(np.uint64)
+            if self.refin:
+                updated = (crc >> eight) ^ table[(crc ^ byte) & np.uint64(0xFF)]
+            else:
+                updated = ((crc << eight) & mask) ^ table[((crc >> shift) ^ byte) & np.uint64(0xFF)]
+            crc = updated if aligned else np.where(starts <= column, updated, crc)
+
+        return [self._finalize(int(value)) for value in crc]
+
+    def verify_batch(self, frames, crcs):
+        """
+        Check many frames against their received CRCs in one call
+
+        Args:
+            frames (list): Received frames as bytes or str
+            crcs (list): Received CRC value of each frame
+
+        Returns:
+            list: True for each frame whose CRC matches
+        """
+        return [computed == received for computed, received in zip(self.compute_batch(frames), crcs)]
+
+
+CRC_PRESETS = {
+    "CRC-8": dict(width=8, poly=0x07),
+    "CRC-16-CCITT": dict(width=16, poly=0x1021, init=0xFFFF),
+    "CRC-32": dict(width=32, poly=0x04C11DB7, init=0xFFFFFFFF, refin=True, refout=True, xorout=0xFFFFFFFF),
+}
+
+_engines = {}
+
+
+def get_crc_engine(name="CRC-8"):
+    """
+    Get a shared engine for a preset polynomial
+
+    Engines are built once per process since building the tables is the slow part.
+
+    Args:
+        name (str): "CRC-8", "CRC-16-CCITT" or "CRC-32"
+
+    Returns:
+        CRCEngine: Engine for the preset
+    """
+    engine = _engines.get(name)
+    if engine is None:
+        if name not in CRC_PRESETS:
+            raise ValueError(f"Unknown CRC preset: {name} (choose from {', '.join(CRC_PRESETS)})")
+        engine = _engines[name] = CRCEngine(name, **CRC_PRESETS[name])
+    return engine
@@ -1,19 +1,38 @@
 """
 CRC-32 implementation for Data Link layer
 """
-import binascii
-import zlib
-import random
+from crc_engine import get_crc_engine
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("DATA LINK")
+_error_simulation_log = get_logger("ERROR SIMULATION")
+
+# CRC preset used by is_correct() for each CRC field width in bits
+_PRESETS_BY_WIDTH = {8: "CRC-8", 16: "CRC-16-CCITT", 32: "CRC-32"}
 
 class CRCForDataLink:
     """
-    Class to handle CRC-32 calculations for data integrity checks
-    Uses zlib's CRC-32 implementation which is standard and widely used
+    Class to handle CRC calculations for data integrity checks
+    Uses the table-driven engines in crc_engine (CRC-32 runs on zlib)
     """
     
-    def __init__(self):
-        """Initialize the CRC calculator"""
-        pass
+    def __init__(self, polynomial="CRC-8", rng=None, channel=None):
+        """
+        Initialize the CRC calculator
+        
+        Args:
+            polynomial (str): CRC used by sender_code(): "CRC-8", "CRC-16-CCITT" or "CRC-32"
+            rng (random.Random, optional): Stream for simulated bit errors
+                (default: the shared "datalink/crc" stream)
+            channel (BitErrorChannel, optional): Channel model that corrupts the data
+                instead of the single-bit flip (see channel_model)
+        """
+        self.rng = rng or get_rng("datalink/crc")
+        self.channel = channel
+        self.engine = get_crc_engine(polynomial)
+        self.crc32_engine = get_crc_engine("CRC-32")
+        self.divisor = self.engine.divisor
     
     def calculate_crc32(self, data):
         """
@@ -25,10 +44,21 @@ class CRCForDataLink:
         Returns:
             str: Hexadecimal string representation of the CRC-32 value
         """
-        # Convert string to bytes and calculate CRC-32
-        crc = zlib.crc32(data.encode('utf-8'))
+        crc = self.crc32_engine.compute(data)
         # Convert to hexadecimal string format
-        return format(crc & 0xFFFFFFFF, '08x')
+        return format(crc, '08x')
+    
+    def calculate_crc32_batch(self, frames):
+        """
+        Calculate CRC-32 for many data strings in one call
+        
+        Args:
+            frames (list): Data strings
+            
+        Returns:
+            list: Hexadecimal CRC-32 value of each string
+        """
+        return [format(crc, '08x') for crc in self.crc32_engine.compute_batch(frames)]
     
     def verify_crc32(self, data, crc_value):
         """
@@ -50,6 +80,9 @@ class CRCForDataLink:
         """
         Introduce a random bit error in the data with given probability
         
+        With a channel model the data goes through the channel instead, which
+        may flip any number of bits (error_probability is then not used).
+        
         Args:
             data (str): The data string that might get corrupted
             error_probability (float): Probability of error (0-1)
@@ -57,30 +90,57 @@ class CRCForDataLink:
         Returns:
             tuple: (modified_data, error_introduced)
         """
-        if random.random() < error_probability:
-            # Choose a random position to modify
+        if self.channel is not None:
+            modified, flipped = self._corrupt_with_channel(data)
+            if flipped:
+                _error_simulation_log.info("[ERROR SIMULATION] {} bit(s) flipped by the {} channel", flipped, self.channel.name)
+            return modified, flipped > 0
+        if self.rng.random() < error_probability:
             if not data:
                 return data, False
-                
-            pos = random.randint(0, len(data) - 1)
-            
-            # Convert string to list for modification
-            chars = list(data)
             
-            # Modify a random character
-            original_char = chars[pos]
-            # XOR with a random value to change it
-            new_char = chr(ord(original_char) ^ random.randint(1, 127))
-            chars[pos] = new_char
+            # Flip one bit of the encoded data
+            encoded = bytearray(data.encode('utf-8'))
+            bit = self.rng.randint(0, len(encoded) * 8 - 1)
+            encoded[bit // 8] ^= 0x80 >> (bit % 8)
             
-            print(f"[ERROR SIMULATION] Corrupted character at position {pos}: '{original_char}' -> '{new_char}'")
+            _error_simulation_log.info("[ERROR SIMULATION] Flipped bit {} (byte {}, bit {})", bit, bit // 8, bit % 8)
             
-            # Convert back to string
-            return ''.join(chars), True
+            # Bytes map to characters one to one, as in binary_to_text()
+            return encoded.decode('latin-1'), True
         else:
             return data, False
+    
+    def _corrupt_with_channel(self, text):
+        """
+        Send text through the channel model
+        
+        Args:
+            text (str): Text to send
+            
+        Returns:
+            tuple: (text, number of flipped bits); corrupted bytes map to
+                characters one to one, as in binary_to_text()
+        """
+        (payload,), (mask,) = self.channel.apply([text.encode('utf-8')])
+        flipped = sum(bin(byte).count("1") for byte in mask)
+        if not flipped:
+            return text, 0
+        return payload.decode('latin-1'), flipped
         
     # For backward compatibility with the old implementation
+    def text_to_binary(self, text):
+        """
+        Convert text to binary string
+        
+        Args:
+            text (str): Text to convert
+            
+        Returns:
+            str: Binary representation, 8 bits per byte
+        """
+        return ''.join(format(byte, '08b') for byte in text.encode('utf-8'))
+    
     def binary_to_text(self, binary):
         """
         Convert binary string to text
@@ -110,29 +170,26 @@ class CRCForDataLink:
             str: Data with CRC appended (with special separator)
         """
         self.original_text = text
-        # Convert text to binary
-        binary_data = self.text_to_binary(text)
-        print(f"\n[DATA LINK] ▶ Computing CRC for message: {text}")
-        print(f"[DATA LINK] ▶ Binary representation: {binary_data}")
+        _log.info("\n[DATA LINK] ▶ Computing {} for message: {}", self.engine.name, text)
         
-        # Calculate CRC
-        # Append zeros equal to divisor length minus 1
-        padding_size = len(self.divisor) - 1
-        binary_with_padding = binary_data + ("0" * padding_size)
-        self.rem = self.binary_xor_division(binary_with_padding, self.divisor)
+        # Table-driven CRC; the remainder is kept as a binary string of the CRC width
+        self.rem = format(self.engine.compute(text), f'0{self.engine.width}b')
         
         # Store the complete codeword
         self.sxt_copy = text + "|CRC|" + self.rem
         
-        print(f"[DATA LINK] ▶ CRC calculation: {self.divisor} (polynomial)")
-        print(f"[DATA LINK] ▶ CRC remainder: {self.rem}")
-        print(f"[DATA LINK] ✓ Message with CRC: {text}|CRC|{self.rem}")
+        _log.info("[DATA LINK] ▶ CRC calculation: {} (polynomial)", self.divisor)
+        _log.info("[DATA LINK] ▶ CRC remainder: {}", self.rem)
+        _log.info("[DATA LINK] ✓ Message with CRC: {}|CRC|{}", text, self.rem)
         return self.sxt_copy
     
     def receiver_code(self, data, probability):
         """
         Process received code and introduce random bit error based on probability
         
+        With a channel model the text goes through the channel instead of the
+        single-bit flip, and probability is not used.
+        
         Args:
             data (str): Data received (text with CRC)
             probability (float): Probability for bit flipping (0-1)
@@ -140,11 +197,9 @@ class CRCForDataLink:
         Returns:
             str: Possibly modified data
         """
-        import random
-        
         # Split the data into text and CRC parts
         if "|CRC|" not in data:
-            print("[DATA LINK] ⚠ ERROR: Invalid data format: CRC separator not found")
+            _log.warning("[DATA LINK] ⚠ ERROR: Invalid data format: CRC separator not found")
             return data
             
         text_part, crc_part = data.split("|CRC|")
@@ -152,19 +207,27 @@ class CRCForDataLink:
         
         # Create a copy of original data
         modified_data = text_part + "|CRC|" + crc_part
-        print(f"\n[DATA LINK] ▶ Received frame: {text_part}")
-        print(f"[DATA LINK] ▶ Frame CRC: {crc_part}")
+        _log.info("\n[DATA LINK] ▶ Received frame: {}", text_part)
+        _log.info("[DATA LINK] ▶ Frame CRC: {}", crc_part)
+        
+        if self.channel is not None:
+            modified_text, flipped = self._corrupt_with_channel(text_part)
+            if flipped:
+                _log.warning("[DATA LINK] ⚠ BIT ERROR: {} bit(s) flipped by the {} channel", flipped, self.channel.name)
+            else:
+                _log.info("[DATA LINK] ✓ No transmission errors introduced")
+            return modified_text + "|CRC|" + crc_part
         
         # With a certain probability, introduce an error
-        error_chance = random.random()
-        print(f"[DATA LINK] ▶ Error probability: {probability:.2f}, Random value: {error_chance:.2f}")
+        error_chance = self.rng.random()
+        _log.info("[DATA LINK] ▶ Error probability: {:.2f}, Random value: {:.2f}", probability, error_chance)
         
         if error_chance < probability:
             # Convert text part to binary array for manipulation
             binary_list = list(binary_data)
             
             # Randomly select a bit to flip
-            bit_to_flip = random.randint(0, len(binary_list) - 1)
+            bit_to_flip = self.rng.randint(0, len(binary_list) - 1)
             
             # Flip the bit (0->1 or 1->0)
             original_bit = binary_list[bit_to_flip]
@@ -183,12 +246,12 @@ class CRCForDataLink:
             bit_in_byte = bit_to_flip % 8
             affected_char = text_part[byte_position:byte_position+1]
             
-            print(f"[DATA LINK] ⚠ BIT ERROR: Bit flipped at position {bit_position}")
-            print(f"[DATA LINK] ⚠ Affected byte {byte_position}, bit {bit_in_byte} in character '{affected_char}'")
-            print(f"[DATA LINK] ⚠ Original bit value: {original_bit}, New value: {binary_list[bit_to_flip]}")
-            print(f"[DATA LINK] ⚠ Modified text: {modified_text}")
+            _log.warning("[DATA LINK] ⚠ BIT ERROR: Bit flipped at position {}", bit_position)
+            _log.warning("[DATA LINK] ⚠ Affected byte {}, bit {} in character '{}'", byte_position, bit_in_byte, affected_char)
+            _log.warning("[DATA LINK] ⚠ Original bit value: {}, New value: {}", original_bit, binary_list[bit_to_flip])
+            _log.warning("[DATA LINK] ⚠ Modified text: {}", modified_text)
         else:
-            print(f"[DATA LINK] ✓ No transmission errors introduced")
+            _log.info("[DATA LINK] ✓ No transmission errors introduced")
         
         return modified_data
     
@@ -204,27 +267,30 @@ class CRCForDataLink:
             bool: True if error detected, False otherwise
         """
         if "|CRC|" not in data:
-            print("[DATA LINK] ⚠ ERROR: Invalid data format: missing CRC separator")
+            _log.warning("[DATA LINK] ⚠ ERROR: Invalid data format: missing CRC separator")
             return True  # Consider invalid format as an error
         
         text_part, crc_part = data.split("|CRC|")
         
-        # Convert text to binary and append the received CRC
-        crc = CRCforDataLink()
-        binary_data = crc.text_to_binary(text_part) + crc_part
+        # The CRC field width tells which polynomial the sender used
+        preset = _PRESETS_BY_WIDTH.get(len(crc_part))
+        if preset is None or crc_part.strip("01"):
+            _log.warning("[DATA LINK] ⚠ ERROR: Invalid CRC field: {}", crc_part)
+            return True
+        engine = get_crc_engine(preset)
         
-        # Do CRC check - remainder should be all zeros if no errors
-        print(f"[DATA LINK] ▶ Verifying data integrity with CRC check")
-        rem = CRCforDataLink.binary_xor_division(binary_data, "100000111")
+        # Recompute the CRC - it must match the received one if there are no errors
+        _log.info("[DATA LINK] ▶ Verifying data integrity with CRC check")
+        computed = engine.compute(text_part)
         
-        if "1" in rem:  # Check if there's any 1 in the remainder
-            print(f"[DATA LINK] ❌ ERROR DETECTED: CRC check failed!")
-            print(f"[DATA LINK] ❌ Remainder: {rem} (should be all zeros)")
-            print(f"[DATA LINK] ❌ Frame will be discarded, retransmission required")
+        if computed != int(crc_part, 2):
+            _log.error("[DATA LINK] ❌ ERROR DETECTED: CRC check failed!")
+            _log.error("[DATA LINK] ❌ Computed CRC: {} (received {})", format(computed, f'0{engine.width}b'), crc_part)
+            _log.error("[DATA LINK] ❌ Frame will be discarded, retransmission required")
             return True  # Error detected
         else:
-            print(f"[DATA LINK] ✓ Data integrity verified: CRC check passed")
-            print(f"[DATA LINK] ✓ Data verified: {text_part}")
+            _log.info("[DATA LINK] ✓ Data integrity verified: CRC check passed")
+            _log.info("[DATA LINK] ✓ Data verified: {}", text_part)
             return False  # No errors
     
     @staticmethod
@@ -239,29 +305,14 @@ class CRCForDataLink:
         Returns:
             str: The remainder
         """
-        # Copy first n-1 bits from dividend
-        n = len(divisor)
-        pick = dividend[:n]
-        
-        # Perform XOR division
-        while n < len(dividend):
-            if pick[0] == '1':
-                pick = CRCforDataLink.xor_op(pick, divisor) + dividend[n]
-            else:
-                # If first bit is 0, XOR with all zeros
-                zeros = '0' * len(divisor)
-                pick = CRCforDataLink.xor_op(pick, zeros) + dividend[n]
-            pick = pick[1:]  # Remove the first bit
-            n += 1
-        
-        # Final step
-        if pick[0] == '1':
-            pick = CRCforDataLink.xor_op(pick, divisor)
-        else:
-            zeros = '0' * len(divisor)
-            pick = CRCforDataLink.xor_op(pick, zeros)
-        
-        return pick[1:]  # Return remainder
+        # Long division on integers instead of character strings
+        degree = len(divisor) - 1
+        remainder = int(dividend, 2)
+        poly = int(divisor, 2)
+        for shift in range(len(dividend) - len(divisor), -1, -1):
+            if (remainder >> (shift + degree)) & 1:
+                remainder ^= poly << shift
+        return format(remainder, f'0{degree}b')
     
     @staticmethod
     def xor_op(str1, str2):
@@ -275,10 +326,4 @@ class CRCForDataLink:
         Returns:
             str: XOR result
         """
-        result = ""
-        for i in range(len(str1)):
-            if str1[i] == str2[i]:
-                result += "0"
-            else:
-                result += "1"
-        return result
+        return format(int(str1, 2) ^ int(str2, 2), f'0{len(str1)}b')
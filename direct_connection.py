@@ -3,24 +3,38 @@ Direct connection implementation for Network Simulator
 This handles connections directly between end devices
 """
 
+from link import Link
+from sim_logging import get_logger
+
+_log = get_logger("DIRECT")
+
 class DirectConnection:
-    def __init__(self, device1, device2):
+    def __init__(self, device1, device2, **link_options):
         """
         Initialize a direct connection between two devices
         
         Args:
             device1 (EndDevices): First device in the connection
             device2 (EndDevices): Second device in the connection
+            **link_options: Link parameters (bandwidth, delay, mtu, ber, loss, duplex);
+                frames are only limited in size when mtu is given
         """
         self.device1 = device1
         self.device2 = device2
         self.connection_active = True
-        self.connection_quality = 1.0  # 1.0 means perfect connection (no errors)
+        link_options.setdefault("name", f"{device1.get_device_name()}-{device2.get_device_name()}")
+        link_options.setdefault("mtu", None)
+        self.link = Link(device1, device2, **link_options)
         
-        print(f"\n[DIRECT] === DIRECT CONNECTION ESTABLISHED ===")
-        print(f"[DIRECT] ▶ Device 1: {device1.get_device_name()} (MAC: {device1.get_mac()}, IP: {device1.IP})")
-        print(f"[DIRECT] ▶ Device 2: {device2.get_device_name()} (MAC: {device2.get_mac()}, IP: {device2.IP})")
-        print(f"[DIRECT] ✓ Connection status: Active")
+        _log.info("\n[DIRECT] === DIRECT CONNECTION ESTABLISHED ===")
+        _log.info("[DIRECT] ▶ Device 1: {} (MAC: {}, IP: {})", device1.get_device_name(), device1.get_mac(), device1.IP)
+        _log.info("[DIRECT] ▶ Device 2: {} (MAC: {}, IP: {})", device2.get_device_name(), device2.get_mac(), device2.IP)
+        _log.info("[DIRECT] ✓ Connection status: Active")
+    
+    @property
+    def connection_quality(self):
+        """Connection quality from 0.0 (worst) to 1.0 (perfect, no loss); the complement of the link's loss rate"""
+        return 1.0 - self.link.loss
     
     def get_connected_devices(self):
         """Get the devices connected by this connection"""
@@ -28,19 +42,19 @@ class DirectConnection:
     
     def set_connection_quality(self, quality):
         """
-        Set the connection quality which affects error rate
+        Set the connection quality, which sets the loss rate of the link
         
         Args:
             quality (float): Connection quality from 0.0 (worst) to 1.0 (best)
         """
         if quality < 0.0 or quality > 1.0:
-            print(f"[DIRECT] ⚠ Invalid connection quality value: {quality}. Using default value.")
+            _log.warning("[DIRECT] ⚠ Invalid connection quality value: {}. Using default value.", quality)
             return
             
-        self.connection_quality = quality
+        self.link.loss = 1.0 - quality
         error_rate = (1.0 - quality) * 100
-        print(f"[DIRECT] ▶ Connection quality set to: {quality:.2f}")
-        print(f"[DIRECT] ▶ Estimated error rate: {error_rate:.1f}%")
+        _log.info("[DIRECT] ▶ Connection quality set to: {:.2f}", quality)
+        _log.info("[DIRECT] ▶ Estimated error rate: {:.1f}%", error_rate)
     
     def send_data(self, sender, receiver, data):
         """
@@ -55,49 +69,63 @@ class DirectConnection:
             bool: True if transmission was successful, False otherwise
         """
         if not self.connection_active:
-            print(f"[DIRECT] ❌ Connection is not active. Cannot transmit data.")
+            _log.error("[DIRECT] ❌ Connection is not active. Cannot transmit data.")
             return False
         
         # Verify that sender and receiver are the devices in this connection
         if (sender == self.device1 and receiver == self.device2) or (sender == self.device2 and receiver == self.device1):
-            print(f"\n[DIRECT] === DIRECT DATA TRANSMISSION ===")
-            print(f"[DIRECT] ▶ Source: {sender.get_device_name()} (MAC: {sender.get_mac()})")
-            print(f"[DIRECT] ▶ Destination: {receiver.get_device_name()} (MAC: {receiver.get_mac()})")
-            print(f"[DIRECT] ▶ Data: {data[:30]}{'...' if len(data) > 30 else ''}")
+            _log.info("\n[DIRECT] === DIRECT DATA TRANSMISSION ===")
+            _log.info("[DIRECT] ▶ Source: {} (MAC: {})", sender.get_device_name(), sender.get_mac())
+            _log.info("[DIRECT] ▶ Destination: {} (MAC: {})", receiver.get_device_name(), receiver.get_mac())
+            _log.info("[DIRECT] ▶ Data: {}{}", data[:30], '...' if len(data) > 30 else '')
             
-            # Calculate error probability based on connection quality
-            error_probability = 1.0 - self.connection_quality
+            # Frames are measured in bytes on the wire
+            size = len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+            loss_probability = self.link.loss_probability(size)
             
             # Set data in sender (with CRC applied at data link layer)
             sender.set_data(data)
             
             # Simulate transmission
-            print(f"[DIRECT] ▶ Physical layer transmission in progress...")
-            print(f"[DIRECT] ▶ Connection quality: {self.connection_quality:.2f}")
-            print(f"[DIRECT] ▶ Error probability: {error_probability:.2f}")
+            _log.info("[DIRECT] ▶ Physical layer transmission in progress...")
+            _log.info("[DIRECT] ▶ Connection quality: {:.2f}", self.connection_quality)
+            _log.info("[DIRECT] ▶ Loss probability: {:.2f}", loss_probability)
             
-            # Send data to receiver
+            # Send data to receiver once it has crossed the link
+            arrived = []
+            arrival = self.link.transmit(sender, data, size, on_arrival=lambda *_: arrived.append(True),
+                                         on_loss=lambda _: arrived.append(False))
+            if arrival is None:
+                return False
+            _log.info("[DIRECT] ▶ Arrival in {:.3f} ms", (arrival - self.link.scheduler.now) * 1000)
+            while not arrived and self.link.scheduler.step():
+                pass
+            if not arrived or not arrived[0]:
+                _log.error("[DIRECT] ❌ Frame lost on the link")
+                return False
             sender.send_data_to_receiver(receiver)
             
             # Check if transmission was acknowledged
             if receiver.ACKorNAK == "ACK":
-                print(f"[DIRECT] ✓ Transmission successful: Received ACK")
+                _log.info("[DIRECT] ✓ Transmission successful: Received ACK")
                 return True
             else:
-                print(f"[DIRECT] ❌ Transmission failed: Received NAK")
-                print(f"[DIRECT] ⚠ Retransmission required")
+                _log.error("[DIRECT] ❌ Transmission failed: Received NAK")
+                _log.warning("[DIRECT] ⚠ Retransmission required")
                 return False
         else:
-            print(f"[DIRECT] ❌ Error: These devices are not connected via this connection")
-            print(f"[DIRECT] ⓘ Connected devices are: {self.device1.get_device_name()} and {self.device2.get_device_name()}")
+            _log.error("[DIRECT] ❌ Error: These devices are not connected via this connection")
+            _log.info("[DIRECT] ⓘ Connected devices are: {} and {}", self.device1.get_device_name(), self.device2.get_device_name())
             return False
     
     def disable_connection(self):
         """Disable this connection"""
         self.connection_active = False
-        print(f"[DIRECT] ⚠ Connection between {self.device1.get_device_name()} and {self.device2.get_device_name()} disabled")
+        self.link.set_up(False)
+        _log.warning("[DIRECT] ⚠ Connection between {} and {} disabled", self.device1.get_device_name(), self.device2.get_device_name())
     
     def enable_connection(self):
         """Enable this connection"""
         self.connection_active = True
-        print(f"[DIRECT] ✓ Connection between {self.device1.get_device_name()} and {self.device2.get_device_name()} enabled")
+        self.link.set_up(True)
+        _log.info("[DIRECT] ✓ Connection between {} and {} enabled", self.device1.get_device_name(), self.device2.get_device_name())
@@ -3,11 +3,15 @@ Domain Name Server implementation for Network Simulator
 Equivalent to DomainNameServer.java in the Java implementation
 """
 
+from sim_logging import get_logger
+
+_log = get_logger("DNS")
+
 class DomainNameServer:
     def __init__(self):
         """Initialize the DNS server with an empty mapping"""
         self.domain_to_ip = {}
-        print("[DNS] Domain Name Server initialized")
+        _log.info("[DNS] Domain Name Server initialized")
     
     def set_domain_ip_mapping(self, domain, ip):
         """
@@ -18,7 +22,7 @@ class DomainNameServer:
             ip (str): IP address
         """
         self.domain_to_ip[domain] = ip
-        print(f"[DNS] Added mapping: {domain} → {ip}")
+        _log.info("[DNS] Added mapping: {} → {}", domain, ip)
     
     def get_ip_from_domain_name(self, domain):
         """
@@ -32,9 +36,9 @@ class DomainNameServer:
         """
         ip = self.domain_to_ip.get(domain)
         if ip:
-            print(f"[DNS] ✓ Lookup successful: {domain} → {ip}")
+            _log.info("[DNS] ✓ Lookup successful: {} → {}", domain, ip)
         else:
-            print(f"[DNS] ❌ Lookup failed: {domain} not found")
+            _log.error("[DNS] ❌ Lookup failed: {} not found", domain)
         return ip
     
     @staticmethod
@@ -49,14 +53,14 @@ class DomainNameServer:
                   "furqanmakhdoomi@gmail.com", "demo@gmail.com"]
         mail_names = []
         
-        print("\n[DNS] === EMAIL DNS MAPPINGS ===")
-        print(f"[DNS] ▶ Setting up DNS for email server at IP: {receiver_IP}")
+        _log.info("\n[DNS] === EMAIL DNS MAPPINGS ===")
+        _log.info("[DNS] ▶ Setting up DNS for email server at IP: {}", receiver_IP)
         
         # Extract usernames from email addresses
         for email in emails:
             username = email[:email.find('@')]
             mail_names.append(username)
-            print(f"[DNS] ▶ Extracted username: {username} from {email}")
+            _log.info("[DNS] ▶ Extracted username: {} from {}", username, email)
         
         # Extract IP parts - Fixed the logic here
         IP_parts = [None] * 4
@@ -66,13 +70,13 @@ class DomainNameServer:
             ip_segments = receiver_IP.split('.')
             if len(ip_segments) == 4:
                 IP_parts = ip_segments
-                print(f"[DNS] ▶ Parsed IP segments: {IP_parts}")
+                _log.info("[DNS] ▶ Parsed IP segments: {}", IP_parts)
             else:
-                print(f"[DNS] ⚠ Warning: IP address format incorrect. Expected 4 segments, got {len(ip_segments)}")
+                _log.warning("[DNS] ⚠ Warning: IP address format incorrect. Expected 4 segments, got {}", len(ip_segments))
                 # Use default values
                 IP_parts = [receiver_IP[:receiver_IP.find('.')], "0", "0", receiver_IP[receiver_IP.rindex('.')+1:]]
         except Exception as e:
-            print(f"[DNS] ❌ Error parsing IP address: {str(e)}")
+            _log.error("[DNS] ❌ Error parsing IP address: {}", str(e))
             # Fallback to simple parsing
             IP_parts[0] = receiver_IP[:receiver_IP.find('.')]
             IP_parts[1] = "0"
@@ -89,10 +93,10 @@ class DomainNameServer:
             dns[mail_names[i]] = IP_parts[0]
         
         # Print DNS mappings
-        print("\n[DNS] === DNS MAPPINGS FOR EMAIL ===")
+        _log.info("\n[DNS] === DNS MAPPINGS FOR EMAIL ===")
         for key, value in dns.items():
-            print(f"[DNS] {key:<20} → {value}")
-        print()
+            _log.info("[DNS] {:<20} → {}", key, value)
+        _log.info("")
         
         return dns
     
@@ -110,8 +114,8 @@ class DomainNameServer:
         websites = ["www.google.com", "www.duckduckgo.com", "www.bing.com"]
         website_names = []
         
-        print("\n[DNS] === SEARCH ENGINE DNS MAPPINGS ===")
-        print(f"[DNS] ▶ Setting up DNS for search engine server at IP: {receiver_IP}")
+        _log.info("\n[DNS] === SEARCH ENGINE DNS MAPPINGS ===")
+        _log.info("[DNS] ▶ Setting up DNS for search engine server at IP: {}", receiver_IP)
         
         # Extract domain names from websites
         for website in websites:
@@ -121,9 +125,9 @@ class DomainNameServer:
                 end = website.rindex('.')
                 domain = website[start:end]
                 website_names.append(domain)
-                print(f"[DNS] ▶ Extracted domain: {domain} from {website}")
+                _log.info("[DNS] ▶ Extracted domain: {} from {}", domain, website)
             except Exception as e:
-                print(f"[DNS] ❌ Error parsing website {website}: {str(e)}")
+                _log.error("[DNS] ❌ Error parsing website {}: {}", website, str(e))
                 website_names.append("unknown")
         
         # Extract IP parts
@@ -134,13 +138,13 @@ class DomainNameServer:
             ip_segments = receiver_IP.split('.')
             if len(ip_segments) == 4:
                 IP_parts = ip_segments
-                print(f"[DNS] ▶ Parsed IP segments: {IP_parts}")
+                _log.info("[DNS] ▶ Parsed IP segments: {}", IP_parts)
             else:
-                print(f"[DNS] ⚠ Warning: IP address format incorrect. Expected 4 segments, got {len(ip_segments)}")
+                _log.warning("[DNS] ⚠ Warning: IP address format incorrect. Expected 4 segments, got {}", len(ip_segments))
                 # Use default values
                 IP_parts = [receiver_IP[:receiver_IP.find('.')], "0", "0", receiver_IP[receiver_IP.rindex('.')+1:]]
         except Exception as e:
-            print(f"[DNS] ❌ Error parsing IP address: {str(e)}")
+            _log.error("[DNS] ❌ Error parsing IP address: {}", str(e))
             # Fallback to simple parsing
             IP_parts[0] = receiver_IP[:receiver_IP.find('.')]
             IP_parts[1] = "0"
@@ -157,9 +161,9 @@ class DomainNameServer:
             dns[website_names[i]] = IP_parts[0]
         
         # Print DNS mappings
-        print("\n[DNS] === DNS MAPPINGS FOR SEARCH ENGINES ===")
+        _log.info("\n[DNS] === DNS MAPPINGS FOR SEARCH ENGINES ===")
         for key, value in dns.items():
-            print(f"[DNS] {key:<20} → {value}")
-        print()
+            _log.info("[DNS] {:<20} → {}", key, value)
+        _log.info("")
         
         return dns
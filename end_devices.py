@@ -3,6 +3,14 @@ End Devices implementation for Network Simulator
 Equivalent to EndDevices.java in the Java implementation
 """
 
+from frame_format import is_frame
+from address_registry import get_address_registry
+from arp_cache import ARPCache
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("DEVICE")
+
 class EndDevices:
     def __init__(self, MAC, name, IP):
         """
@@ -13,16 +21,20 @@ class EndDevices:
             name (str): Single character name of the device
             IP (str): IP address of the device
         """
+        self.registry = get_address_registry()  # IP/MAC index used for address resolution
+        self.ARP_cache = ARPCache()  # IP -> MAC; holds our own address permanently
+        self._MAC = None
+        self._IP = None
         self.MAC = MAC
         self.device_name = name
         self.data = ""
         self.raw_data = ""  # Data at physical layer (without processing)
         self.ACKorNAK = "ACK0"  # Default ACK
         self.IP = IP
-        self.ARP_cache = {MAC: IP}  # Store own MAC and IP in ARP cache
         
         # Go-Back-N protocol variables
         self.window_size = 4
+        self.error_probability = 0.3  # Chance that a received frame gets a bit flipped
         self.current_seq_num = 0  # Current sequence number for sending
         self.expected_seq_num = 0  # Next expected sequence number for receiving
         self.last_received_seq = -1  # Last correctly received frame
@@ -33,21 +45,67 @@ class EndDevices:
         
         # Create checksum handler as an instance variable
         from checksum_for_datalink import ChecksumForDataLink
-        self.checksum_handler = ChecksumForDataLink()
+        self.checksum_handler = ChecksumForDataLink(rng=get_rng(f"device/{name}/datalink"))
         
         # Transmission status
         self.transmission_complete = False
         self.retransmission_count = 0
         self.max_retransmissions = 3
     
+    @property
+    def IP(self):
+        """IP address; changing it updates the address registry"""
+        return self._IP
+    
+    @IP.setter
+    def IP(self, ip):
+        self.registry.update_ip(self, self._IP, ip)
+        if self._IP is not None:
+            self.ARP_cache.remove(self._IP)
+        if ip is not None:
+            self.ARP_cache.add(ip, self._MAC, permanent=True)
+        self._IP = ip
+    
+    @property
+    def MAC(self):
+        """MAC address; changing it updates the address registry"""
+        return self._MAC
+    
+    @MAC.setter
+    def MAC(self, mac):
+        self.registry.update_mac(self, self._MAC, mac)
+        if self._IP is not None:
+            self.ARP_cache.add(self._IP, mac, permanent=True)
+        self._MAC = mac
+    
+    @property
+    def channel(self):
+        """Channel model that corrupts received frames instead of error_probability (see channel_model)"""
+        return self.checksum_handler.channel
+    
+    @channel.setter
+    def channel(self, channel):
+        self.checksum_handler.channel = channel
+    
+    def unregister(self):
+        """Remove this device from the address registry"""
+        self.registry.unregister(self, self._IP, self._MAC)
+    
     def send_ARP_request(self, receiver):
         """
-        Send ARP request to a receiver device
+        Resolve a receiver's MAC address, sending an ARP request only on a cache miss
         
         Args:
             receiver (EndDevices): The receiver device
+            
+        Returns:
+            int: MAC address of the receiver
         """
-        self.ARP_cache[receiver.get_mac()] = receiver.IP
+        mac = self.ARP_cache.lookup(receiver.IP)
+        if mac is None:
+            mac = receiver.get_mac()
+            self.ARP_cache.add(receiver.IP, mac)
+        return mac
     
     def get_mac(self):
         """Get MAC address of this device"""
@@ -62,13 +120,19 @@ class EndDevices:
         Set data for this device (used for the application layer)
         
         Args:
-            d (str): Data for the device
+            d (str or bytes): Data for the device, or a frame that is already built
         """
-        print(f"[DEVICE {self.device_name}] ▶ Application layer: Setting data")
+        _log.info("[DEVICE {}] ▶ Application layer: Setting data", self.device_name)
         self.raw_data = d
         
+        # A frame built by an upper layer is sent as is instead of being framed again
+        if is_frame(d):
+            _log.info("[DEVICE {}] ✓ Frame ready for transmission", self.device_name)
+            self.data = d
+            return
+        
         # Apply data link layer processing (checksum)
-        print(f"[DEVICE {self.device_name}] ▶ Data link layer: Applying checksum with Go-Back-N protocol")
+        _log.info("[DEVICE {}] ▶ Data link layer: Applying checksum with Go-Back-N protocol", self.device_name)
         
         # Generate frame with correct sequence number
         self.data = self.checksum_handler.sender_code(d, self.current_seq_num)
@@ -79,7 +143,7 @@ class EndDevices:
         # Advance sequence number for next frame
         self.current_seq_num = (self.current_seq_num + 1) % 10
         
-        print(f"[DEVICE {self.device_name}] ✓ Frame ready for transmission")
+        _log.info("[DEVICE {}] ✓ Frame ready for transmission", self.device_name)
         self.checksum_handler.print_window_status()
     
     def get_data(self):
@@ -91,41 +155,38 @@ class EndDevices:
         Set data for receiving at physical layer, then process at data link layer
         
         Args:
-            d (str): Data to be received
+            d (bytes or str): Frame to be received
         """
         # PHYSICAL LAYER - Just receives the raw bits, no checking
-        print(f"\n[DEVICE {self.device_name}] === RECEIVING DATA THROUGH NETWORK LAYERS ===")
-        print(f"[DEVICE {self.device_name}] ▶ PHYSICAL LAYER: Received frame")
+        _log.info("\n[DEVICE {}] === RECEIVING DATA THROUGH NETWORK LAYERS ===", self.device_name)
+        _log.info("[DEVICE {}] ▶ PHYSICAL LAYER: Received frame", self.device_name)
         self.raw_data = d
         
         # DATA LINK LAYER - Apply error detection
-        print(f"[DEVICE {self.device_name}] ▶ DATA LINK LAYER: Processing frame with Go-Back-N protocol")
-        
-        # Use a controlled probability for bit flipping (e.g., 30% chance)
-        error_probability = 0.3
+        _log.info("[DEVICE {}] ▶ DATA LINK LAYER: Processing frame with Go-Back-N protocol", self.device_name)
         
         # Possibly modify the data (simulate transmission errors)
-        modified_data = self.checksum_handler.receiver_code(d, error_probability)
+        modified_data = self.checksum_handler.receiver_code(d, self.error_probability)
         
         # Verify the checksum and extract sequence number and data
         is_valid, seq_num, frame_data = self.checksum_handler.verify_frame(modified_data)
         
         if not is_valid or seq_num == -1:
-            print(f"[DEVICE {self.device_name}] ❌ DATA LINK LAYER: Checksum verification failed")
+            _log.error("[DEVICE {}] ❌ DATA LINK LAYER: Checksum verification failed", self.device_name)
             if seq_num != -1:
-                print(f"[DEVICE {self.device_name}] ❌ Frame {seq_num} will be discarded")
+                _log.error("[DEVICE {}] ❌ Frame {} will be discarded", self.device_name, seq_num)
                 # In Go-Back-N, we send NAK for the expected frame
                 self.ACKorNAK = f"NAK{self.expected_seq_num}"
-                print(f"[DEVICE {self.device_name}] ❌ Sending NAK{self.expected_seq_num}")
+                _log.error("[DEVICE {}] ❌ Sending NAK{}", self.device_name, self.expected_seq_num)
             else:
-                print(f"[DEVICE {self.device_name}] ❌ Invalid frame format, cannot identify sequence number")
+                _log.error("[DEVICE {}] ❌ Invalid frame format, cannot identify sequence number", self.device_name)
                 self.ACKorNAK = f"NAK{self.expected_seq_num}"  # NAK with expected sequence number
         else:
-            print(f"[DEVICE {self.device_name}] ✓ DATA LINK LAYER: Checksum verification passed")
+            _log.info("[DEVICE {}] ✓ DATA LINK LAYER: Checksum verification passed", self.device_name)
             
             # Go-Back-N protocol implementation
             if seq_num == self.expected_seq_num:
-                print(f"[DEVICE {self.device_name}] ✓ Received expected frame {seq_num}")
+                _log.info("[DEVICE {}] ✓ Received expected frame {}", self.device_name, seq_num)
                 
                 # Store the valid data
                 self.received_frames[seq_num] = frame_data
@@ -135,26 +196,26 @@ class EndDevices:
                 self.expected_seq_num = (self.expected_seq_num + 1) % 10
                 self.ACKorNAK = f"ACK{seq_num}"
                 
-                print(f"[DEVICE {self.device_name}] ✓ Sending ACK{seq_num}")
-                print(f"[DEVICE {self.device_name}] ✓ Next expecting frame {self.expected_seq_num}")
+                _log.info("[DEVICE {}] ✓ Sending ACK{}", self.device_name, seq_num)
+                _log.info("[DEVICE {}] ✓ Next expecting frame {}", self.device_name, self.expected_seq_num)
             else:
-                print(f"[DEVICE {self.device_name}] ⚠ Received out-of-order frame {seq_num}, expected {self.expected_seq_num}")
+                _log.warning("[DEVICE {}] ⚠ Received out-of-order frame {}, expected {}", self.device_name, seq_num, self.expected_seq_num)
                 # In Go-Back-N, we discard out-of-order frames and send ACK for the last in-order frame received
                 if self.last_received_seq >= 0:
                     self.ACKorNAK = f"ACK{self.last_received_seq}"
-                    print(f"[DEVICE {self.device_name}] ⚠ Sending cumulative ACK{self.last_received_seq}")
+                    _log.warning("[DEVICE {}] ⚠ Sending cumulative ACK{}", self.device_name, self.last_received_seq)
                 else:
                     self.ACKorNAK = f"NAK{self.expected_seq_num}"
-                    print(f"[DEVICE {self.device_name}] ⚠ No frames received yet, sending NAK{self.expected_seq_num}")
+                    _log.warning("[DEVICE {}] ⚠ No frames received yet, sending NAK{}", self.device_name, self.expected_seq_num)
         
         # Store the data regardless of validity - upper layer will handle errors
         self.data = modified_data
         
         # Extract actual message to pass to the network layer
         if is_valid and seq_num == self.expected_seq_num - 1 or (self.expected_seq_num == 0 and seq_num == 9):
-            print(f"[DEVICE {self.device_name}] ▶ NETWORK LAYER: Processing message: {frame_data}")
+            _log.info("[DEVICE {}] ▶ NETWORK LAYER: Processing message: {}", self.device_name, frame_data)
         else:
-            print(f"[DEVICE {self.device_name}] ⚠ NETWORK LAYER: Frame not passed to network layer")
+            _log.warning("[DEVICE {}] ⚠ NETWORK LAYER: Frame not passed to network layer", self.device_name)
     
     def process_acknowledgment(self):
         """
@@ -168,28 +229,28 @@ class EndDevices:
         if self.ACKorNAK.startswith("ACK"):
             # Process ACK
             acked_frames = self.checksum_handler.process_ack(self.ACKorNAK)
-            print(f"[DEVICE {self.device_name}] ✓ Processed ACK: {self.ACKorNAK}")
+            _log.info("[DEVICE {}] ✓ Processed ACK: {}", self.device_name, self.ACKorNAK)
             self.checksum_handler.print_window_status()
             self.retransmission_count = 0  # Reset retransmission counter
             
             # Check if transmission is complete
             if len(self.frame_buffer) == 0:
                 self.transmission_complete = True
-                print(f"[DEVICE {self.device_name}] ✓ All frames acknowledged, transmission complete")
+                _log.info("[DEVICE {}] ✓ All frames acknowledged, transmission complete", self.device_name)
                 
         elif self.ACKorNAK.startswith("NAK"):
             # Process NAK
             to_retransmit = self.checksum_handler.handle_nak(self.ACKorNAK)
-            print(f"[DEVICE {self.device_name}] ⚠ Processed NAK: {self.ACKorNAK}")
-            print(f"[DEVICE {self.device_name}] ⚠ Will retransmit frames: {to_retransmit}")
+            _log.warning("[DEVICE {}] ⚠ Processed NAK: {}", self.device_name, self.ACKorNAK)
+            _log.warning("[DEVICE {}] ⚠ Will retransmit frames: {}", self.device_name, to_retransmit)
             
             # Increment retransmission counter
             self.retransmission_count += 1
-            print(f"[DEVICE {self.device_name}] ⚠ Retransmission attempt {self.retransmission_count} of {self.max_retransmissions}")
+            _log.warning("[DEVICE {}] ⚠ Retransmission attempt {} of {}", self.device_name, self.retransmission_count, self.max_retransmissions)
             
             # Check if we've reached max retransmissions
             if self.retransmission_count >= self.max_retransmissions:
-                print(f"[DEVICE {self.device_name}] ❌ Max retransmissions reached, transmission failed")
+                _log.error("[DEVICE {}] ❌ Max retransmissions reached, transmission failed", self.device_name)
                 self.transmission_complete = True  # Mark as complete even though it failed
             
         return to_retransmit
@@ -205,23 +266,23 @@ class EndDevices:
             str: The first retransmitted frame (for simulation purposes)
         """
         if not seq_nums_to_retransmit:
-            print(f"[DEVICE {self.device_name}] ⚠ No frames to retransmit")
+            _log.warning("[DEVICE {}] ⚠ No frames to retransmit", self.device_name)
             return None
         
         # For simulation purposes, we'll just retransmit the first frame in the list
         seq_num = seq_nums_to_retransmit[0]
         if seq_num not in self.frame_buffer:
-            print(f"[DEVICE {self.device_name}] ⚠ Cannot retransmit frame {seq_num} - not in buffer")
+            _log.warning("[DEVICE {}] ⚠ Cannot retransmit frame {} - not in buffer", self.device_name, seq_num)
             return None
             
         data = self.frame_buffer[seq_num]
-        print(f"[DEVICE {self.device_name}] ▶ Retransmitting frame {seq_num}")
+        _log.info("[DEVICE {}] ▶ Retransmitting frame {}", self.device_name, seq_num)
         
         # Regenerate the frame with the sequence number
         retransmitted_frame = self.checksum_handler.sender_code(data, seq_num)
         self.data = retransmitted_frame
         
-        print(f"[DEVICE {self.device_name}] ▶ Frame {seq_num} ready for retransmission")
+        _log.info("[DEVICE {}] ▶ Frame {} ready for retransmission", self.device_name, seq_num)
         return retransmitted_frame
     
     def send_data_and_address_to_hub(self, hub):
@@ -233,7 +294,7 @@ class EndDevices:
         """
         hub.sender_address = self.MAC
         hub.receive_data_from_sender(self.data)
-        print(f"[DEVICE {self.device_name}] ▶ Sending data to Hub {hub.get_hub_number()}")
+        _log.info("[DEVICE {}] ▶ Sending data to Hub {}", self.device_name, hub.get_hub_number())
     
     def send_data_to_receiver(self, receiver):
         """
@@ -248,20 +309,20 @@ class EndDevices:
         # DATA LINK LAYER - Already handled by set_data() for the sender
         # PHYSICAL LAYER - Raw bit transmission
         
-        print(f"[DEVICE {self.device_name}] === SENDING DATA THROUGH NETWORK LAYERS ===")
-        print(f"[DEVICE {self.device_name}] ▶ APPLICATION LAYER: Data ready for transmission")
-        print(f"[DEVICE {self.device_name}] ▶ TRANSPORT LAYER: Preparing segments")
-        print(f"[DEVICE {self.device_name}] ▶ NETWORK LAYER: Preparing datagram with destination IP {receiver.IP}")
-        print(f"[DEVICE {self.device_name}] ▶ DATA LINK LAYER: Framing with destination MAC {receiver.get_mac()}")
-        print(f"[DEVICE {self.device_name}] ▶ PHYSICAL LAYER: Sending bits to {receiver.get_device_name()}")
+        _log.info("[DEVICE {}] === SENDING DATA THROUGH NETWORK LAYERS ===", self.device_name)
+        _log.info("[DEVICE {}] ▶ APPLICATION LAYER: Data ready for transmission", self.device_name)
+        _log.info("[DEVICE {}] ▶ TRANSPORT LAYER: Preparing segments", self.device_name)
+        _log.info("[DEVICE {}] ▶ NETWORK LAYER: Preparing datagram with destination IP {}", self.device_name, receiver.IP)
+        _log.info("[DEVICE {}] ▶ DATA LINK LAYER: Framing with destination MAC {}", self.device_name, receiver.get_mac())
+        _log.info("[DEVICE {}] ▶ PHYSICAL LAYER: Sending bits to {}", self.device_name, receiver.get_device_name())
         
         # Send the physical layer bits to the receiver
         receiver.set_receiver_data(self.data)
         
         # In a real implementation, we'd wait for ACK here
-        print(f"[DEVICE {self.device_name}] ▶ Waiting for acknowledgment...")
+        _log.info("[DEVICE {}] ▶ Waiting for acknowledgment...", self.device_name)
         ack = receiver.ACKorNAK
-        print(f"[DEVICE {self.device_name}] ▶ Received: {ack}")
+        _log.info("[DEVICE {}] ▶ Received: {}", self.device_name, ack)
         self.ACKorNAK = ack  # Store the received ACK/NAK
         
         # Process the acknowledgment and get frames to retransmit
@@ -271,10 +332,10 @@ class EndDevices:
         if frames_to_retransmit:
             retransmitted_frame = self.retransmit_frames(frames_to_retransmit)
             if retransmitted_frame:
-                print(f"[DEVICE {self.device_name}] ▶ Retransmitting to {receiver.get_device_name()}")
+                _log.info("[DEVICE {}] ▶ Retransmitting to {}", self.device_name, receiver.get_device_name())
                 self.send_data_to_receiver(receiver)
         
-        print(f"[DEVICE {self.device_name}] ✓ Data transmission process completed")
+        _log.info("[DEVICE {}] ✓ Data transmission process completed", self.device_name)
     
     def get_device_name(self):
         """Get the name of this device"""
@@ -289,10 +350,10 @@ class EndDevices:
             sender_device (EndDevices): The sender device
         """
         if check_error:
-            print(f"[DEVICE {self.device_name}] ❌ Sending NAK{self.expected_seq_num} to {sender_device.get_device_name()}")
+            _log.error("[DEVICE {}] ❌ Sending NAK{} to {}", self.device_name, self.expected_seq_num, sender_device.get_device_name())
             sender_device.ACKorNAK = f"NAK{self.expected_seq_num}"
         else:
-            print(f"[DEVICE {self.device_name}] ✓ Sending ACK{self.last_received_seq} to {sender_device.get_device_name()}")
+            _log.info("[DEVICE {}] ✓ Sending ACK{} to {}", self.device_name, self.last_received_seq, sender_device.get_device_name())
             sender_device.ACKorNAK = f"ACK{self.last_received_seq}"
             
     def is_transmission_complete(self):
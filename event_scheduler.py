@@ -0,0 +1,211 @@
+"""
+Discrete-event simulation kernel for Network Simulator
+Keeps a virtual clock and a priority queue of timestamped events so that
+delays, backoffs and timeouts advance simulated time instead of wall-clock time
+"""
+
+import heapq
+import itertools
+
+
+class Event:
+    """A scheduled callback on the simulation clock"""
+
+    __slots__ = ("time", "callback", "args", "cancelled")
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancel this event so it is skipped when its time comes"""
+        self.cancelled = True
+
+
+class EventScheduler:
+    """
+    Discrete-event scheduler with a virtual clock
+
+    Events are kept in a heap ordered by (time, insertion order), so events
+    scheduled for the same instant run in the order they were scheduled and
+    every run is reproducible.
+    """
+
+    def __init__(self, start_time=0.0):
+        """
+        Initialize the scheduler
+
+        Args:
+            start_time (float): Initial value of the virtual clock in seconds
+        """
+        self.now = start_time
+        self._queue = []
+        self._counter = itertools.count()
+        self.events_processed = 0
+
+    def schedule(self, delay, callback, *args):
+        """
+        Schedule a callback to run after a delay
+
+        Args:
+            delay (float): Delay in simulated seconds (must be >= 0)
+            callback (callable): Function to call when the event fires
+            *args: Positional arguments passed to the callback
+
+        Returns:
+            Event: Handle that can be used to cancel the event
+        """
+        if delay < 0:
+            raise ValueError(f"Cannot schedule an event in the past (delay={delay})")
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    def schedule_at(self, time, callback, *args):
+        """
+        Schedule a callback at an absolute simulation time
+
+        Args:
+            time (float): Absolute simulated time in seconds
+            callback (callable): Function to call when the event fires
+            *args: Positional arguments passed to the callback
+
+        Returns:
+            Event: Handle that can be used to cancel the event
+        """
+        if time < self.now:
+            raise ValueError(f"Cannot schedule an event in the past (time={time}, now={self.now})")
+        event = Event(time, callback, args)
+        heapq.heappush(self._queue, (time, next(self._counter), event))
+        return event
+
+    def cancel(self, event):
+        """
+        Cancel a previously scheduled event
+
+        Args:
+            event (Event): Event handle returned by schedule()
+        """
+        if event is not None:
+            event.cancel()
+
+    def peek_time(self):
+        """
+        Get the time of the next pending event
+
+        Returns:
+            float: Time of the next event, or None if the queue is empty
+        """
+        queue = self._queue
+        while queue and queue[0][2].cancelled:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    def step(self):
+        """
+        Run the next pending event
+
+        Returns:
+            bool: True if an event was run, False if the queue is empty
+        """
+        queue = self._queue
+        while queue:
+            time, _, event = heapq.heappop(queue)
+            if event.cancelled:
+                continue
+            self.now = time
+            self.events_processed += 1
+            event.callback(*event.args)
+            return True
+        return False
+
+    def run(self, until=None, max_events=None):
+        """
+        Run events in timestamp order
+
+        Args:
+            until (float, optional): Stop once the clock would pass this time;
+                the clock is left at exactly this time
+            max_events (int, optional): Maximum number of events to run
+
+        Returns:
+            int: Number of events run
+        """
+        queue = self._queue
+        heappop = heapq.heappop
+        count = 0
+        while queue:
+            if max_events is not None and count >= max_events:
+                return count
+            time, _, event = queue[0]
+            if until is not None and time > until:
+                break
+            heappop(queue)
+            if event.cancelled:
+                continue
+            self.now = time
+            event.callback(*event.args)
+            count += 1
+        self.events_processed += count
+        if until is not None and until > self.now:
+            self.now = until
+        return count
+
+    def sleep(self, delay):
+        """
+        Advance the virtual clock by a delay, running any events that fall due
+
+        This is the drop-in replacement for time.sleep() in synchronous code paths.
+
+        Args:
+            delay (float): Delay in simulated seconds
+
+        Returns:
+            float: The new simulation time
+        """
+        if delay > 0:
+            self.run(until=self.now + delay)
+        return self.now
+
+    def pending_events(self):
+        """Get the number of events still queued (including cancelled ones)"""
+        return len(self._queue)
+
+    def reset(self, start_time=0.0):
+        """
+        Drop all pending events and reset the clock
+
+        Args:
+            start_time (float): New value of the virtual clock
+        """
+        self._queue.clear()
+        self._counter = itertools.count()
+        self.now = start_time
+        self.events_processed = 0
+
+
+_default_scheduler = EventScheduler()
+
+
+def get_scheduler():
+    """
+    Get the shared simulation scheduler
+
+    Returns:
+        EventScheduler: The process-wide default scheduler
+    """
+    return _default_scheduler
+
+
+def set_scheduler(scheduler):
+    """
+    Replace the shared simulation scheduler
+
+    Components pick up the shared scheduler when they are created, so this
+    should be called before building a topology.
+
+    Args:
+        scheduler (EventScheduler): Scheduler to use from now on
+    """
+    global _default_scheduler
+    _default_scheduler = scheduler
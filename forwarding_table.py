@@ -0,0 +1,411 @@
+"""
+Forwarding information base (FIB) for Network Simulator routers
+Longest-prefix match over integer IPv4 addresses at any prefix length, with a
+vectorized batch lookup, shared by router.Router and network_topology.Router
+"""
+
+import time
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch lookups fall back to a loop
+    np = None
+
+
+def ip_to_int(ip):
+    """
+    Convert a dotted-quad IPv4 address to an integer
+
+    Args:
+        ip (str or int): Address such as "192.168.1.10"; a "/len" suffix is ignored
+
+    Returns:
+        int: 32-bit address
+    """
+    if isinstance(ip, int):
+        return ip
+    a, b, c, d = ip.split("/", 1)[0].split(".")
+    return (int(a) << 24) | (int(b) << 16) | (int(c) << 8) | int(d)
+
+
+def int_to_ip(value):
+    """
+    Convert an integer to a dotted-quad IPv4 address
+
+    Args:
+        value (int): 32-bit address
+
+    Returns:
+        str: Dotted-quad address
+    """
+    return f"{(value >> 24) & 0xFF}.{(value >> 16) & 0xFF}.{(value >> 8) & 0xFF}.{value & 0xFF}"
+
+
+def prefix_mask(length):
+    """Netmask for a prefix length as an integer"""
+    return (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+
+
+@lru_cache(maxsize=65536)
+def parse_prefix(prefix):
+    """
+    Parse a network prefix
+
+    Results are cached since routing protocols rewrite the same prefixes over
+    and over while converging.
+
+    Prefixes without "/len" get their length from the trailing zero octets,
+    matching the classful network IDs routers are created with ("10.0.0.0" is
+    10.0.0.0/8, "192.168.1.0" is 192.168.1.0/24, a host address is /32).
+
+    Args:
+        prefix (str): Prefix such as "10.1.0.0/16" or "20.0.0.0"
+
+    Returns:
+        tuple: (network as int, prefix length)
+    """
+    if "/" in prefix:
+        address, length = prefix.split("/", 1)
+        length = int(length)
+        if not 0 <= length <= 32:
+            raise ValueError(f"Invalid prefix length in {prefix}")
+    else:
+        address = prefix
+        octets = address.split(".")
+        length = 32
+        while length and octets[length // 8 - 1] == "0":
+            length -= 8
+    return ip_to_int(address) & prefix_mask(length), length
+
+
+@lru_cache(maxsize=65536)
+def normalize_prefix(prefix):
+    """
+    Spell a prefix the one way routing tables store it
+
+    Args:
+        prefix (str): Prefix such as "10.0.0.0" or "10.1.2.3/16"
+
+    Returns:
+        str: "network/length" with the host bits cleared, e.g. "10.0.0.0/8"
+    """
+    network, length = parse_prefix(prefix)
+    return f"{int_to_ip(network)}/{length}"
+
+
+class ForwardingTable:
+    """
+    Longest-prefix-match forwarding table
+
+    Prefixes are kept in one hash table per prefix length. A lookup masks the
+    address with each populated length, longest first, and stops at the first
+    hit, so it costs at most one dict probe per distinct prefix length in use.
+    Batch lookups do the same with NumPy over sorted per-length arrays.
+    """
+
+    def __init__(self):
+        """Initialize an empty table"""
+        self._tables = {}  # prefix length -> {network int: (prefix, route)}
+        self._lengths = []  # Populated prefix lengths, longest first, with their masks
+        self._batch_index = None  # Sorted arrays for lookup_batch(), rebuilt after changes
+
+    def insert(self, prefix, route):
+        """
+        Add or replace a route
+
+        Args:
+            prefix (str): Destination prefix, e.g. "10.1.0.0/16"
+            route: Route information returned by lookups (e.g. a routing table entry)
+        """
+        network, length = parse_prefix(prefix)
+        table = self._tables.get(length)
+        if table is None:
+            table = self._tables[length] = {}
+            self._update_lengths()
+        table[network] = (prefix, route)
+        self._batch_index = None
+
+    def remove(self, prefix):
+        """
+        Remove a route
+
+        Args:
+            prefix (str): Destination prefix
+
+        Returns:
+            bool: True if the route existed
+        """
+        network, length = parse_prefix(prefix)
+        table = self._tables.get(length)
+        if table is None or network not in table:
+            return False
+        del table[network]
+        if not table:
+            del self._tables[length]
+            self._update_lengths()
+        self._batch_index = None
+        return True
+
+    def clear(self):
+        """Remove all routes"""
+        self._tables.clear()
+        self._lengths = []
+        self._batch_index = None
+
+    def _update_lengths(self):
+        """Refresh the list of populated prefix lengths"""
+        self._lengths = [(length, prefix_mask(length)) for length in sorted(self._tables, reverse=True)]
+
+    def lookup_entry(self, ip):
+        """
+        Find the longest matching prefix for an address
+
+        Args:
+            ip (str or int): Destination address
+
+        Returns:
+            tuple: (prefix, route), or None if no prefix matches
+        """
+        address = ip_to_int(ip)
+        tables = self._tables
+        for length, mask in self._lengths:
+            entry = tables[length].get(address & mask)
+            if entry is not None:
+                return entry
+        return None
+
+    def lookup(self, ip):
+        """
+        Find the route for an address by longest-prefix match
+
+        Args:
+            ip (str or int): Destination address
+
+        Returns:
+            The matching route, or None if no prefix matches
+        """
+        entry = self.lookup_entry(ip)
+        return entry[1] if entry is not None else None
+
+    def _build_batch_index(self):
+        """Build sorted network arrays per prefix length for lookup_batch()"""
+        index = []
+        entries = []
+        for length, mask in self._lengths:
+            table = self._tables[length]
+            networks = np.fromiter(table.keys(), dtype=np.uint32, count=len(table))
+            order = np.argsort(networks)
+            slots = np.arange(len(entries), len(entries) + len(table), dtype=np.int64)[order]
+            entries.extend(route for _, route in table.values())
+            index.append((np.uint32(mask), networks[order], slots))
+        # The extra None at the end is what unmatched addresses (slot -1) pick up
+        routes = np.empty(len(entries) + 1, dtype=object)
+        routes[:len(entries)] = entries
+        self._batch_index = (index, routes)
+        return self._batch_index
+
+    def lookup_batch(self, ips):
+        """
+        Look up many addresses at once
+
+        Args:
+            ips (list or numpy.ndarray): Destination addresses as strings or ints
+
+        Returns:
+            list: Matching route (or None) for each address, in order
+        """
+        if np is None:
+            return [self.lookup(ip) for ip in ips]
+
+        if isinstance(ips, np.ndarray):
+            addresses = ips.astype(np.uint32, copy=False)
+        elif ips and isinstance(ips[0], str):
+            addresses = np.fromiter(map(ip_to_int, ips), dtype=np.uint32, count=len(ips))
+        else:
+            addresses = np.array(ips, dtype=np.uint32)
+        index, routes = self._batch_index or self._build_batch_index()
+        # Masking keeps sorted addresses sorted, so sort once and every
+        # searchsorted() below walks its table in order
+        order = np.argsort(addresses, kind="stable")
+        addresses = addresses[order]
+        match = np.full(len(addresses), -1, dtype=np.int64)
+        unmatched = np.ones(len(addresses), dtype=bool)
+
+        for mask, networks, slots in index:
+            if not unmatched.any():
+                break
+            masked = addresses & mask
+            positions = np.minimum(np.searchsorted(networks, masked), len(networks) - 1)
+            hit = unmatched & (networks[positions] == masked)
+            match[hit] = slots[positions[hit]]
+            unmatched &= ~hit
+
+        result = np.empty(len(addresses), dtype=np.int64)
+        result[order] = match
+        return routes[result].tolist()
+
+    def __len__(self):
+        return sum(len(table) for table in self._tables.values())
+
+    def __contains__(self, prefix):
+        network, length = parse_prefix(prefix)
+        return network in self._tables.get(length, ())
+
+    def items(self):
+        """
+        Iterate over all routes, longest prefixes first
+
+        Returns:
+            generator: (prefix, route) pairs
+        """
+        for length, _ in self._lengths:
+            yield from self._tables[length].values()
+
+
+class RoutingTable(dict):
+    """
+    Routing table dictionary that keeps a ForwardingTable in sync
+
+    Behaves like the plain {network: route} dictionaries the routers used so
+    far, so existing code can keep reading and assigning entries, while
+    lookup() does a longest-prefix match through the FIB.
+
+    Keys are stored in normalize_prefix() form, and every access normalizes
+    its key the same way, so "10.0.0.0" and "10.0.0.0/8" are one entry.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.fib = ForwardingTable()
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        # Rebuild through __init__ so the FIB exists before any entry is set
+        return self.__class__, (dict(self),)
+
+    def __setitem__(self, prefix, route):
+        prefix = normalize_prefix(prefix)
+        self.fib.insert(prefix, route)
+        super().__setitem__(prefix, route)
+
+    def __getitem__(self, prefix):
+        return super().__getitem__(normalize_prefix(prefix))
+
+    def __contains__(self, prefix):
+        return isinstance(prefix, str) and super().__contains__(normalize_prefix(prefix))
+
+    def __delitem__(self, prefix):
+        prefix = normalize_prefix(prefix)
+        super().__delitem__(prefix)
+        self.fib.remove(prefix)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def copy(self):
+        return self.__class__(self)
+
+    def get(self, prefix, default=None):
+        return super().get(normalize_prefix(prefix), default)
+
+    def update(self, *args, **kwargs):
+        for prefix, route in dict(*args, **kwargs).items():
+            self[prefix] = route
+
+    def setdefault(self, prefix, route=None):
+        if prefix not in self:
+            self[prefix] = route
+        return self[prefix]
+
+    def pop(self, prefix, *default):
+        prefix = normalize_prefix(prefix)
+        if super().__contains__(prefix):
+            self.fib.remove(prefix)
+        return super().pop(prefix, *default)
+
+    def popitem(self):
+        prefix, route = super().popitem()
+        self.fib.remove(prefix)
+        return prefix, route
+
+    def clear(self):
+        super().clear()
+        self.fib.clear()
+
+    def lookup(self, ip):
+        """
+        Find the route for an address by longest-prefix match
+
+        Args:
+            ip (str or int): Destination address
+
+        Returns:
+            dict: Matching route entry, or None
+        """
+        return self.fib.lookup(ip)
+
+    def lookup_entry(self, ip):
+        """
+        Find the longest matching prefix and its route
+
+        Args:
+            ip (str or int): Destination address
+
+        Returns:
+            tuple: (prefix, route), or None
+        """
+        return self.fib.lookup_entry(ip)
+
+    def lookup_batch(self, ips):
+        """
+        Look up many addresses at once
+
+        Args:
+            ips (list): Destination addresses
+
+        Returns:
+            list: Matching route entry (or None) for each address
+        """
+        return self.fib.lookup_batch(ips)
+
+
+def benchmark_lookups(num_prefixes=10000, num_lookups=200000, seed=1):
+    """
+    Measure lookup throughput on a random table
+
+    Args:
+        num_prefixes (int): Number of random prefixes (/8 to /32)
+        num_lookups (int): Number of random addresses to look up
+
+    Returns:
+        dict: Lookups per second for single and batch lookups
+    """
+    import random
+    rng = random.Random(seed)
+    table = ForwardingTable()
+    for i in range(num_prefixes):
+        length = rng.choice((8, 16, 20, 24, 24, 24, 28, 32))
+        network = rng.getrandbits(32) & prefix_mask(length)
+        table.insert(f"{int_to_ip(network)}/{length}", i)
+    addresses = [rng.getrandbits(32) for _ in range(num_lookups)]
+
+    start = time.perf_counter()
+    lookup = table.lookup
+    for address in addresses:
+        lookup(address)
+    single = num_lookups / (time.perf_counter() - start)
+
+    table.lookup_batch(addresses[:1])  # Build the batch index outside the timing
+    start = time.perf_counter()
+    table.lookup_batch(addresses)
+    batch = num_lookups / (time.perf_counter() - start)
+
+    return {"single_lookups_per_sec": single, "batch_lookups_per_sec": batch}
+
+
+if __name__ == "__main__":
+    results = benchmark_lookups()
+    print(f"[FIB] Single lookups: {results['single_lookups_per_sec'] / 1e6:.2f} M/s")
+    print(f"[FIB] Batch lookups:  {results['batch_lookups_per_sec'] / 1e6:.2f} M/s")
@@ -0,0 +1,189 @@
+"""
+Binary frame format for Network Simulator
+A fixed 12-byte header packed with struct, followed by the payload. Header fields
+and the payload are read through memoryviews, so a frame can be passed from layer
+to layer and hop to hop as the same buffer without being split or rebuilt.
+
+Header layout (network byte order):
+    offset 0   version      uint8
+    offset 1   flags        uint8
+    offset 2   ttl          uint8
+    offset 3   reserved     uint8
+    offset 4   seq_num      uint32
+    offset 8   length       uint16  (payload length in bytes)
+    offset 10  checksum     uint16  (RFC 1071 over header and payload)
+"""
+
+import struct
+from internet_checksum import internet_checksum, update_checksum, verify_checksum
+
+FRAME_VERSION = 1
+DEFAULT_TTL = 64
+
+HEADER = struct.Struct("!BBBBIHH")
+HEADER_SIZE = HEADER.size
+MAX_PAYLOAD = 0xFFFF
+
+_TTL_WORD = struct.Struct("!H")  # TTL shares a 16-bit checksum word with the reserved byte
+_SEQ = struct.Struct("!I")
+_LENGTH = struct.Struct("!H")
+_TTL_OFFSET = 2
+_SEQ_OFFSET = 4
+_LENGTH_OFFSET = 8
+_CHECKSUM_OFFSET = 10
+
+
+def build_frame(payload, seq_num, flags=0, ttl=DEFAULT_TTL):
+    """
+    Build a binary frame around a payload
+
+    Args:
+        payload (bytes, bytearray, memoryview or str): Payload; strings are UTF-8 encoded
+        seq_num (int): Sequence number (stored as uint32)
+        flags (int): Frame flags (uint8)
+        ttl (int): Initial time to live (uint8)
+
+    Returns:
+        bytes: The frame
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    length = len(payload)
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Payload of {length} bytes does not fit in a frame (max {MAX_PAYLOAD})")
+
+    frame = bytearray(HEADER_SIZE + length)
+    HEADER.pack_into(frame, 0, FRAME_VERSION, flags, ttl, 0, seq_num & 0xFFFFFFFF, length, 0)
+    frame[HEADER_SIZE:] = payload
+    checksum = internet_checksum(frame)
+    frame[_CHECKSUM_OFFSET:HEADER_SIZE] = checksum.to_bytes(2, "big")
+    return bytes(frame)
+
+
+def is_frame(data):
+    """
+    Check if an object holds a binary frame (as opposed to a legacy string frame)
+
+    Args:
+        data: Object to check
+
+    Returns:
+        bool: True if data is a bytes-like object with a valid frame header
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)) or len(data) < HEADER_SIZE:
+        return False
+    return data[0] == FRAME_VERSION and HEADER_SIZE + _LENGTH.unpack_from(data, _LENGTH_OFFSET)[0] == len(data)
+
+
+class Frame:
+    """
+    Zero-copy view of a binary frame
+
+    Header fields are unpacked on access straight from the underlying buffer,
+    and the payload is a memoryview slice of it.
+    """
+
+    __slots__ = ("buffer", "view")
+
+    def __init__(self, buffer):
+        """
+        Wrap a frame buffer
+
+        Args:
+            buffer (bytes, bytearray or memoryview): Frame data; use a bytearray
+                for frames whose TTL will be decremented in place
+        """
+        if len(buffer) < HEADER_SIZE:
+            raise ValueError(f"Frame too short: {len(buffer)} bytes (header is {HEADER_SIZE})")
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+    @property
+    def version(self):
+        """Frame format version"""
+        return self.view[0]
+
+    @property
+    def flags(self):
+        """Frame flags"""
+        return self.view[1]
+
+    @property
+    def ttl(self):
+        """Remaining time to live"""
+        return self.view[_TTL_OFFSET]
+
+    @property
+    def seq_num(self):
+        """Sequence number"""
+        return _SEQ.unpack_from(self.view, _SEQ_OFFSET)[0]
+
+    @property
+    def payload_length(self):
+        """Payload length from the header"""
+        return _LENGTH.unpack_from(self.view, _LENGTH_OFFSET)[0]
+
+    @property
+    def checksum(self):
+        """Checksum from the header"""
+        return _LENGTH.unpack_from(self.view, _CHECKSUM_OFFSET)[0]
+
+    @property
+    def payload(self):
+        """Payload as a memoryview slice of the frame (no copy)"""
+        return self.view[HEADER_SIZE:HEADER_SIZE + self.payload_length]
+
+    def payload_text(self):
+        """
+        Decode the payload as text
+
+        Returns:
+            str: Payload decoded as UTF-8 (undecodable bytes are replaced)
+        """
+        return str(self.payload, "utf-8", "replace")
+
+    def is_well_formed(self):
+        """
+        Check the header against the buffer
+
+        Returns:
+            bool: True if the version is known and the length field matches the buffer
+        """
+        return self.version == FRAME_VERSION and HEADER_SIZE + self.payload_length == len(self.view)
+
+    def verify(self):
+        """
+        Verify the frame checksum
+
+        Returns:
+            bool: True if the frame is well formed and its checksum is correct
+        """
+        return self.is_well_formed() and verify_checksum(self.view)
+
+    def decrement_ttl(self):
+        """
+        Decrement the TTL in place and patch the checksum incrementally (RFC 1624)
+
+        Requires a writable buffer such as a bytearray.
+
+        Returns:
+            int: The new TTL (0 means the frame must be dropped)
+        """
+        view = self.view
+        ttl = view[_TTL_OFFSET]
+        if ttl == 0:
+            return 0
+        old_word = _TTL_WORD.unpack_from(view, _TTL_OFFSET)[0]
+        view[_TTL_OFFSET] = ttl - 1
+        new_word = _TTL_WORD.unpack_from(view, _TTL_OFFSET)[0]
+        _LENGTH.pack_into(view, _CHECKSUM_OFFSET, update_checksum(self.checksum, old_word, new_word))
+        return ttl - 1
+
+    def __len__(self):
+        return len(self.view)
+
+    def __bytes__(self):
+        return bytes(self.view)
+
+    def __repr__(self):
+        return f"Frame(seq={self.seq_num}, ttl={self.ttl}, length={self.payload_length})"
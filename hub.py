@@ -3,6 +3,19 @@ Hub implementation for Network Simulator
 Equivalent to Hub.java in the Java implementation
 """
 
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("HUB")
+_device_log = get_logger("DEVICE")
+
+def _preview(data, limit=20):
+    """Short printable form of data on the wire; binary frames are shown as hex"""
+    if isinstance(data, (bytes, bytearray)):
+        return data[:limit].hex(' ') + (' ...' if len(data) > limit else '')
+    return data[:limit] + ('...' if len(data) > limit else '')
+
 class Hub:
     def __init__(self, hub_number):
         """
@@ -14,6 +27,7 @@ class Hub:
         self.sender_address = None
         self.receiver_address = None
         self.hub_number = hub_number
+        self.rng = get_rng(f"hub/{hub_number}")  # CSMA/CD channel sensing, collisions and backoff
         self.data = None
         self.devices_connected = None
         self.channel_busy = False
@@ -21,6 +35,7 @@ class Hub:
         self.transmission_in_progress = False
         self.active_senders = set()  # Track devices currently sending data
         self.backoff_times = {}      # Store backoff times for devices after collisions
+        self.scheduler = get_scheduler()  # Simulation clock for CSMA/CD waits and backoffs
     
     def receive_data_from_sender(self, d):
         """
@@ -30,10 +45,9 @@ class Hub:
             d (str): Data received from a sender device
         """
         self.data = d
-        print(f"\n[HUB {self.hub_number}] ▶ PHYSICAL LAYER: Received data from source")
+        _log.info("\n[HUB {}] ▶ PHYSICAL LAYER: Received data from source", self.hub_number)
         # Display truncated data to keep logs clean
-        display_data = d[:20] + "..." if len(d) > 20 else d
-        print(f"[HUB {self.hub_number}] ▶ Data content: '{display_data}'")
+        _log.info("[HUB {}] ▶ Data content: '{}'", self.hub_number, _preview(d))
     
     def send_data_to_receiver(self, receiver_device):
         """
@@ -45,12 +59,12 @@ class Hub:
         self.receiver_address = receiver_device.get_mac()
         
         # In physical layer, we don't do CRC validation - that happens at the data link layer
-        print(f"[HUB {self.hub_number}] ▶ PHYSICAL LAYER: Forwarding data to {receiver_device.get_device_name()}")
-        print(f"[HUB {self.hub_number}] ▶ Destination MAC: {receiver_device.get_mac()}")
+        _log.info("[HUB {}] ▶ PHYSICAL LAYER: Forwarding data to {}", self.hub_number, receiver_device.get_device_name())
+        _log.info("[HUB {}] ▶ Destination MAC: {}", self.hub_number, receiver_device.get_mac())
         
         # Pass the data to the receiver - receiver will handle CRC at data link layer
         receiver_device.set_receiver_data(self.data)
-        print(f"[HUB {self.hub_number}] ✓ Data transmitted to {receiver_device.get_device_name()}")
+        _log.info("[HUB {}] ✓ Data transmitted to {}", self.hub_number, receiver_device.get_device_name())
     
     def get_hub_number(self):
         """Get hub number"""
@@ -71,8 +85,12 @@ class Hub:
         Args:
             dev (list): List of connected devices
         """
+        for device in self.devices_connected or ():
+            device.registry.detach(device, self)
         self.devices_connected = dev
-        print(f"[HUB {self.hub_number}] Connected {len(dev)} device(s) to hub")
+        for device in dev:
+            device.registry.attach(device, self)
+        _log.info("[HUB {}] Connected {} device(s) to hub", self.hub_number, len(dev))
     
     def get_connected_devices(self):
         """Get connected devices"""
@@ -89,22 +107,22 @@ class Hub:
             sender (EndDevices): Sender device
             receiver (EndDevices): Receiver device
         """
-        print(f"\n[HUB {sender_hub.get_hub_number()}] === HUB BROADCASTING OPERATION ===")
-        print(f"[HUB {sender_hub.get_hub_number()}] ▶ Source: {sender.get_device_name()} (MAC: {sender.get_mac()})")
-        print(f"[HUB {sender_hub.get_hub_number()}] ▶ Target: {receiver.get_device_name()} (MAC: {receiver.get_mac()})")
+        _log.info("\n[HUB {}] === HUB BROADCASTING OPERATION ===", sender_hub.get_hub_number())
+        _log.info("[HUB {}] ▶ Source: {} (MAC: {})", sender_hub.get_hub_number(), sender.get_device_name(), sender.get_mac())
+        _log.info("[HUB {}] ▶ Target: {} (MAC: {})", sender_hub.get_hub_number(), receiver.get_device_name(), receiver.get_mac())
         
         # Try to send data using CSMA/CD protocol
         if not self.send_with_csma_cd(sender_hub, sender, receiver):
-            print(f"[HUB {sender_hub.get_hub_number()}] ❌ Data transmission failed after multiple attempts")
+            _log.error("[HUB {}] ❌ Data transmission failed after multiple attempts", sender_hub.get_hub_number())
             return
             
         # If we're here, transmission succeeded
         # If receiver is in a different hub, forward to switch
         if sender_hub.get_hub_number() != receiver_hub.get_hub_number():
-            print(f"\n[HUB {sender_hub.get_hub_number()}] ⚠ Intended receiver not found in this hub")
-            print(f"[HUB {sender_hub.get_hub_number()}] → Forwarding data to switch {switch_new.switch_number}")
+            _log.warning("\n[HUB {}] ⚠ Intended receiver not found in this hub", sender_hub.get_hub_number())
+            _log.info("[HUB {}] → Forwarding data to switch {}", sender_hub.get_hub_number(), switch_new.switch_number)
             switch_new.send_data_via_hub(sender_hub, receiver_hub, sender, receiver)
-            print(f"[HUB {sender_hub.get_hub_number()}] ✓ Data forwarded to switch for further routing")
+            _log.info("[HUB {}] ✓ Data forwarded to switch for further routing", sender_hub.get_hub_number())
     
     def send_ACK_or_NAK(self, receiver_device):
         """
@@ -113,7 +131,7 @@ class Hub:
         Args:
             receiver_device (EndDevices): The receiver device
         """
-        print(f"[HUB {self.hub_number}] ▶ PHYSICAL LAYER: Sending ACK to {receiver_device.get_device_name()}")
+        _log.info("[HUB {}] ▶ PHYSICAL LAYER: Sending ACK to {}", self.hub_number, receiver_device.get_device_name())
         receiver_device.receive_ACK_or_NAK("ACK")
     
     def receive_ACK_or_NAK(self, ack_or_nak):
@@ -123,7 +141,7 @@ class Hub:
         Args:
             ack_or_nak (str): ACK or NAK string
         """
-        print(f"[HUB {self.hub_number}] ▶ PHYSICAL LAYER: Received {ack_or_nak}")
+        _log.info("[HUB {}] ▶ PHYSICAL LAYER: Received {}", self.hub_number, ack_or_nak)
     
     def check_channel_status(self):
         """
@@ -152,7 +170,7 @@ class Hub:
         """
         self.collision_detected = status
         if status:
-            print(f"[HUB {self.hub_number}] ⚠ COLLISION DETECTED: Multiple devices transmitting simultaneously")
+            _log.warning("[HUB {}] ⚠ COLLISION DETECTED: Multiple devices transmitting simultaneously", self.hub_number)
     
     def set_channel_busy(self, status):
         """
@@ -163,9 +181,9 @@ class Hub:
         """
         self.channel_busy = status
         if status:
-            print(f"[HUB {self.hub_number}] ▶ Channel is now busy")
+            _log.info("[HUB {}] ▶ Channel is now busy", self.hub_number)
         else:
-            print(f"[HUB {self.hub_number}] ▶ Channel is now free")
+            _log.info("[HUB {}] ▶ Channel is now free", self.hub_number)
     
     def broadcast_physical_layer(self, sender_device):
         """
@@ -175,19 +193,19 @@ class Hub:
             sender_device (EndDevices): The device that sent the data (will not receive its own data)
         """
         if not self.devices_connected:
-            print(f"[HUB {self.hub_number}] ⚠ No devices connected to hub for broadcast.")
+            _log.warning("[HUB {}] ⚠ No devices connected to hub for broadcast.", self.hub_number)
             return
-        print(f"[HUB {self.hub_number}] === PHYSICAL LAYER BROADCAST ===")
+        _log.info("[HUB {}] === PHYSICAL LAYER BROADCAST ===", self.hub_number)
         for device in self.devices_connected:
             if device == sender_device:
                 continue
-            print(f"[HUB {self.hub_number}] ▶ Broadcasting to {device.get_device_name()} (MAC: {device.get_mac()})")
+            _log.info("[HUB {}] ▶ Broadcasting to {} (MAC: {})", self.hub_number, device.get_device_name(), device.get_mac())
             # Set raw_data at physical layer only (no data link layer processing)
             device.raw_data = self.data  
-            print(f"[DEVICE {device.get_device_name()}] ▶ PHYSICAL LAYER: Received bits '{self.data[:20]}{'...' if len(self.data) > 20 else ''}' from hub {self.hub_number}")
+            _device_log.info("[DEVICE {}] ▶ PHYSICAL LAYER: Received bits '{}' from hub {}", device.get_device_name(), _preview(self.data), self.hub_number)
             # Note that in a physical broadcast, all devices receive the signal, but only the intended recipient processes it further
             # Other devices would discard it at the data link layer (MAC filtering)
-        print(f"[HUB {self.hub_number}] ✓ Broadcast complete at physical layer.")
+        _log.info("[HUB {}] ✓ Broadcast complete at physical layer.", self.hub_number)
 
     def send_with_csma_cd_physical(self, sender_device, data, max_attempts=5):
         """
@@ -201,53 +219,52 @@ class Hub:
         Returns:
             bool: True if transmission succeeded, False if failed after retries
         """
-        import random
-        import time
+        rng = self.rng
         attempt = 0
         
         # Randomly determine if channel is initially busy (30% chance)
         if not self.channel_busy:  # Only set if not already busy
-            self.channel_busy = random.random() < 0.3
+            self.channel_busy = rng.random() < 0.3
             
         while attempt < max_attempts:
-            print(f"[HUB {self.hub_number}] ▶ [CSMA/CD] Attempt {attempt+1}: Checking if channel is busy...")
+            _log.info("[HUB {}] ▶ [CSMA/CD] Attempt {}: Checking if channel is busy...", self.hub_number, attempt+1)
             if self.channel_busy:
-                print(f"[HUB {self.hub_number}] ▶ [CSMA/CD] Channel busy. Waiting...")
-                time.sleep(0.5)
+                _log.info("[HUB {}] ▶ [CSMA/CD] Channel busy. Waiting...", self.hub_number)
+                self.scheduler.sleep(0.5)
                 # After waiting, check again with 50% chance of still being busy
-                self.channel_busy = random.random() < 0.5
-                print(f"[HUB {self.hub_number}] ▶ [CSMA/CD] Channel is now {'busy' if self.channel_busy else 'free'}")
+                self.channel_busy = rng.random() < 0.5
+                _log.info("[HUB {}] ▶ [CSMA/CD] Channel is now {}", self.hub_number, 'busy' if self.channel_busy else 'free')
                 if self.channel_busy:
                     attempt += 1
                     continue
                     
             # Channel is free, start transmission
             self.set_channel_busy(True)
-            print(f"[HUB {self.hub_number}] ▶ [CSMA/CD] Channel is free. {sender_device.get_device_name()} starts transmitting...")
+            _log.info("[HUB {}] ▶ [CSMA/CD] Channel is free. {} starts transmitting...", self.hub_number, sender_device.get_device_name())
             
             # Simulate possible collision (random chance)
-            collision_happened = random.random() < 0.3  # 30% chance
+            collision_happened = rng.random() < 0.3  # 30% chance
             if collision_happened:
                 self.set_collision(True)
-                print(f"[HUB {self.hub_number}] ▶ [CSMA/CD] Collision detected! Sending jamming signal...")
+                _log.info("[HUB {}] ▶ [CSMA/CD] Collision detected! Sending jamming signal...", self.hub_number)
                 self.set_channel_busy(False)
-                backoff = random.randint(1, 2 ** (attempt + 1))
-                print(f"[HUB {self.hub_number}] ▶ [CSMA/CD] Backing off for {backoff} time units...")
-                time.sleep(0.2 * backoff)
+                backoff = rng.randint(1, 2 ** (attempt + 1))
+                _log.info("[HUB {}] ▶ [CSMA/CD] Backing off for {} time units...", self.hub_number, backoff)
+                self.scheduler.sleep(0.2 * backoff)
                 self.set_collision(False)
                 attempt += 1
                 continue
                 
             # No collision, broadcast
             self.data = data
-            print(f"[HUB {self.hub_number}] === PHYSICAL LAYER: TRANSMISSION STARTED ===")
+            _log.info("[HUB {}] === PHYSICAL LAYER: TRANSMISSION STARTED ===", self.hub_number)
             self.broadcast_physical_layer(sender_device)
             self.set_channel_busy(False)
-            print(f"[HUB {self.hub_number}] ✓ [CSMA/CD] Transmission successful at physical layer.")
-            print(f"[HUB {self.hub_number}] === DATA LINK LAYER: FRAME FORWARDED ===")
+            _log.info("[HUB {}] ✓ [CSMA/CD] Transmission successful at physical layer.", self.hub_number)
+            _log.info("[HUB {}] === DATA LINK LAYER: FRAME FORWARDED ===", self.hub_number)
             return True
             
-        print(f"[HUB {self.hub_number}] ❌ [CSMA/CD] Transmission failed after {max_attempts} attempts.")
+        _log.error("[HUB {}] ❌ [CSMA/CD] Transmission failed after {} attempts.", self.hub_number, max_attempts)
         return False
     
     def send_with_csma_cd(self, sender_hub, sender_device, receiver_device):
@@ -262,7 +279,7 @@ class Hub:
         Returns:
             bool: True if transmission succeeded, False if failed after retries
         """
-        print(f"[HUB {sender_hub.get_hub_number()}] ▶ CSMA/CD: Beginning transmission process")
+        _log.info("[HUB {}] ▶ CSMA/CD: Beginning transmission process", sender_hub.get_hub_number())
         
         # Use sender's data
         data = sender_device.data
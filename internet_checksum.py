@@ -0,0 +1,165 @@
+"""
+Internet checksum (RFC 1071) for Network Simulator
+One's-complement sum of 16-bit words computed over bytes with end-around carry,
+plus the RFC 1624 incremental update for when only a few header bytes change
+"""
+
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; array('H') handles every size
+    np = None
+
+# Buffers at least this large are summed with NumPy when it is available
+NUMPY_THRESHOLD = 4096
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _fold(total):
+    """
+    Fold carries above 16 bits back into the low 16 bits (end-around carry)
+
+    Args:
+        total (int): Sum of 16-bit words of any size
+
+    Returns:
+        int: 16-bit one's-complement sum
+    """
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return total
+
+
+def _swap16(value):
+    """Swap the two bytes of a 16-bit value"""
+    return ((value & 0xFF) << 8) | (value >> 8)
+
+
+def ones_complement_sum(data):
+    """
+    Compute the 16-bit one's-complement sum of some data
+
+    Words are taken in network byte order; an odd trailing byte is padded
+    with a zero byte as in RFC 1071.
+
+    Args:
+        data (bytes, bytearray or memoryview): Data to sum
+
+    Returns:
+        int: 16-bit one's-complement sum (not yet complemented)
+    """
+    view = memoryview(data).cast("B")
+    length = len(view)
+    even = length & ~1
+
+    if np is not None and length >= NUMPY_THRESHOLD:
+        total = int(np.frombuffer(view[:even], dtype=">u2").sum(dtype=np.uint64))
+    else:
+        words = array("H")
+        words.frombytes(view[:even])
+        # One's-complement addition is byte-order independent (RFC 1071 section 2),
+        # so sum in native order and swap the folded result once
+        total = _fold(sum(words))
+        if _LITTLE_ENDIAN:
+            total = _swap16(total)
+
+    if length & 1:
+        total += view[length - 1] << 8
+    return _fold(total)
+
+
+def internet_checksum(data):
+    """
+    Compute the RFC 1071 Internet checksum
+
+    Args:
+        data (bytes, bytearray, memoryview or str): Data to protect; strings are UTF-8 encoded
+
+    Returns:
+        int: 16-bit checksum
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return ~ones_complement_sum(data) & 0xFFFF
+
+
+def internet_checksum_batch(frames):
+    """
+    Compute the Internet checksums of many equal-length frames at once
+
+    Args:
+        frames (numpy.ndarray): uint8 array with one frame per row
+
+    Returns:
+        numpy.ndarray: 16-bit checksum of each row
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for internet_checksum_batch()")
+    frames = np.asarray(frames, dtype=np.uint8)
+    if frames.shape[1] & 1:
+        frames = np.pad(frames, ((0, 0), (0, 1)))  # Odd trailing byte is padded with zero
+    total = np.ascontiguousarray(frames).view(">u2").sum(axis=1, dtype=np.uint64)
+    while (total >> 16).any():
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def verify_checksum(data):
+    """
+    Check data that already contains its checksum field
+
+    Args:
+        data (bytes, bytearray or memoryview): Data including a 16-bit aligned checksum
+
+    Returns:
+        bool: True if the one's-complement sum is all ones
+    """
+    return ones_complement_sum(data) == 0xFFFF
+
+
+def update_checksum(checksum, old_word, new_word):
+    """
+    Update a checksum after one 16-bit word changed (RFC 1624, equation 3)
+
+    HC' = ~(~HC + ~m + m')
+
+    Args:
+        checksum (int): Current 16-bit checksum
+        old_word (int): Old value of the changed 16-bit word
+        new_word (int): New value of the word
+
+    Returns:
+        int: Updated checksum
+    """
+    total = (~checksum & 0xFFFF) + (~old_word & 0xFFFF) + new_word
+    return ~_fold(total) & 0xFFFF
+
+
+def update_checksum_bytes(checksum, offset, old_bytes, new_bytes):
+    """
+    Update a checksum after a run of bytes changed
+
+    The changed run does not need to be 16-bit aligned; the byte position of
+    each changed byte within its word is taken from the offset.
+
+    Args:
+        checksum (int): Current 16-bit checksum
+        offset (int): Offset of the changed bytes in the checksummed data
+        old_bytes (bytes): Old contents of the run
+        new_bytes (bytes): New contents of the run (same length)
+
+    Returns:
+        int: Updated checksum
+    """
+    if len(old_bytes) != len(new_bytes):
+        raise ValueError("Incremental checksum update needs runs of equal length")
+    if offset & 1:
+        # Align to a word boundary by prepending a byte that is the same in both runs
+        old_bytes = b"\0" + bytes(old_bytes)
+        new_bytes = b"\0" + bytes(new_bytes)
+    # ~m + m' summed over all changed words is ~sum(old) + sum(new)
+    total = (~checksum & 0xFFFF) + (~ones_complement_sum(old_bytes) & 0xFFFF) + ones_complement_sum(new_bytes)
+    return ~_fold(total) & 0xFFFF
@@ -0,0 +1,213 @@
+"""
+Link model for Network Simulator
+Point-to-point link between two endpoints with bandwidth, propagation delay,
+MTU, bit errors and random loss, in full or half duplex. Frames arrive as
+events on the simulation clock after their serialization and propagation time.
+"""
+
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("LINK")
+
+DEFAULT_BANDWIDTH = 100e6  # Bits per second (Fast Ethernet)
+DEFAULT_DELAY = 0.0005  # Propagation delay in seconds (about 100 km of fiber)
+DEFAULT_MTU = 1500  # Bytes
+
+
+class Link:
+    """
+    Point-to-point link
+
+    Each direction of a full-duplex link has its own transmitter: a frame
+    starts when the previous frame in that direction has been serialized,
+    takes size * 8 / bandwidth seconds to serialize and arrives delay seconds
+    later. A half-duplex link has one transmitter shared by both ends, so
+    frames in opposite directions wait for each other.
+    """
+
+    def __init__(self, endpoint_a, endpoint_b, bandwidth=DEFAULT_BANDWIDTH, delay=DEFAULT_DELAY,
+                 mtu=DEFAULT_MTU, ber=0.0, loss=0.0, duplex="full", name=None, scheduler=None, rng=None):
+        """
+        Initialize a link
+
+        Args:
+            endpoint_a: First endpoint (interface, device, router, ...)
+            endpoint_b: Second endpoint
+            bandwidth (float): Bits per second in each direction
+            delay (float): Propagation delay in seconds
+            mtu (int): Largest frame in bytes (None for no limit)
+            ber (float): Bit error rate; a frame with any bit error is lost
+            loss (float): Probability that a frame is lost regardless of its size
+            duplex (str): "full" or "half"
+            name (str, optional): Link name, which selects its random stream
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+            rng (random.Random, optional): Random source (default: the "link/<name>" stream)
+        """
+        if bandwidth <= 0:
+            raise ValueError(f"Link bandwidth must be positive (got {bandwidth})")
+        if duplex not in ("full", "half"):
+            raise ValueError(f"Link duplex must be 'full' or 'half' (got {duplex})")
+        self.endpoint_a = endpoint_a
+        self.endpoint_b = endpoint_b
+        self.bandwidth = bandwidth
+        self.delay = delay
+        self.mtu = mtu
+        self.ber = ber
+        self.loss = loss
+        self.duplex = duplex
+        self.name = name
+        self.scheduler = scheduler or get_scheduler()
+        self.rng = rng or get_rng(f"link/{name}" if name else "link")
+        self.is_up = True
+        self._created = self.scheduler.now
+        self._busy_until = [self.scheduler.now, self.scheduler.now]  # Per direction (shared when half duplex)
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.frames_lost = 0
+        self.frames_oversized = 0
+        self.busy_time = 0.0
+
+    def peer(self, endpoint):
+        """
+        Get the endpoint at the other end
+
+        Args:
+            endpoint: One endpoint of the link
+
+        Returns:
+            The other endpoint
+        """
+        if endpoint is self.endpoint_a:
+            return self.endpoint_b
+        if endpoint is self.endpoint_b:
+            return self.endpoint_a
+        raise ValueError("Endpoint is not attached to this link")
+
+    def serialization_time(self, size):
+        """
+        Time to put a frame on the wire
+
+        Args:
+            size (int): Frame size in bytes
+
+        Returns:
+            float: Seconds
+        """
+        return size * 8 / self.bandwidth
+
+    def transfer_time(self, size):
+        """
+        Time from the first bit sent to the last bit received on an idle link
+
+        Args:
+            size (int): Frame size in bytes
+
+        Returns:
+            float: Seconds
+        """
+        return size * 8 / self.bandwidth + self.delay
+
+    def loss_probability(self, size):
+        """
+        Probability that a frame of a given size is lost
+
+        Args:
+            size (int): Frame size in bytes
+
+        Returns:
+            float: Probability from 0.0 to 1.0
+        """
+        survive = 1.0 - self.loss
+        if self.ber:
+            survive *= (1.0 - self.ber) ** (size * 8)
+        return 1.0 - survive
+
+    def transmit(self, sender, packet, size, on_arrival=None, on_loss=None):
+        """
+        Send a frame from one end of the link to the other
+
+        Args:
+            sender: Endpoint sending the frame
+            packet: Frame (any object)
+            size (int): Frame size in bytes
+            on_arrival (callable, optional): Called as on_arrival(packet, receiver)
+                when the last bit arrives
+            on_loss (callable, optional): Called as on_loss(packet) when the frame
+                would have arrived but was corrupted or lost
+
+        Returns:
+            float: Simulation time the frame arrives (or would have arrived), or
+                None if the link is down or the frame is larger than the MTU
+        """
+        if not self.is_up:
+            _log.warning("[LINK] ⚠ Link is down, frame not sent")
+            return None
+        if self.mtu is not None and size > self.mtu:
+            self.frames_oversized += 1
+            _log.error("[LINK] ❌ Frame of {} bytes exceeds the MTU of {} bytes", size, self.mtu)
+            return None
+        receiver = self.peer(sender)
+        direction = 0 if self.duplex == "half" or sender is self.endpoint_a else 1
+
+        now = self.scheduler.now
+        serialization = size * 8 / self.bandwidth
+        start = max(now, self._busy_until[direction])
+        self._busy_until[direction] = start + serialization
+        if self.duplex == "half":
+            self._busy_until[1] = self._busy_until[0]
+        arrival = start + serialization + self.delay
+        self.frames_sent += 1
+        self.bytes_sent += size
+        self.busy_time += serialization
+
+        if self.rng.random() < self.loss_probability(size):
+            self.frames_lost += 1
+            if on_loss is not None:
+                self.scheduler.schedule_at(arrival, on_loss, packet)
+        elif on_arrival is not None:
+            self.scheduler.schedule_at(arrival, on_arrival, packet, receiver)
+        return arrival
+
+    def set_up(self, is_up):
+        """
+        Bring the link up or down
+
+        Args:
+            is_up (bool): New state
+        """
+        self.is_up = is_up
+        _log.info("[LINK] ▶ Link {}", "up" if is_up else "down")
+
+    def utilization(self):
+        """
+        Fraction of the elapsed simulation time the link spent transmitting
+
+        Returns:
+            float: Busy time per direction over elapsed time (capped at 1.0)
+        """
+        elapsed = self.scheduler.now - self._created
+        if elapsed <= 0:
+            return 0.0
+        directions = 1 if self.duplex == "half" else 2
+        return min(1.0, self.busy_time / (directions * elapsed))
+
+    def summary(self):
+        """
+        Get the link statistics
+
+        Returns:
+            dict: Configuration and counters
+        """
+        return {
+            "bandwidth": self.bandwidth,
+            "delay": self.delay,
+            "mtu": self.mtu,
+            "duplex": self.duplex,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "frames_lost": self.frames_lost,
+            "frames_oversized": self.frames_oversized,
+            "utilization": self.utilization(),
+        }
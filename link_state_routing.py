@@ -0,0 +1,635 @@
+"""
+Link-state (OSPF-like) routing for Network Simulator
+Routers flood link-state advertisements (LSAs) into a shared link-state database,
+and each router computes its routes with a heap-based Dijkstra. After the first
+run, link changes are applied with incremental SPF: only the part of each
+shortest-path tree that the change affects is recomputed.
+"""
+
+import heapq
+from event_scheduler import get_scheduler
+from sim_logging import get_logger
+
+_log = get_logger("OSPF")
+
+INFINITY = float("inf")
+SPF_DELAY = 0.05  # Seconds to wait after an LSA change before running SPF (batches changes)
+
+
+class LinkStateAdvertisement:
+    """A router's description of its own links and attached networks"""
+
+    __slots__ = ("router_id", "sequence", "links", "networks")
+
+    def __init__(self, router_id, sequence, links, networks):
+        """
+        Initialize the LSA
+
+        Args:
+            router_id: Originating router
+            sequence (int): Sequence number; a higher number replaces an older LSA
+            links (dict): Neighbor router ID -> link cost
+            networks (tuple): Directly attached network prefixes
+        """
+        self.router_id = router_id
+        self.sequence = sequence
+        self.links = links
+        self.networks = networks
+
+
+class LinkStateDatabase:
+    """
+    Link-state database shared by all routers of an area
+
+    After flooding, every router of an area holds the same LSDB, so one copy
+    serves them all. A link is only used when both ends advertise it (two-way check).
+    """
+
+    def __init__(self):
+        """Initialize an empty database"""
+        self.lsas = {}  # Router ID -> LinkStateAdvertisement
+        self.advertisers = {}  # Prefix -> {router ID: None} of the routers advertising it, in LSA order
+        self._adjacency = None  # Two-way links per router, rebuilt after changes
+
+    def install(self, lsa):
+        """
+        Install an LSA if it is newer than the one held
+
+        Args:
+            lsa (LinkStateAdvertisement): Flooded LSA
+
+        Returns:
+            LinkStateAdvertisement: The replaced LSA, or None if there was none;
+                False if the LSA was not newer and was discarded
+        """
+        current = self.lsas.get(lsa.router_id)
+        if current is not None and current.sequence >= lsa.sequence:
+            return False
+        self.lsas[lsa.router_id] = lsa
+        if current is None or current.networks != lsa.networks:
+            for prefix in current.networks if current is not None else ():
+                advertisers = self.advertisers[prefix]
+                del advertisers[lsa.router_id]
+                if not advertisers:
+                    del self.advertisers[prefix]
+            for prefix in lsa.networks:
+                self.advertisers.setdefault(prefix, {})[lsa.router_id] = None
+        self._adjacency = None
+        return current
+
+    def cost(self, from_id, to_id):
+        """
+        Get the usable cost of a directed link
+
+        Args:
+            from_id: Router at the start of the link
+            to_id: Router at the end of the link
+
+        Returns:
+            int: Link cost, or None if the link is not advertised by both ends
+        """
+        lsa = self.lsas.get(from_id)
+        if lsa is None:
+            return None
+        cost = lsa.links.get(to_id)
+        if cost is None:
+            return None
+        other = self.lsas.get(to_id)
+        if other is None or from_id not in other.links:
+            return None
+        return cost
+
+    def adjacency(self):
+        """
+        Get the usable links of every router
+
+        Built once per LSDB change and shared by all SPF runs.
+
+        Returns:
+            dict: Router ID -> list of (neighbor ID, cost) pairs
+        """
+        if self._adjacency is None:
+            lsas = self.lsas
+            self._adjacency = {
+                router_id: [(neighbor_id, cost) for neighbor_id, cost in lsa.links.items()
+                            if neighbor_id in lsas and router_id in lsas[neighbor_id].links]
+                for router_id, lsa in lsas.items()
+            }
+        return self._adjacency
+
+    def neighbors(self, router_id):
+        """
+        Get a router's usable outgoing links
+
+        Args:
+            router_id: Router ID
+
+        Returns:
+            list: (neighbor ID, cost) pairs
+        """
+        return self.adjacency().get(router_id, ())
+
+    def networks(self, router_id):
+        """Get the networks a router advertises"""
+        lsa = self.lsas.get(router_id)
+        return lsa.networks if lsa is not None else ()
+
+
+class ShortestPathTree:
+    """
+    Shortest-path tree of one router over the LSDB
+
+    Keeps distances, parents, children and first hops so that link changes can
+    be applied incrementally:
+    - a link that gets cheaper (or appears) relaxes outward from where it lands;
+    - a tree link that gets more expensive (or disappears) detaches the subtree
+      below it, reattaches it from its surroundings and reruns Dijkstra only there.
+    """
+
+    def __init__(self, root, lsdb):
+        """
+        Initialize the tree
+
+        Args:
+            root: Router ID at the root of the tree
+            lsdb (LinkStateDatabase): Database to compute over
+        """
+        self.root = root
+        self.lsdb = lsdb
+        self.dist = {}
+        self.parent = {}
+        self.children = {}
+        self.first_hop = {}
+
+    def full_run(self):
+        """
+        Compute the whole tree from scratch
+
+        Returns:
+            set: Router IDs whose distance or first hop changed
+        """
+        root = self.root
+        old_dist, old_first_hop = self.dist, self.first_hop
+        adjacency = self.lsdb.adjacency()
+        dist = {root: 0}
+        parent = {root: None}
+        first_hop = {root: None}
+        settled = set()
+        heap = [(0, root)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+        while heap:
+            d, node = heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            up = parent[node]
+            if up is not None:
+                first_hop[node] = node if up == root else first_hop[up]
+            for neighbor_id, cost in adjacency.get(node, ()):
+                nd = d + cost
+                if nd < dist.get(neighbor_id, INFINITY):
+                    dist[neighbor_id] = nd
+                    parent[neighbor_id] = node
+                    heappush(heap, (nd, neighbor_id))
+
+        children = {}
+        for node, up in parent.items():
+            if up is not None:
+                children.setdefault(up, set()).add(node)
+        self.dist, self.parent, self.children, self.first_hop = dist, parent, children, first_hop
+
+        changed = {node for node in old_dist
+                   if dist.get(node) != old_dist[node] or first_hop.get(node) != old_first_hop.get(node)}
+        changed.update(node for node in dist if node not in old_dist)
+        return changed
+
+    def _set_parent(self, node, parent):
+        """Move a node under a new parent in the tree"""
+        old = self.parent.get(node)
+        if old is not None:
+            self.children[old].discard(node)
+        self.parent[node] = parent
+        if parent is not None:
+            self.children.setdefault(parent, set()).add(node)
+
+    def _dijkstra(self, heap, changed):
+        """
+        Run Dijkstra from a seeded heap over the current tree state
+
+        Args:
+            heap (list): (distance, router ID) entries to start from
+            changed (set): Collects routers whose distance or first hop was set
+        """
+        dist, parent, first_hop = self.dist, self.parent, self.first_hop
+        root = self.root
+        adjacency = self.lsdb.adjacency()
+        heapify, heappush, heappop = heapq.heapify, heapq.heappush, heapq.heappop
+        heapify(heap)
+        while heap:
+            d, node = heappop(heap)
+            if d > dist.get(node, INFINITY):
+                continue
+            up = parent[node]
+            first_hop[node] = None if up is None else (node if up == root else first_hop[up])
+            changed.add(node)
+            for neighbor_id, cost in adjacency.get(node, ()):
+                nd = d + cost
+                if nd < dist.get(neighbor_id, INFINITY):
+                    dist[neighbor_id] = nd
+                    self._set_parent(neighbor_id, node)
+                    heappush(heap, (nd, neighbor_id))
+
+    def _subtree(self, node):
+        """Get a node and all its descendants in the tree"""
+        nodes = [node]
+        children = self.children
+        i = 0
+        while i < len(nodes):
+            nodes.extend(children.get(nodes[i], ()))
+            i += 1
+        return nodes
+
+    def link_changed(self, from_id, to_id):
+        """
+        Update the tree after the cost of a directed link changed
+
+        The LSDB must already hold the new cost.
+
+        Args:
+            from_id: Router at the start of the link
+            to_id: Router at the end of the link
+
+        Returns:
+            set: Router IDs whose distance or first hop may have changed
+        """
+        return self.links_changed([(from_id, to_id)])
+
+    def links_changed(self, links):
+        """
+        Update the tree after the costs of several directed links changed at once
+
+        The LSDB must already hold the new costs. The tree still describes the
+        LSDB before the changes, so the subtrees below every tree link that got
+        worse (or disappeared) are detached together, reattached from the rest
+        of the tree, and a single Dijkstra pass runs from there and from every
+        link that got better. Applying the links one at a time against the new
+        LSDB would read distances that later links in the batch still change.
+
+        Args:
+            links (iterable): (from ID, to ID) pairs of the changed links
+
+        Returns:
+            set: Router IDs whose distance or first hop may have changed
+        """
+        changed = set()
+        dist, parent = self.dist, self.parent
+        lsdb = self.lsdb
+        links = [(from_id, to_id, lsdb.cost(from_id, to_id)) for from_id, to_id in links]
+
+        # Tree links that got worse: detach the subtrees hanging below them
+        members = set()
+        subtree = []
+        for from_id, to_id, cost in links:
+            if to_id in members or parent.get(to_id) != from_id:
+                continue
+            if cost is not None and dist[from_id] + cost <= dist[to_id]:
+                continue
+            for node in self._subtree(to_id):
+                if node not in members:
+                    members.add(node)
+                    subtree.append(node)
+        for node in subtree:
+            del dist[node]
+            self._set_parent(node, None)
+            self.first_hop[node] = None
+            changed.add(node)
+
+        # Reattach detached routers from their best neighbor left in the tree
+        heap = []
+        for node in subtree:
+            best, best_parent = INFINITY, None
+            for neighbor_id, _ in lsdb.neighbors(node):
+                if neighbor_id not in dist:
+                    continue
+                in_cost = lsdb.cost(neighbor_id, node)
+                if in_cost is not None and dist[neighbor_id] + in_cost < best:
+                    best, best_parent = dist[neighbor_id] + in_cost, neighbor_id
+            if best_parent is not None:
+                dist[node] = best
+                self._set_parent(node, best_parent)
+                heap.append((best, node))
+
+        # Links that got better: relax their far ends
+        for from_id, to_id, cost in links:
+            d_from = dist.get(from_id)
+            if cost is not None and d_from is not None and d_from + cost < dist.get(to_id, INFINITY):
+                dist[to_id] = d_from + cost
+                self._set_parent(to_id, from_id)
+                heap.append((dist[to_id], to_id))
+
+        self._dijkstra(heap, changed)
+        for node in subtree:
+            if node not in dist:
+                parent.pop(node, None)
+                self.first_hop.pop(node, None)
+        return changed
+
+
+class LinkStateRouter:
+    """Link-state routing state of one router"""
+
+    def __init__(self, domain, router, router_id, networks):
+        """
+        Initialize the router state
+
+        Args:
+            domain (LinkStateRouting): Routing domain
+            router: Router object whose routing_table is filled
+            router_id: Identifier used as next hop
+            networks (list): Directly attached network prefixes
+        """
+        self.domain = domain
+        self.router = router
+        self.router_id = router_id
+        self.networks = tuple(networks)
+        self.links = {}  # Neighbor router ID -> cost
+        self.interfaces = {}  # Neighbor router ID -> local interface name
+        self.sequence = 0
+        self.tree = ShortestPathTree(router_id, domain.lsdb)
+        self.installed = {}  # Prefix -> destination router ID of routes in the routing table
+
+    def originate(self):
+        """Flood a new LSA describing this router's current links"""
+        self.sequence += 1
+        self.domain.flood(LinkStateAdvertisement(self.router_id, self.sequence, dict(self.links), self.networks))
+
+    def _route_prefix(self, prefix):
+        """
+        Route a prefix to its closest reachable advertiser, or drop the route
+        if none is left
+
+        On a tie the advertiser already installed is kept.
+
+        Args:
+            prefix (str): Network prefix advertised by other routers
+        """
+        tree = self.tree
+        installed = self.installed.get(prefix)
+        best = None
+        best_distance = INFINITY
+        for router_id in self.domain.lsdb.advertisers.get(prefix, ()):
+            if router_id == self.router_id or tree.first_hop.get(router_id) is None:
+                continue
+            distance = tree.dist[router_id]
+            if distance < best_distance or (distance == best_distance and router_id == installed):
+                best, best_distance = router_id, distance
+
+        table = self.router.routing_table
+        if best is None:
+            if installed is not None:
+                del self.installed[prefix]
+                table.pop(prefix, None)
+            return
+        next_hop = tree.first_hop[best]
+        table[prefix] = {
+            "next_hop": next_hop,
+            "metric": best_distance,
+            "interface": self.interfaces.get(next_hop, f"interface {next_hop}"),
+        }
+        self.installed[prefix] = best
+
+    def update_routes(self, destinations):
+        """
+        Rewrite the routing table entries for routes to some routers
+
+        Every prefix those routers advertise is routed to its closest
+        advertiser again, so a prefix shared by several routers moves when
+        another advertiser becomes closer or the installed one further away.
+
+        Args:
+            destinations (iterable): Router IDs whose distance or first hop changed
+        """
+        lsdb = self.domain.lsdb
+        prefixes = set()
+        for destination in destinations:
+            if destination != self.router_id:
+                prefixes.update(lsdb.networks(destination))
+        for prefix in prefixes.difference(self.networks):  # Directly connected routes stay as they are
+            self._route_prefix(prefix)
+
+    def remove_stale_prefixes(self, old_networks, new_networks):
+        """
+        Re-route prefixes a router no longer advertises to the closest
+        remaining advertiser, or drop them if there is none
+
+        Args:
+            old_networks (tuple): Prefixes of the router's previous LSA
+            new_networks (tuple): Prefixes of its new LSA
+        """
+        for prefix in set(old_networks) - set(new_networks):
+            if prefix in self.installed:
+                self._route_prefix(prefix)
+
+
+class LinkStateRouting:
+    """
+    Link-state routing domain (a single OSPF-like area)
+
+    LSAs are flooded into the shared LSDB as soon as they are originated; SPF
+    runs on the simulation clock SPF_DELAY later, so a burst of link changes is
+    handled in one incremental pass per router.
+    """
+
+    def __init__(self, scheduler=None, spf_delay=SPF_DELAY, full_spf_threshold=0.25):
+        """
+        Initialize the domain
+
+        Args:
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+            spf_delay (float): Delay between an LSA change and the SPF run
+            full_spf_threshold (float): Run a full SPF instead of incremental updates
+                when more than this fraction of routers changed their LSA at once
+        """
+        self.scheduler = scheduler or get_scheduler()
+        self.spf_delay = spf_delay
+        self.full_spf_threshold = full_spf_threshold
+        self.lsdb = LinkStateDatabase()
+        self.routers = {}  # Router ID -> LinkStateRouter
+        self.changed_links = set()  # Directed links whose cost changed since the last SPF
+        self.changed_networks = set()  # Routers whose advertised networks changed
+        self.new_routers = set()  # Routers that need a full SPF
+        self.spf_event = None
+        self.full_runs = 0
+        self.incremental_runs = 0
+
+    def add_router(self, router, router_id=None, networks=None):
+        """
+        Run link-state routing on a router
+
+        Args:
+            router: router.Router or network_topology.Router
+            router_id: Identifier used as next hop (default: router_number, or device_id)
+            networks (list, optional): Directly attached prefixes (default: the
+                router's NID or connected_networks)
+
+        Returns:
+            LinkStateRouter: The router's link-state state
+        """
+        if router_id is None:
+            router_id = getattr(router, "router_number", None)
+            if router_id is None:
+                router_id = router.device_id
+        if networks is None:
+            networks = [router.NID] if hasattr(router, "NID") else sorted(router.connected_networks)
+        state = LinkStateRouter(self, router, router_id, networks)
+        self.routers[router_id] = state
+        self.new_routers.add(router_id)
+        state.originate()
+        return state
+
+    def set_link(self, router_a, router_b, cost=1, interface_a=None, interface_b=None):
+        """
+        Bring up a link between two routers or change its cost
+
+        Args:
+            router_a: Router ID of one end
+            router_b: Router ID of the other end
+            cost (int): Link cost (positive)
+            interface_a (str, optional): Interface name on router_a
+            interface_b (str, optional): Interface name on router_b
+        """
+        if cost <= 0:
+            raise ValueError(f"Link cost must be positive, got {cost}")
+        for local, remote, interface in ((router_a, router_b, interface_a), (router_b, router_a, interface_b)):
+            state = self.routers[local]
+            if interface is not None:
+                state.interfaces[remote] = interface
+            if state.links.get(remote) != cost:
+                state.links[remote] = cost
+                state.originate()
+
+    def remove_link(self, router_a, router_b):
+        """
+        Take a link down
+
+        Args:
+            router_a: Router ID of one end
+            router_b: Router ID of the other end
+        """
+        for local, remote in ((router_a, router_b), (router_b, router_a)):
+            state = self.routers[local]
+            state.interfaces.pop(remote, None)
+            if state.links.pop(remote, None) is not None:
+                state.originate()
+
+    def set_networks(self, router_id, networks):
+        """
+        Change the networks a router advertises
+
+        Args:
+            router_id: Router ID
+            networks (list): Directly attached prefixes
+        """
+        state = self.routers[router_id]
+        state.networks = tuple(networks)
+        state.originate()
+
+    def flood(self, lsa):
+        """
+        Flood an LSA into the LSDB and schedule SPF for the links it changed
+
+        Args:
+            lsa (LinkStateAdvertisement): LSA from the originating router
+        """
+        old = self.lsdb.install(lsa)
+        if old is False:
+            return
+        old_links = old.links if old is not None else {}
+        origin = lsa.router_id
+        for neighbor_id in old_links.keys() | lsa.links.keys():
+            if old_links.get(neighbor_id) != lsa.links.get(neighbor_id):
+                # The two-way check makes both directions depend on either LSA
+                self.changed_links.add((origin, neighbor_id))
+                self.changed_links.add((neighbor_id, origin))
+        if old is None or old.networks != lsa.networks:
+            self.changed_networks.add(origin)
+            if old is not None:
+                for state in self.routers.values():
+                    state.remove_stale_prefixes(old.networks, lsa.networks)
+        if self.spf_event is None:
+            self.spf_event = self.scheduler.schedule(self.spf_delay, self.run_spf)
+
+    def run_spf(self):
+        """Apply all LSDB changes since the last run to every router's tree and routing table"""
+        self.spf_event = None
+        changed_links, self.changed_links = self.changed_links, set()
+        changed_networks, self.changed_networks = self.changed_networks, set()
+        new_routers, self.new_routers = self.new_routers, set()
+        full = len(changed_links) > 2 * self.full_spf_threshold * len(self.routers)
+
+        for router_id, state in self.routers.items():
+            tree = state.tree
+            if full or router_id in new_routers:
+                destinations = tree.full_run()
+                self.full_runs += 1
+            else:
+                destinations = tree.links_changed(changed_links)
+                self.incremental_runs += 1
+            destinations |= changed_networks
+            state.update_routes(destinations)
+
+        _log.info("[OSPF] ✓ SPF run: {} link changes, {} routers ({})", len(changed_links) // 2,
+                  len(self.routers), "full" if full else "incremental")
+
+    def is_converged(self):
+        """Check if no SPF run is pending"""
+        return self.spf_event is None
+
+    def converge(self):
+        """
+        Run the simulation clock until the pending SPF run is done
+
+        Returns:
+            float: Simulated time it took
+        """
+        scheduler = self.scheduler
+        start = scheduler.now
+        while self.spf_event is not None:
+            if not scheduler.step():
+                break
+        return scheduler.now - start
+
+    def get_path_cost(self, source_id, dest_id):
+        """
+        Get the SPF distance between two routers
+
+        Args:
+            source_id: Router ID at the start
+            dest_id: Router ID at the end
+
+        Returns:
+            int: Path cost, or None if unreachable
+        """
+        return self.routers[source_id].tree.dist.get(dest_id)
+
+
+def build_link_state_domain(routers, links, scheduler=None, **options):
+    """
+    Run link-state routing over a set of routers and compute all routes
+
+    Args:
+        routers (list): Router objects
+        links (list): (router ID, router ID) or (router ID, router ID, cost) tuples
+        scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+        **options: Further LinkStateRouting settings
+
+    Returns:
+        LinkStateRouting: The converged domain
+    """
+    domain = LinkStateRouting(scheduler, **options)
+    for router in routers:
+        domain.add_router(router)
+    for link in links:
+        domain.set_link(*link)
+    domain.converge()
+    return domain
@@ -0,0 +1,238 @@
+"""
+MAC address table (CAM table) for Network Simulator switches
+MAC -> port entries kept in integer-indexed arrays, with aging on the
+simulation clock, a bounded capacity and station-move detection
+"""
+
+from array import array
+from event_scheduler import get_scheduler
+
+DEFAULT_CAPACITY = 8192  # Entries, as in a small access switch
+DEFAULT_AGING_TIME = 300.0  # Seconds an unused dynamic entry is kept (IEEE 802.1D default)
+
+# Results of MACTable.learn()
+LEARNED = 1  # New entry
+REFRESHED = 0  # Known on the same port, aging timer restarted
+MOVED = 2  # Known on another port: the station moved
+TABLE_FULL = -1  # No room; frames to this MAC will be flooded
+
+_NEVER = float("inf")
+
+
+def parse_port(port):
+    """
+    Get a port number from the "PORT n" strings the switches used to store
+
+    Args:
+        port (int or str): Port number or "PORT n"
+
+    Returns:
+        int: Port number
+    """
+    if isinstance(port, int):
+        return port
+    return int(port.split()[-1])
+
+
+class MACTable:
+    """
+    MAC learning table of one switch
+
+    Each MAC address owns a slot; its port and expiry time live at that slot in
+    flat arrays, and freed slots are reused, so the table allocates nothing per
+    frame once it is warm. Entries age lazily: an expired entry is dropped when
+    it is next looked up, or in bulk by age_out() when the table fills up. The
+    table keeps a lower bound on the earliest expiry, so a full table only scans
+    for expired entries once one may actually have expired.
+    Static entries never age, and traffic does not move them to another port.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, aging_time=DEFAULT_AGING_TIME, scheduler=None):
+        """
+        Initialize an empty table
+
+        Args:
+            capacity (int): Maximum number of entries
+            aging_time (float): Seconds a dynamic entry lives without traffic
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+        """
+        self.capacity = capacity
+        self.aging_time = aging_time
+        self.scheduler = scheduler or get_scheduler()
+        self._slots = {}  # MAC -> slot
+        self._macs = []  # Slot -> MAC (None when free)
+        self._ports = array("i")  # Slot -> port number
+        self._expiry = array("d")  # Slot -> expiry time (inf for static entries)
+        self._free = []  # Free slots
+        self._next_expiry = _NEVER  # No dynamic entry expires before this
+        self.moves = 0
+        self.overflows = 0
+
+    def _release(self, mac, slot):
+        """Free the slot of an entry"""
+        del self._slots[mac]
+        self._macs[slot] = None
+        self._free.append(slot)
+
+    def learn(self, mac, port, static=False):
+        """
+        Learn (or refresh) the port a MAC address was seen on
+
+        Args:
+            mac: Source MAC address of a frame
+            port (int or str): Port the frame arrived on
+            static (bool): Never age this entry; only another static learn
+                replaces a static entry
+
+        Returns:
+            int: LEARNED, REFRESHED, MOVED or TABLE_FULL (REFRESHED also when
+                traffic is seen for a static entry, which keeps its port)
+        """
+        port = parse_port(port)
+        expiry = _NEVER if static else self.scheduler.now + self.aging_time
+        slot = self._slots.get(mac)
+        if slot is not None:
+            old_port = self._ports[slot]
+            old_expiry = self._expiry[slot]
+            if old_expiry == _NEVER and not static:
+                return REFRESHED  # Configured entries are not overridden by traffic
+            self._expiry[slot] = expiry
+            self._ports[slot] = port
+            if old_expiry <= self.scheduler.now:
+                return LEARNED  # Aged out but not yet reclaimed
+            if old_port == port:
+                return REFRESHED
+            self.moves += 1
+            return MOVED
+
+        if len(self._slots) >= self.capacity and (self.scheduler.now < self._next_expiry or not self.age_out()):
+            self.overflows += 1
+            return TABLE_FULL
+        if expiry < self._next_expiry:
+            self._next_expiry = expiry
+        if self._free:
+            slot = self._free.pop()
+            self._macs[slot] = mac
+            self._ports[slot] = port
+            self._expiry[slot] = expiry
+        else:
+            slot = len(self._macs)
+            self._macs.append(mac)
+            self._ports.append(port)
+            self._expiry.append(expiry)
+        self._slots[mac] = slot
+        return LEARNED
+
+    def lookup(self, mac):
+        """
+        Find the port of a MAC address
+
+        Args:
+            mac: Destination MAC address
+
+        Returns:
+            int: Port number, or None if unknown (the frame should be flooded)
+        """
+        slot = self._slots.get(mac)
+        if slot is None:
+            return None
+        if self._expiry[slot] <= self.scheduler.now:
+            self._release(mac, slot)
+            return None
+        return self._ports[slot]
+
+    def remove(self, mac):
+        """
+        Remove an entry
+
+        Args:
+            mac: MAC address
+
+        Returns:
+            bool: True if the entry existed
+        """
+        slot = self._slots.get(mac)
+        if slot is None:
+            return False
+        self._release(mac, slot)
+        return True
+
+    def flush_port(self, port):
+        """
+        Remove the dynamic entries learned on a port (e.g. when its link goes down)
+
+        Args:
+            port (int): Port number
+
+        Returns:
+            int: Number of entries removed
+        """
+        ports, expiry = self._ports, self._expiry
+        stale = [(mac, slot) for mac, slot in self._slots.items() if ports[slot] == port and expiry[slot] != _NEVER]
+        for mac, slot in stale:
+            self._release(mac, slot)
+        return len(stale)
+
+    def age_out(self):
+        """
+        Remove every expired entry
+
+        Returns:
+            int: Number of entries removed
+        """
+        now = self.scheduler.now
+        expiry = self._expiry
+        stale = [(mac, slot) for mac, slot in self._slots.items() if expiry[slot] <= now]
+        for mac, slot in stale:
+            self._release(mac, slot)
+        self._next_expiry = min((expiry[slot] for slot in self._slots.values()), default=_NEVER)
+        return len(stale)
+
+    def clear(self):
+        """Remove all entries"""
+        self._slots.clear()
+        self._macs.clear()
+        del self._ports[:]
+        del self._expiry[:]
+        self._free.clear()
+        self._next_expiry = _NEVER
+
+    def update(self, entries):
+        """
+        Learn entries from a {MAC: port} mapping
+
+        Args:
+            entries (dict): MAC -> port number or "PORT n"
+        """
+        for mac, port in entries.items():
+            self.learn(mac, port)
+
+    def items(self):
+        """
+        Get the valid entries
+
+        Returns:
+            list: (MAC, port, static) tuples
+        """
+        now = self.scheduler.now
+        ports, expiry = self._ports, self._expiry
+        return [(mac, ports[slot], expiry[slot] == _NEVER) for mac, slot in self._slots.items() if expiry[slot] > now]
+
+    def __getitem__(self, mac):
+        port = self.lookup(mac)
+        if port is None:
+            raise KeyError(mac)
+        return port
+
+    def __setitem__(self, mac, port):
+        self.learn(mac, port)
+
+    def __delitem__(self, mac):
+        if not self.remove(mac):
+            raise KeyError(mac)
+
+    def __contains__(self, mac):
+        return self.lookup(mac) is not None
+
+    def __len__(self):
+        return len(self._slots)
@@ -3,8 +3,6 @@ Main Network Simulator implementation in Python
 Equivalent to functionality in Main.java and SampleMain.java
 """
 
-import random
-import time
 from end_devices import EndDevices
 from hub import Hub
 from switch import Switch
@@ -16,7 +14,17 @@ from search_service import SenderSearch, ReceiverSearch
 from checksum_for_datalink import ChecksumForDataLink
 from crc_for_datalink import CRCForDataLink
 from direct_connection import DirectConnection
+from link import Link
 from cli_utils import CLIUtils
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from rip_routing import build_rip_domain
+from link_state_routing import build_link_state_domain
+from sim_logging import get_logger
+
+_sender_log = get_logger("SENDER")
+_network_log = get_logger("NETWORK")
+_router_log = get_logger("ROUTER")
 
 class NetworkSimulator:
     def __init__(self):
@@ -40,11 +48,16 @@ class NetworkSimulator:
         self.sender_IP = ""
         self.receiver_IP = ""
         self.device_counter = 0  # Counter for device IDs
+        self.scheduler = get_scheduler()  # Simulation clock for network delays
+        self.rng = get_rng("simulator")  # Link delays and demo error injection
+        self.rip_domain = None  # Set when routing tables are learned with RIP
+        self.link_state_domain = None  # Set when routing tables are computed with link-state SPF
         
         # Go-Back-N protocol parameters
         self.window_size = 4
         self.timeout = 2.0  # seconds
         self.max_retries = 3
+        self.max_nak_rounds = 30  # Give up on a transfer after this many NAK rounds in a row
     
     def create_network_topology(self):
         """Create network topology with routers, switches, hubs and end devices"""
@@ -287,6 +300,182 @@ class NetworkSimulator:
         print("Network topology created successfully.")
         self.print_network_topology()
     
+    def build_topology_from_spec(self, spec):
+        """
+        Build a network topology from a specification instead of input() prompts
+        
+        Devices are named and addressed exactly as in create_network_topology.
+        Example spec:
+            {"routers": [{"switches": [{"hubs": [2, 2]}]}, {"direct_devices": 3}]}
+            {"routers": [{"direct_devices": 1}] * 3, "routing": "rip", "links": [[0, 1], [1, 2]]}
+            {"switches": [{"direct_devices": 2, "hubs": [3]}]}
+            {"preset": "three_network"}
+        
+        Args:
+            spec (dict): Topology specification. "routers" is a list of routers, each
+                with either "switches" or "direct_devices"; without routers, "switches"
+                is a list of switches with optional "direct_devices" and "hubs". A
+                switch's "hubs" list gives the number of devices on each hub. With
+                "routing": "rip" or "link_state", routing tables are learned with RIP
+                or computed with link-state SPF over "links" (pairs of router
+                numbers, optionally with a cost; default: a chain). "queue" sets the
+                routers' output queue discipline, e.g. {"discipline": "red", "limit": 32}.
+                "link" models the router links, e.g. {"bandwidth": 1e9, "delay": 0.002}.
+                
+        Returns:
+            bool: True if the topology was built, False if the spec is invalid
+        """
+        self.devices.clear()
+        self.routers.clear()
+        self.switches.clear()
+        self.hubs.clear()
+        self.rip_domain = None
+        self.link_state_domain = None
+        
+        if spec.get("preset") == "three_network":
+            self.build_three_network_topology()
+            return True
+        if "preset" in spec:
+            print(f"Unknown topology preset: {spec['preset']}")
+            return False
+        
+        routers_spec = spec.get("routers", [])
+        
+        # Custom network with switches and hubs but no routers
+        if not routers_spec:
+            for s, switch_spec in enumerate(spec.get("switches", [])):
+                switch = Switch(s)
+                self.switches.append(switch)
+                
+                direct_devices = []
+                for d in range(switch_spec.get("direct_devices", 0)):
+                    device = self._add_device(f"192.168.{s+1}.{100+d}")
+                    direct_devices.append(device)
+                    switch.add_to_direct_connection_table(device)
+                if direct_devices:
+                    switch.store_directly_connected_devices(direct_devices)
+                
+                switch.store_connected_hubs([
+                    self._add_hub(h, num_devices, f"192.168.{s+1}.{h+1}")
+                    for h, num_devices in enumerate(switch_spec.get("hubs", []))
+                ])
+            
+            print("Custom network created successfully.")
+            return True
+        
+        for r, router_spec in enumerate(routers_spec):
+            router = Router(r, f"{(r+1)*10}.0.0.0")
+            self.routers.append(router)
+            
+            switches_spec = router_spec.get("switches", [])
+            
+            # Devices connected directly to the router sit behind a virtual hub
+            if not switches_spec:
+                router_devices = [
+                    self._add_device(f"{(r+1)*10}.0.0.{d+1}")
+                    for d in range(router_spec.get("direct_devices", 0))
+                ]
+                if router_devices:
+                    direct_hub = Hub(-1)  # Special ID for direct hub
+                    direct_hub.store_devices_connected(router_devices)
+                    self.hubs.append(direct_hub)
+                continue
+            
+            router_switches = []
+            for s, switch_spec in enumerate(switches_spec):
+                switch = Switch(s)
+                router_switches.append(switch)
+                self.switches.append(switch)
+                switch.store_connected_hubs([
+                    self._add_hub(h, num_devices, f"{(r+1)*10}.{s+1}.{h+1}")
+                    for h, num_devices in enumerate(switch_spec.get("hubs", []))
+                ])
+            
+            router.store_connected_switches(router_switches)
+        
+        queue_spec = dict(spec.get("queue") or {})
+        if queue_spec:
+            discipline = queue_spec.pop("discipline", "drop_tail")
+            try:
+                for router in self.routers:
+                    router.set_queue_discipline(discipline, **queue_spec)
+            except (TypeError, ValueError) as e:
+                print(f"Invalid queue specification: {e}")
+                return False
+        
+        routing = spec.get("routing", "static")
+        links = [tuple(link) for link in spec.get("links") or [(r, r + 1) for r in range(len(self.routers) - 1)]]
+        if "link" in spec:
+            try:
+                for a, b, *_ in links:
+                    link = Link(self.routers[a], self.routers[b], name=f"router/{a}-{b}", scheduler=self.scheduler, **spec["link"])
+                    self.routers[a].attach_link(f"interface {b}", link)
+                    self.routers[b].attach_link(f"interface {a}", link)
+            except (IndexError, TypeError, ValueError) as e:
+                print(f"Invalid link specification: {e}")
+                return False
+        if routing == "rip":
+            self.rip_domain = build_rip_domain(self.routers, links, self.scheduler)
+        elif routing == "link_state":
+            self.link_state_domain = build_link_state_domain(self.routers, links, self.scheduler)
+        elif routing != "static":
+            print(f"Unknown routing protocol: {routing}")
+            return False
+        
+        print("Network topology created successfully.")
+        return True
+    
+    def _add_device(self, ip_address):
+        """
+        Create an end device with the next free name and MAC and register it
+        
+        Args:
+            ip_address (str): IP address of the new device
+            
+        Returns:
+            EndDevices: The created device
+        """
+        device_name = chr(65 + len(self.devices))  # Generate name as letter (A, B, C...)
+        mac_address = len(self.devices) + 1
+        device = EndDevices(mac_address, device_name, ip_address)
+        self.devices.append(device)
+        print(f"Created device {device_name} with IP {ip_address} and MAC {mac_address}")
+        return device
+    
+    def _add_hub(self, hub_number, num_devices, ip_prefix):
+        """
+        Create a hub with a number of end devices attached
+        
+        Args:
+            hub_number (int): Hub number
+            num_devices (int): Number of devices to attach
+            ip_prefix (str): IP prefix, device d gets "<ip_prefix>.<d+1>"
+            
+        Returns:
+            Hub: The created hub
+        """
+        hub = Hub(hub_number)
+        self.hubs.append(hub)
+        hub.store_devices_connected([
+            self._add_device(f"{ip_prefix}.{d+1}") for d in range(num_devices)
+        ])
+        return hub
+    
+    def find_device(self, key):
+        """
+        Find a device by name or IP address
+        
+        Args:
+            key (str): Device name (e.g. "A", "PC1-10") or IP address (with or without prefix length)
+            
+        Returns:
+            EndDevices: The matching device, or None if not found
+        """
+        for device in self.devices:
+            if device.get_device_name() == key or device.IP == key or device.IP.split('/')[0] == key:
+                return device
+        return None
+    
     def print_network_topology(self):
         """Print the current network topology"""
         print("\n--- NETWORK TOPOLOGY ---")
@@ -313,8 +502,8 @@ class NetworkSimulator:
             # Show directly connected devices
             if switch.connected_direct:
                 print(f"  Directly connected devices: {len(switch.connected_direct)}")
-                for i, device in enumerate(switch.connected_direct):
-                    port_num = i + 1
+                for device in switch.connected_direct:
+                    port_num = switch.port_of(device)
                     print(f"  - Device {device.get_device_name()} on PORT {port_num}: MAC={device.get_mac()}, IP={device.IP}")
             else:
                 print(f"  No directly connected devices")
@@ -322,8 +511,8 @@ class NetworkSimulator:
             # Show connected hubs
             if switch.hubs:
                 print(f"  Connected hubs: {len(switch.hubs)}")
-                for i, hub in enumerate(switch.hubs):
-                    port_num = len(switch.connected_direct) + i + 1
+                for hub in switch.hubs:
+                    port_num = switch.port_of(hub)
                     hub_devices = hub.get_connected_devices() if hub.get_connected_devices() else []
                     print(f"  - Hub {hub.get_hub_number()} on PORT {port_num}: {len(hub_devices)} connected devices")
             
@@ -370,13 +559,26 @@ class NetworkSimulator:
             except ValueError:
                 print("Please enter a valid number.")
         
-        self.sender_device = self.devices[sender_idx]
+        return self.set_sender_and_receiver(self.devices[sender_idx], self.devices[receiver_idx])
+    
+    def set_sender_and_receiver(self, sender_device, receiver_device):
+        """
+        Set sender and receiver devices and locate their hubs, switches and routers
+        
+        Args:
+            sender_device (EndDevices): Sender device
+            receiver_device (EndDevices): Receiver device
+            
+        Returns:
+            bool: True once the devices are selected
+        """
+        self.sender_device = sender_device
         self.sender_IP = self.sender_device.IP
-        self.receiver_device = self.devices[receiver_idx]
+        self.receiver_device = receiver_device
         self.receiver_IP = self.receiver_device.IP
         
-        print(f"Selected sender: Device {self.sender_device.get_device_name()} (IP: {self.sender_IP})")
-        print(f"Selected receiver: Device {self.receiver_device.get_device_name()} (IP: {self.receiver_IP})")
+        _network_log.info("[NETWORK] ▶ Selected sender: Device {} (IP: {})", self.sender_device.get_device_name(), self.sender_IP)
+        _network_log.info("[NETWORK] ▶ Selected receiver: Device {} (IP: {})", self.receiver_device.get_device_name(), self.receiver_IP)
         
         # Reset previous connections
         self.sender_hub = None
@@ -402,33 +604,33 @@ class NetworkSimulator:
             # Check sender
             if self.sender_IP.startswith(f"{router_network}."):
                 self.sender_router = router
-                print(f"Sender is in Router {router.router_number}'s network ({router.NID})")
+                _network_log.info("[NETWORK] ▶ Sender is in Router {}'s network ({})", router.router_number, router.NID)
                 
             # Check receiver
             if self.receiver_IP.startswith(f"{router_network}."):
                 self.receiver_router = router
-                print(f"Receiver is in Router {router.router_number}'s network ({router.NID})")
+                _network_log.info("[NETWORK] ▶ Receiver is in Router {}'s network ({})", router.router_number, router.NID)
         
         # Find if devices are connected directly to switches
         for switch in self.switches:
             if self.sender_device in switch.connected_direct:
                 sender_switch = switch
-                print(f"Sender is connected directly to Switch {switch.switch_number}")
+                _network_log.info("[NETWORK] ▶ Sender is connected directly to Switch {}", switch.switch_number)
             if self.receiver_device in switch.connected_direct:
                 receiver_switch = switch
-                print(f"Receiver is connected directly to Switch {switch.switch_number}")
+                _network_log.info("[NETWORK] ▶ Receiver is connected directly to Switch {}", switch.switch_number)
         
         if self.sender_hub:
-            print(f"Sender is connected to Hub {self.sender_hub.get_hub_number()}")
+            _network_log.info("[NETWORK] ▶ Sender is connected to Hub {}", self.sender_hub.get_hub_number())
         if self.receiver_hub:
-            print(f"Receiver is connected to Hub {self.receiver_hub.get_hub_number()}")
+            _network_log.info("[NETWORK] ▶ Receiver is connected to Hub {}", self.receiver_hub.get_hub_number())
             
         # Set switches if they are known through hubs
         if self.sender_hub and not sender_switch:
             for switch in self.switches:
                 if self.sender_hub in switch.hubs:
                     self.sender_switch = switch
-                    print(f"Sender's Hub {self.sender_hub.get_hub_number()} is connected to Switch {switch.switch_number}")
+                    _network_log.info("[NETWORK] ▶ Sender's Hub {} is connected to Switch {}", self.sender_hub.get_hub_number(), switch.switch_number)
                     break
         else:
             self.sender_switch = sender_switch
@@ -437,7 +639,7 @@ class NetworkSimulator:
             for switch in self.switches:
                 if self.receiver_hub in switch.hubs:
                     self.receiver_switch = switch
-                    print(f"Receiver's Hub {self.receiver_hub.get_hub_number()} is connected to Switch {switch.switch_number}")
+                    _network_log.info("[NETWORK] ▶ Receiver's Hub {} is connected to Switch {}", self.receiver_hub.get_hub_number(), switch.switch_number)
                     break
         else:
             self.receiver_switch = receiver_switch
@@ -454,12 +656,32 @@ class NetworkSimulator:
                 return
         
         # Get data from user
-        self.data_to_be_sent = input("Enter data to be sent: ")
+        self.transfer_data(input("Enter data to be sent: "))
+    
+    def transfer_data(self, message, deadline=None):
+        """
+        Transfer a message from the selected sender to the selected receiver
+        
+        Args:
+            message (str): Data to be sent
+            deadline (float, optional): Simulation time after which no further
+                window of frames is sent; the transfer then counts as not delivered
+            
+        Returns:
+            dict: Transfer statistics (connection type, frames, ACKs, NAKs, timing)
+        """
+        self.data_to_be_sent = message
+        start_time = self.scheduler.now
+        transmissions = 0
+        acks_received = 0
+        naks_received = 0
+        consecutive_naks = 0
+        delivered = True
         
         # Demo of Go-Back-N protocol with multiple frames
-        print("\n--- GO-BACK-N PROTOCOL DEMONSTRATION ---")
-        print(f"Window size: {self.window_size}")
-        print(f"Using checksum for error detection")
+        _sender_log.info("\n[SENDER] === GO-BACK-N PROTOCOL DEMONSTRATION ===")
+        _sender_log.info("[SENDER] ▶ Window size: {}", self.window_size)
+        _sender_log.info("[SENDER] ▶ Using checksum for error detection")
         
         # Split the message into multiple frames if it's long enough
         frames = []
@@ -469,10 +691,11 @@ class NetworkSimulator:
             frame_data = self.data_to_be_sent[i:i+frame_size]
             frames.append(frame_data)
             
-        print(f"Message split into {len(frames)} frames")
+        _sender_log.info("[SENDER] ▶ Message split into {} frames", len(frames))
         
-        # Set up our checksum handler
+        # Set up our checksum handler; its send window follows the one below
         checksum_handler = ChecksumForDataLink()
+        checksum_handler.window_size = self.window_size
         
         # Determine connection type
         sender_connected_to_switch = False
@@ -494,9 +717,10 @@ class NetworkSimulator:
         # Check if devices are in different router networks
         if self.sender_router and self.receiver_router and self.sender_router != self.receiver_router:
             connection_type = "Inter-Router"
-            # Build routing tables if not already built
-            for router in self.routers:
-                router.build_routing_table(self.routers)
+            # Build routing tables if not already built (RIP and link-state keep their own up to date)
+            if self.rip_domain is None and self.link_state_domain is None:
+                for router in self.routers:
+                    router.build_routing_table(self.routers)
         elif self.sender_hub and self.receiver_hub:
             if self.sender_hub == self.receiver_hub:
                 connection_type = "Same Hub"
@@ -515,14 +739,22 @@ class NetworkSimulator:
             # Direct connection or unrecognized topology
             connection_type = "Direct"
             
-        print(f"\n[NETWORK] Connection type: {connection_type}")
+        _network_log.info("\n[NETWORK] Connection type: {}", connection_type)
         
-        # Simulate sending frames with Go-Back-N
+        # Simulate sending frames with Go-Back-N; every transfer numbers its
+        # frames from 0, so the receiver starts expecting frame 0 again
         current_seq = 0
+        self.receiver_device.expected_seq_num = 0
+        self.receiver_device.last_received_seq = -1
         frames_sent = 0
         buffer = {}  # Buffer for unacknowledged frames
         
-        while frames_sent < len(frames):
+        while frames_sent < len(frames) or buffer:
+            if deadline is not None and self.scheduler.now > deadline:
+                _sender_log.warning("[SENDER] ⚠ Deadline {:.2f}s reached with {} of {} frames sent", deadline, frames_sent, len(frames))
+                delivered = False
+                break
+            
             # Send frames within the window
             while frames_sent < len(frames) and len(buffer) < self.window_size:
                 # Create frame with checksum
@@ -533,31 +765,31 @@ class NetworkSimulator:
                 buffer[current_seq] = frame
                 
                 # Send frame to receiver
-                print(f"\n[SENDER] ▶ Sending frame {current_seq}: {frame_data}")
+                _sender_log.info("\n[SENDER] ▶ Sending frame {}: {}", current_seq, frame_data)
                 self.sender_device.data = frame
                 
                 # Handle different connection types
                 if connection_type == "Direct" or (self.sender_hub and (self.sender_hub.hub_number == -1 or self.receiver_hub.hub_number == -1)):
-                    print("[NETWORK] ▶ Direct connection path")
+                    _network_log.info("[NETWORK] ▶ Direct connection path")
                     self.sender_device.send_data_to_receiver(self.receiver_device)
                 elif connection_type == "Same Hub":
-                    print("[NETWORK] ▶ Same hub path")
+                    _network_log.info("[NETWORK] ▶ Same hub path")
                     self.sender_device.send_data_and_address_to_hub(self.sender_hub)
                     self.sender_hub.send_data_to_receiver(self.receiver_device)
                 elif connection_type == "Same Switch":
-                    print("[NETWORK] ▶ Same switch path")
-                    print("\n[NETWORK] === OSI MODEL DATA TRANSFER DEMONSTRATION ===")
-                    print("[NETWORK] ▶ APPLICATION LAYER: Preparing data from user input")
-                    print("[NETWORK] ▶ PRESENTATION LAYER: Data formatting (not implemented)")
-                    print("[NETWORK] ▶ SESSION LAYER: Session management (not implemented)")
-                    print("[NETWORK] ▶ TRANSPORT LAYER: End-to-end delivery with Go-Back-N")
-                    print("[NETWORK] ▶ NETWORK LAYER: Route selection - device connected to switch")
-                    print("[NETWORK] ▶ DATA LINK LAYER: Framing with error detection")
-                    print("[NETWORK] ▶ PHYSICAL LAYER: Using CSMA/CD for media access")
+                    _network_log.info("[NETWORK] ▶ Same switch path")
+                    _network_log.info("\n[NETWORK] === OSI MODEL DATA TRANSFER DEMONSTRATION ===")
+                    _network_log.info("[NETWORK] ▶ APPLICATION LAYER: Preparing data from user input")
+                    _network_log.info("[NETWORK] ▶ PRESENTATION LAYER: Data formatting (not implemented)")
+                    _network_log.info("[NETWORK] ▶ SESSION LAYER: Session management (not implemented)")
+                    _network_log.info("[NETWORK] ▶ TRANSPORT LAYER: End-to-end delivery with Go-Back-N")
+                    _network_log.info("[NETWORK] ▶ NETWORK LAYER: Route selection - device connected to switch")
+                    _network_log.info("[NETWORK] ▶ DATA LINK LAYER: Framing with error detection")
+                    _network_log.info("[NETWORK] ▶ PHYSICAL LAYER: Using CSMA/CD for media access")
                     # Send data through switch with CSMA/CD
                     sender_connected_switch.send_direct_data(self.sender_device, self.receiver_device)
                 elif connection_type == "Different Hubs":
-                    print("[NETWORK] ▶ Different hubs path")
+                    _network_log.info("[NETWORK] ▶ Different hubs path")
                     # Find a switch connecting both hubs
                     connecting_switch = None
                     for s in self.switches:
@@ -570,29 +802,30 @@ class NetworkSimulator:
                         self.sender_hub.send_data_to_switch(connecting_switch, self.sender_hub, self.receiver_hub, 
                                                           self.sender_device, self.receiver_device)
                     else:
-                        print("[NETWORK] ⚠ Could not find a path between hubs, using direct connection")
+                        _network_log.warning("[NETWORK] ⚠ Could not find a path between hubs, using direct connection")
                         self.sender_device.send_data_to_receiver(self.receiver_device)
                 elif connection_type == "Different Switches":
-                    print("[NETWORK] ⚠ Different switches path - not implemented yet, using direct connection")
+                    _network_log.warning("[NETWORK] ⚠ Different switches path - not implemented yet, using direct connection")
                     self.sender_device.send_data_to_receiver(self.receiver_device)
                 elif connection_type == "Hub to Switch":
-                    print("[NETWORK] ⚠ Hub to switch path - not implemented yet, using direct connection")
+                    _network_log.warning("[NETWORK] ⚠ Hub to switch path - not implemented yet, using direct connection")
                     self.sender_device.send_data_to_receiver(self.receiver_device)
                 elif connection_type == "Switch to Hub":
-                    print("[NETWORK] ⚠ Switch to hub path - not implemented yet, using direct connection")
+                    _network_log.warning("[NETWORK] ⚠ Switch to hub path - not implemented yet, using direct connection")
                     self.sender_device.send_data_to_receiver(self.receiver_device)
                 elif connection_type == "Inter-Router":
-                    print("\n[NETWORK] === OSI MODEL INTER-ROUTER DATA TRANSFER ===")
-                    print("[NETWORK] ▶ APPLICATION LAYER: Preparing data from user input")
-                    print("[NETWORK] ▶ PRESENTATION LAYER: Data formatting")
-                    print("[NETWORK] ▶ SESSION LAYER: Session establishment")
-                    print("[NETWORK] ▶ TRANSPORT LAYER: End-to-end delivery with Go-Back-N")
-                    print("[NETWORK] ▶ NETWORK LAYER: IP routing between different networks")
-                    print(f"[NETWORK] ▶ Source IP: {self.sender_IP}, Destination IP: {self.receiver_IP}")
+                    _network_log.info("\n[NETWORK] === OSI MODEL INTER-ROUTER DATA TRANSFER ===")
+                    _network_log.info("[NETWORK] ▶ APPLICATION LAYER: Preparing data from user input")
+                    _network_log.info("[NETWORK] ▶ PRESENTATION LAYER: Data formatting")
+                    _network_log.info("[NETWORK] ▶ SESSION LAYER: Session establishment")
+                    _network_log.info("[NETWORK] ▶ TRANSPORT LAYER: End-to-end delivery with Go-Back-N")
+                    _network_log.info("[NETWORK] ▶ NETWORK LAYER: IP routing between different networks")
+                    _network_log.info("[NETWORK] ▶ Source IP: {}, Destination IP: {}", self.sender_IP, self.receiver_IP)
                     
                     # Display routing information
-                    print(f"\n[ROUTER {self.sender_router.router_number}] === ROUTING PROCESS ===")
-                    self.sender_router.display_routing_table()
+                    if _router_log.is_enabled():  # The table is only worth walking if it is shown
+                        _router_log.info("\n[ROUTER {}] === ROUTING PROCESS ===", self.sender_router.router_number)
+                        self.sender_router.display_routing_table()
                     
                     # Route the packet through routers
                     success = self.route_packet_through_network(self.sender_IP, self.receiver_IP, frame)
@@ -601,58 +834,93 @@ class NetworkSimulator:
                         # If routing is successful, the packet arrives at the destination
                         self.receiver_device.set_receiver_data(frame)
                     else:
-                        print(f"[NETWORK] ❌ Routing failed. Packet did not reach destination.")
+                        _network_log.error("[NETWORK] ❌ Routing failed. Packet did not reach destination.")
                         # Handle failed transmission (set a NAK)
                         self.receiver_device.ACKorNAK = f"NAK{current_seq}"
                 else:
-                    print("[NETWORK] ⚠ Unknown path, using direct connection")
+                    _network_log.warning("[NETWORK] ⚠ Unknown path, using direct connection")
                     self.sender_device.send_data_to_receiver(self.receiver_device)
                 
                 # Move to next sequence number
                 current_seq = (current_seq + 1) % 10
                 frames_sent += 1
+                transmissions += 1
             
             # Wait for ACK or NAK
-            print(f"\n[SENDER] ▶ Waiting for acknowledgment...")
-            time.sleep(0.5)  # Simulate network delay
+            _sender_log.info("\n[SENDER] ▶ Waiting for acknowledgment...")
+            self.scheduler.sleep(0.5)  # Simulate network delay
             
             # Check ACK/NAK from receiver
             response = self.receiver_device.ACKorNAK
+            go_back_to = None  # Frame to resend from, if this round made no progress
             
             if response.startswith("ACK"):
                 # Extract the ACK sequence number
                 ack_seq = int(response[3:])
-                print(f"[SENDER] ✓ Received ACK for frame {ack_seq}")
-                
-                # Handle cumulative acknowledgment
-                to_remove = []
-                for seq in buffer:
-                    if (seq <= ack_seq and ack_seq - seq < 5) or (seq > ack_seq and seq - ack_seq > 5):
-                        to_remove.append(seq)
-                
-                for seq in to_remove:
-                    del buffer[seq]
-                    print(f"[SENDER] ✓ Frame {seq} acknowledged")
+                acks_received += 1
+                _sender_log.info("[SENDER] ✓ Received ACK for frame {}", ack_seq)
+                
+                # Handle cumulative acknowledgment: sequence numbers wrap at 10, so
+                # compare them by their distance from the window base (the buffer
+                # keeps frames in sending order); a stale ACK lies beyond the window
+                if buffer:
+                    base = next(iter(buffer))
+                    acked = (ack_seq - base) % 10 + 1
+                    if acked <= len(buffer):
+                        for seq in list(buffer)[:acked]:
+                            del buffer[seq]
+                            _sender_log.info("[SENDER] ✓ Frame {} acknowledged", seq)
+                        checksum_handler.process_ack(response)  # Slide the framing window too
+                        consecutive_naks = 0
+                    else:
+                        # Nothing new acknowledged: the window base was lost, as on a timeout
+                        go_back_to = base
                 
-                print(f"[SENDER] ▶ Current window: {list(buffer.keys())}")
+                if _sender_log.is_enabled():
+                    _sender_log.info("[SENDER] ▶ Current window: {}", list(buffer))
                 
             elif response.startswith("NAK"):
                 # Extract NAK sequence number
-                nak_seq = int(response[3:])
-                print(f"[SENDER] ❌ Received NAK for frame {nak_seq}")
-                
-                # Go-Back-N: Resend all frames from NAK onwards
-                print(f"[SENDER] ⚠ Retransmitting from frame {nak_seq}")
+                go_back_to = int(response[3:])
+                naks_received += 1
+                _sender_log.error("[SENDER] ❌ Received NAK for frame {}", go_back_to)
+            
+            if go_back_to is not None:
+                consecutive_naks += 1
+                if consecutive_naks >= self.max_nak_rounds:
+                    _sender_log.error("[SENDER] ❌ Giving up after {} rounds without progress", consecutive_naks)
+                    delivered = False
+                    break
                 
-                # Reset frames_sent to force retransmission
-                for seq in list(buffer.keys()):
-                    if seq >= nak_seq:
-                        frames_sent = frames_sent - (current_seq - seq)
-                        current_seq = seq
-                        break
-        
-        print("\n[SENDER] ✓ All frames transmitted and acknowledged")
-        print("[SENDER] ✓ Data transfer completed successfully")
+                # Go-Back-N: Resend all frames from the NAKed one onwards
+                _sender_log.warning("[SENDER] ⚠ Retransmitting from frame {}", go_back_to)
+                
+                # Compare sequence numbers by their distance from the window base, as for ACKs
+                if buffer:
+                    base = next(iter(buffer))
+                    offset = (go_back_to - base) % 10
+                    resend = [seq for seq in buffer if (seq - base) % 10 >= offset]
+                    if resend:
+                        # Go back to the NAKed frame and free the window slots of the frames to resend
+                        frames_sent -= len(resend)
+                        current_seq = resend[0]
+                        for seq in resend:
+                            del buffer[seq]
+        
+        if delivered:
+            _sender_log.info("\n[SENDER] ✓ All frames transmitted and acknowledged")
+            _sender_log.info("[SENDER] ✓ Data transfer completed successfully")
+        
+        return {
+            'delivered': delivered,
+            'connection_type': connection_type,
+            'frames': len(frames),
+            'transmissions': transmissions,
+            'acks': acks_received,
+            'naks': naks_received,
+            'start_time': start_time,
+            'end_time': self.scheduler.now
+        }
     
     def email_service_test(self):
         """Test email service between devices"""
@@ -984,8 +1252,7 @@ class NetworkSimulator:
                 print(f"\n[DIRECT] ❌ Max retransmissions reached, some data may be lost")
             
             # Small delay between frames
-            import time
-            time.sleep(0.5)
+            self.scheduler.sleep(0.5)
         
         self.ACK_or_NAK = self.sender_device.ACKorNAK
         
@@ -1121,8 +1388,7 @@ class NetworkSimulator:
                 print(f"\n[HUB] ❌ Max retransmissions reached for frame {i}, data may be lost")
             
             # Small delay between frames
-            import time
-            time.sleep(0.5)
+            self.scheduler.sleep(0.5)
         
         self.ACK_or_NAK = self.sender_device.ACKorNAK
         
@@ -1291,35 +1557,41 @@ class NetworkSimulator:
         Returns:
             bool: True if packet was successfully delivered, False otherwise
         """
-        print(f"\n[NETWORK] === ROUTING PACKET ===")
-        print(f"[NETWORK] ▶ Source IP: {source_ip}")
-        print(f"[NETWORK] ▶ Destination IP: {destination_ip}")
+        _network_log.info("\n[NETWORK] === ROUTING PACKET ===")
+        _network_log.info("[NETWORK] ▶ Source IP: {}", source_ip)
+        _network_log.info("[NETWORK] ▶ Destination IP: {}", destination_ip)
         
         if not self.sender_router or not self.receiver_router:
-            print("[NETWORK] ❌ Source or destination router not found")
+            _network_log.error("[NETWORK] ❌ Source or destination router not found")
             return False
+        
+        # One writable copy of the frame travels the whole path; each router
+        # decrements its TTL in place instead of rebuilding it
+        if isinstance(packet_data, bytes):
+            packet_data = bytearray(packet_data)
             
         # Initialize variables for routing simulation
         current_router = self.sender_router
         max_hops = 8  # Prevent infinite loops
         hop_count = 0
         
-        print(f"[NETWORK] ▶ Starting at Router {current_router.router_number}")
+        _network_log.info("[NETWORK] ▶ Starting at Router {}", current_router.router_number)
         
         # Loop until we reach the destination router or hit max hops
         while current_router != self.receiver_router and hop_count < max_hops:
-            # Simulate router congestion (random level between 0.2 and 0.7)
-            congestion_level = random.uniform(0.2, 0.7)
-            if not current_router.simulate_congestion(congestion_level):
-                print(f"[NETWORK] ❌ Packet dropped due to network congestion")
-                return False
-                
             # Route the packet using the router's routing table
             success, next_hop = current_router.route_packet(source_ip, destination_ip, packet_data)
             
             if not success:
-                print(f"[NETWORK] ❌ Routing failed at Router {current_router.router_number}")
+                _network_log.error("[NETWORK] ❌ Routing failed at Router {}", current_router.router_number)
                 return False
+            
+            # Wait in the output queue behind whatever traffic is already there
+            if next_hop != current_router.router_number:
+                size = len(packet_data) if isinstance(packet_data, (bytes, bytearray, str)) else 1500
+                if not current_router.send_queued(f"interface {next_hop}", packet_data, size):
+                    _network_log.error("[NETWORK] ❌ Packet dropped in the output queue of Router {}", current_router.router_number)
+                    return False
                 
             # Find the next router in the path
             next_router = None
@@ -1329,55 +1601,54 @@ class NetworkSimulator:
                     break
             
             if next_router:
-                print(f"[NETWORK] ▶ Hop {hop_count+1}: Router {current_router.router_number} → Router {next_router.router_number}")
-                # Simulate link delay between routers (50-150ms)
-                link_delay = random.uniform(0.05, 0.15)
-                print(f"[NETWORK] ▶ Link delay: {link_delay:.3f}s")
-                time.sleep(link_delay)
+                _network_log.info("[NETWORK] ▶ Hop {}: Router {} → Router {}", hop_count+1, current_router.router_number, next_router.router_number)
+                # Propagation delay of the link to the next router (50-150 ms when not modeled)
+                link = current_router.links.get(f"interface {next_hop}")
+                link_delay = link.delay if link is not None else self.rng.uniform(0.05, 0.15)
+                _network_log.info("[NETWORK] ▶ Link delay: {:.3f}s", link_delay)
+                self.scheduler.sleep(link_delay)
                 current_router = next_router
             else:
                 # We've reached the destination network
-                print(f"[NETWORK] ✓ Reached destination network at Router {current_router.router_number}")
+                _network_log.info("[NETWORK] ✓ Reached destination network at Router {}", current_router.router_number)
                 break
                 
             hop_count += 1
             
         if hop_count >= max_hops:
-            print(f"[NETWORK] ❌ Packet exceeded maximum hop count ({max_hops})")
+            _network_log.error("[NETWORK] ❌ Packet exceeded maximum hop count ({})", max_hops)
             return False
             
-        print(f"[NETWORK] ✓ Successfully routed packet to destination network")
+        _network_log.info("[NETWORK] ✓ Successfully routed packet to destination network")
         
         # If destination router found, send to the correct switch
         if current_router == self.receiver_router:
-            print(f"[NETWORK] ▶ Router {current_router.router_number} delivering packet to local network")
+            _network_log.info("[NETWORK] ▶ Router {} delivering packet to local network", current_router.router_number)
             
             # In a real network, the router would now perform ARP to find the MAC address
-            print(f"[NETWORK] ▶ Router performing ARP lookup for {destination_ip}")
+            _network_log.info("[NETWORK] ▶ Router performing ARP lookup for {}", destination_ip)
             
             # Find the appropriate switch to deliver to
             if self.receiver_switch:
-                print(f"[NETWORK] ▶ Forwarding to Switch {self.receiver_switch.switch_number}")
+                _network_log.info("[NETWORK] ▶ Forwarding to Switch {}", self.receiver_switch.switch_number)
                 # The switch would then forward to the device
                 
                 # For demonstration, we simulate the complete delivery
                 self.receiver_device.set_receiver_data(packet_data)
-                # Extract sequence number from frame format: SEQ|data|CHECKSUM|checksum_value
-                seq_num = packet_data.split('|')[0]
+                seq_num = ChecksumForDataLink.get_sequence_number(packet_data)
                 self.receiver_device.ACKorNAK = f"ACK{seq_num}"
                 return True
             else:
                 # Try to find a path through a hub
                 if self.receiver_hub:
-                    print(f"[NETWORK] ▶ Forwarding to Hub {self.receiver_hub.get_hub_number()}")
+                    _network_log.info("[NETWORK] ▶ Forwarding to Hub {}", self.receiver_hub.get_hub_number())
                     self.receiver_device.set_receiver_data(packet_data)
-                    # Extract sequence number from frame format: SEQ|data|CHECKSUM|checksum_value
-                    seq_num = packet_data.split('|')[0]
+                    seq_num = ChecksumForDataLink.get_sequence_number(packet_data)
                     self.receiver_device.ACKorNAK = f"ACK{seq_num}"
                     return True
                     
         # If we get here, we couldn't find a complete path
-        print(f"[NETWORK] ❌ Cannot find final delivery path")
+        _network_log.error("[NETWORK] ❌ Cannot find final delivery path")
         return False
         
     def create_routing_test(self):
@@ -1565,6 +1836,18 @@ class NetworkSimulator:
         print("• Full protocol stack implementation")
         print("• User-selectable application protocols and ports")
         
+        created_devices, created_routers = self.build_three_network_topology()
+        
+        # Interactive communication test
+        self._run_interactive_communication_test(created_devices, created_routers)
+    
+    def build_three_network_topology(self):
+        """
+        Build the 3-router topology used by the three-network test
+        
+        Returns:
+            tuple: (devices by name, routers by name)
+        """
         # Clear existing topology
         self.devices.clear()
         self.routers.clear()
@@ -1657,8 +1940,7 @@ class NetworkSimulator:
             for device in network_devices:
                 print(f"    {device.device_name}: {device.IP}")
         
-        # Interactive communication test
-        self._run_interactive_communication_test(created_devices, created_routers)
+        return created_devices, created_routers
     
     def _run_interactive_communication_test(self, devices, routers):
         """Run interactive communication test with protocol selection"""
@@ -1883,7 +2165,7 @@ class NetworkSimulator:
             crc_value = crc_handler.calculate_crc32(checksum_frame)
             
             # Simulate error injection (10% chance)
-            error_occurred = random.random() < 0.1
+            error_occurred = self.rng.random() < 0.1
             if error_occurred:
                 print(f"[ERROR] ⚠ Segment {i+1}: Transmission error - will retransmit")
             else:
@@ -1900,21 +2182,21 @@ class NetworkSimulator:
         print(f"[CSMA/CD] → Listening to carrier signal...")
         
         # Simulate CSMA/CD process
-        collision_detected = random.random() < 0.15  # 15% collision chance
+        collision_detected = self.rng.random() < 0.15  # 15% collision chance
         
         if collision_detected:
-            backoff_time = random.randint(1, 10)
+            backoff_time = self.rng.randint(1, 10)
             print(f"[CSMA/CD] ⚠ COLLISION DETECTED!")
             print(f"[CSMA/CD] → Sending jam signal (48 bits)")
             print(f"[CSMA/CD] → Binary exponential backoff: {backoff_time} time slots")
             print(f"[CSMA/CD] → Retransmitting after backoff...")
-            time.sleep(0.3)  # Simulate backoff delay
+            self.scheduler.sleep(0.3)  # Simulate backoff delay
         
         print(f"[CSMA/CD] ✓ Channel clear, transmitting...")
         print(f"[PHYSICAL] → Converting frames to electrical signals")
         
         # Signal propagation simulation
-        propagation_delay = random.randint(10, 50)
+        propagation_delay = self.rng.randint(10, 50)
         print(f"[PHYSICAL] → Signal propagation delay: {propagation_delay}ms")
         print(f"[PHYSICAL] → Transmission rate: 100 Mbps")
         print(f"[PHYSICAL] → Signal transmitted successfully")
@@ -2097,9 +2379,8 @@ class NetworkSimulator:
                     segment_data = segments[0]  # Use first segment
                     print(f"✓ TCP segment created with sliding window flow control")
                     # Get connection details
-                    conn_key = (source_port, dest_ip, protocol['port'])
-                    if conn_key in transport.tcp_connections:
-                        conn = transport.tcp_connections[conn_key]
+                    conn = transport.get_tcp_connection(process_id, dest_ip, protocol['port'])
+                    if conn is not None:
                         seq_num = getattr(conn, 'seq_num', 'N/A')
                         print(f"✓ Sequence number: {seq_num}")
                 else:
@@ -2333,9 +2614,8 @@ class NetworkSimulator:
                 print(f"✓ New CRC calculated for WAN frame: {wan_crc}")
                 
                 # Simulate WAN transmission delay
-                import time
                 print(f"✓ Transmitting over WAN link...")
-                time.sleep(0.2)  # Real network delay
+                self.scheduler.sleep(0.2)  # Simulated network delay
                 
                 # Destination router processing
                 print(f"\n[ROUTER {dest_router.router_number}] WAN FRAME PROCESSING")
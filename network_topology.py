@@ -3,8 +3,19 @@ Network Topology Manager for TCP/IP Network Simulator
 Manages network devices, connections, and routing in a realistic way
 """
 
-import random
+import heapq
+import itertools
+from collections import deque
 from enum import Enum
+from sim_logging import get_logger
+from forwarding_table import RoutingTable
+from mac_table import MACTable, LEARNED, MOVED, TABLE_FULL
+from link_state_routing import LinkStateRouting
+from link import Link
+from address_registry import get_address_registry
+from rng_service import get_rng
+
+_log = get_logger("TOPOLOGY")
 
 class DeviceType(Enum):
     END_DEVICE = "END_DEVICE"
@@ -21,11 +32,19 @@ class NetworkInterface:
         self.mac_address = mac_address
         self.is_up = True
         self.connected_to = None  # Reference to connected device/port
+        self.link = None  # Link to the connected interface
         
-    def connect_to(self, other_interface):
-        """Connect this interface to another interface"""
+    def connect_to(self, other_interface, **link_options):
+        """Connect this interface to another interface over a new Link (see link.Link for options)"""
+        self.link = other_interface.link = Link(self, other_interface, **link_options)
         self.connected_to = other_interface
         other_interface.connected_to = self
+        
+    def send(self, packet, size, on_arrival=None, on_loss=None):
+        """Send a frame over the link; returns its arrival time, or None if it cannot be sent"""
+        if self.link is None or not self.is_up:
+            return None
+        return self.link.transmit(self, packet, size, on_arrival, on_loss)
 
 class NetworkDevice:
     """Base class for all network devices"""
@@ -44,10 +63,10 @@ class NetworkDevice:
         self.interfaces[interface_name] = interface
         return interface
         
-    def connect_to_device(self, other_device, local_interface, remote_interface):
+    def connect_to_device(self, other_device, local_interface, remote_interface, **link_options):
         """Connect this device to another device"""
         if local_interface in self.interfaces and remote_interface in other_device.interfaces:
-            self.interfaces[local_interface].connect_to(other_device.interfaces[remote_interface])
+            self.interfaces[local_interface].connect_to(other_device.interfaces[remote_interface], **link_options)
             return True
         return False
         
@@ -60,6 +79,9 @@ class EndDevice(NetworkDevice):
     
     def __init__(self, device_id, device_name, ip_address, mac_address):
         super().__init__(device_id, DeviceType.END_DEVICE, device_name)
+        self.registry = get_address_registry()  # IP/MAC index used for address resolution
+        self._ip_address = None
+        self._mac_address = None
         self.ip_address = ip_address
         self.mac_address = mac_address
         
@@ -69,6 +91,26 @@ class EndDevice(NetworkDevice):
         # Default gateway
         self.default_gateway = None
         
+    @property
+    def ip_address(self):
+        """IP address; changing it updates the address registry"""
+        return self._ip_address
+    
+    @ip_address.setter
+    def ip_address(self, ip_address):
+        self.registry.update_ip(self, self._ip_address, ip_address)
+        self._ip_address = ip_address
+        
+    @property
+    def mac_address(self):
+        """MAC address; changing it updates the address registry"""
+        return self._mac_address
+    
+    @mac_address.setter
+    def mac_address(self, mac_address):
+        self.registry.update_mac(self, self._mac_address, mac_address)
+        self._mac_address = mac_address
+        
     def set_default_gateway(self, gateway_ip):
         """Set the default gateway for this device"""
         self.default_gateway = gateway_ip
@@ -76,10 +118,10 @@ class EndDevice(NetworkDevice):
     def process_packet(self, packet, receiving_interface):
         """Process packet at end device"""
         if packet.dest_ip == self.ip_address:
-            print(f"[{self.device_name}] ✓ Packet received and accepted")
+            _log.info("[{}] ✓ Packet received and accepted", self.device_name)
             return True
         else:
-            print(f"[{self.device_name}] ▶ Packet not for this device, dropping")
+            _log.info("[{}] ▶ Packet not for this device, dropping", self.device_name)
             return False
 
 class Switch(NetworkDevice):
@@ -87,22 +129,31 @@ class Switch(NetworkDevice):
     
     def __init__(self, device_id, device_name=None):
         super().__init__(device_id, DeviceType.SWITCH, device_name)
-        self.mac_address_table = {}  # MAC -> interface mapping
+        self.mac_address_table = MACTable()  # MAC -> port number, with aging
         self.port_count = 24  # Default 24 ports
+        self.port_names = [None]  # Port number -> interface name
+        self.port_numbers = {}  # Interface name -> port number
         
         # Add switch ports
         for i in range(1, self.port_count + 1):
             self.add_interface(f"port{i}")
+            self.port_names.append(f"port{i}")
+            self.port_numbers[f"port{i}"] = i
             
     def learn_mac_address(self, mac_address, interface_name):
         """Learn MAC address on an interface"""
-        if mac_address not in self.mac_address_table:
-            self.mac_address_table[mac_address] = interface_name
-            print(f"[{self.device_name}] ▶ Learned MAC {mac_address} on {interface_name}")
+        result = self.mac_address_table.learn(mac_address, self.port_numbers[interface_name])
+        if result == LEARNED:
+            _log.info("[{}] ▶ Learned MAC {} on {}", self.device_name, mac_address, interface_name)
+        elif result == MOVED:
+            _log.warning("[{}] ⚠ Station move: MAC {} is now on {}", self.device_name, mac_address, interface_name)
+        elif result == TABLE_FULL:
+            _log.warning("[{}] ⚠ MAC table full, frames to {} will be flooded", self.device_name, mac_address)
         
     def lookup_mac_address(self, mac_address):
         """Look up which interface a MAC address is on"""
-        return self.mac_address_table.get(mac_address)
+        port = self.mac_address_table.lookup(mac_address)
+        return self.port_names[port] if port is not None else None
         
     def process_packet(self, packet, receiving_interface):
         """Process packet at switch (Layer 2)"""
@@ -114,10 +165,10 @@ class Switch(NetworkDevice):
         if packet.dest_mac:
             out_interface = self.lookup_mac_address(packet.dest_mac)
             if out_interface and out_interface != receiving_interface:
-                print(f"[{self.device_name}] ▶ Forwarding to {out_interface}")
+                _log.info("[{}] ▶ Forwarding to {}", self.device_name, out_interface)
                 return self.forward_packet(packet, out_interface)
             else:
-                print(f"[{self.device_name}] ▶ Flooding to all ports (unknown destination)")
+                _log.info("[{}] ▶ Flooding to all ports (unknown destination)", self.device_name)
                 return self.flood_packet(packet, receiving_interface)
         
         return False
@@ -127,7 +178,7 @@ class Switch(NetworkDevice):
         if out_interface in self.interfaces:
             connected_interface = self.interfaces[out_interface].connected_to
             if connected_interface:
-                print(f"[{self.device_name}] ▶ Packet forwarded via {out_interface}")
+                _log.info("[{}] ▶ Packet forwarded via {}", self.device_name, out_interface)
                 return True
         return False
         
@@ -136,7 +187,7 @@ class Switch(NetworkDevice):
         forwarded = False
         for interface_name, interface in self.interfaces.items():
             if interface_name != receiving_interface and interface.connected_to:
-                print(f"[{self.device_name}] ▶ Flooding to {interface_name}")
+                _log.info("[{}] ▶ Flooding to {}", self.device_name, interface_name)
                 forwarded = True
         return forwarded
 
@@ -147,6 +198,16 @@ class Router(NetworkDevice):
         super().__init__(device_id, DeviceType.ROUTER, device_name)
         self.connected_networks = set()
         self.interface_count = 4  # Default 4 interfaces
+        self.rng = get_rng(f"topology/{device_id}")  # Interface MAC addresses
+        
+    @property
+    def routing_table(self):
+        """Routing table; longest-prefix lookups go through its forwarding table"""
+        return self._routing_table
+    
+    @routing_table.setter
+    def routing_table(self, table):
+        self._routing_table = table if isinstance(table, RoutingTable) else RoutingTable(table)
         
     def add_network_interface(self, interface_name, ip_address, network_address):
         """Add a network interface with IP address"""
@@ -161,7 +222,7 @@ class Router(NetworkDevice):
             "metric": 0
         }
         
-        print(f"[{self.device_name}] ▶ Added interface {interface_name} ({ip_address}) for network {network_address}")
+        _log.info("[{}] ▶ Added interface {} ({}) for network {}", self.device_name, interface_name, ip_address, network_address)
         return interface
         
     def add_static_route(self, network, next_hop, interface, metric=1):
@@ -171,22 +232,11 @@ class Router(NetworkDevice):
             "interface": interface,
             "metric": metric
         }
-        print(f"[{self.device_name}] ▶ Added route: {network} via {next_hop} (metric {metric})")
+        _log.info("[{}] ▶ Added route: {} via {} (metric {})", self.device_name, network, next_hop, metric)
         
     def lookup_route(self, dest_ip):
-        """Look up route for destination IP"""
-        # Convert IP to network (assuming /24 networks)
-        dest_network = ".".join(dest_ip.split(".")[:3]) + ".0/24"
-        
-        # Check for exact match
-        if dest_network in self.routing_table:
-            return self.routing_table[dest_network]
-            
-        # Check for default route
-        if "0.0.0.0/0" in self.routing_table:
-            return self.routing_table["0.0.0.0/0"]
-            
-        return None
+        """Look up route for destination IP by longest-prefix match (falls back to 0.0.0.0/0 if present)"""
+        return self.routing_table.lookup(dest_ip)
         
     def process_packet(self, packet, receiving_interface):
         """Process packet at router (Layer 3)"""
@@ -194,16 +244,16 @@ class Router(NetworkDevice):
         if hasattr(packet, 'ttl'):
             packet.ttl -= 1
             if packet.ttl <= 0:
-                print(f"[{self.device_name}] ▶ TTL expired, dropping packet")
+                _log.info("[{}] ▶ TTL expired, dropping packet", self.device_name)
                 return False
                 
         # Look up route
         route = self.lookup_route(packet.dest_ip)
         if not route:
-            print(f"[{self.device_name}] ▶ No route to {packet.dest_ip}, dropping packet")
+            _log.info("[{}] ▶ No route to {}, dropping packet", self.device_name, packet.dest_ip)
             return False
             
-        print(f"[{self.device_name}] ▶ Routing {packet.dest_ip} via {route['next_hop']} on {route['interface']}")
+        _log.info("[{}] ▶ Routing {} via {} on {}", self.device_name, packet.dest_ip, route['next_hop'], route['interface'])
         
         # Forward packet
         return self.forward_packet(packet, route['interface'])
@@ -213,13 +263,14 @@ class Router(NetworkDevice):
         if out_interface in self.interfaces:
             connected_interface = self.interfaces[out_interface].connected_to
             if connected_interface:
-                print(f"[{self.device_name}] ▶ Packet forwarded via {out_interface}")
+                _log.info("[{}] ▶ Packet forwarded via {}", self.device_name, out_interface)
                 return True
         return False
         
     def generate_mac_address(self):
         """Generate a random MAC address for router interface"""
-        return f"00:1A:2B:{random.randint(0, 255):02X}:{random.randint(0, 255):02X}:{random.randint(0, 255):02X}"
+        rng = self.rng
+        return f"00:1A:2B:{rng.randint(0, 255):02X}:{rng.randint(0, 255):02X}:{rng.randint(0, 255):02X}"
 
 class Hub(NetworkDevice):
     """Layer 1 hub that repeats all signals"""
@@ -234,12 +285,12 @@ class Hub(NetworkDevice):
             
     def process_packet(self, packet, receiving_interface):
         """Process packet at hub (Layer 1) - broadcast to all ports"""
-        print(f"[{self.device_name}] ▶ Repeating signal to all ports")
+        _log.info("[{}] ▶ Repeating signal to all ports", self.device_name)
         
         # Broadcast to all ports except receiving one
         for interface_name, interface in self.interfaces.items():
             if interface_name != receiving_interface and interface.connected_to:
-                print(f"[{self.device_name}] ▶ Repeating to {interface_name}")
+                _log.info("[{}] ▶ Repeating to {}", self.device_name, interface_name)
                 
         return True
 
@@ -249,12 +300,23 @@ class NetworkTopologyManager:
     def __init__(self):
         self.devices = {}
         self.networks = {}
-        self.connections = []
+        self.connections = {}  # Connection ID -> connection
+        self.adjacency = {}  # Device ID -> {neighbor device ID: {connection ID: connection}}
+        self._connection_ids = itertools.count(1)
+        self.registry = get_address_registry()  # IP/MAC -> device index shared with the devices
+        self.topology_version = 0  # Bumped on every change; path caches are tied to it
+        self._path_trees = {}  # (source device ID, weighted) -> parent pointers
+        self._path_trees_version = 0
+        self.link_state = None  # LinkStateRouting once enable_link_state_routing() is called
         
     def add_device(self, device):
         """Add a device to the topology"""
         self.devices[device.device_id] = device
-        print(f"[TOPOLOGY] ▶ Added {device.device_type.value}: {device.device_name}")
+        self.adjacency.setdefault(device.device_id, {})
+        self.topology_version += 1
+        if self.link_state is not None and device.device_type == DeviceType.ROUTER:
+            self.link_state.add_router(device, device.device_id)
+        _log.info("[TOPOLOGY] ▶ Added {}: {}", device.device_type.value, device.device_name)
         
     def create_network(self, network_id, network_address, description=""):
         """Create a network segment"""
@@ -263,93 +325,322 @@ class NetworkTopologyManager:
             "description": description,
             "devices": []
         }
-        print(f"[TOPOLOGY] ▶ Created network {network_id}: {network_address}")
+        _log.info("[TOPOLOGY] ▶ Created network {}: {}", network_id, network_address)
+        
+    def connect_devices(self, device1_id, interface1, device2_id, interface2, cost=1, **link_options):
+        """
+        Connect two devices together (cost is used by weighted path searches; link_options
+        such as bandwidth, delay, mtu, ber, loss and duplex configure the Link)
         
-    def connect_devices(self, device1_id, interface1, device2_id, interface2):
-        """Connect two devices together"""
+        Two devices may be connected more than once through different interfaces;
+        each connection gets its own ID.
+        """
         if device1_id in self.devices and device2_id in self.devices:
             device1 = self.devices[device1_id]
             device2 = self.devices[device2_id]
             
-            success = device1.connect_to_device(device2, interface1, interface2)
+            link_options.setdefault("name", f"{device1_id}:{interface1}-{device2_id}:{interface2}")
+            success = device1.connect_to_device(device2, interface1, interface2, **link_options)
             if success:
+                connection_id = next(self._connection_ids)
                 connection = {
+                    "id": connection_id,
                     "device1": device1_id,
                     "interface1": interface1,
                     "device2": device2_id,
-                    "interface2": interface2
+                    "interface2": interface2,
+                    "cost": cost,
+                    "link": device1.interfaces[interface1].link
                 }
-                self.connections.append(connection)
-                print(f"[TOPOLOGY] ▶ Connected {device1_id}:{interface1} <-> {device2_id}:{interface2}")
+                self.connections[connection_id] = connection
+                self.adjacency[device1_id].setdefault(device2_id, {})[connection_id] = connection
+                self.adjacency[device2_id].setdefault(device1_id, {})[connection_id] = connection
+                self.topology_version += 1
+                _log.info("[TOPOLOGY] ▶ Connected {}:{} <-> {}:{}", device1_id, interface1, device2_id, interface2)
+                if self.link_state is not None:
+                    self.update_link_state_routing((device1_id, device2_id))
                 return True
                 
         return False
         
-    def find_path(self, source_device_id, dest_device_id):
-        """Find path between two devices using simple BFS"""
+    def disconnect_devices(self, device1_id, device2_id, connection_id=None):
+        """Remove the connections between two devices (or only the one with connection_id)"""
+        between = self.adjacency.get(device1_id, {}).get(device2_id)
+        if not between or (connection_id is not None and connection_id not in between):
+            return False
+        removed = [connection_id] if connection_id is not None else list(between)
+        for connection_id in removed:
+            connection = self.connections.pop(connection_id)
+            del between[connection_id]
+            del self.adjacency[device2_id][device1_id][connection_id]
+            for device_id, interface in ((connection["device1"], connection["interface1"]),
+                                         (connection["device2"], connection["interface2"])):
+                self.devices[device_id].interfaces[interface].connected_to = None
+                self.devices[device_id].interfaces[interface].link = None
+        if not between:
+            del self.adjacency[device1_id][device2_id]
+            self.adjacency[device2_id].pop(device1_id, None)
+        self.topology_version += 1
+        _log.info("[TOPOLOGY] ▶ Disconnected {} <-> {}", device1_id, device2_id)
+        if self.link_state is not None:
+            self.update_link_state_routing((device1_id, device2_id))
+        return True
+        
+    def _path_tree(self, source_device_id, weighted):
+        """
+        Get the shortest-path tree rooted at a device, computing it on first use
+        
+        Trees are cached until the topology changes.
+        
+        Args:
+            source_device_id (str): Root device
+            weighted (bool): Use connection costs (Dijkstra) instead of hop counts (BFS)
+            
+        Returns:
+            dict: Device ID -> parent device ID (None for the root) for every reachable device
+        """
+        if self._path_trees_version != self.topology_version:
+            self._path_trees.clear()
+            self._path_trees_version = self.topology_version
+        key = (source_device_id, weighted)
+        parents = self._path_trees.get(key)
+        if parents is not None:
+            return parents
+        
+        adjacency = self.adjacency
+        parents = {source_device_id: None}
+        if weighted:
+            dist = {source_device_id: 0}
+            heap = [(0, source_device_id)]
+            done = set()
+            while heap:
+                d, device_id = heapq.heappop(heap)
+                if device_id in done:
+                    continue
+                done.add(device_id)
+                for next_device, between in adjacency.get(device_id, {}).items():
+                    nd = d + min(connection["cost"] for connection in between.values())
+                    if nd < dist.get(next_device, float("inf")):
+                        dist[next_device] = nd
+                        parents[next_device] = device_id
+                        heapq.heappush(heap, (nd, next_device))
+        else:
+            queue = deque([source_device_id])
+            while queue:
+                device_id = queue.popleft()
+                for next_device in adjacency.get(device_id, ()):
+                    if next_device not in parents:
+                        parents[next_device] = device_id
+                        queue.append(next_device)
+        
+        self._path_trees[key] = parents
+        return parents
+        
+    def find_path(self, source_device_id, dest_device_id, weighted=False):
+        """
+        Find the shortest path between two devices
+        
+        The first query from a source runs one BFS (or Dijkstra) over the
+        adjacency index and caches its parent pointers, so later queries from
+        the same source only walk the path back from the destination.
+        
+        Args:
+            source_device_id (str): Source device
+            dest_device_id (str): Destination device
+            weighted (bool): Minimize the sum of connection costs instead of hops
+            
+        Returns:
+            list: Device IDs from source to destination, or None if there is no path
+        """
         if source_device_id == dest_device_id:
             return [source_device_id]
+        parents = self._path_tree(source_device_id, weighted)
+        if dest_device_id not in parents:
+            return None  # No path found
+        
+        path = [dest_device_id]
+        device_id = parents[dest_device_id]
+        while device_id is not None:
+            path.append(device_id)
+            device_id = parents[device_id]
+        path.reverse()
+        return path
+        
+    def precompute_paths(self, sources=None, weighted=False):
+        """
+        Compute shortest-path trees ahead of time
+        
+        With no sources this covers every device (all-pairs paths), which takes
+        memory proportional to the number of devices squared; for large
+        topologies pass the devices that will actually send.
+        
+        Args:
+            sources (iterable, optional): Source device IDs (default: all devices)
+            weighted (bool): Use connection costs instead of hop counts
             
-        visited = set()
-        queue = [(source_device_id, [source_device_id])]
-        
-        while queue:
-            current_device, path = queue.pop(0)
+        Returns:
+            int: Number of trees now cached
+        """
+        for source_device_id in (self.devices if sources is None else sources):
+            self._path_tree(source_device_id, weighted)
+        return len(self._path_trees)
+        
+    def get_router_adjacencies(self, router_ids=None):
+        """
+        Find which routers can reach each other without crossing another router
+        
+        Routers are adjacent when they are connected directly or through
+        switches and hubs (the same layer 2 segment).
+        
+        Args:
+            router_ids (iterable, optional): Routers to look at (default: all routers)
+            
+        Returns:
+            dict: Router ID -> {neighbor router ID: local interface name}
+        """
+        if router_ids is None:
+            router_ids = [device_id for device_id, device in self.devices.items()
+                          if device.device_type == DeviceType.ROUTER]
+        adjacencies = {}
+        for router_id in router_ids:
+            neighbors = adjacencies[router_id] = {}
+            for first, between in self.adjacency[router_id].items():
+                connection = next(iter(between.values()))
+                interface = connection["interface1"] if connection["device1"] == router_id else connection["interface2"]
+                # Walk the layer 2 segment behind this interface
+                for device_id in self._segment_routers([first], {router_id}):
+                    neighbors.setdefault(device_id, interface)
+        return adjacencies
+        
+    def _segment_routers(self, start_ids, seen=()):
+        """
+        Find the routers on the layer 2 segments of some devices
+        
+        Args:
+            start_ids (iterable): Devices to walk from (routers are returned, not crossed)
+            seen (iterable): Devices to leave out
             
-            if current_device in visited:
+        Returns:
+            list: Router IDs in the order they were reached
+        """
+        routers = []
+        seen = set(seen)
+        stack = [device_id for device_id in start_ids if device_id in self.devices and device_id not in seen]
+        seen.update(stack)
+        while stack:
+            device_id = stack.pop()
+            if self.devices[device_id].device_type == DeviceType.ROUTER:
+                routers.append(device_id)
                 continue
-                
-            visited.add(current_device)
+            for next_device in self.adjacency[device_id]:
+                if next_device not in seen:
+                    seen.add(next_device)
+                    stack.append(next_device)
+        return routers
+        
+    def enable_link_state_routing(self, **options):
+        """
+        Run link-state routing over the routers of this topology
+        
+        Router adjacencies come from the connection graph and are kept up to
+        date as devices are connected; routes are written into each router's
+        routing table.
+        
+        Args:
+            **options: LinkStateRouting settings
             
-            if current_device == dest_device_id:
-                return path
-                
-            # Find connected devices
-            for connection in self.connections:
-                next_device = None
-                if connection["device1"] == current_device:
-                    next_device = connection["device2"]
-                elif connection["device2"] == current_device:
-                    next_device = connection["device1"]
-                    
-                if next_device and next_device not in visited:
-                    queue.append((next_device, path + [next_device]))
-                    
-        return None  # No path found
+        Returns:
+            LinkStateRouting: The routing domain
+        """
+        self.link_state = LinkStateRouting(**options)
+        for device in self.devices.values():
+            if device.device_type == DeviceType.ROUTER:
+                self.link_state.add_router(device, device.device_id)
+        self.update_link_state_routing()
+        return self.link_state
+        
+    def update_link_state_routing(self, changed_devices=None):
+        """
+        Bring link-state adjacencies in line with the connection graph and rerun SPF
+        
+        Args:
+            changed_devices (iterable, optional): Ends of the connection that was just
+                added or removed; only the routers on their layer 2 segments are
+                looked at (default: every router)
+        """
+        domain = self.link_state
+        if changed_devices is None:
+            for device in self.devices.values():
+                if device.device_type == DeviceType.ROUTER and device.device_id not in domain.routers:
+                    domain.add_router(device, device.device_id)
+            router_ids = list(domain.routers)
+        else:
+            router_ids = [router_id for router_id in self._segment_routers(changed_devices)
+                          if router_id in domain.routers]
+        
+        adjacencies = self.get_router_adjacencies(router_ids)
+        for router_id in router_ids:
+            state = domain.routers[router_id]
+            neighbors = adjacencies[router_id]
+            for neighbor_id in list(state.links):
+                if neighbor_id not in neighbors:
+                    domain.remove_link(router_id, neighbor_id)
+            for neighbor_id, interface in neighbors.items():
+                state.interfaces[neighbor_id] = interface
+                if neighbor_id not in state.links:
+                    domain.set_link(router_id, neighbor_id, 1, interface, adjacencies.get(neighbor_id, {}).get(router_id))
+            if set(state.networks) != state.router.connected_networks:
+                domain.set_networks(router_id, sorted(state.router.connected_networks))
+        domain.converge()
+        
+    def remove_device(self, device_id):
+        """Remove a device, its connections and its addresses from the topology"""
+        device = self.devices.get(device_id)
+        if device is None:
+            return False
+        for neighbor_id in list(self.adjacency.get(device_id, ())):
+            self.disconnect_devices(device_id, neighbor_id)
+        del self.devices[device_id]
+        self.adjacency.pop(device_id, None)
+        self.topology_version += 1
+        if device.device_type == DeviceType.END_DEVICE:
+            device.registry.unregister(device, device.ip_address, device.mac_address)
+        _log.info("[TOPOLOGY] ▶ Removed {}: {}", device.device_type.value, device.device_name)
+        return True
         
     def get_device_by_ip(self, ip_address):
-        """Find device by IP address"""
-        for device in self.devices.values():
-            if hasattr(device, 'ip_address') and device.ip_address == ip_address:
+        """Find device by IP address (hash lookup in the address registry)"""
+        for device in reversed(self.registry.lookup_all_ip(ip_address)):
+            if self.devices.get(getattr(device, "device_id", None)) is device:
                 return device
         return None
         
     def simulate_packet_flow(self, source_ip, dest_ip, packet_data):
         """Simulate packet flow through the network"""
-        print(f"\n[TOPOLOGY] === PACKET FLOW SIMULATION ===")
-        print(f"[TOPOLOGY] ▶ Source: {source_ip}")
-        print(f"[TOPOLOGY] ▶ Destination: {dest_ip}")
+        _log.info("\n[TOPOLOGY] === PACKET FLOW SIMULATION ===")
+        _log.info("[TOPOLOGY] ▶ Source: {}", source_ip)
+        _log.info("[TOPOLOGY] ▶ Destination: {}", dest_ip)
         
         # Find source and destination devices
         source_device = self.get_device_by_ip(source_ip)
         dest_device = self.get_device_by_ip(dest_ip)
         
         if not source_device or not dest_device:
-            print(f"[TOPOLOGY] ❌ Cannot find source or destination device")
+            _log.error("[TOPOLOGY] ❌ Cannot find source or destination device")
             return False
             
         # Find path
         path = self.find_path(source_device.device_id, dest_device.device_id)
         if not path:
-            print(f"[TOPOLOGY] ❌ No path found between devices")
+            _log.error("[TOPOLOGY] ❌ No path found between devices")
             return False
             
-        print(f"[TOPOLOGY] ▶ Path found: {' -> '.join(path)}")
+        _log.info("[TOPOLOGY] ▶ Path found: {}", ' -> '.join(path))
         
         # Simulate packet processing at each device
         for i, device_id in enumerate(path):
             device = self.devices[device_id]
-            print(f"\n[TOPOLOGY] ▶ Processing at {device.device_name}")
+            _log.info("\n[TOPOLOGY] ▶ Processing at {}", device.device_name)
             
             # Create a mock packet for simulation
             class MockPacket:
@@ -366,14 +657,14 @@ class NetworkTopologyManager:
             # Process packet based on device type
             if device.device_type == DeviceType.END_DEVICE:
                 if i == 0:  # Source device
-                    print(f"[{device.device_name}] ▶ Originating packet")
+                    _log.info("[{}] ▶ Originating packet", device.device_name)
                 elif i == len(path) - 1:  # Destination device
                     success = device.process_packet(mock_packet, "eth0")
                     if success:
-                        print(f"[{device.device_name}] ✓ Packet delivered")
+                        _log.info("[{}] ✓ Packet delivered", device.device_name)
                         return True
                     else:
-                        print(f"[{device.device_name}] ❌ Packet rejected")
+                        _log.error("[{}] ❌ Packet rejected", device.device_name)
                         return False
             else:
                 # Network device (switch, router, hub)
@@ -384,23 +675,23 @@ class NetworkTopologyManager:
         
     def display_topology(self):
         """Display the current network topology"""
-        print(f"\n[TOPOLOGY] === NETWORK TOPOLOGY ===")
+        _log.info("\n[TOPOLOGY] === NETWORK TOPOLOGY ===")
         
-        print(f"\nDevices:")
+        _log.info("\nDevices:")
         for device_id, device in self.devices.items():
-            print(f"  {device_id}: {device.device_type.value} - {device.device_name}")
+            _log.info("  {}: {} - {}", device_id, device.device_type.value, device.device_name)
             if hasattr(device, 'ip_address'):
-                print(f"    IP: {device.ip_address}")
+                _log.info("    IP: {}", device.ip_address)
             if hasattr(device, 'mac_address'):
-                print(f"    MAC: {device.mac_address}")
+                _log.info("    MAC: {}", device.mac_address)
                 
-        print(f"\nConnections:")
-        for connection in self.connections:
-            print(f"  {connection['device1']}:{connection['interface1']} <-> {connection['device2']}:{connection['interface2']}")
+        _log.info("\nConnections:")
+        for connection in self.connections.values():
+            _log.info("  {}:{} <-> {}:{}", connection['device1'], connection['interface1'], connection['device2'], connection['interface2'])
             
-        print(f"\nNetworks:")
+        _log.info("\nNetworks:")
         for network_id, network in self.networks.items():
-            print(f"  {network_id}: {network['address']} - {network['description']}")
+            _log.info("  {}: {} - {}", network_id, network['address'], network['description'])
 
 def create_sample_topology():
     """Create a sample network topology for testing"""
@@ -448,16 +739,16 @@ def test_topology():
     topology.display_topology()
     
     # Test packet flow
-    print("\n" + "="*60)
-    print("TESTING PACKET FLOW")
-    print("="*60)
+    _log.info("{}", "\n" + "="*60)
+    _log.info("TESTING PACKET FLOW")
+    _log.info("{}", "="*60)
     
     # Same network communication
-    print("\n--- Same Network Communication ---")
+    _log.info("\n--- Same Network Communication ---")
     topology.simulate_packet_flow("192.168.1.10", "192.168.1.20", "Hello PC2!")
     
     # Cross network communication
-    print("\n--- Cross Network Communication ---")
+    _log.info("\n--- Cross Network Communication ---")
     topology.simulate_packet_flow("192.168.1.10", "192.168.2.10", "Hello Server!")
 
 if __name__ == "__main__":
@@ -0,0 +1,297 @@
+"""
+Parameter sweeps for the Network Simulator
+Runs a scenario template over every point of a parameter grid on a process
+pool and collects the results into one columnar table, checkpointing finished
+runs to a JSON Lines file so an interrupted sweep can be resumed
+
+Example:
+    python parameter_sweep.py scenario.json -p settings.error_probability=0,0.1,0.3
+        -p settings.window_size=1,4,8 --replicates 5 -o sweep.json --checkpoint sweep.jsonl
+
+Parameter paths are dotted keys into the scenario ("topology.queue.limit",
+"settings.window_size", "duration"); values are parsed as JSON.
+"""
+
+import argparse
+import contextlib
+import copy
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import sim_logging
+from batch_runner import load_scenario, run_scenario
+from rng_service import RNGService
+
+SUMMARY_COLUMNS = ("transfers", "delivered", "frames", "transmissions", "acks", "naks", "sim_time", "events_processed")
+
+
+def expand_grid(grid):
+    """
+    List every combination of a parameter grid
+
+    Args:
+        grid (dict): Parameter path -> list of values
+
+    Returns:
+        list: One {path: value} dict per point, last parameter varying fastest
+    """
+    paths = list(grid)
+    return [dict(zip(paths, values)) for values in itertools.product(*(grid[path] for path in paths))]
+
+
+def apply_params(template, params):
+    """
+    Build a scenario from a template and parameter values
+
+    Args:
+        template (dict): Scenario template (left unchanged)
+        params (dict): Dotted path -> value
+
+    Returns:
+        dict: New scenario
+    """
+    scenario = copy.deepcopy(template)
+    for path, value in params.items():
+        node = scenario
+        *parents, key = path.split(".")
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return scenario
+
+
+def plan_sweep(template, grid, replicates=1, seed=None):
+    """
+    List the runs of a sweep
+
+    Every run gets its own seed derived from the sweep seed and its index, so
+    a run gives the same result whichever worker executes it, in any order.
+
+    Args:
+        template (dict): Scenario template
+        grid (dict): Parameter path -> list of values
+        replicates (int): Runs per grid point, each with a different seed
+        seed (int, optional): Sweep seed (default: the template's seed, else 0)
+
+    Returns:
+        tuple: (list of (index, params, scenario) tasks, sweep seed)
+    """
+    if seed is None:
+        seed = template.get("seed") or 0
+    seeds = RNGService(seed)
+    tasks = []
+    for point in expand_grid(grid):
+        for replicate in range(replicates):
+            index = len(tasks)
+            params = dict(point, replicate=replicate)
+            scenario = apply_params(template, point)
+            if "seed" not in point:
+                scenario["seed"] = seeds.child(index).stream("sweep").getrandbits(63)
+            tasks.append((index, params, scenario))
+    return tasks, seeds.seed
+
+
+def _task_fingerprint(params, scenario):
+    """Digest of a run's parameters and scenario (which includes its seed)"""
+    material = json.dumps([params, scenario], sort_keys=True, default=str).encode()
+    return hashlib.sha256(material).hexdigest()[:16]
+
+
+def _result_row(index, params, results):
+    """Flatten the results of one run into a table row"""
+    row = {"index": index}
+    row.update(params)
+    row["seed"] = results.get("seed")
+    summary = results.get("summary", {})
+    for column in SUMMARY_COLUMNS:
+        row[column] = summary.get(column)
+    row["errors"] = len(results.get("errors", []))
+    return row
+
+
+def _run_chunk(chunk):
+    """
+    Run a chunk of tasks in a worker process (or in this one, with one worker)
+
+    Args:
+        chunk (list): (index, params, scenario) tasks
+
+    Returns:
+        list: Result rows
+    """
+    level = sim_logging.disable_output()
+    rows = []
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for index, params, scenario in chunk:
+                rows.append(_result_row(index, params, run_scenario(scenario)))
+    finally:
+        sim_logging.set_level(level)
+    return rows
+
+
+def load_checkpoint(path):
+    """
+    Read the rows a previous run of a sweep finished
+
+    Args:
+        path (str): JSON Lines checkpoint file
+
+    Returns:
+        dict: Run index -> row, with the "fingerprint" of the run it came from
+    """
+    rows = {}
+    if not os.path.exists(path):
+        return rows
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                break  # A line cut short when the sweep was interrupted
+            rows[row["index"]] = row
+    return rows
+
+
+def to_columns(rows):
+    """
+    Turn result rows into a columnar table
+
+    Args:
+        rows (list): Row dicts ordered by run index
+
+    Returns:
+        dict: Column name -> list of values (None where a row lacks the column)
+    """
+    names = []
+    for row in rows:
+        for name in row:
+            if name not in names:
+                names.append(name)
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def run_sweep(template, grid, replicates=1, seed=None, workers=None, chunksize=None,
+              checkpoint=None, resume=False, progress=None):
+    """
+    Run a scenario template over a parameter grid in parallel
+
+    Args:
+        template (dict): Scenario template
+        grid (dict): Parameter path -> list of values
+        replicates (int): Runs per grid point
+        seed (int, optional): Sweep seed (see plan_sweep())
+        workers (int, optional): Worker processes (default: one per CPU; 1 runs in this process)
+        chunksize (int, optional): Runs per task sent to a worker (default: about
+            four chunks per worker)
+        checkpoint (str, optional): JSON Lines file that receives every finished row
+        resume (bool): Skip the runs already in the checkpoint file; a row is only
+            reused when its run has the same parameters, scenario and seed
+        progress (callable, optional): Called as progress(done, total) after each chunk
+
+    Returns:
+        dict: Columnar results table, one entry per run in index order
+    """
+    tasks, _ = plan_sweep(template, grid, replicates, seed)
+    fingerprints = {index: _task_fingerprint(params, scenario) for index, params, scenario in tasks}
+    done = {}
+    if checkpoint and resume:
+        for index, row in load_checkpoint(checkpoint).items():
+            if row.pop("fingerprint", None) == fingerprints.get(index):
+                done[index] = row
+    pending = [task for task in tasks if task[0] not in done]
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(pending) / (workers * 4)))
+    chunks = [pending[i:i + chunksize] for i in range(0, len(pending), chunksize)]
+
+    with open(checkpoint, "w") if checkpoint else contextlib.nullcontext() as sink:
+        if sink is not None:
+            # Rewrite what is kept, dropping a line cut short by an interruption
+            for index in sorted(done):
+                sink.write(json.dumps(dict(done[index], fingerprint=fingerprints[index])) + "\n")
+        def collect(rows):
+            for row in rows:
+                done[row["index"]] = row
+                if sink is not None:
+                    sink.write(json.dumps(dict(row, fingerprint=fingerprints[row["index"]])) + "\n")
+            if sink is not None:
+                sink.flush()
+            if progress is not None:
+                progress(len(done), len(tasks))
+
+        if workers == 1:
+            for chunk in chunks:
+                collect(_run_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+    return to_columns([done[index] for index in sorted(done)])
+
+
+def _parse_param(text):
+    """Parse a "path=v1,v2,..." command-line parameter"""
+    path, _, values = text.partition("=")
+    if not path or not values:
+        raise argparse.ArgumentTypeError(f"expected path=v1,v2,... (got {text})")
+    parsed = []
+    for value in values.split(","):
+        try:
+            parsed.append(json.loads(value))
+        except ValueError:
+            parsed.append(value)
+    return path, parsed
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run a scenario over a parameter grid on all cores")
+    parser.add_argument("scenario", help="JSON scenario template")
+    parser.add_argument("-p", "--param", action="append", type=_parse_param, default=[],
+                        help="Parameter to sweep as path=v1,v2,... (repeatable)")
+    parser.add_argument("--grid", help="JSON file with a {path: [values]} grid")
+    parser.add_argument("--replicates", type=int, default=1, help="Runs per grid point (default: 1)")
+    parser.add_argument("--seed", type=int, help="Sweep seed (default: the scenario's seed)")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--chunksize", type=int, help="Runs per worker task")
+    parser.add_argument("--checkpoint", help="JSON Lines file for finished runs")
+    parser.add_argument("--resume", action="store_true", help="Skip runs already in the checkpoint")
+    parser.add_argument("-o", "--output", help="Columnar results file (default: print to stdout)")
+    args = parser.parse_args(argv)
+
+    template = load_scenario(args.scenario)
+    grid = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid.update(json.load(f))
+    grid.update(dict(args.param))
+
+    def progress(done, total):
+        print(f"\r[SWEEP] ▶ {done}/{total} runs", end="", file=sys.stderr, flush=True)
+
+    table = run_sweep(template, grid, args.replicates, args.seed, args.workers, args.chunksize,
+                      args.checkpoint, args.resume, progress)
+    print(file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(table, f)
+        print(f"[SWEEP] ✓ {len(table.get('index', []))} runs written to {args.output}")
+    else:
+        json.dump(table, sys.stdout)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
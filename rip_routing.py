@@ -0,0 +1,453 @@
+"""
+RIP-style distance-vector routing for Network Simulator
+Routers exchange distance vectors over the simulation clock with periodic and
+triggered updates, split horizon with poison reverse, and route timeouts
+(RFC 2453). Triggered updates carry only the routes that changed, so a topology
+change costs work proportional to what it affects rather than to the table size.
+"""
+
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("RIP")
+
+INFINITY = 16  # Hop count meaning "unreachable"
+UPDATE_INTERVAL = 30.0  # Seconds between periodic full updates
+ROUTE_TIMEOUT = 180.0  # Seconds without a refresh before a route is declared unreachable
+GARBAGE_COLLECTION = 120.0  # Seconds an unreachable route is still advertised before removal
+TRIGGERED_DELAY = (1.0, 5.0)  # Random hold-down before a triggered update is sent
+
+
+class RIPRoute:
+    """One entry of a router's distance vector"""
+
+    __slots__ = ("prefix", "metric", "next_hop", "updated")
+
+    def __init__(self, prefix, metric, next_hop, updated):
+        self.prefix = prefix
+        self.metric = metric
+        self.next_hop = next_hop  # Neighbor router ID, or None for a directly connected network
+        self.updated = updated  # Last refresh, or when the route became unreachable
+
+
+class RIPProcess:
+    """
+    RIP instance running on one router
+
+    Learned routes are mirrored into the router's routing_table in the same
+    {"next_hop", "metric", "interface"} form build_routing_table() uses, so
+    forwarding keeps going through the router's FIB.
+    """
+
+    def __init__(self, domain, router, router_id, networks):
+        """
+        Initialize the process
+
+        Args:
+            domain (RIPDomain): Domain the router belongs to
+            router: Router object whose routing_table is kept up to date
+            router_id: Identifier other routers use as next hop (router number)
+            networks (list): Directly connected network prefixes
+        """
+        self.domain = domain
+        self.router = router
+        self.router_id = router_id
+        self.rng = get_rng(f"rip/{router_id}")  # Timer jitter
+        self.neighbors = {}  # Neighbor router ID -> (RIPProcess, link cost)
+        self.routes = {}  # Prefix -> RIPRoute
+        self.changed = set()  # Prefixes changed since the last update was sent
+        self.triggered_event = None
+        self.periodic_event = None
+        self.full_update_mark = -1  # domain.changes when the last full update was sent
+
+        now = domain.scheduler.now
+        for network in networks:
+            self.routes[network] = RIPRoute(network, 0, None, now)
+            self.changed.add(network)
+
+    def add_neighbor(self, neighbor, cost=1):
+        """
+        Add an adjacent router
+
+        Args:
+            neighbor (RIPProcess): Neighbor's RIP process
+            cost (int): Link cost added to routes learned over this link
+        """
+        self.neighbors[neighbor.router_id] = (neighbor, cost)
+
+    def remove_neighbor(self, neighbor_id):
+        """
+        Drop an adjacency, e.g. after a link failure
+
+        Routes through the neighbor become unreachable immediately and are
+        announced in a triggered update.
+
+        Args:
+            neighbor_id: Neighbor router ID
+        """
+        if self.neighbors.pop(neighbor_id, None) is None:
+            return
+        now = self.domain.scheduler.now
+        for route in self.routes.values():
+            if route.next_hop == neighbor_id and route.metric < INFINITY:
+                route.metric = INFINITY
+                route.updated = now
+                self._route_changed(route)
+
+    def start(self, periodic=True):
+        """
+        Start the process: announce connected networks and start the update timer
+
+        Args:
+            periodic (bool): Whether to send periodic full updates
+        """
+        if self.changed:
+            self._schedule_triggered_update()
+        if periodic and self.periodic_event is None:
+            # Start timers at random offsets so routers do not synchronize
+            delay = self.rng.uniform(0, self.domain.update_interval)
+            self.periodic_event = self.domain.scheduler.schedule(delay, self._periodic_update)
+
+    def stop(self):
+        """Cancel the process timers"""
+        scheduler = self.domain.scheduler
+        scheduler.cancel(self.triggered_event)
+        scheduler.cancel(self.periodic_event)
+        self.triggered_event = self.periodic_event = None
+        self.domain.pending_triggered.discard(self)
+
+    def _periodic_update(self):
+        """Age routes, send the whole table to every neighbor and re-arm the timer"""
+        domain = self.domain
+        self.check_timeouts()
+        # A full update covers everything a pending triggered update would send
+        if self.triggered_event is not None:
+            domain.scheduler.cancel(self.triggered_event)
+            self.triggered_event = None
+            domain.pending_triggered.discard(self)
+        self.changed.clear()
+        self.full_update_mark = domain.changes
+        self.send_update(self.routes, triggered=False)
+        jitter = domain.update_interval * 0.1
+        delay = domain.update_interval + self.rng.uniform(-jitter, jitter)
+        self.periodic_event = domain.scheduler.schedule(delay, self._periodic_update)
+
+    def _schedule_triggered_update(self):
+        """Schedule a triggered update unless one is already pending"""
+        if self.triggered_event is None:
+            domain = self.domain
+            self.triggered_event = domain.scheduler.schedule(
+                self.rng.uniform(*domain.triggered_delay), self._triggered_update)
+            domain.pending_triggered.add(self)
+
+    def _triggered_update(self):
+        """Send the routes that changed since the last update"""
+        self.triggered_event = None
+        self.domain.pending_triggered.discard(self)
+        changed, self.changed = self.changed, set()
+        self.send_update([prefix for prefix in changed if prefix in self.routes])
+
+    def send_update(self, prefixes, triggered=True):
+        """
+        Send routes to every neighbor with split horizon and poison reverse
+
+        Args:
+            prefixes (iterable): Prefixes of the routes to send
+            triggered (bool): Whether this is a triggered (rather than periodic) update
+        """
+        routes = [self.routes[prefix] for prefix in prefixes]
+        if not routes:
+            return
+        poison_reverse = self.domain.poison_reverse
+        for neighbor_id, (neighbor, _) in self.neighbors.items():
+            entries = []
+            for route in routes:
+                if route.next_hop == neighbor_id:
+                    if poison_reverse:
+                        entries.append((route.prefix, INFINITY))
+                    # Plain split horizon: never tell a neighbor about routes learned from it
+                else:
+                    entries.append((route.prefix, route.metric))
+            if entries:
+                self.domain.deliver(self, neighbor, entries, triggered)
+
+    def receive_update(self, sender_id, entries):
+        """
+        Merge a neighbor's distance vector (Bellman-Ford step)
+
+        Args:
+            sender_id: Router ID of the neighbor that sent the update
+            entries (list): (prefix, metric) pairs
+        """
+        link = self.neighbors.get(sender_id)
+        if link is None:
+            return  # Update crossed a link that has since gone down
+        cost = link[1]
+        now = self.domain.scheduler.now
+        routes = self.routes
+
+        for prefix, metric in entries:
+            metric += cost
+            if metric > INFINITY:
+                metric = INFINITY
+            route = routes.get(prefix)
+            if route is None:
+                if metric < INFINITY:
+                    route = routes[prefix] = RIPRoute(prefix, metric, sender_id, now)
+                    self._route_changed(route)
+            elif route.next_hop is None:
+                continue  # Directly connected networks always win
+            elif route.next_hop == sender_id:
+                if metric < INFINITY:
+                    route.updated = now
+                if metric != route.metric:
+                    if metric == INFINITY:
+                        route.updated = now  # Start the garbage-collection timer
+                    route.metric = metric
+                    self._route_changed(route)
+            elif metric < route.metric:
+                route.metric = metric
+                route.next_hop = sender_id
+                route.updated = now
+                self._route_changed(route)
+
+    def check_timeouts(self):
+        """Expire routes that have not been refreshed and remove dead ones"""
+        domain = self.domain
+        now = domain.scheduler.now
+        expired = []
+        for route in self.routes.values():
+            if route.next_hop is None:
+                continue
+            if route.metric < INFINITY:
+                if now - route.updated > domain.route_timeout:
+                    route.metric = INFINITY
+                    route.updated = now
+                    _log.info("[RIP {}] ⚠ Route to {} timed out", self.router_id, route.prefix)
+                    self._route_changed(route)
+            elif now - route.updated > domain.garbage_collection:
+                expired.append(route.prefix)
+        for prefix in expired:
+            del self.routes[prefix]
+            self.changed.discard(prefix)
+
+    def _route_changed(self, route):
+        """Mirror a changed route into the routing table and queue it for a triggered update"""
+        table = self.router.routing_table
+        if route.metric < INFINITY:
+            table[route.prefix] = {
+                "next_hop": route.next_hop,
+                "metric": route.metric,
+                "interface": f"interface {route.next_hop}",
+            }
+        elif route.prefix in table:
+            del table[route.prefix]
+        self.changed.add(route.prefix)
+        self.domain.changes += 1
+        self._schedule_triggered_update()
+
+    def get_routes(self):
+        """
+        Get the current distance vector
+
+        Returns:
+            dict: Prefix -> (metric, next hop) for every known route
+        """
+        return {prefix: (route.metric, route.next_hop) for prefix, route in self.routes.items()}
+
+
+class RIPDomain:
+    """
+    Set of routers running RIP with each other
+
+    Update messages travel over the simulation clock with a fixed link delay.
+    """
+
+    def __init__(self, scheduler=None, update_interval=UPDATE_INTERVAL, route_timeout=ROUTE_TIMEOUT,
+                 garbage_collection=GARBAGE_COLLECTION, triggered_delay=TRIGGERED_DELAY,
+                 link_delay=0.01, poison_reverse=True):
+        """
+        Initialize the domain
+
+        Args:
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+            update_interval (float): Seconds between periodic full updates
+            route_timeout (float): Seconds before an unrefreshed route becomes unreachable
+            garbage_collection (float): Seconds before an unreachable route is removed
+            triggered_delay (tuple): (min, max) random delay before a triggered update
+            link_delay (float): Delivery delay of update messages
+            poison_reverse (bool): Advertise routes back to their next hop as unreachable
+                instead of leaving them out (plain split horizon)
+        """
+        self.scheduler = scheduler or get_scheduler()
+        self.update_interval = update_interval
+        self.route_timeout = route_timeout
+        self.garbage_collection = garbage_collection
+        self.triggered_delay = triggered_delay
+        self.link_delay = link_delay
+        self.poison_reverse = poison_reverse
+        self.processes = {}  # Router ID -> RIPProcess
+        self.pending_triggered = set()  # Processes with a triggered update scheduled
+        self.in_flight = 0  # Update messages sent but not yet delivered
+        self.changes = 0  # Route changes so far, in any process
+        self.updates_sent = 0
+        self.entries_sent = 0
+
+    def add_router(self, router, router_id=None, networks=None):
+        """
+        Run RIP on a router
+
+        Args:
+            router: router.Router or network_topology.Router
+            router_id: Identifier used as next hop (default: router_number, or device_id)
+            networks (list, optional): Directly connected prefixes (default: the
+                router's NID or connected_networks)
+
+        Returns:
+            RIPProcess: The router's RIP process
+        """
+        if router_id is None:
+            router_id = getattr(router, "router_number", None)
+            if router_id is None:
+                router_id = router.device_id
+        if networks is None:
+            networks = [router.NID] if hasattr(router, "NID") else sorted(router.connected_networks)
+        process = RIPProcess(self, router, router_id, networks)
+        self.processes[router_id] = process
+        return process
+
+    def add_link(self, router_a, router_b, cost=1):
+        """
+        Make two routers neighbors
+
+        Args:
+            router_a: Router ID of one end
+            router_b: Router ID of the other end
+            cost (int): Link cost
+        """
+        a, b = self.processes[router_a], self.processes[router_b]
+        a.add_neighbor(b, cost)
+        b.add_neighbor(a, cost)
+
+    def remove_link(self, router_a, router_b):
+        """
+        Take a link down; both ends announce the lost routes in triggered updates
+
+        Args:
+            router_a: Router ID of one end
+            router_b: Router ID of the other end
+        """
+        self.processes[router_a].remove_neighbor(router_b)
+        self.processes[router_b].remove_neighbor(router_a)
+
+    def deliver(self, sender, receiver, entries, triggered=True):
+        """
+        Send an update message over a link
+
+        Args:
+            sender (RIPProcess): Sending process
+            receiver (RIPProcess): Receiving process
+            entries (list): (prefix, metric) pairs
+            triggered (bool): Whether the message belongs to a triggered update
+        """
+        self.in_flight += 1
+        self.updates_sent += 1
+        self.entries_sent += len(entries)
+        self.scheduler.schedule(self.link_delay, self._receive, receiver, sender.router_id, entries, triggered)
+
+    def _receive(self, receiver, sender_id, entries, triggered):
+        """Hand a delivered message to its receiver"""
+        self.in_flight -= 1
+        receiver.receive_update(sender_id, entries)
+
+    def start(self, periodic=True):
+        """
+        Start RIP on every router
+
+        Args:
+            periodic (bool): Whether to send periodic full updates (needed for route timeouts)
+        """
+        for process in self.processes.values():
+            process.start(periodic)
+
+    def stop(self):
+        """Stop all timers"""
+        for process in self.processes.values():
+            process.stop()
+
+    def is_converged(self):
+        """
+        Check if routing has settled
+
+        Triggered updates only carry changes, so a neighbor that lost a route hears
+        about an alternative path from the next periodic update. Routing has
+        therefore settled only when no update is scheduled or travelling and every
+        router sending periodic updates has sent its whole table since the last
+        route change. Without periodic updates only triggered ones are waited for.
+        """
+        if self.pending_triggered or self.in_flight:
+            return False
+        changes = self.changes
+        return all(process.full_update_mark == changes for process in self.processes.values()
+                   if process.periodic_event is not None)
+
+    def converge(self, max_time=None):
+        """
+        Run the simulation clock until routing has settled
+
+        With periodic updates running this takes up to one update interval after
+        the last route change, since every router has to resend its table.
+
+        Args:
+            max_time (float, optional): Give up after this much simulated time
+
+        Returns:
+            float: Simulated time it took to converge, or None if max_time was reached
+        """
+        scheduler = self.scheduler
+        start = scheduler.now
+        while not self.is_converged():
+            if max_time is not None and scheduler.now - start > max_time:
+                return None
+            if not scheduler.step():
+                break
+        _log.info("[RIP] ✓ Converged in {:.2f}s ({} updates, {} route entries)",
+                  scheduler.now - start, self.updates_sent, self.entries_sent)
+        return scheduler.now - start
+
+    def display_routes(self, router_id):
+        """
+        Log a router's distance vector
+
+        Args:
+            router_id: Router ID
+        """
+        process = self.processes[router_id]
+        _log.info("[RIP {}] === DISTANCE VECTOR ===", router_id)
+        for prefix, route in sorted(process.routes.items()):
+            next_hop = "connected" if route.next_hop is None else f"Router {route.next_hop}"
+            _log.info("[RIP {}] {:<17} | {:<15} | {:2d}", router_id, prefix, next_hop, route.metric)
+
+
+def build_rip_domain(routers, links, scheduler=None, **options):
+    """
+    Run RIP over a set of routers and let it converge
+
+    Args:
+        routers (list): Router objects
+        links (list): (router ID, router ID) or (router ID, router ID, cost) tuples
+        scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+        **options: Further RIPDomain settings
+
+    Returns:
+        RIPDomain: The converged domain (periodic updates still running)
+    """
+    domain = RIPDomain(scheduler, **options)
+    for router in routers:
+        domain.add_router(router)
+    for link in links:
+        domain.add_link(*link)
+    domain.start()
+    domain.converge()
+    return domain
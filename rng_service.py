@@ -0,0 +1,144 @@
+"""
+Random number streams for Network Simulator
+Hands every component (device, hub, switch, router, link, ...) its own seeded
+generator derived from one root seed, so runs can be replayed exactly and
+parallel workers get statistically independent streams
+"""
+
+import hashlib
+import random
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only generator() needs it
+    np = None
+
+
+def _name_key(name):
+    """Stable 64-bit key for a stream name (str hashes change between processes)"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big")
+
+
+class RNGService:
+    """
+    Source of named random streams
+
+    A stream is derived from (root seed, spawn path, stream name) alone, so a
+    component gets the same numbers whatever else was created before it, and
+    adding a device to a topology does not shift the randomness of the others.
+    spawn() derives child services the way NumPy's SeedSequence spawns
+    children, for handing independent streams to parallel workers.
+    """
+
+    def __init__(self, seed=None, spawn_key=()):
+        """
+        Initialize the service
+
+        Args:
+            seed (int, optional): Root seed; a fresh one is drawn from the OS
+                when omitted (read it back from .seed to replay the run)
+            spawn_key (tuple): Path of this service in the spawn tree
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.spawn_key = tuple(spawn_key)
+        self._streams = {}  # Name -> random.Random
+        self._children_spawned = 0
+
+    def stream(self, name):
+        """
+        Get the random.Random stream of a component
+
+        Args:
+            name (str): Component name, e.g. "hub/2" or "router/0"
+
+        Returns:
+            random.Random: The same object for every call with the same name
+        """
+        rng = self._streams.get(name)
+        if rng is None:
+            material = repr((self.seed, self.spawn_key, name)).encode()
+            rng = self._streams[name] = random.Random(int.from_bytes(hashlib.sha256(material).digest(), "big"))
+        return rng
+
+    def generator(self, name):
+        """
+        Get a new NumPy Generator for a component, for vectorized draws
+
+        Args:
+            name (str): Component name
+
+        Returns:
+            numpy.random.Generator: Generator seeded from (seed, spawn key, name)
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for RNGService.generator()")
+        sequence = np.random.SeedSequence(self.seed, spawn_key=self.spawn_key + (_name_key(name),))
+        return np.random.Generator(np.random.PCG64(sequence))
+
+    def spawn(self, count):
+        """
+        Derive independent child services (e.g. one per parallel worker or run)
+
+        Args:
+            count (int): Number of children
+
+        Returns:
+            list: RNGService children; spawning again continues the numbering
+        """
+        start = self._children_spawned
+        self._children_spawned += count
+        return [RNGService(self.seed, self.spawn_key + (start + i,)) for i in range(count)]
+
+    def child(self, index):
+        """
+        Get one child service by index without spawning the ones before it
+
+        Args:
+            index (int): Child index, as in spawn()
+
+        Returns:
+            RNGService: Child service
+        """
+        return RNGService(self.seed, self.spawn_key + (index,))
+
+
+_default_service = RNGService()
+
+
+def get_rng_service():
+    """
+    Get the shared RNG service
+
+    Returns:
+        RNGService: The process-wide default service
+    """
+    return _default_service
+
+
+def set_rng_service(service):
+    """
+    Replace the shared RNG service
+
+    Components take their stream when they are created, so this should be
+    called before building a topology.
+
+    Args:
+        service (RNGService): Service to use from now on
+    """
+    global _default_service
+    _default_service = service
+
+
+def get_rng(name):
+    """
+    Get the stream of a component from the shared service
+
+    Args:
+        name (str): Component name
+
+    Returns:
+        random.Random: The component's stream
+    """
+    return _default_service.stream(name)
@@ -2,17 +2,27 @@
 Router implementation for Network Simulator
 Equivalent to Router.java in the Java implementation
 """
-import random
-import time
 from switch import Switch
+from frame_format import DEFAULT_TTL, Frame, is_frame
+from forwarding_table import RoutingTable, ip_to_int, parse_prefix, prefix_mask
+from address_registry import get_address_registry
+from arp_cache import ARPCache
+from queue_disciplines import make_queue
+from rng_service import get_rng
+from sim_logging import get_logger
+
+_log = get_logger("ROUTER")
+
+ARP_REPLY_DELAY = 0.001  # Seconds from an ARP broadcast to its reply
 
 class Router(Switch):
     def __init__(self, number, NID):
         super().__init__(number)
         self.NID = NID
         self.data = None
-        self.routing_table = {}  # Maps destination network to next hop router
+        self.routing_table = RoutingTable()  # Maps destination network to next hop router
         self.router_number = number
+        self.rng = get_rng(f"router/{number}")  # Processing delays
         self.switches = []
         
         # Router interface attributes
@@ -21,16 +31,43 @@ class Router(Switch):
         self.ip_address_wan = None
         self.mac_address_wan = None
         
-        # Router state variables
-        self.queue = []  # Packet queue
-        self.max_queue_size = 10  # Maximum packets in queue
-        self.processing = False  # Whether router is currently processing a packet
+        # Output ports: one bounded queue per interface, served at the link rate
+        self.max_queue_size = 10  # Default queue limit in packets
+        self.queue_discipline = "drop_tail"
+        self.queue_options = {}
+        self.link_rate = 10e6  # Output link rate in bits per second when no Link is attached
+        self.links = {}  # Interface -> Link
+        self.output_queues = {}  # Interface -> QueueDiscipline
+        self._transmitting = set()  # Interfaces currently sending a packet
         
         # Statistics
         self.packets_processed = 0
         self.packets_dropped = 0
         self.current_load = 0  # 0-100% load
-        self.arp_requests = {}  # ARP requests (IP -> requesting device)
+        self.arp_cache = ARPCache(scheduler=self.scheduler)  # IP -> MAC, with requests waiting on a resolution
+        self.arp_delay = ARP_REPLY_DELAY
+    
+    @property
+    def routing_table(self):
+        """Routing table; longest-prefix lookups go through its forwarding table"""
+        return self._routing_table
+    
+    @routing_table.setter
+    def routing_table(self, table):
+        self._routing_table = table if isinstance(table, RoutingTable) else RoutingTable(table)
+    
+    def is_local_address(self, ip):
+        """
+        Check if an address is inside this router's own network (NID)
+        
+        Args:
+            ip (str): IP address
+            
+        Returns:
+            bool: True if the address matches the NID prefix
+        """
+        network, length = parse_prefix(self.NID)
+        return ip_to_int(ip) & prefix_mask(length) == network
     
     def get_data_from_sender_switch(self, data):
         """
@@ -40,7 +77,7 @@ class Router(Switch):
             data (str): Data from sender switch
         """
         self.data = data
-        print(f"[ROUTER {self.router_number}] ▶ Received data from sender switch")
+        _log.info("[ROUTER {}] ▶ Received data from sender switch", self.router_number)
     
     def send_data_to_receiver_switch(self):
         """
@@ -49,7 +86,7 @@ class Router(Switch):
         Returns:
             str: Data to be sent
         """
-        print(f"[ROUTER {self.router_number}] ▶ Forwarding data to receiver switch")
+        _log.info("[ROUTER {}] ▶ Forwarding data to receiver switch", self.router_number)
         return self.data
     
     def store_connected_switches(self, switches):
@@ -60,7 +97,7 @@ class Router(Switch):
             switches (list): List of connected switches
         """
         self.switches = switches
-        print(f"[ROUTER {self.router_number}] ▶ Connected to {len(switches)} switches")
+        _log.info("[ROUTER {}] ▶ Connected to {} switches", self.router_number, len(switches))
     
     def get_connected_switches(self):
         """
@@ -78,7 +115,7 @@ class Router(Switch):
         Args:
             all_routers (list): List of all routers in the network
         """
-        print(f"[ROUTER {self.router_number}] === BUILDING ROUTING TABLE ===")
+        _log.info("[ROUTER {}] === BUILDING ROUTING TABLE ===", self.router_number)
         for router in all_routers:
             if router.router_number != self.router_number:
                 # For demonstration, we assume a simple routing where we know direct paths
@@ -88,7 +125,7 @@ class Router(Switch):
                     "metric": 1,  # Direct connection for simplicity
                     "interface": f"interface {router.router_number}"
                 }
-                print(f"[ROUTER {self.router_number}] ▶ Route to {router.NID}: via Router {router.router_number}")
+                _log.info("[ROUTER {}] ▶ Route to {}: via Router {}", self.router_number, router.NID, router.router_number)
     
     def route_packet(self, source_ip, dest_ip, data):
         """
@@ -97,144 +134,303 @@ class Router(Switch):
         Args:
             source_ip (str): Source IP address
             dest_ip (str): Destination IP address
-            data (str): Packet data
+            data (bytes or str): Packet data; the TTL of a binary frame in a
+                bytearray is decremented in place
             
         Returns:
             tuple: (success, next_router_number)
         """
-        print(f"[ROUTER {self.router_number}] === NETWORK LAYER: IP ROUTING ===")
-        print(f"[ROUTER {self.router_number}] ▶ Routing packet from {source_ip} to {dest_ip}")
-        
-        # Extract destination network
-        dest_network = dest_ip.split('.')[0] + ".0.0.0"  # Simple way to get network ID
+        _log.info("[ROUTER {}] === NETWORK LAYER: IP ROUTING ===", self.router_number)
+        _log.info("[ROUTER {}] ▶ Routing packet from {} to {}", self.router_number, source_ip, dest_ip)
         
         # Check if packet is for our network
-        if dest_ip.startswith(self.NID.split('.')[0]):
-            print(f"[ROUTER {self.router_number}] ✓ Destination {dest_ip} is in our network ({self.NID})")
+        if self.is_local_address(dest_ip):
+            _log.info("[ROUTER {}] ✓ Destination {} is in our network ({})", self.router_number, dest_ip, self.NID)
             return True, self.router_number
         
-        # Check routing table for path to destination
-        if dest_network in self.routing_table:
-            next_hop = self.routing_table[dest_network]["next_hop"]
-            print(f"[ROUTER {self.router_number}] ▶ Found route to {dest_network} via Router {next_hop}")
+        # Longest-prefix match in the routing table for a path to the destination
+        entry = self.routing_table.lookup_entry(dest_ip)
+        if entry is not None:
+            dest_network, route = entry
+            next_hop = route["next_hop"]
+            _log.info("[ROUTER {}] ▶ Found route to {} via Router {}", self.router_number, dest_network, next_hop)
             
             # Simulate router processing
-            processing_delay = random.uniform(0.1, 0.3)  # 100-300 ms delay
-            print(f"[ROUTER {self.router_number}] ▶ Processing packet (delay: {processing_delay:.3f}s)")
-            time.sleep(processing_delay)
+            processing_delay = self.rng.uniform(0.1, 0.3)  # 100-300 ms delay
+            _log.info("[ROUTER {}] ▶ Processing packet (delay: {:.3f}s)", self.router_number, processing_delay)
+            self.scheduler.sleep(processing_delay)
             
-            # Calculate Time-To-Live (TTL)
-            ttl = 64  # Starting TTL value
-            ttl -= 1  # Decrement TTL
+            # Decrement Time-To-Live (TTL) in the frame header when the buffer allows it
+            if isinstance(data, bytearray) and is_frame(data):
+                ttl = Frame(data).decrement_ttl()
+            else:
+                ttl = DEFAULT_TTL - 1
             
             # Check if TTL expired
             if ttl <= 0:
-                print(f"[ROUTER {self.router_number}] ❌ TTL expired, packet dropped")
+                _log.error("[ROUTER {}] ❌ TTL expired, packet dropped", self.router_number)
                 self.packets_dropped += 1
                 return False, None
             
-            print(f"[ROUTER {self.router_number}] ✓ Forwarding to Router {next_hop}")
+            _log.info("[ROUTER {}] ✓ Forwarding to Router {}", self.router_number, next_hop)
             self.packets_processed += 1
             return True, next_hop
         else:
-            print(f"[ROUTER {self.router_number}] ❌ No route to {dest_network}, packet dropped")
+            _log.error("[ROUTER {}] ❌ No route to {}, packet dropped", self.router_number, dest_ip)
             self.packets_dropped += 1
             return False, None
             
     def display_routing_table(self):
         """Display the current routing table"""
-        print(f"\n[ROUTER {self.router_number}] === ROUTING TABLE ===")
-        print(f"[ROUTER {self.router_number}] Network ID       | Next Hop        | Metric | Interface")
-        print(f"[ROUTER {self.router_number}] ----------------- | --------------- | ------ | ---------------")
+        _log.info("\n[ROUTER {}] === ROUTING TABLE ===", self.router_number)
+        _log.info("[ROUTER {}] Network ID       | Next Hop        | Metric | Interface", self.router_number)
+        _log.info("[ROUTER {}] ----------------- | --------------- | ------ | ---------------", self.router_number)
         
         # Display direct network
-        print(f"[ROUTER {self.router_number}] {self.NID:<17} | Connected       | 0      | local")
+        _log.info("[ROUTER {}] {:<17} | Connected       | 0      | local", self.router_number, self.NID)
         
         # Display routes to other networks
         for network, route in self.routing_table.items():
-            print(f"[ROUTER {self.router_number}] {network:<17} | Router {route['next_hop']:<9} | {route['metric']:6d} | {route['interface']}")
+            _log.info("[ROUTER {}] {:<17} | Router {:<9} | {:6d} | {}", self.router_number, network, route['next_hop'], route['metric'], route['interface'])
             
-    def simulate_congestion(self, congestion_level=0.5):
+    def attach_link(self, interface, link):
+        """
+        Attach a Link to an interface; its bandwidth then sets the transmission time
+        
+        Args:
+            interface (str): Interface name
+            link (Link): Link to the neighbor
+        """
+        self.links[interface] = link
+        _log.info("[ROUTER {}] ▶ {} attached: {:.0f} Mb/s, {:.3f} ms delay", self.router_number, interface, link.bandwidth / 1e6, link.delay * 1000)
+    
+    def set_queue_discipline(self, discipline, **options):
+        """
+        Choose the queue discipline of the output ports
+        
+        Existing queues are replaced; the packets they hold move to the new
+        queues in the order they would have been sent, and any the new queue
+        does not admit are dropped (their on_done is told so).
+        
+        Args:
+            discipline (str): "drop_tail", "red", "codel" or "drr"
+            **options: Parameters of the discipline (e.g. limit=32)
+        """
+        make_queue(discipline, scheduler=self.scheduler, **options)  # Fail early on bad options
+        self.queue_discipline = discipline
+        self.queue_options = options
+        old_queues = self.output_queues
+        self.output_queues = {}
+        _log.info("[ROUTER {}] ▶ Output queues use {}", self.router_number, discipline)
+        for interface, old_queue in old_queues.items():
+            backlog = old_queue.drain()
+            if not backlog:
+                continue
+            queue = self.get_output_queue(interface)
+            for entry, size in backlog:
+                if not queue.enqueue(entry, size, entry[2]):
+                    self.packets_dropped += 1
+                    _log.error("[ROUTER {}] ❌ {} queue on {} dropped packet moved from {}", self.router_number, discipline, interface, old_queue.name)
+                    packet, on_done, _ = entry
+                    if on_done is not None:
+                        on_done(packet, False)
+            _log.info("[ROUTER {}] ▶ Moved {} queued packet(s) on {} to {}", self.router_number, len(queue), interface, discipline)
+    
+    def get_output_queue(self, interface):
         """
-        Simulate router congestion for educational demonstration
+        Get the output queue of an interface, creating it on first use
         
         Args:
-            congestion_level (float): Level of congestion from 0.0-1.0
+            interface (str): Interface name
             
         Returns:
-            bool: True if congestion is manageable, False if packet should be dropped
+            QueueDiscipline: The interface's queue
         """
-        # Update current load
-        self.current_load = int(congestion_level * 100)
+        queue = self.output_queues.get(interface)
+        if queue is None:
+            options = dict(self.queue_options)
+            options.setdefault("limit", self.max_queue_size)
+            if self.queue_discipline == "red":
+                options.setdefault("rng", get_rng(f"router/{self.router_number}/{interface}"))
+            queue = self.output_queues[interface] = make_queue(self.queue_discipline, scheduler=self.scheduler, **options)
+            queue.on_drop = lambda entry: self._dropped_in_queue(interface, entry)
+        return queue
+    
+    def enqueue_packet(self, interface, packet, size=1500, traffic_class=0, on_done=None):
+        """
+        Queue a packet on an output interface
         
-        # Determine if packet needs to be dropped due to congestion
-        if congestion_level > 0.8:  # 80% congestion threshold
-            # High congestion - might drop packets
-            drop_probability = (congestion_level - 0.8) * 2  # 0-40% drop chance
-            if random.random() < drop_probability:
-                print(f"[ROUTER {self.router_number}] ❌ High congestion ({self.current_load}%), packet dropped")
-                self.packets_dropped += 1
-                return False
-                
-        if congestion_level > 0.4:
-            print(f"[ROUTER {self.router_number}] ⚠ Router congestion: {self.current_load}%, added latency")
-            # Add latency proportional to congestion
-            time.sleep(congestion_level * 0.2)
+        The interface sends one packet at a time, taking size * 8 / link_rate
+        seconds per packet, so packets wait behind whatever is already queued.
         
+        Args:
+            interface (str): Output interface name
+            packet: Packet to send
+            size (int): Packet size in bytes
+            traffic_class: Traffic class (for DRR)
+            on_done (callable, optional): Called as on_done(packet, sent) once the
+                packet has been sent, or dropped by the queue after all
+            
+        Returns:
+            bool: True if the packet was queued, False if the queue dropped it
+        """
+        queue = self.get_output_queue(interface)
+        if not queue.enqueue((packet, on_done, traffic_class), size, traffic_class):
+            self.packets_dropped += 1
+            _log.error("[ROUTER {}] ❌ {} queue on {} dropped packet ({} queued)", self.router_number, self.queue_discipline, interface, len(queue))
+            return False
+        self.current_load = min(100, int(100 * len(queue) / queue.limit))
+        if interface not in self._transmitting:
+            self._transmit_next(interface)
         return True
     
-    def broadcast_arp(self, sender_device, target_ip):
+    def _transmit_next(self, interface):
+        """Start sending the next packet of an interface, if any"""
+        sent = self.get_output_queue(interface).dequeue()
+        if sent is None:
+            self._transmitting.discard(interface)
+            return
+        self._transmitting.add(interface)
+        (packet, on_done, _), size = sent
+        link = self.links.get(interface)
+        transmission_time = link.serialization_time(size) if link is not None else size * 8 / self.link_rate
+        self.scheduler.schedule(transmission_time, self._transmit_done, interface, packet, on_done)
+    
+    def _transmit_done(self, interface, packet, on_done):
+        """Finish sending a packet and move on to the next one"""
+        if on_done is not None:
+            on_done(packet, True)
+        self._transmit_next(interface)
+    
+    def _dropped_in_queue(self, interface, entry):
+        """Account for a packet an AQM dropped while it was queued"""
+        packet, on_done, _ = entry
+        self.packets_dropped += 1
+        _log.error("[ROUTER {}] ❌ Packet dropped by {} on {}", self.router_number, self.queue_discipline, interface)
+        if on_done is not None:
+            on_done(packet, False)
+    
+    def send_queued(self, interface, packet, size=1500, traffic_class=0):
+        """
+        Queue a packet and wait on the simulation clock until it has been sent
+        
+        Args:
+            interface (str): Output interface name
+            packet: Packet to send
+            size (int): Packet size in bytes
+            traffic_class: Traffic class (for DRR)
+            
+        Returns:
+            bool: True once the packet is sent, False if it was dropped
+        """
+        outcome = []
+        if not self.enqueue_packet(interface, packet, size, traffic_class, on_done=lambda _, sent: outcome.append(sent)):
+            return False
+        start = self.scheduler.now
+        while not outcome and self.scheduler.step():
+            pass
+        if not outcome or not outcome[0]:
+            return False
+        _log.info("[ROUTER {}] ▶ Queued and sent on {} in {:.3f} ms", self.router_number, interface, (self.scheduler.now - start) * 1000)
+        return True
+    
+    def display_queue_stats(self):
+        """Display depth, sojourn time and drops of every output queue"""
+        _log.info("\n[ROUTER {}] === OUTPUT QUEUES ({}) ===", self.router_number, self.queue_discipline)
+        if not self.output_queues:
+            _log.info("[ROUTER {}] No packets queued yet.", self.router_number)
+            return
+        _log.info("[ROUTER {}] Interface       | Depth | Peak | Mean sojourn | Dropped", self.router_number)
+        for interface, queue in sorted(self.output_queues.items()):
+            stats = queue.summary()
+            _log.info("[ROUTER {}] {:<15} | {:5d} | {:4d} | {:9.3f} ms | {}", self.router_number, interface, stats["depth"], stats["peak_depth"], stats["mean_sojourn"] * 1000, stats["dropped"])
+    
+    def broadcast_arp(self, sender_device, target_ip, on_reply=None):
         """
         Broadcast ARP request to all ports (excluding the one the request came from)
         This implements the proper ARP behavior for routers (Layer 3)
         
+        A cached address is answered at once. Otherwise the request is
+        broadcast and answered arp_delay later on the simulation clock;
+        requests for the same address that arrive meanwhile wait for that
+        answer instead of flooding again, so a burst of requests costs one
+        broadcast.
+        
         Args:
             sender_device (EndDevices): The device sending the ARP request
             target_ip (str): The IP address being queried
+            on_reply (callable, optional): Called as on_reply(device) when the
+                answer arrives, with None if nobody answered; not called when
+                the cache answers at once
             
         Returns:
-            EndDevices or None: The device with matching IP if found, otherwise None
+            EndDevices or None: The device from the ARP cache, or None if the
+                address has to be resolved first (or recently failed to resolve)
         """
-        print(f"\n[ROUTER {self.router_number}] === ARP BROADCAST ===")
-        print(f"[ROUTER {self.router_number}] ▶ ARP request from {sender_device.get_device_name()} (MAC: {sender_device.get_mac()})")
-        print(f"[ROUTER {self.router_number}] ▶ Looking for device with IP: {target_ip}")
-        self.arp_requests[target_ip] = sender_device
+        _log.info("\n[ROUTER {}] === ARP BROADCAST ===", self.router_number)
+        _log.info("[ROUTER {}] ▶ ARP request from {} (MAC: {})", self.router_number, sender_device.get_device_name(), sender_device.get_mac())
+        _log.info("[ROUTER {}] ▶ Looking for device with IP: {}", self.router_number, target_ip)
         
         # Learn the sender's MAC address
-        if sender_device in self.connected_direct:
-            port_num = self.connected_direct.index(sender_device) + 1
-            self.mac_table[sender_device.get_mac()] = f"PORT {port_num}"
-            print(f"[ROUTER {self.router_number}] ⓘ MAC Table Updated: {sender_device.get_mac()} → PORT {port_num}")
-        
-        # Check directly connected devices first
-        sender_port = None
-        if sender_device in self.connected_direct:
-            sender_port = self.connected_direct.index(sender_device) + 1
-        for i, device in enumerate(self.connected_direct):
-            port_num = i + 1
-            if port_num == sender_port:
-                continue  # Skip the source port
-            if device.IP == target_ip:
-                print(f"[ROUTER {self.router_number}] ✓ Found matching device: {device.get_device_name()} on PORT {port_num}")
-                self.mac_table[device.get_mac()] = f"PORT {port_num}"
+        port_num = self._direct_ports.get(sender_device)
+        if port_num is not None:
+            self.mac_table.learn(sender_device.get_mac(), port_num)
+            _log.info("[ROUTER {}] ⓘ MAC Table Updated: {} → PORT {}", self.router_number, sender_device.get_mac(), port_num)
+        
+        cache = self.arp_cache
+        cache.add(sender_device.IP, sender_device.get_mac())
+        
+        # Answer from the cache instead of flooding again
+        mac = cache.lookup(target_ip)
+        if mac is not None:
+            device = get_address_registry().lookup_mac(mac)
+            if device is not None:
+                _log.info("[ROUTER {}] ✓ ARP cache hit: {} is at {}", self.router_number, target_ip, mac)
+                sender_device.ARP_cache.add(target_ip, mac)
                 return device
-            else:
-                print(f"[ROUTER {self.router_number}] ▶ Sending ARP request to device on PORT {port_num}")
-        
-        # If not found in direct connections, try via connected hubs
-        for i, hub in enumerate(self.hubs):
-            port_num = len(self.connected_direct) + i + 1
-            print(f"[ROUTER {self.router_number}] ▶ Forwarding ARP request to Hub {hub.get_hub_number()} on PORT {port_num}")
-            devices = hub.get_connected_devices()
-            for device in devices:
-                if device.IP == target_ip:
-                    print(f"[ROUTER {self.router_number}] ✓ Found matching device: {device.get_device_name()} via Hub {hub.get_hub_number()}")
-                    self.connected_via_hub[device.get_mac()] = hub
-                    return device
-        
-        print(f"[ROUTER {self.router_number}] ❌ No device with IP {target_ip} found")
+            cache.remove(target_ip)
+        if cache.is_negative(target_ip):
+            _log.warning("[ROUTER {}] ⚠ {} did not answer recently, not flooding again", self.router_number, target_ip)
+            if on_reply is not None:
+                on_reply(None)
+            return None
+        if not cache.queue_packet(target_ip, (sender_device, on_reply)):
+            _log.info("[ROUTER {}] ⓘ Resolution of {} already in progress, request queued", self.router_number, target_ip)
+            return None
+        
+        _log.info("[ROUTER {}] ▶ Broadcasting ARP request on {} port(s)", self.router_number, len(self.connected_direct) + len(self.hubs))
+        self.scheduler.schedule(self.arp_delay, self._arp_reply, sender_device, target_ip)
         return None
     
+    def _arp_reply(self, sender_device, target_ip):
+        """
+        Complete a broadcast ARP request and answer everyone waiting on it
+        
+        The broadcast reaches every other port; who answers is resolved through
+        the address registry instead of asking each port in turn.
+        """
+        cache = self.arp_cache
+        device, segment = get_address_registry().find_on_segments(target_ip, [self, *self.hubs])
+        if device is None or device is sender_device:
+            _log.error("[ROUTER {}] ❌ No device with IP {} found", self.router_number, target_ip)
+            for _, on_reply in cache.add_negative(target_ip):
+                if on_reply is not None:
+                    on_reply(None)
+            return
+        
+        if segment is self:
+            port_num = self.port_of(device)
+            _log.info("[ROUTER {}] ✓ Found matching device: {} on PORT {}", self.router_number, device.get_device_name(), port_num)
+            self.mac_table.learn(device.get_mac(), port_num)
+        else:
+            _log.info("[ROUTER {}] ✓ Found matching device: {} via Hub {}", self.router_number, device.get_device_name(), segment.get_hub_number())
+            self.mac_table.learn(device.get_mac(), self.port_of(segment))
+        # Every requester waiting on this address gets the reply
+        for requester, on_reply in cache.add(target_ip, device.get_mac()):
+            requester.ARP_cache.add(target_ip, device.get_mac())
+            if on_reply is not None:
+                on_reply(device)
+    
     def get_ip(self):
         """
         Get router IP address
@@ -0,0 +1,270 @@
+"""
+Logging layer for Network Simulator
+Wraps the standard logging module with per-subsystem loggers ([ROUTER], [SWITCH],
+[DATA LINK], [GO-BACK-N], ...) that format their messages lazily, so a disabled
+subsystem costs a single level check per call instead of an f-string and a print
+"""
+
+import logging
+import logging.handlers
+import sys
+from event_scheduler import get_scheduler
+
+ROOT_LOGGER_NAME = "netsim"
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+OFF = logging.CRITICAL + 1
+
+_loggers = {}
+
+
+class _BraceMessage:
+    """Log message that is only formatted with str.format when a handler needs it"""
+
+    __slots__ = ("template", "args")
+
+    def __init__(self, template, args):
+        self.template = template
+        self.args = args
+
+    def __str__(self):
+        return self.template.format(*self.args)
+
+
+class _ConsoleHandler(logging.Handler):
+    """
+    Handler that writes plain messages to the current sys.stdout
+
+    sys.stdout is looked up on every record so that redirect_stdout() and
+    test capture keep working like they do for print().
+    """
+
+    def emit(self, record):
+        try:
+            sys.stdout.write(record.getMessage() + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+class _SimTimeFilter(logging.Filter):
+    """Stamp each record with the current simulation time"""
+
+    def filter(self, record):
+        record.sim_time = get_scheduler().now
+        return True
+
+
+class SimLogger:
+    """
+    Logger for one simulator subsystem
+
+    Messages use str.format-style placeholders and are passed their arguments
+    separately, e.g. log.info("[SWITCH {}] ▶ Forwarding to port {}", number, port).
+    Nothing is formatted unless the subsystem is enabled for that level.
+
+    The effective level is cached in _threshold, so a disabled call is one
+    integer comparison. Change levels through this module (set_level,
+    enable_subsystem, ...) so the cache is kept up to date.
+    """
+
+    __slots__ = ("tag", "_logger", "_threshold")
+
+    def __init__(self, tag):
+        """
+        Initialize a subsystem logger
+
+        Args:
+            tag (str): Subsystem tag as shown in the output, e.g. "DATA LINK"
+        """
+        self.tag = tag
+        self._logger = logging.getLogger(f"{ROOT_LOGGER_NAME}.{_logger_suffix(tag)}")
+        self._threshold = self._logger.getEffectiveLevel()
+
+    def is_enabled(self, level=INFO):
+        """
+        Check if messages at a level would be emitted
+
+        Args:
+            level (int): Logging level
+
+        Returns:
+            bool: True if the subsystem is enabled for the level
+        """
+        return level >= self._threshold
+
+    def log(self, level, msg, *args):
+        """
+        Log a message at a level
+
+        Args:
+            level (int): Logging level
+            msg (str): Message template with {} placeholders
+            *args: Values for the placeholders
+        """
+        if level >= self._threshold:
+            self._logger.log(level, _BraceMessage(msg, args))
+
+    def debug(self, msg, *args):
+        """Log a debug message"""
+        if DEBUG >= self._threshold:
+            self._logger.debug(_BraceMessage(msg, args))
+
+    def info(self, msg, *args):
+        """Log an informational message"""
+        if INFO >= self._threshold:
+            self._logger.info(_BraceMessage(msg, args))
+
+    def warning(self, msg, *args):
+        """Log a warning message"""
+        if WARNING >= self._threshold:
+            self._logger.warning(_BraceMessage(msg, args))
+
+    def error(self, msg, *args):
+        """Log an error message"""
+        if ERROR >= self._threshold:
+            self._logger.error(_BraceMessage(msg, args))
+
+
+def _logger_suffix(tag):
+    """Convert a subsystem tag into a logger name component ("GO-BACK-N" -> "go_back_n")"""
+    return "".join(c if c.isalnum() else "_" for c in tag.strip().lower())
+
+
+def _configure_root():
+    """Set up the root simulator logger with console output at INFO level"""
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(INFO)
+    root.propagate = False
+    console = _ConsoleHandler()
+    console.setLevel(INFO)
+    root.addHandler(console)
+    return root, console
+
+
+_root_logger, _console_handler = _configure_root()
+
+
+def _refresh_thresholds():
+    """Recompute the cached level of every subsystem logger after a level change"""
+    for logger in _loggers.values():
+        logger._threshold = logger._logger.getEffectiveLevel()
+
+
+def get_logger(tag):
+    """
+    Get the logger for a subsystem
+
+    Args:
+        tag (str): Subsystem tag, e.g. "ROUTER", "SWITCH", "DATA LINK", "GO-BACK-N"
+
+    Returns:
+        SimLogger: Logger shared by all callers using the same tag
+    """
+    logger = _loggers.get(tag)
+    if logger is None:
+        logger = _loggers[tag] = SimLogger(tag)
+    return logger
+
+
+def set_level(level, tag=None):
+    """
+    Set the logging level globally or for one subsystem
+
+    Args:
+        level (int): Logging level (DEBUG, INFO, WARNING, ERROR or OFF)
+        tag (str, optional): Subsystem tag; all subsystems if omitted
+    """
+    if tag is None:
+        _root_logger.setLevel(level)
+    else:
+        get_logger(tag)._logger.setLevel(level)
+    _refresh_thresholds()
+
+
+def enable_subsystem(tag, enabled=True):
+    """
+    Turn a subsystem's output on or off
+
+    Args:
+        tag (str): Subsystem tag
+        enabled (bool): False silences the subsystem, True restores the global level
+    """
+    get_logger(tag)._logger.setLevel(logging.NOTSET if enabled else OFF)
+    _refresh_thresholds()
+
+
+def set_console_output(enabled, level=INFO):
+    """
+    Turn console output on or off without affecting other sinks
+
+    Args:
+        enabled (bool): Whether log messages are written to stdout
+        level (int): Minimum level written to stdout when enabled
+
+    Returns:
+        tuple: (enabled, level) as they were, to pass back to undo this
+    """
+    previous = _console_handler.level
+    _console_handler.setLevel(level if enabled else OFF)
+    return (previous < OFF, previous if previous < OFF else INFO)
+
+
+def disable_output():
+    """
+    Silence every subsystem; messages are neither formatted nor written
+
+    Returns:
+        int: The previous global level, to pass to set_level() to undo this
+    """
+    previous = _root_logger.level
+    set_level(OFF)
+    return previous
+
+
+def add_file_sink(path, level=DEBUG, capacity=1000):
+    """
+    Add a buffered file sink for traces
+
+    Records are kept in memory and written to the file in batches of
+    `capacity` records, when an ERROR is logged, or on flush().
+
+    Args:
+        path (str): Trace file path
+        level (int): Minimum level written to the file
+        capacity (int): Number of records buffered before writing
+
+    Returns:
+        logging.Handler: The sink, to pass to remove_sink()
+    """
+    file_handler = logging.FileHandler(path, mode="w", encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(sim_time).6f %(levelname)s %(message)s"))
+    sink = logging.handlers.MemoryHandler(capacity, flushLevel=ERROR, target=file_handler)
+    sink.setLevel(level)
+    sink.addFilter(_SimTimeFilter())  # Stamp when logged, not when the buffer is written
+    _root_logger.addHandler(sink)
+    if _root_logger.level > level:
+        set_level(level)
+    return sink
+
+
+def remove_sink(sink):
+    """
+    Flush and remove a sink added with add_file_sink()
+
+    Args:
+        sink (logging.Handler): Sink to remove
+    """
+    _root_logger.removeHandler(sink)
+    target = sink.target
+    sink.close()  # Flushes buffered records to the target
+    if target is not None:
+        target.close()
+
+
+def flush():
+    """Write out any buffered log records"""
+    for handler in _root_logger.handlers:
+        handler.flush()
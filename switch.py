@@ -3,6 +3,14 @@ Switch implementation for Network Simulator
 Equivalent to Switch.java in the Java implementation
 """
 
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from address_registry import get_address_registry
+from mac_table import MACTable, LEARNED, MOVED, TABLE_FULL
+from sim_logging import get_logger
+
+_log = get_logger("SWITCH")
+
 class Switch:
     def __init__(self, num):
         """
@@ -15,10 +23,96 @@ class Switch:
         self.hubs = []
         self.devices_directly_connected = None
         self.connected_direct = []
-        self.connected_via_hub = {}  # Maps MAC address to Hub for faster lookup
-        self.mac_table = {}  # Maps MAC address to a port (for MAC learning demonstration)
+        self._direct_ports = {}  # Device -> port number
+        self._hub_ports = {}  # Hub -> port number
+        self._attached = {}  # Port number -> device or hub
+        self._next_port = 1
         self.data = None
-        print(f"[SWITCH {num}] ▶ Switch initialized")
+        self.scheduler = get_scheduler()  # Simulation clock for CSMA/CD waits, backoffs and MAC aging
+        self.rng = get_rng(f"switch/{num}")  # CSMA/CD channel sensing, collisions and backoff
+        self.mac_table = MACTable(scheduler=self.scheduler)  # MAC -> port learned from traffic
+        _log.info("[SWITCH {}] ▶ Switch initialized", num)
+    
+    @property
+    def mac_table(self):
+        """MAC address table; plain {MAC: "PORT n"} dictionaries are learned into a MACTable"""
+        return self._mac_table
+    
+    @mac_table.setter
+    def mac_table(self, table):
+        if not isinstance(table, MACTable):
+            entries = table
+            table = MACTable(scheduler=self.scheduler)
+            table.update(entries)
+        self._mac_table = table
+    
+    @property
+    def connected_via_hub(self):
+        """MAC addresses learned behind hubs, as {MAC: Hub}"""
+        hubs = {}
+        for mac, port, _ in self.mac_table.items():
+            attached = self.attached_to(port)
+            if attached in self._hub_ports:
+                hubs[mac] = attached
+        return hubs
+    
+    def port_of(self, attached):
+        """
+        Get the port number of a directly connected device or hub
+        
+        Devices and hubs take ports 1, 2, ... in the order they are connected
+        and keep them while they stay connected, so learned MAC entries stay
+        valid as more devices and hubs are plugged in.
+        
+        Args:
+            attached (EndDevices or Hub): Device or hub
+            
+        Returns:
+            int: Port number, or None if it is not connected to this switch
+        """
+        port = self._direct_ports.get(attached)
+        if port is not None:
+            return port
+        return self._hub_ports.get(attached)
+    
+    def attached_to(self, port):
+        """
+        Get the device or hub on a port
+        
+        Args:
+            port (int): Port number
+            
+        Returns:
+            EndDevices or Hub: What is plugged into the port, or None
+        """
+        return self._attached.get(port)
+    
+    def learn_mac(self, mac, port):
+        """
+        Learn the port a MAC address was seen on
+        
+        Args:
+            mac: Source MAC address
+            port (int): Port number
+            
+        Returns:
+            int: Result of MACTable.learn()
+        """
+        result = self.mac_table.learn(mac, port)
+        if result == LEARNED:
+            _log.info("[SWITCH {}] ⓘ MAC Table Updated: {} → PORT {}", self.switch_number, mac, port)
+        elif result == MOVED:
+            _log.warning("[SWITCH {}] ⚠ Station move: {} is now on PORT {}", self.switch_number, mac, port)
+        elif result == TABLE_FULL:
+            _log.warning("[SWITCH {}] ⚠ MAC table full ({} entries), frames to {} will be flooded", self.switch_number, len(self.mac_table), mac)
+        return result
+    
+    def _assign_port(self, attached):
+        """Give a newly connected device or hub the next port number"""
+        port = self._next_port
+        self._next_port += 1
+        self._attached[port] = attached
+        return port
     
     def get_data(self, data):
         """
@@ -28,7 +122,7 @@ class Switch:
             data (str): Data to store
         """
         self.data = data
-        print(f"[SWITCH {self.switch_number}] ▶ Received data for forwarding")
+        _log.info("[SWITCH {}] ▶ Received data for forwarding", self.switch_number)
     
     def store_directly_connected_devices(self, devices):
         """
@@ -38,7 +132,7 @@ class Switch:
             devices (list): List of directly connected devices
         """
         self.devices_directly_connected = devices
-        print(f"[SWITCH {self.switch_number}] ▶ Added {len(devices)} directly connected devices")
+        _log.info("[SWITCH {}] ▶ Added {} directly connected devices", self.switch_number, len(devices))
     
     def store_connected_hubs(self, hubs):
         """
@@ -47,9 +141,20 @@ class Switch:
         Args:
             hubs (list): List of connected hubs
         """
+        hub_ports = {}
+        for hub in hubs:
+            if hub in hub_ports:
+                continue
+            port = self._hub_ports.pop(hub, None)
+            hub_ports[hub] = port if port is not None else self._assign_port(hub)
+        # Hubs no longer connected free their ports and what was learned behind them
+        for port in self._hub_ports.values():
+            del self._attached[port]
+            self.mac_table.flush_port(port)
         self.hubs = hubs
+        self._hub_ports = hub_ports
         hub_numbers = [hub.get_hub_number() for hub in hubs]
-        print(f"[SWITCH {self.switch_number}] ▶ Connected to Hubs: {hub_numbers}")
+        _log.info("[SWITCH {}] ▶ Connected to Hubs: {}", self.switch_number, hub_numbers)
     
     def add_to_direct_connection_table(self, device):
         """
@@ -59,7 +164,10 @@ class Switch:
             device (EndDevices): Device to add
         """
         self.connected_direct.append(device)
-        print(f"[SWITCH {self.switch_number}] ▶ Added device {device.get_device_name()} (MAC: {device.get_mac()}) to direct connections")
+        if device not in self._direct_ports:
+            self._direct_ports[device] = self._assign_port(device)
+        device.registry.attach(device, self)
+        _log.info("[SWITCH {}] ▶ Added device {} (MAC: {}) to direct connections", self.switch_number, device.get_device_name(), device.get_mac())
     
     def add_to_hub_connected_table(self, hub, device):
         """
@@ -69,59 +177,49 @@ class Switch:
             hub (Hub): Hub the device is connected to
             device (EndDevices): Device to add
         """
-        # Use MAC address as the key for faster lookups
-        self.connected_via_hub[device.get_mac()] = hub
-        print(f"[SWITCH {self.switch_number}] ⓘ MAC Table Update: {device.get_mac()} → Hub {hub.get_hub_number()}")
+        port = self.port_of(hub)
+        if port is None:
+            _log.warning("[SWITCH {}] ⚠ Hub {} is not connected to this switch", self.switch_number, hub.get_hub_number())
+            return
+        result = self.mac_table.learn(device.get_mac(), port)
+        if result == TABLE_FULL:
+            _log.warning("[SWITCH {}] ⚠ MAC table full ({} entries), frames to {} will be flooded", self.switch_number, len(self.mac_table), device.get_mac())
+        elif result == MOVED:
+            _log.warning("[SWITCH {}] ⚠ Station move: {} is now behind Hub {}", self.switch_number, device.get_mac(), hub.get_hub_number())
+        else:
+            _log.info("[SWITCH {}] ⓘ MAC Table Update: {} → Hub {}", self.switch_number, device.get_mac(), hub.get_hub_number())
     
     def display_mac_table(self):
         """Display the current MAC address table"""
-        print(f"\n[SWITCH {self.switch_number}] === MAC ADDRESS TABLE ===")
+        _log.info("\n[SWITCH {}] === MAC ADDRESS TABLE ===", self.switch_number)
         
-        # Consolidate all entries into a single table
-        has_entries = False
+        # Learned entries, with the hub behind each hub port
         entries = []
-        
-        # Add entries from MAC table
-        if self.mac_table:
-            has_entries = True
-            for mac, port in self.mac_table.items():
-                entries.append((mac, port, "Dynamic"))
-        
-        # Add entries from devices connected via hubs
-        if self.connected_via_hub:
-            has_entries = True
-            for mac, hub in self.connected_via_hub.items():
-                # Calculate the port number for this hub
-                if self.hubs:
-                    try:
-                        hub_index = self.hubs.index(hub)
-                        port_num = len(self.connected_direct) + hub_index + 1
-                        entries.append((mac, f"PORT {port_num} (Hub {hub.get_hub_number()})", "Dynamic"))
-                    except ValueError:
-                        entries.append((mac, f"Hub {hub.get_hub_number()}", "Dynamic"))
+        for mac, port, static in self.mac_table.items():
+            attached = self.attached_to(port)
+            if attached in self._hub_ports:
+                entries.append((mac, f"PORT {port} (Hub {attached.get_hub_number()})", "Static" if static else "Dynamic"))
+            else:
+                entries.append((mac, f"PORT {port}", "Static" if static else "Dynamic"))
         
         # Add entries from directly connected devices that aren't yet in the MAC table
-        if self.connected_direct:
-            has_entries = True
-            for device in self.connected_direct:
-                mac = device.get_mac()
-                # Only add if not already in the MAC table
-                if not self.mac_table or mac not in self.mac_table:
-                    port_num = self.connected_direct.index(device) + 1
-                    entries.append((mac, f"PORT {port_num}", "Static"))
+        for device, port in self._direct_ports.items():
+            mac = device.get_mac()
+            if mac not in self.mac_table:
+                entries.append((mac, f"PORT {port}", "Static"))
         
         # Display the consolidated table
-        if has_entries:
-            print(f"[SWITCH {self.switch_number}] {'MAC Address':<15} | {'Port':<20} | {'Type'}")
-            print(f"[SWITCH {self.switch_number}] {'-'*15} | {'-'*20} | {'-'*10}")
+        if entries:
+            _log.info("[SWITCH {}] MAC Address     | Port                 | Type", self.switch_number)
+            _log.info("[SWITCH {}] {} | {} | {}", self.switch_number, '-'*15, '-'*20, '-'*10)
             
             # Sort entries for better display
             entries.sort(key=lambda x: x[0])  # Sort by MAC address
             
             for mac, port, entry_type in entries:
-                print(f"[SWITCH {self.switch_number}] {mac:<15} | {port:<20} | {entry_type}")
+                _log.info("[SWITCH {}] {:<15} | {:<20} | {}", self.switch_number, mac, port, entry_type)
         else:
-            print(f"[SWITCH {self.switch_number}] MAC address table is empty.")
+            _log.info("[SWITCH {}] MAC address table is empty.", self.switch_number)
     
     def send_direct_data(self, sender_device, receiver_device):
         """
@@ -131,13 +229,11 @@ class Switch:
             sender_device (EndDevices): Sender device
             receiver_device (EndDevices): Receiver device
         """
-        import random
-        import time
-        
+        rng = self.rng
         data = sender_device.get_data()
-        print(f"\n[SWITCH {self.switch_number}] === DIRECT SWITCHING ===")
-        print(f"[SWITCH {self.switch_number}] ▶ Source: {sender_device.get_device_name()} (MAC: {sender_device.get_mac()})")
-        print(f"[SWITCH {self.switch_number}] ▶ Destination: {receiver_device.get_device_name()} (MAC: {receiver_device.get_mac()})")
+        _log.info("\n[SWITCH {}] === DIRECT SWITCHING ===", self.switch_number)
+        _log.info("[SWITCH {}] ▶ Source: {} (MAC: {})", self.switch_number, sender_device.get_device_name(), sender_device.get_mac())
+        _log.info("[SWITCH {}] ▶ Destination: {} (MAC: {})", self.switch_number, receiver_device.get_device_name(), receiver_device.get_mac())
         
         # Initialize CSMA/CD variables
         channel_busy = False
@@ -146,80 +242,76 @@ class Switch:
         
         # Check if switch ports are busy (randomly)
         # This simulates CSMA/CD medium sensing
-        print(f"[SWITCH {self.switch_number}] === PHYSICAL LAYER: CSMA/CD PROTOCOL ===")
+        _log.info("[SWITCH {}] === PHYSICAL LAYER: CSMA/CD PROTOCOL ===", self.switch_number)
         
         # Randomly determine if channel is busy (30% chance)
-        channel_busy = random.random() < 0.3
+        channel_busy = rng.random() < 0.3
         
         while attempt < max_attempts:
-            print(f"[SWITCH {self.switch_number}] ▶ [CSMA/CD] Attempt {attempt+1}: Checking if channel is busy...")
+            _log.info("[SWITCH {}] ▶ [CSMA/CD] Attempt {}: Checking if channel is busy...", self.switch_number, attempt+1)
             
             if channel_busy:
-                print(f"[SWITCH {self.switch_number}] ▶ [CSMA/CD] Channel busy. Waiting...")
-                time.sleep(0.5)  # Wait before retrying
+                _log.info("[SWITCH {}] ▶ [CSMA/CD] Channel busy. Waiting...", self.switch_number)
+                self.scheduler.sleep(0.5)  # Wait before retrying
                 # After waiting, check again with 50% chance of still being busy
-                channel_busy = random.random() < 0.5
+                channel_busy = rng.random() < 0.5
                 attempt += 1
                 continue
                 
             # Channel is free, start transmission
-            print(f"[SWITCH {self.switch_number}] ▶ [CSMA/CD] Channel is free. {sender_device.get_device_name()} starts transmitting...")
+            _log.info("[SWITCH {}] ▶ [CSMA/CD] Channel is free. {} starts transmitting...", self.switch_number, sender_device.get_device_name())
             
             # Simulate possible collision (random chance)
-            collision_happened = random.random() < 0.2  # 20% chance of collision
+            collision_happened = rng.random() < 0.2  # 20% chance of collision
             
             if collision_happened:
-                print(f"[SWITCH {self.switch_number}] ⚠ [CSMA/CD] COLLISION DETECTED during transmission!")
-                print(f"[SWITCH {self.switch_number}] ▶ [CSMA/CD] Sending jamming signal...")
+                _log.warning("[SWITCH {}] ⚠ [CSMA/CD] COLLISION DETECTED during transmission!", self.switch_number)
+                _log.info("[SWITCH {}] ▶ [CSMA/CD] Sending jamming signal...", self.switch_number)
                 
                 # Calculate backoff time using exponential backoff algorithm
-                backoff = random.randint(1, 2 ** min(attempt, 10))  # Limit exponent to avoid overflow
-                print(f"[SWITCH {self.switch_number}] ▶ [CSMA/CD] Backing off for {backoff} time units...")
+                backoff = rng.randint(1, 2 ** min(attempt, 10))  # Limit exponent to avoid overflow
+                _log.info("[SWITCH {}] ▶ [CSMA/CD] Backing off for {} time units...", self.switch_number, backoff)
                 
-                time.sleep(0.2 * backoff)  # Wait according to backoff algorithm
+                self.scheduler.sleep(0.2 * backoff)  # Wait according to backoff algorithm
                 attempt += 1
                 continue
                 
             # No collision, proceed with switching
-            print(f"[SWITCH {self.switch_number}] ✓ [CSMA/CD] Transmission successful at physical layer")
-            print(f"[SWITCH {self.switch_number}] === DATA LINK LAYER: MAC LEARNING & FORWARDING ===")
+            _log.info("[SWITCH {}] ✓ [CSMA/CD] Transmission successful at physical layer", self.switch_number)
+            _log.info("[SWITCH {}] === DATA LINK LAYER: MAC LEARNING & FORWARDING ===", self.switch_number)
             
             # Check if we know this MAC address yet (MAC Table lookup)
             known_receiver = False
-            if hasattr(self, 'mac_table') and receiver_device.get_mac() in self.mac_table:
+            port_num = self.mac_table.lookup(receiver_device.get_mac())
+            if port_num is not None:
                 known_receiver = True
-                print(f"[SWITCH {self.switch_number}] ✓ MAC address found in table: {receiver_device.get_mac()} → {self.mac_table[receiver_device.get_mac()]}")
-            elif receiver_device in self.connected_direct:
-                known_receiver = True
-                port_num = self.connected_direct.index(receiver_device) + 1
-                print(f"[SWITCH {self.switch_number}] ✓ Device connected directly: {receiver_device.get_device_name()} on Port {port_num}")
-                
-                # Add to MAC table for future reference
-                if hasattr(self, 'mac_table'):
-                    self.mac_table[receiver_device.get_mac()] = f"PORT {port_num}"
-                    print(f"[SWITCH {self.switch_number}] ⓘ MAC Table Updated: {receiver_device.get_mac()} → PORT {port_num}")
+                _log.info("[SWITCH {}] ✓ MAC address found in table: {} → PORT {}", self.switch_number, receiver_device.get_mac(), port_num)
+            else:
+                port_num = self._direct_ports.get(receiver_device)
+                if port_num is not None:
+                    _log.info("[SWITCH {}] ✓ Device connected directly: {} on Port {}", self.switch_number, receiver_device.get_device_name(), port_num)
+                    # Add to MAC table for future reference; a full table leaves it to flooding
+                    known_receiver = self.learn_mac(receiver_device.get_mac(), port_num) != TABLE_FULL
                     
-            # Learn the sender's MAC if needed
-            if hasattr(self, 'mac_table') and sender_device.get_mac() not in self.mac_table:
-                if sender_device in self.connected_direct:
-                    port_num = self.connected_direct.index(sender_device) + 1
-                    self.mac_table[sender_device.get_mac()] = f"PORT {port_num}"
-                    print(f"[SWITCH {self.switch_number}] ⓘ MAC Table Updated: {sender_device.get_mac()} → PORT {port_num}")
+            # Learn the sender's MAC (refreshing its aging timer if already known)
+            port_num = self._direct_ports.get(sender_device)
+            if port_num is not None:
+                self.learn_mac(sender_device.get_mac(), port_num)
             
             # Unlike a hub, a switch only forwards to the specific destination
             if known_receiver:
-                print(f"[SWITCH {self.switch_number}] ▶ Forwarding frame directly to destination")
+                _log.info("[SWITCH {}] ▶ Forwarding frame directly to destination", self.switch_number)
             else:
-                print(f"[SWITCH {self.switch_number}] ⚠ Unknown destination MAC, flooding frame to all ports")
+                _log.warning("[SWITCH {}] ⚠ Unknown destination MAC, flooding frame to all ports", self.switch_number)
                 
             # Send the data to the receiver
-            print(f"[SWITCH {self.switch_number}] === NETWORK LAYER: PASSING DATA UPWARD ===")
+            _log.info("[SWITCH {}] === NETWORK LAYER: PASSING DATA UPWARD ===", self.switch_number)
             receiver_device.set_receiver_data(data)
-            print(f"[SWITCH {self.switch_number}] ✓ Frame forwarded to destination")
+            _log.info("[SWITCH {}] ✓ Frame forwarded to destination", self.switch_number)
             return
             
         # If we reach here, max attempts were exceeded
-        print(f"[SWITCH {self.switch_number}] ❌ [CSMA/CD] Transmission failed after {max_attempts} attempts")
+        _log.error("[SWITCH {}] ❌ [CSMA/CD] Transmission failed after {} attempts", self.switch_number, max_attempts)
     
     def send_data_via_hub(self, sender_hub, receiver_hub, sender, receiver):
         """
@@ -231,40 +323,41 @@ class Switch:
             sender (EndDevices): Sender device
             receiver (EndDevices): Receiver device
         """
-        print(f"\n[SWITCH {self.switch_number}] === INTER-HUB SWITCHING ===")
-        print(f"[SWITCH {self.switch_number}] ▶ Source: Hub {sender_hub.get_hub_number()}")
-        print(f"[SWITCH {self.switch_number}] ▶ Source device: {sender.get_device_name()} (MAC: {sender.get_mac()})")
-        print(f"[SWITCH {self.switch_number}] ▶ Destination device: {receiver.get_device_name()} (MAC: {receiver.get_mac()})")
+        _log.info("\n[SWITCH {}] === INTER-HUB SWITCHING ===", self.switch_number)
+        _log.info("[SWITCH {}] ▶ Source: Hub {}", self.switch_number, sender_hub.get_hub_number())
+        _log.info("[SWITCH {}] ▶ Source device: {} (MAC: {})", self.switch_number, sender.get_device_name(), sender.get_mac())
+        _log.info("[SWITCH {}] ▶ Destination device: {} (MAC: {})", self.switch_number, receiver.get_device_name(), receiver.get_mac())
         
         # Learn sender's MAC address and hub (building MAC address table)
         self.add_to_hub_connected_table(sender_hub, sender)
         
         # Check if the switch knows which hub the receiver is connected to
-        receiver_hub_from_table = self.connected_via_hub.get(receiver.get_mac())
+        port = self.mac_table.lookup(receiver.get_mac())
+        receiver_hub_from_table = self.attached_to(port) if port is not None else None
         
         if receiver_hub_from_table is not None:
-            print(f"[SWITCH {self.switch_number}] ✓ MAC table lookup successful: {receiver.get_mac()} → Hub {receiver_hub_from_table.get_hub_number()}")
+            _log.info("[SWITCH {}] ✓ MAC table lookup successful: {} → Hub {}", self.switch_number, receiver.get_mac(), receiver_hub_from_table.get_hub_number())
             
             # Verify if our knowledge is correct
             if receiver_hub_from_table.get_hub_number() != receiver_hub.get_hub_number():
-                print(f"[SWITCH {self.switch_number}] ⚠ MAC table outdated! Updating: {receiver.get_mac()} is now at Hub {receiver_hub.get_hub_number()}")
+                _log.warning("[SWITCH {}] ⚠ MAC table outdated! Updating: {} is now at Hub {}", self.switch_number, receiver.get_mac(), receiver_hub.get_hub_number())
                 self.add_to_hub_connected_table(receiver_hub, receiver)
         else:
-            print(f"[SWITCH {self.switch_number}] ⓘ MAC {receiver.get_mac()} not in table, learning it's at Hub {receiver_hub.get_hub_number()}")
+            _log.info("[SWITCH {}] ⓘ MAC {} not in table, learning it's at Hub {}", self.switch_number, receiver.get_mac(), receiver_hub.get_hub_number())
             self.add_to_hub_connected_table(receiver_hub, receiver)
             
         # Display the current MAC table
         self.display_mac_table()
         
         # Forward data to the receiver's hub
-        print(f"[SWITCH {self.switch_number}] ▶ Forwarding frame from Hub {sender_hub.get_hub_number()} to Hub {receiver_hub.get_hub_number()}")
+        _log.info("[SWITCH {}] ▶ Forwarding frame from Hub {} to Hub {}", self.switch_number, sender_hub.get_hub_number(), receiver_hub.get_hub_number())
         receiver_hub.receive_data_from_sender(sender_hub.data)
-        print(f"[SWITCH {self.switch_number}] ✓ Frame forwarded to Hub {receiver_hub.get_hub_number()}")
+        _log.info("[SWITCH {}] ✓ Frame forwarded to Hub {}", self.switch_number, receiver_hub.get_hub_number())
         
         # The receiver hub will broadcast to its connected devices
         # When a hub receives data, it broadcasts to all connected devices
         receiver_hub.send_data_to_receiver(receiver)
-        print(f"[SWITCH {self.switch_number}] ✓ Transfer complete")
+        _log.info("[SWITCH {}] ✓ Transfer complete", self.switch_number)
     
     def send_ACK_or_NAK(self):
         """Send ACK or NAK (placeholder)"""
@@ -274,7 +367,7 @@ class Switch:
         """
         ARP logic should not be in Switch. This method is deprecated and will be removed.
         """
-        print(f"[SWITCH {self.switch_number}] ARP logic is now handled by the Router (Layer 3 device). No action taken.")
+        _log.info("[SWITCH {}] ARP logic is now handled by the Router (Layer 3 device). No action taken.", self.switch_number)
         return None
     
     def find_device_by_ip(self, ip_address):
@@ -288,20 +381,16 @@ class Switch:
         Returns:
             EndDevices or None: Device with the IP if found, None otherwise
         """
-        print(f"[SWITCH {self.switch_number}] ▶ Looking for device with IP {ip_address}")
+        _log.info("[SWITCH {}] ▶ Looking for device with IP {}", self.switch_number, ip_address)
         
-        # Check directly connected devices
-        for device in self.connected_direct:
-            if device.IP == ip_address:
-                print(f"[SWITCH {self.switch_number}] ✓ Found device with IP {ip_address}: MAC {device.get_mac()}")
-                return device
-        
-        # Check devices connected via hubs
-        for hub in self.hubs:
-            for device in hub.get_connected_devices():
-                if device.IP == ip_address:
-                    print(f"[SWITCH {self.switch_number}] ✓ Found device with IP {ip_address} via Hub {hub.get_hub_number()}: MAC {device.get_mac()}")
-                    return device
+        # Resolve through the address registry, accepting only devices on this switch or its hubs
+        device, segment = get_address_registry().find_on_segments(ip_address, [self, *self.hubs])
+        if device is not None:
+            if segment is self:
+                _log.info("[SWITCH {}] ✓ Found device with IP {}: MAC {}", self.switch_number, ip_address, device.get_mac())
+            else:
+                _log.info("[SWITCH {}] ✓ Found device with IP {} via Hub {}: MAC {}", self.switch_number, ip_address, segment.get_hub_number(), device.get_mac())
+            return device
         
-        print(f"[SWITCH {self.switch_number}] ⚠ No device with IP {ip_address} found")
+        _log.warning("[SWITCH {}] ⚠ No device with IP {} found", self.switch_number, ip_address)
         return None
@@ -0,0 +1,352 @@
+"""
+TCP congestion control algorithms for Network Simulator
+Pluggable congestion window algorithms (Reno, NewReno, CUBIC and a BBR-like
+model) and a Jacobson/Karels retransmission timeout estimator, run by the
+transport layer's TCPConnection for every sender: plain connections, the
+asyncio streams of async_sockets and the bottleneck experiments in
+bottleneck_bench.
+
+Windows are counted in segments.
+"""
+
+import math
+from collections import deque
+
+DEFAULT_MSS = 1460  # Bytes of payload per segment
+
+
+class RTOEstimator:
+    """
+    Retransmission timeout estimator (Jacobson/Karels, RFC 6298)
+
+    SRTT and RTTVAR are exponentially weighted averages of the RTT and of its
+    deviation; RTO = SRTT + max(G, 4 * RTTVAR), doubled after each timeout.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, initial_rto=1.0, min_rto=0.2, max_rto=60.0, granularity=0.001):
+        """
+        Initialize the estimator
+
+        Args:
+            initial_rto (float): RTO before the first RTT sample, in seconds
+            min_rto (float): Lower bound of the RTO
+            max_rto (float): Upper bound of the RTO
+            granularity (float): Clock granularity G
+        """
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.granularity = granularity
+        self.srtt = None
+        self.rttvar = None
+        self.min_rtt = None
+        self.rto = initial_rto
+
+    def update(self, sample):
+        """
+        Take an RTT sample
+
+        Args:
+            sample (float): Measured round-trip time in seconds
+        """
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - sample)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * sample
+        self.min_rtt = sample if self.min_rtt is None else min(self.min_rtt, sample)
+        rto = self.srtt + max(self.granularity, 4 * self.rttvar)
+        self.rto = min(self.max_rto, max(self.min_rto, rto))
+
+    def backoff(self):
+        """Double the RTO after a timeout (exponential backoff)"""
+        self.rto = min(self.max_rto, self.rto * 2)
+
+
+class Reno:
+    """
+    TCP Reno (RFC 5681)
+
+    Slow start below ssthresh, one segment per RTT above it. Three duplicate
+    ACKs halve the window and start fast recovery, which ends at the next new
+    ACK; a timeout drops the window to one segment.
+    """
+
+    name = "reno"
+    newreno = False  # Whether partial ACKs keep the connection in fast recovery
+
+    def __init__(self, initial_cwnd=4):
+        """
+        Initialize the algorithm
+
+        Args:
+            initial_cwnd (int): Initial congestion window in segments
+        """
+        self.cwnd = float(initial_cwnd)
+        self.ssthresh = math.inf
+        self.pacing_rate = None  # Segments per second, or None to send as fast as the window allows
+
+    def window(self):
+        """
+        Get the number of segments that may be in flight
+
+        Returns:
+            int: Congestion window in whole segments
+        """
+        return max(1, int(self.cwnd))
+
+    def on_ack(self, acked, now, rtt=None, flight=0, rate=None):
+        """
+        Grow the window for newly acknowledged data outside fast recovery
+
+        Args:
+            acked (int): Segments newly acknowledged
+            now (float): Simulation time
+            rtt (float, optional): RTT sample carried by this ACK
+            flight (int): Segments in flight after this ACK
+            rate (float, optional): Delivery rate sample in segments per second
+        """
+        if self.cwnd < self.ssthresh:
+            self.cwnd += acked
+        else:
+            self.cwnd += acked / self.cwnd
+
+    def enter_recovery(self, now, flight):
+        """
+        React to three duplicate ACKs (fast retransmit)
+
+        Args:
+            now (float): Simulation time
+            flight (int): Segments in flight
+        """
+        self.ssthresh = max(flight / 2, 2.0)
+        self.cwnd = self.ssthresh + 3  # The three segments that left the network
+
+    def on_dup_ack(self, now):
+        """Inflate the window for another segment that left the network during fast recovery"""
+        self.cwnd += 1
+
+    def on_partial_ack(self, acked, now):
+        """
+        Deflate the window after a partial ACK (NewReno only)
+
+        Args:
+            acked (int): Segments newly acknowledged
+            now (float): Simulation time
+        """
+        self.cwnd = max(self.cwnd - acked + 1, 1.0)
+
+    def exit_recovery(self, now):
+        """Deflate the window when fast recovery ends"""
+        self.cwnd = self.ssthresh
+
+    def on_timeout(self, now, flight):
+        """
+        React to a retransmission timeout
+
+        Args:
+            now (float): Simulation time
+            flight (int): Segments in flight
+        """
+        self.ssthresh = max(flight / 2, 2.0)
+        self.cwnd = 1.0
+
+
+class NewReno(Reno):
+    """
+    TCP NewReno (RFC 6582)
+
+    Like Reno, but a partial ACK during fast recovery retransmits the next
+    hole and stays in recovery, so several losses in one window cost one
+    window reduction instead of a timeout.
+    """
+
+    name = "newreno"
+    newreno = True
+
+
+class Cubic(NewReno):
+    """
+    CUBIC (RFC 9438)
+
+    Above ssthresh the window follows W(t) = C * (t - K)^3 + W_max, a cubic
+    of the time since the last reduction that plateaus around the window
+    where the last loss happened, and never grows slower than Reno would.
+    """
+
+    name = "cubic"
+    C = 0.4
+    BETA = 0.7
+
+    def __init__(self, initial_cwnd=4, fast_convergence=True):
+        """
+        Initialize the algorithm
+
+        Args:
+            initial_cwnd (int): Initial congestion window in segments
+            fast_convergence (bool): Release bandwidth faster when W_max shrinks
+        """
+        super().__init__(initial_cwnd)
+        self.fast_convergence = fast_convergence
+        self.w_max = 0.0
+        self.k = 0.0
+        self.epoch_start = None
+        self.w_est = 0.0
+        self.min_rtt = None
+
+    def on_ack(self, acked, now, rtt=None, flight=0, rate=None):
+        if rtt is not None:
+            self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+        if self.cwnd < self.ssthresh:
+            self.cwnd += acked
+            return
+        if self.epoch_start is None:
+            self.epoch_start = now
+            if self.cwnd < self.w_max:
+                self.k = ((self.w_max - self.cwnd) / self.C) ** (1 / 3)
+            else:
+                self.k = 0.0
+                self.w_max = self.cwnd
+            self.w_est = self.cwnd
+
+        rtt = self.min_rtt or 0.0
+        t = now - self.epoch_start
+        target = self.C * (t + rtt - self.k) ** 3 + self.w_max
+        # Reno-friendly estimate (RFC 9438 section 4.3)
+        self.w_est += 3 * (1 - self.BETA) / (1 + self.BETA) * acked / self.cwnd
+        if target < self.w_est:
+            self.cwnd = max(self.cwnd, self.w_est)
+        elif target > self.cwnd:
+            self.cwnd += (min(target, 1.5 * self.cwnd) - self.cwnd) / self.cwnd * acked
+
+    def _reduce(self):
+        """Multiplicative decrease and the new W_max"""
+        if self.fast_convergence and self.cwnd < self.w_max:
+            self.w_max = self.cwnd * (1 + self.BETA) / 2
+        else:
+            self.w_max = self.cwnd
+        self.ssthresh = max(self.cwnd * self.BETA, 2.0)
+        self.epoch_start = None
+
+    def enter_recovery(self, now, flight):
+        self._reduce()
+        self.cwnd = self.ssthresh + 3
+
+    def on_timeout(self, now, flight):
+        self._reduce()
+        self.cwnd = 1.0
+
+
+class BBRLike(Reno):
+    """
+    Model-based congestion control in the style of BBR (v1)
+
+    Estimates the bottleneck bandwidth (windowed maximum of delivery-rate
+    samples) and the round-trip propagation time (windowed minimum RTT),
+    paces at gain * bandwidth and caps the window at twice the estimated
+    bandwidth-delay product. Losses do not shrink the model.
+    """
+
+    name = "bbr"
+    newreno = True
+    HIGH_GAIN = 2 / math.log(2)  # Startup gain that doubles the rate every round
+    CWND_GAIN = 2.0
+    PROBE_CYCLE = (1.25, 0.75, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0)
+    BW_WINDOW_ROUNDS = 10
+    MIN_RTT_WINDOW = 10.0  # Seconds
+
+    def __init__(self, initial_cwnd=4):
+        super().__init__(initial_cwnd)
+        self.state = "startup"
+        self.pacing_gain = self.HIGH_GAIN
+        self.cwnd_gain = self.HIGH_GAIN
+        self.btl_bw = 0.0
+        self.min_rtt = None
+        self._min_rtt_stamp = 0.0
+        self._bw_samples = deque()  # (round, rate)
+        self._round = 0
+        self._round_start = None
+        self._full_bw = 0.0
+        self._full_bw_rounds = 0
+        self._cycle_index = 0
+
+    def _bdp(self):
+        """Estimated bandwidth-delay product in segments"""
+        return self.btl_bw * self.min_rtt if self.min_rtt else 0.0
+
+    def on_ack(self, acked, now, rtt=None, flight=0, rate=None):
+        if rtt is not None and (self.min_rtt is None or rtt <= self.min_rtt or now - self._min_rtt_stamp > self.MIN_RTT_WINDOW):
+            self.min_rtt = rtt
+            self._min_rtt_stamp = now
+        new_round = self._round_start is None or (self.min_rtt and now - self._round_start >= self.min_rtt)
+        if new_round:
+            self._round += 1
+            self._round_start = now
+        if rate is not None:
+            self._bw_samples.append((self._round, rate))
+            while self._bw_samples[0][0] <= self._round - self.BW_WINDOW_ROUNDS:
+                self._bw_samples.popleft()
+            self.btl_bw = max(sample for _, sample in self._bw_samples)
+
+        if self.state == "startup" and new_round and self.btl_bw:
+            if self.btl_bw >= self._full_bw * 1.25:
+                self._full_bw = self.btl_bw
+                self._full_bw_rounds = 0
+            else:
+                self._full_bw_rounds += 1
+                if self._full_bw_rounds >= 3:  # Bandwidth stopped growing: the pipe is full
+                    self.state = "drain"
+                    self.pacing_gain = 1 / self.HIGH_GAIN
+        if self.state == "drain" and flight <= self._bdp():
+            self.state = "probe_bw"
+            self.cwnd_gain = self.CWND_GAIN
+            self._cycle_index = 0
+        elif self.state == "probe_bw" and new_round:
+            self._cycle_index = (self._cycle_index + 1) % len(self.PROBE_CYCLE)
+        if self.state == "probe_bw":
+            self.pacing_gain = self.PROBE_CYCLE[self._cycle_index]
+
+        if self.btl_bw and self.min_rtt:
+            self.pacing_rate = self.pacing_gain * self.btl_bw
+            target = max(4.0, self.cwnd_gain * self._bdp())
+            # Grow towards the target as data is delivered, shrink to it at once
+            self.cwnd = min(self.cwnd + acked, target) if self.cwnd < target else target
+        else:
+            self.cwnd += acked
+
+    def enter_recovery(self, now, flight):
+        self.cwnd = max(self.cwnd, flight + 1.0)  # Packet conservation: keep what is in flight
+
+    def on_dup_ack(self, now):
+        pass
+
+    def on_partial_ack(self, acked, now):
+        pass
+
+    def exit_recovery(self, now):
+        pass
+
+    def on_timeout(self, now, flight):
+        self.cwnd = 1.0
+
+
+ALGORITHMS = {"reno": Reno, "newreno": NewReno, "cubic": Cubic, "bbr": BBRLike}
+
+
+def make_congestion_control(name="reno", **options):
+    """
+    Create a congestion control algorithm by name
+
+    Args:
+        name (str): "reno", "newreno", "cubic" or "bbr"
+        **options: Constructor arguments (e.g. initial_cwnd=10)
+
+    Returns:
+        Reno: The algorithm
+    """
+    if name not in ALGORITHMS:
+        raise ValueError(f"Unknown congestion control: {name} (choose from {', '.join(ALGORITHMS)})")
+    return ALGORITHMS[name](**options)
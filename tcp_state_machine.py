@@ -0,0 +1,532 @@
+"""
+TCP connection state machine for Network Simulator
+Implements the RFC 793 connection life cycle (three-way handshake, data
+transfer, FIN and RST teardown, TIME_WAIT) on the simulation clock, with
+segments delivered to their connection through a table keyed on the
+4-tuple. Connection state lives in __slots__ objects so that hundreds of
+thousands of simulated connections stay cheap.
+"""
+
+from enum import Enum
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from sim_logging import DEBUG, get_logger
+
+_log = get_logger("TCP")
+
+SEQ_MODULUS = 1 << 32
+DEFAULT_MSL = 30.0  # Maximum segment lifetime in seconds; TIME_WAIT lasts 2 * MSL
+WILDCARD_IP = "0.0.0.0"
+DEFAULT_WINDOW = 65535  # Receive window advertised while the application keeps reading
+
+
+class ConnectionState(Enum):
+    CLOSED = "CLOSED"
+    LISTEN = "LISTEN"
+    SYN_SENT = "SYN_SENT"
+    SYN_RECEIVED = "SYN_RECEIVED"
+    ESTABLISHED = "ESTABLISHED"
+    FIN_WAIT_1 = "FIN_WAIT_1"
+    FIN_WAIT_2 = "FIN_WAIT_2"
+    CLOSE_WAIT = "CLOSE_WAIT"
+    CLOSING = "CLOSING"
+    LAST_ACK = "LAST_ACK"
+    TIME_WAIT = "TIME_WAIT"
+
+
+class TCPFlags:
+    """TCP Flag constants"""
+    SYN = 0x02
+    ACK = 0x10
+    FIN = 0x01
+    RST = 0x04
+    PSH = 0x08
+    URG = 0x20
+
+
+def seq_add(seq, n):
+    """Add to a sequence number modulo 2^32"""
+    return (seq + n) % SEQ_MODULUS
+
+
+def seq_lt(a, b):
+    """Check if sequence number a comes before b (RFC 1982 serial arithmetic)"""
+    return 0 < (b - a) % SEQ_MODULUS < SEQ_MODULUS // 2
+
+
+class Segment:
+    """A TCP segment between two endpoints"""
+
+    __slots__ = ("src_ip", "src_port", "dst_ip", "dst_port", "seq", "ack", "flags", "payload", "window")
+
+    def __init__(self, src_ip, src_port, dst_ip, dst_port, seq, ack, flags, payload=b"", window=DEFAULT_WINDOW):
+        self.src_ip = src_ip
+        self.src_port = src_port
+        self.dst_ip = dst_ip
+        self.dst_port = dst_port
+        self.seq = seq
+        self.ack = ack
+        self.flags = flags
+        self.payload = payload
+        self.window = window
+
+    def __repr__(self):
+        names = [name for name in ("SYN", "ACK", "FIN", "RST", "PSH") if self.flags & getattr(TCPFlags, name)]
+        return (f"Segment({self.src_ip}:{self.src_port} → {self.dst_ip}:{self.dst_port} "
+                f"{'|'.join(names) or '-'} seq={self.seq} ack={self.ack} len={len(self.payload)})")
+
+
+class TCB:
+    """
+    Transmission control block: the state of one connection
+
+    Sequence numbers follow RFC 793: snd_una is the oldest unacknowledged
+    byte, snd_nxt the next byte to send and rcv_nxt the next byte expected.
+    snd_wnd is the window the peer last advertised and rcv_wnd the one we
+    advertise.
+    """
+
+    __slots__ = ("local_ip", "local_port", "remote_ip", "remote_port", "state", "iss", "snd_una", "snd_nxt",
+                 "rcv_nxt", "snd_wnd", "rcv_wnd", "owner", "timer", "retries", "on_data", "on_state", "on_ack")
+
+    def __init__(self, local_ip, local_port, remote_ip, remote_port, iss, owner=None):
+        self.local_ip = local_ip
+        self.local_port = local_port
+        self.remote_ip = remote_ip
+        self.remote_port = remote_port
+        self.state = ConnectionState.CLOSED
+        self.iss = iss
+        self.snd_una = iss
+        self.snd_nxt = iss
+        self.rcv_nxt = 0
+        self.snd_wnd = DEFAULT_WINDOW
+        self.rcv_wnd = DEFAULT_WINDOW
+        self.owner = owner  # Whatever owns the connection (process id, socket, ...)
+        self.timer = None  # Retransmission or TIME_WAIT timer
+        self.retries = 0
+        self.on_data = None  # Called as on_data(tcb, payload) for in-order data
+        self.on_state = None  # Called as on_state(tcb, old_state) after every transition
+        self.on_ack = None  # Called as on_ack(tcb, acked) when an ACK acknowledges bytes, moves the window or is a duplicate
+
+    @property
+    def key(self):
+        """Demultiplexing key (local_ip, local_port, remote_ip, remote_port)"""
+        return (self.local_ip, self.local_port, self.remote_ip, self.remote_port)
+
+    def __repr__(self):
+        return f"TCB({self.local_ip}:{self.local_port} ↔ {self.remote_ip}:{self.remote_port} {self.state.value})"
+
+
+class TCPStateMachine:
+    """
+    TCP endpoints of any number of hosts, sharing one simulation clock
+
+    Connections are found in O(1) by the 4-tuple of an arriving segment,
+    and listening sockets by (ip, port) with a wildcard IP fallback. A SYN
+    for a listening port creates a new connection; a segment for no
+    connection and no listener is answered with a RST. SYN and FIN are
+    retransmitted with exponential backoff; data reliability is left to the
+    flow control layered on top (see transport_layer). Every segment carries
+    its sender's receive window, which owners use to pace their data (see
+    async_sockets).
+    """
+
+    def __init__(self, scheduler=None, delay=0.001, rto=1.0, max_retries=5, msl=DEFAULT_MSL, output=None, rng=None):
+        """
+        Initialize the state machine
+
+        Args:
+            scheduler (EventScheduler, optional): Simulation clock (default: the shared one)
+            delay (float): One-way delay of the default output path in seconds
+            rto (float): Initial retransmission timeout for SYN and FIN
+            max_retries (int): Retransmissions of SYN or FIN before the connection is dropped
+            msl (float): Maximum segment lifetime; TIME_WAIT lasts 2 * msl
+            output (callable, optional): Called as output(segment) to send a segment;
+                by default segments come back to deliver() after delay seconds
+            rng (random.Random, optional): Source of initial sequence numbers
+                (default: the shared "tcp/isn" stream)
+        """
+        self.scheduler = scheduler or get_scheduler()
+        self.delay = delay
+        self.rto = rto
+        self.max_retries = max_retries
+        self.msl = msl
+        self.output = output or self._loopback
+        self.rng = rng or get_rng("tcp/isn")
+        self.connections = {}  # (local_ip, local_port, remote_ip, remote_port) -> TCB
+        self.listeners = {}  # (ip, port) -> on_accept callback (or None)
+        self.segments_sent = 0
+        self.segments_received = 0
+        self.resets_sent = 0
+
+    def _loopback(self, segment):
+        """Default output path: deliver the segment here after the configured delay"""
+        self.scheduler.schedule(self.delay, self.deliver, segment)
+
+    # ---- Opening -------------------------------------------------------------
+
+    def listen(self, ip, port, on_accept=None):
+        """
+        Open a listening socket (passive open)
+
+        Args:
+            ip (str): Local IP, or WILDCARD_IP for every address
+            port (int): Local port
+            on_accept (callable, optional): Called as on_accept(tcb) when a
+                connection reaches ESTABLISHED
+        """
+        self.listeners[(ip, port)] = on_accept
+        _log.info("[TCP] ▶ Listening on {}:{}", ip, port)
+
+    def unlisten(self, ip, port):
+        """Close a listening socket; established connections are not affected"""
+        self.listeners.pop((ip, port), None)
+
+    def connect(self, local_ip, local_port, remote_ip, remote_port, owner=None, on_state=None):
+        """
+        Open a connection (active open) by sending a SYN
+
+        Args:
+            local_ip (str): Local IP
+            local_port (int): Local port
+            remote_ip (str): Remote IP
+            remote_port (int): Remote port
+            owner: Owner recorded in the TCB
+            on_state (callable, optional): Called as on_state(tcb, old_state) after every transition
+
+        A 4-tuple whose previous connection is still in TIME_WAIT is reused,
+        with an initial sequence number above everything the old connection
+        sent, so the peer cannot mistake old segments for new ones.
+
+        Returns:
+            TCB: The connection in SYN_SENT, or None if the 4-tuple is in use
+        """
+        key = (local_ip, local_port, remote_ip, remote_port)
+        iss = self.rng.getrandbits(32)
+        old = self.connections.get(key)
+        if old is not None:
+            if old.state != ConnectionState.TIME_WAIT:
+                _log.warning("[TCP] ⚠ {}:{} → {}:{} is in use ({})", local_ip, local_port, remote_ip, remote_port, old.state.value)
+                return None
+            iss = seq_add(old.snd_nxt, 1 + (iss & 0xFFFF))
+            self._remove(old)
+        tcb = TCB(local_ip, local_port, remote_ip, remote_port, iss, owner)
+        tcb.on_state = on_state
+        self.connections[key] = tcb
+        tcb.snd_nxt = seq_add(tcb.iss, 1)  # SYN takes one sequence number
+        self._set_state(tcb, ConnectionState.SYN_SENT)
+        self._send_control(tcb, TCPFlags.SYN, tcb.iss)
+        return tcb
+
+    # ---- Data and closing ----------------------------------------------------
+
+    def send(self, tcb, payload):
+        """
+        Send data on a connection
+
+        Args:
+            tcb (TCB): Connection
+            payload (bytes or str): Data; strings are UTF-8 encoded
+
+        Returns:
+            bool: True if sent, False if the connection cannot send
+        """
+        if tcb.state not in (ConnectionState.ESTABLISHED, ConnectionState.CLOSE_WAIT):
+            _log.error("[TCP] ❌ Cannot send in state {}", tcb.state.value)
+            return False
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK | TCPFlags.PSH, payload)
+        tcb.snd_nxt = seq_add(tcb.snd_nxt, len(payload))
+        return True
+
+    def close(self, tcb):
+        """
+        Close a connection gracefully by sending a FIN
+
+        Args:
+            tcb (TCB): Connection
+        """
+        if tcb.state in (ConnectionState.SYN_SENT, ConnectionState.CLOSED):
+            self._remove(tcb)
+            return
+        if tcb.state in (ConnectionState.SYN_RECEIVED, ConnectionState.ESTABLISHED):
+            next_state = ConnectionState.FIN_WAIT_1
+        elif tcb.state == ConnectionState.CLOSE_WAIT:
+            next_state = ConnectionState.LAST_ACK
+        else:
+            return  # Already closing
+        fin_seq = tcb.snd_nxt
+        tcb.snd_nxt = seq_add(fin_seq, 1)  # FIN takes one sequence number
+        self._set_state(tcb, next_state)
+        self._send_control(tcb, TCPFlags.FIN | TCPFlags.ACK, fin_seq)
+
+    def abort(self, tcb):
+        """
+        Reset a connection at once
+
+        Args:
+            tcb (TCB): Connection
+        """
+        if tcb.state not in (ConnectionState.CLOSED, ConnectionState.TIME_WAIT):
+            self._emit(tcb, tcb.snd_nxt, TCPFlags.RST)
+            self.resets_sent += 1
+        self._remove(tcb)
+
+    def set_receive_window(self, tcb, window):
+        """
+        Change the receive window a connection advertises
+
+        A window that opens again after being closed is announced at once
+        with a window update, since the peer is waiting for it.
+
+        Args:
+            tcb (TCB): Connection
+            window (int): Bytes the application is willing to accept
+        """
+        reopened = tcb.rcv_wnd == 0 and window > 0
+        tcb.rcv_wnd = window
+        if reopened and self.connections.get(tcb.key) is tcb and tcb.state not in (ConnectionState.SYN_SENT, ConnectionState.TIME_WAIT):
+            self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK)
+
+    def lookup(self, local_ip, local_port, remote_ip, remote_port):
+        """
+        Find a connection by its 4-tuple
+
+        Returns:
+            TCB: The connection, or None
+        """
+        return self.connections.get((local_ip, local_port, remote_ip, remote_port))
+
+    # ---- Segment arrival -----------------------------------------------------
+
+    def deliver(self, segment):
+        """
+        Hand an arriving segment to its connection
+
+        Args:
+            segment (Segment): Segment addressed to one of our endpoints
+        """
+        self.segments_received += 1
+        flags = segment.flags
+        tcb = self.connections.get((segment.dst_ip, segment.dst_port, segment.src_ip, segment.src_port))
+        if tcb is not None:
+            if not (tcb.state == ConnectionState.TIME_WAIT and flags & TCPFlags.SYN and not flags & TCPFlags.ACK
+                    and seq_lt(tcb.rcv_nxt, segment.seq)):
+                self._process(tcb, segment)
+                return
+            # A new incarnation of a connection in TIME_WAIT (RFC 1122 4.2.2.13)
+            self._remove(tcb)
+
+        if flags & TCPFlags.RST:
+            return
+        if flags & TCPFlags.SYN and not flags & TCPFlags.ACK:
+            listener = (segment.dst_ip, segment.dst_port)
+            if listener not in self.listeners:
+                listener = (WILDCARD_IP, segment.dst_port)
+            if listener in self.listeners:
+                self._accept(segment, self.listeners[listener])
+                return
+        self._reset_for(segment)
+
+    def _accept(self, segment, on_accept):
+        """Create a connection for a SYN arriving at a listener"""
+        tcb = TCB(segment.dst_ip, segment.dst_port, segment.src_ip, segment.src_port, self.rng.getrandbits(32))
+        tcb.rcv_nxt = seq_add(segment.seq, 1)
+        tcb.snd_nxt = seq_add(tcb.iss, 1)
+        tcb.on_state = (lambda t, old: on_accept(t) if t.state == ConnectionState.ESTABLISHED else None) if on_accept else None
+        self.connections[tcb.key] = tcb
+        self._set_state(tcb, ConnectionState.SYN_RECEIVED)
+        self._send_control(tcb, TCPFlags.SYN | TCPFlags.ACK, tcb.iss)
+
+    def _process(self, tcb, segment):
+        """Run one segment through a connection's state machine (RFC 793 section 3.9)"""
+        state = tcb.state
+        flags = segment.flags
+
+        if state == ConnectionState.SYN_SENT:
+            if flags & TCPFlags.ACK and segment.ack != tcb.snd_nxt:
+                if not flags & TCPFlags.RST:
+                    self._reset_for(segment)
+                return
+            if flags & TCPFlags.RST:
+                if flags & TCPFlags.ACK:
+                    _log.error("[TCP] ❌ Connection to {}:{} refused", tcb.remote_ip, tcb.remote_port)
+                    self._remove(tcb)
+                return
+            if flags & TCPFlags.SYN:
+                tcb.rcv_nxt = seq_add(segment.seq, 1)
+                tcb.snd_wnd = segment.window
+                if flags & TCPFlags.ACK:
+                    tcb.snd_una = segment.ack
+                    self._cancel_timer(tcb)
+                    self._set_state(tcb, ConnectionState.ESTABLISHED)
+                    self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK)
+                else:
+                    # Simultaneous open
+                    self._set_state(tcb, ConnectionState.SYN_RECEIVED)
+                    self._send_control(tcb, TCPFlags.SYN | TCPFlags.ACK, tcb.iss)
+            return
+
+        # Every other state: the segment must start where we expect it
+        if segment.seq != tcb.rcv_nxt and not (flags & TCPFlags.SYN and state == ConnectionState.SYN_RECEIVED):
+            if flags & TCPFlags.RST:
+                return
+            if state == ConnectionState.TIME_WAIT and flags & TCPFlags.FIN:
+                self._start_time_wait(tcb)  # Our last ACK was lost
+            self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK)  # Duplicate or out of order: re-ACK
+            return
+        if flags & TCPFlags.RST:
+            _log.warning("[TCP] ⚠ Connection {}:{} ↔ {}:{} reset by peer", tcb.local_ip, tcb.local_port, tcb.remote_ip, tcb.remote_port)
+            self._remove(tcb)
+            return
+        if flags & TCPFlags.SYN:
+            if state != ConnectionState.SYN_RECEIVED:
+                self.abort(tcb)
+            elif flags & TCPFlags.ACK and segment.ack == tcb.snd_nxt:
+                # SYN-ACK after a simultaneous open
+                self._cancel_timer(tcb)
+                self._set_state(tcb, ConnectionState.ESTABLISHED)
+                self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK)
+            else:
+                self._send_control(tcb, TCPFlags.SYN | TCPFlags.ACK, tcb.iss)  # Retransmitted SYN
+            return
+        if not flags & TCPFlags.ACK:
+            return
+
+        # ACK processing
+        acks_all = segment.ack == tcb.snd_nxt
+        acked = 0
+        window_moved = False
+        # A bare ACK that repeats snd_una while data is out signals a later segment got through
+        duplicate = (segment.ack == tcb.snd_una and not acks_all and not segment.payload
+                     and not flags & TCPFlags.FIN and segment.window == tcb.snd_wnd)
+        if not seq_lt(segment.ack, tcb.snd_una) and not seq_lt(tcb.snd_nxt, segment.ack):
+            acked = (segment.ack - tcb.snd_una) % SEQ_MODULUS
+            window_moved = acked or segment.window != tcb.snd_wnd
+            tcb.snd_una = segment.ack
+            tcb.snd_wnd = segment.window
+        if acks_all:
+            self._cancel_timer(tcb)
+            if state == ConnectionState.SYN_RECEIVED:
+                self._set_state(tcb, ConnectionState.ESTABLISHED)
+            elif state == ConnectionState.FIN_WAIT_1:
+                self._set_state(tcb, ConnectionState.FIN_WAIT_2)
+            elif state == ConnectionState.CLOSING:
+                self._start_time_wait(tcb)
+                return
+            elif state == ConnectionState.LAST_ACK:
+                self._remove(tcb)
+                return
+        state = tcb.state
+
+        # Data
+        if segment.payload and state in (ConnectionState.ESTABLISHED, ConnectionState.FIN_WAIT_1, ConnectionState.FIN_WAIT_2):
+            tcb.rcv_nxt = seq_add(tcb.rcv_nxt, len(segment.payload))
+            if tcb.on_data is not None:
+                tcb.on_data(tcb, segment.payload)
+            if not flags & TCPFlags.FIN:
+                self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK)
+
+        # FIN
+        if flags & TCPFlags.FIN:
+            tcb.rcv_nxt = seq_add(tcb.rcv_nxt, 1)
+            self._emit(tcb, tcb.snd_nxt, TCPFlags.ACK)
+            if state in (ConnectionState.SYN_RECEIVED, ConnectionState.ESTABLISHED):
+                self._set_state(tcb, ConnectionState.CLOSE_WAIT)
+            elif state == ConnectionState.FIN_WAIT_1:
+                self._set_state(tcb, ConnectionState.CLOSING)
+            elif state == ConnectionState.FIN_WAIT_2:
+                self._start_time_wait(tcb)
+
+        # Last, so that whatever the owner sends in return sees the final state
+        if (window_moved or duplicate) and tcb.on_ack is not None:
+            tcb.on_ack(tcb, acked)
+
+    # ---- Helpers -------------------------------------------------------------
+
+    def _set_state(self, tcb, state):
+        old = tcb.state
+        tcb.state = state
+        if _log.is_enabled(DEBUG):  # Skip building the arguments on the hot path
+            _log.debug("[TCP] ▶ {}:{} ↔ {}:{} {} → {}", tcb.local_ip, tcb.local_port, tcb.remote_ip, tcb.remote_port, old.value, state.value)
+        if tcb.on_state is not None:
+            tcb.on_state(tcb, old)
+
+    def _emit(self, tcb, seq, flags, payload=b""):
+        """Send a segment from a connection"""
+        self.segments_sent += 1
+        self.output(Segment(tcb.local_ip, tcb.local_port, tcb.remote_ip, tcb.remote_port, seq, tcb.rcv_nxt, flags, payload, tcb.rcv_wnd))
+
+    def _send_control(self, tcb, flags, seq):
+        """Send a SYN or FIN and arm its retransmission timer"""
+        if flags & TCPFlags.SYN and tcb.state != ConnectionState.SYN_SENT:
+            flags |= TCPFlags.ACK
+        self._emit(tcb, seq, flags)
+        self._stop_timer(tcb)
+        tcb.timer = self.scheduler.schedule(self.rto * (1 << tcb.retries), self._retransmit, tcb, flags, seq)
+
+    def _retransmit(self, tcb, flags, seq):
+        tcb.timer = None
+        if self.connections.get(tcb.key) is not tcb:
+            return
+        if tcb.retries >= self.max_retries:
+            _log.error("[TCP] ❌ {}:{} → {}:{} timed out in {}", tcb.local_ip, tcb.local_port, tcb.remote_ip, tcb.remote_port, tcb.state.value)
+            self._remove(tcb)
+            return
+        tcb.retries += 1
+        self._send_control(tcb, flags, seq)
+
+    def _stop_timer(self, tcb):
+        if tcb.timer is not None:
+            tcb.timer.cancel()
+            tcb.timer = None
+
+    def _cancel_timer(self, tcb):
+        """Stop the retransmission timer once what it guarded is acknowledged"""
+        self._stop_timer(tcb)
+        tcb.retries = 0
+
+    def _start_time_wait(self, tcb):
+        """Enter (or restart) TIME_WAIT; the connection is removed after 2 * MSL"""
+        self._cancel_timer(tcb)
+        if tcb.state != ConnectionState.TIME_WAIT:
+            self._set_state(tcb, ConnectionState.TIME_WAIT)
+        tcb.timer = self.scheduler.schedule(2 * self.msl, self._time_wait_done, tcb)
+
+    def _time_wait_done(self, tcb):
+        tcb.timer = None
+        if self.connections.get(tcb.key) is tcb:
+            self._remove(tcb)
+
+    def _remove(self, tcb):
+        """Drop a connection from the table and mark it CLOSED (retries are kept for inspection)"""
+        self._stop_timer(tcb)
+        if self.connections.get(tcb.key) is tcb:
+            del self.connections[tcb.key]
+        if tcb.state != ConnectionState.CLOSED:
+            self._set_state(tcb, ConnectionState.CLOSED)
+
+    def _reset_for(self, segment):
+        """Answer a segment that belongs to no connection with a RST"""
+        if segment.flags & TCPFlags.ACK:
+            seq, ack, flags = segment.ack, 0, TCPFlags.RST
+        else:
+            seq = 0
+            ack = seq_add(segment.seq, len(segment.payload) + (1 if segment.flags & TCPFlags.SYN else 0))
+            flags = TCPFlags.RST | TCPFlags.ACK
+        self.segments_sent += 1
+        self.resets_sent += 1
+        self.output(Segment(segment.dst_ip, segment.dst_port, segment.src_ip, segment.src_port, seq, ack, flags))
+
+    def count_by_state(self):
+        """
+        Count the connections in each state
+
+        Returns:
+            dict: State name -> number of connections
+        """
+        counts = {}
+        for tcb in self.connections.values():
+            counts[tcb.state.value] = counts.get(tcb.state.value, 0) + 1
+        return counts
@@ -0,0 +1,110 @@
+"""
+Tests for the address registry
+Covers devices dropping out when garbage collected, address moves, duplicate
+IPs on different segments and unregistering
+"""
+
+import gc
+from address_registry import AddressRegistry, set_address_registry
+from end_devices import EndDevices
+from event_scheduler import EventScheduler, set_scheduler
+
+
+class _Device:
+    """Bare device: the registry only needs something it can reference weakly"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+def test_collected_devices_drop_out():
+    registry = AddressRegistry()
+    device = _Device("a")
+    registry.register(device, "10.0.0.1/24", 1)
+    registry.attach(device, "switch")
+    assert registry.lookup_ip("10.0.0.1") is device and registry.lookup_mac(1) is device
+
+    del device
+    gc.collect()
+    assert registry.lookup_ip("10.0.0.1") is None and registry.lookup_mac(1) is None
+    assert registry.lookup_all_ip("10.0.0.1") == []
+    assert len(registry) == 0
+
+
+def test_a_collected_duplicate_leaves_the_other_in_place():
+    registry = AddressRegistry()
+    first, second = _Device("a"), _Device("b")
+    registry.register(first, "10.0.0.1")
+    registry.register(second, "10.0.0.1")
+    del second
+    gc.collect()
+    assert registry.lookup_all_ip("10.0.0.1") == [first]
+    assert registry.lookup_ip("10.0.0.1") is first
+
+
+def test_address_updates_move_the_device():
+    registry = AddressRegistry()
+    device = _Device("a")
+    registry.register(device, "10.0.0.1", 1)
+    registry.update_ip(device, "10.0.0.1/24", "10.0.1.1/24")
+    registry.update_mac(device, 1, 2)
+    assert registry.lookup_ip("10.0.0.1") is None and registry.lookup_ip("10.0.1.1") is device
+    assert registry.lookup_mac(1) is None and registry.lookup_mac(2) is device
+
+    registry.update_ip(device, "10.0.1.1", None)
+    registry.update_mac(device, None, 3)
+    assert registry.lookup_ip("10.0.1.1") is None
+    assert registry.lookup_mac(2) is device and registry.lookup_mac(3) is device
+
+
+def test_device_setters_keep_the_registry_current():
+    registry = AddressRegistry()
+    set_address_registry(registry)
+    set_scheduler(EventScheduler())
+    device = EndDevices(5, "a", "10.0.0.5")
+    device.IP = "10.0.0.6"
+    device.MAC = 6
+    assert registry.lookup_ip("10.0.0.5") is None and registry.lookup_ip("10.0.0.6") is device
+    assert registry.lookup_mac(5) is None and registry.lookup_mac(6) is device
+
+
+def test_duplicate_ips_resolve_by_segment():
+    """The same private address behind two switches: each segment finds its own device"""
+    registry = AddressRegistry()
+    left, right = _Device("left"), _Device("right")
+    registry.register(left, "192.168.1.10")
+    registry.register(right, "192.168.1.10/24")
+    registry.attach(left, "switch-1")
+    registry.attach(right, "switch-2")
+    registry.attach(right, "switch-2")  # Attaching twice records the segment once
+
+    assert registry.lookup_all_ip("192.168.1.10") == [left, right]
+    assert registry.lookup_ip("192.168.1.10") is right  # Most recently registered
+    assert registry.get_segments(right) == ["switch-2"]
+    assert registry.find_on_segments("192.168.1.10", ["switch-1"]) == (left, "switch-1")
+    assert registry.find_on_segments("192.168.1.10", ["switch-2", "switch-1"]) == (right, "switch-2")
+    assert registry.find_on_segments("192.168.1.10", ["switch-3"]) == (None, None)
+    assert registry.find_on_segments("192.168.1.99", ["switch-1"]) == (None, None)
+
+    # Registering again moves a device to the end of the list
+    registry.register(left, "192.168.1.10")
+    assert registry.lookup_all_ip("192.168.1.10") == [right, left]
+
+    registry.detach(left, "switch-1")
+    assert registry.find_on_segments("192.168.1.10", ["switch-1"]) == (None, None)
+
+
+def test_unregister_removes_addresses_and_segments():
+    registry = AddressRegistry()
+    device, other = _Device("a"), _Device("b")
+    registry.register(device, "10.0.0.1", 1)
+    registry.register(other, "10.0.0.1", 2)
+    registry.attach(device, "hub")
+    registry.unregister(device, "10.0.0.1/8", 1)
+    assert registry.lookup_all_ip("10.0.0.1") == [other]
+    assert registry.lookup_mac(1) is None and registry.lookup_mac(2) is other
+    assert registry.get_segments(device) == []
+
+    registry.unregister(other, "10.0.0.1", 2)
+    assert len(registry) == 0
+    registry.unregister(other, "10.0.0.1", 2)  # Unknown devices are ignored
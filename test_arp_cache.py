@@ -0,0 +1,89 @@
+"""
+Tests for the ARP cache
+Covers entry lifetimes, LRU eviction, negative entries, key normalization and
+how a Router collapses concurrent requests for one address into one broadcast
+"""
+
+from address_registry import AddressRegistry, set_address_registry
+from arp_cache import ARPCache
+from end_devices import EndDevices
+from event_scheduler import EventScheduler, set_scheduler
+from router import Router
+
+
+def test_entries_expire_on_the_simulation_clock():
+    scheduler = EventScheduler()
+    cache = ARPCache(ttl=10.0, scheduler=scheduler)
+    cache.add("10.0.0.5", 5)
+    cache.add("10.0.0.1", 1, permanent=True)
+    scheduler.run(until=9.0)
+    assert cache.lookup("10.0.0.5") == 5
+    scheduler.run(until=11.0)
+    assert cache.lookup("10.0.0.5") is None
+    assert cache.lookup("10.0.0.1") == 1
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ARPCache(capacity=2, scheduler=EventScheduler())
+    cache.add("10.0.0.1", 1)
+    cache.add("10.0.0.2", 2)
+    cache.lookup("10.0.0.1")
+    cache.add("10.0.0.3", 3)
+    assert "10.0.0.2" not in cache
+    assert "10.0.0.1" in cache and "10.0.0.3" in cache
+    assert cache.evictions == 1
+
+
+def test_negative_entries_expire_and_release_waiting_packets():
+    scheduler = EventScheduler()
+    cache = ARPCache(negative_ttl=5.0, max_pending=2, scheduler=scheduler)
+    assert cache.queue_packet("10.0.0.9", "a")
+    assert not cache.queue_packet("10.0.0.9", "b")
+    assert not cache.queue_packet("10.0.0.9", "c")  # Drops "a"
+    assert cache.add_negative("10.0.0.9") == ["b", "c"]
+    assert cache.is_negative("10.0.0.9")
+    scheduler.run(until=6.0)
+    assert not cache.is_negative("10.0.0.9")
+
+
+def test_prefix_lengths_are_ignored():
+    cache = ARPCache(scheduler=EventScheduler())
+    cache.add("10.0.0.5/24", 5)
+    assert cache.lookup("10.0.0.5") == 5
+    assert "10.0.0.5/24" in cache
+    cache.queue_packet("10.0.0.6", "packet")
+    assert cache.is_pending("10.0.0.6/24")
+    assert cache.add("10.0.0.6/24", 6) == ["packet"]
+    cache.remove("10.0.0.5/24")
+    assert "10.0.0.5" not in cache
+
+
+def test_router_coalesces_concurrent_requests():
+    """Requests for one address while its broadcast is out share a single reply"""
+    set_address_registry(AddressRegistry())
+    scheduler = EventScheduler()
+    set_scheduler(scheduler)
+    router = Router(0, "10.0.0.0")
+    senders = [EndDevices(n, f"s{n}", f"10.0.0.{n}") for n in range(1, 4)]
+    target = EndDevices(9, "t", "10.0.0.9")
+    for device in (*senders, target):
+        router.add_to_direct_connection_table(device)
+
+    replies = []
+    for sender in senders:
+        assert router.broadcast_arp(sender, "10.0.0.9", replies.append) is None
+    assert scheduler.pending_events() == 1
+    scheduler.run()
+    assert replies == [target] * 3
+    assert all(sender.ARP_cache.lookup("10.0.0.9") == 9 for sender in senders)
+
+    # Now cached: answered at once, without another broadcast
+    assert router.broadcast_arp(senders[0], "10.0.0.9") is target
+    assert scheduler.pending_events() == 0
+
+    router.broadcast_arp(senders[0], "10.0.0.77", replies.append)
+    scheduler.run()
+    assert replies[-1] is None
+    router.broadcast_arp(senders[1], "10.0.0.77", replies.append)
+    assert replies[-1] is None and scheduler.pending_events() == 0
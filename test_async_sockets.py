@@ -0,0 +1,192 @@
+"""
+Tests for the asyncio socket API
+Runs servers and clients as coroutines on a simulation event loop over a
+private TransportLayer
+"""
+
+import asyncio
+import async_sockets
+from event_scheduler import EventScheduler, set_scheduler
+from tcp_congestion import DEFAULT_MSS
+from transport_layer import ProtocolType, TransportLayer
+
+SERVER_IP = "10.0.0.2"
+
+
+def _stack():
+    set_scheduler(EventScheduler())
+    return TransportLayer()
+
+
+def test_echo():
+    """Lines written by a client come back from an echo server"""
+    stack = _stack()
+
+    async def echo(reader, writer):
+        while line := await reader.readline():
+            writer.write(line)
+        writer.close()
+
+    async def main():
+        server = await async_sockets.start_server(echo, SERVER_IP, 7, stack=stack)
+        reader, writer = await async_sockets.open_connection(SERVER_IP, 7, stack=stack)
+        replies = []
+        for n in range(3):
+            writer.write(f"message {n}\n".encode())
+            replies.append(await reader.readline())
+        writer.close()
+        await writer.wait_closed()
+        server.close()
+        await server.wait_closed()
+        return replies
+
+    assert async_sockets.run(main(), stack) == [b"message 0\n", b"message 1\n", b"message 2\n"]
+
+
+def test_connection_refused():
+    """Connecting to a port nobody listens on raises ConnectionRefusedError"""
+    stack = _stack()
+
+    async def main():
+        try:
+            await async_sockets.open_connection(SERVER_IP, 81, stack=stack)
+        except ConnectionRefusedError:
+            return True
+        return False
+
+    assert async_sockets.run(main(), stack)
+    assert not stack.tcp.connections
+
+
+def test_connect_timeout():
+    """A handshake nobody answers fails with TimeoutError after the SYN retransmissions"""
+    stack = _stack()
+    stack.tcp.output = lambda segment: None
+
+    async def main():
+        try:
+            await async_sockets.open_connection(SERVER_IP, 80, stack=stack)
+        except TimeoutError:
+            return asyncio.get_running_loop().time()
+        return None
+
+    assert async_sockets.run(main(), stack) == sum(stack.tcp.rto * 2 ** n for n in range(stack.tcp.max_retries + 1))
+
+
+def test_half_close():
+    """After write_eof() the client still reads the server's reply to everything it sent"""
+    stack = _stack()
+
+    async def shout(reader, writer):
+        writer.write((await reader.read()).upper())
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        await async_sockets.start_server(shout, SERVER_IP, 80, stack=stack)
+        reader, writer = await async_sockets.open_connection(SERVER_IP, 80, stack=stack)
+        writer.write(b"hello ")
+        writer.write(b"world")
+        writer.write_eof()
+        reply = await reader.read()
+        writer.close()
+        return reply
+
+    assert async_sockets.run(main(), stack) == b"HELLO WORLD"
+
+
+def test_drain_waits_for_a_slow_reader():
+    """A reader that stops reading closes its window, so the writer's buffer fills and drain() blocks"""
+    stack = _stack()
+    size = 1000000
+
+    async def main():
+        release = asyncio.Event()
+        received = bytearray()
+        done = asyncio.Event()
+
+        async def sink(reader, writer):
+            await release.wait()
+            while chunk := await reader.read(65536):
+                received.extend(chunk)
+            writer.close()
+            done.set()
+
+        await async_sockets.start_server(sink, SERVER_IP, 80, stack=stack)
+        reader, writer = await async_sockets.open_connection(SERVER_IP, 80, stack=stack)
+        writer.write(b"x" * size)
+        drain = asyncio.ensure_future(writer.drain())
+        await asyncio.sleep(10)
+        blocked = not drain.done()
+        buffered = writer.transport.get_write_buffer_size()
+        release.set()
+        await drain
+        writer.close()
+        await done.wait()
+        return blocked, buffered, len(received)
+
+    blocked, buffered, received = async_sockets.run(main(), stack)
+    assert blocked
+    assert buffered > 64 * 1024
+    assert received == size
+
+
+def test_duplicate_acks_put_a_stream_into_fast_recovery():
+    """Losing the first data segment draws duplicate ACKs, which halve the writer's congestion window"""
+    stack = _stack()
+    output = stack.tcp.output
+    lost = []
+
+    def lossy(segment):
+        if segment.payload and not lost:
+            lost.append(segment)
+        else:
+            output(segment)
+
+    stack.tcp.output = lossy
+
+    async def idle(reader, writer):
+        pass
+
+    async def main():
+        await async_sockets.start_server(idle, SERVER_IP, 80, stack=stack)
+        reader, writer = await async_sockets.open_connection(SERVER_IP, 80, stack=stack)
+        writer.write(b"x" * 4 * DEFAULT_MSS)
+        await asyncio.sleep(1)
+        return writer.transport._connection
+
+    connection = async_sockets.run(main(), stack)
+    assert len(lost) == 1
+    assert connection.fast_retransmits == 1 and connection.in_recovery
+    assert connection.congestion.ssthresh == 2
+
+
+def test_udp_between_process_and_endpoint():
+    """A process using send_udp_data() and an asyncio endpoint exchange datagrams"""
+    stack = _stack()
+    stack.register_process("dns", ProtocolType.UDP, well_known_port=53, device_ip=SERVER_IP)
+    stack.create_udp_socket("dns")
+
+    class Client(asyncio.DatagramProtocol):
+        def __init__(self):
+            self.answers = asyncio.get_running_loop().create_future()
+
+        def datagram_received(self, data, addr):
+            self.answers.set_result((data, addr))
+
+    async def main():
+        transport, client = await async_sockets.create_datagram_endpoint(
+            Client, local_addr=("10.0.0.9", 0), remote_addr=(SERVER_IP, 53), stack=stack)
+        transport.sendto(b"query")
+        await asyncio.sleep(1)
+        query, source = stack.receive_udp_data("dns")
+        stack.send_udp_data("dns", *source, "answer")
+        answer = await client.answers
+        transport.close()
+        return query, source, answer
+
+    query, source, answer = async_sockets.run(main(), stack)
+    assert query == b"query"
+    assert source[0] == "10.0.0.9"
+    assert answer == (b"answer", (SERVER_IP, 53))
+    assert (source[0], source[1]) not in stack.udp_sockets
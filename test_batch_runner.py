@@ -0,0 +1,102 @@
+"""
+Tests for the batch runner
+Checks the result format, seeded replays, error reporting, the duration
+cut-off, and that runs leave the console and the shared services as they were
+"""
+
+import json
+import sim_logging
+from address_registry import get_address_registry
+from batch_runner import run_scenario, run_scenarios
+from event_scheduler import get_scheduler
+from rng_service import get_rng_service
+
+SCENARIO = {
+    "name": "direct",
+    "seed": 1,
+    "topology": {"routers": [{"direct_devices": 2}]},
+    "traffic": [{"source": "A", "destination": "B", "message": "hi"}],
+}
+
+
+def test_quiet_run_restores_console_output(tmp_path, capsys):
+    path = tmp_path / "scenario.json"
+    path.write_text(json.dumps(SCENARIO))
+    results = run_scenarios([str(path)], quiet=True)
+    assert results[0]["file"] == str(path)
+    assert capsys.readouterr().out == ""
+    sim_logging.get_logger("TEST").info("after")
+    assert "after" in capsys.readouterr().out
+
+
+def test_console_output_is_restored_when_a_scenario_fails(tmp_path, capsys):
+    try:
+        run_scenarios([str(tmp_path / "missing.json")], quiet=True)
+    except OSError:
+        pass
+    else:
+        raise AssertionError("expected OSError")
+    sim_logging.get_logger("TEST").warning("still here")
+    assert "still here" in capsys.readouterr().out
+
+
+NOISY = {
+    "name": "noisy",
+    "seed": 5,
+    "topology": {"routers": [{"direct_devices": 2}]},
+    "traffic": [{"source": "A", "destination": "B", "message": "x" * 80, "count": 2, "interval": 10.0}],
+    "settings": {"error_probability": 0.3, "max_nak_rounds": 50},
+}
+
+
+def test_results_have_the_documented_fields():
+    results = run_scenario(SCENARIO)
+    assert results["scenario"] == "direct" and results["seed"] == 1 and results["devices"] == 2
+    assert results["errors"] == []
+    transfer, = results["transfers"]
+    assert transfer["delivered"] and transfer["frames"] == 1
+    assert {"connection_type", "transmissions", "acks", "naks", "start_time", "end_time", "flow", "source",
+            "destination", "scheduled_time"} <= transfer.keys()
+    assert results["summary"]["transfers"] == results["summary"]["delivered"] == 1
+    json.dumps(results)
+
+
+def test_same_seed_gives_identical_results():
+    first = run_scenario(NOISY)
+    assert run_scenario(NOISY) == first
+    assert first["summary"]["naks"] > 0  # The seed really drives the bit errors
+    assert run_scenario(dict(NOISY, seed=6)) != first
+
+
+def test_frames_past_the_sequence_wrap_are_delivered_after_naks():
+    """Sequence numbers wrap at 10, so an 80-character message goes around them after a NAK too"""
+    results = run_scenario(NOISY)
+    for transfer in results["transfers"]:
+        assert transfer["delivered"]
+        assert transfer["frames"] == 16
+        assert transfer["transmissions"] >= transfer["frames"]
+        assert transfer["acks"] * 4 >= transfer["frames"]
+
+
+def test_unknown_settings_and_devices_are_reported():
+    scenario = dict(SCENARIO, settings={"warp_speed": 9},
+                    traffic=SCENARIO["traffic"] + [{"source": "A", "destination": "Z"}])
+    results = run_scenario(scenario)
+    assert results["errors"] == ["unknown setting: warp_speed", "flow 1: unknown device A -> Z"]
+    assert results["summary"]["transfers"] == 1
+
+
+def test_duration_stops_a_running_transfer_and_skips_later_ones():
+    scenario = dict(NOISY, duration=1.0, settings={})
+    scenario["traffic"] = [dict(NOISY["traffic"][0], count=3, interval=0.5)]
+    results = run_scenario(scenario)
+    transfer, = results["transfers"]
+    assert not transfer["delivered"]
+    assert transfer["transmissions"] < transfer["frames"]
+    assert transfer["end_time"] <= 1.5  # The window in flight at the deadline still finishes
+
+
+def test_shared_services_are_restored():
+    services = get_rng_service(), get_scheduler(), get_address_registry()
+    run_scenario(SCENARIO)
+    assert (get_rng_service(), get_scheduler(), get_address_registry()) == services
@@ -5,7 +5,6 @@ in a complex network topology with routers, switches, and end devices
 """
 
 import sys
-import time
 import argparse
 from cli_utils import CLIUtils
 from network_simulator import NetworkSimulator
@@ -16,6 +15,7 @@ from router import Router
 from domain_name_server import DomainNameServer
 from direct_connection import DirectConnection
 from crc_for_datalink import CRCForDataLink
+from event_scheduler import get_scheduler
 
 def create_test_topology(verbose=False):
     """Create a comprehensive test network topology"""
@@ -928,9 +928,8 @@ def demonstrate_transport_layer():
     transport.establish_tcp_connection("file_transfer", "192.168.1.20", 21)
     
     # Get the connection to access flow control
-    connection_key = (file_transfer_port, "192.168.1.20", 21)
-    if connection_key in transport.tcp_connections:
-        connection = transport.tcp_connections[connection_key]
+    connection = transport.get_tcp_connection("file_transfer", "192.168.1.20", 21)
+    if connection is not None:
         
         # Demonstrate window status
         print("\n--- Initial Window Status ---")
@@ -973,12 +972,12 @@ def demonstrate_transport_layer():
     print("="*60)
     
     # Simulate timeout and retransmission
-    if connection_key in transport.tcp_connections:
-        connection = transport.tcp_connections[connection_key]
+    connection = transport.get_tcp_connection("file_transfer", "192.168.1.20", 21)
+    if connection is not None:
         print("\n--- Simulating Timeout and Retransmission ---")
         
         # Simulate timeout
-        time.sleep(0.1)  # Small delay
+        get_scheduler().sleep(0.1)  # Small delay
         retransmit_list = connection.flow_control.handle_timeout()
         
         if retransmit_list:
@@ -0,0 +1,100 @@
+"""
+Tests for the table-driven CRC engine
+Checks slicing-by-N and the native paths against a bit-at-a-time reference for
+every preset and a non-reflected CRC-24, and batches of ragged and empty frames
+"""
+
+import random
+import numpy as np
+import crc_engine
+from crc_engine import CRC_PRESETS, CRCEngine, get_crc_engine
+
+CRC_24 = dict(width=24, poly=0x864CFB, init=0xB704CE)  # CRC-24/OPENPGP: not reflected, 3-byte register
+
+CHECK_VALUES = {  # CRC of b"123456789"
+    "CRC-8": 0xF4,
+    "CRC-16-CCITT": 0x29B1,
+    "CRC-32": 0xCBF43926,
+}
+
+
+def _bitwise_crc(data, width, poly, init=0, refin=False, refout=False, xorout=0):
+    """Reference CRC: one bit per step, straight from the Rocksoft model"""
+    top, mask = 1 << (width - 1), (1 << width) - 1
+    crc = init
+    for byte in data:
+        if refin:
+            byte = int(format(byte, "08b")[::-1], 2)
+        crc ^= byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & mask if crc & top else (crc << 1) & mask
+    if refout:
+        crc = int(format(crc, f"0{width}b")[::-1], 2)
+    return crc ^ xorout
+
+
+def _samples():
+    rng = random.Random(12)
+    samples = [b"", b"\x00", b"\xff", b"123456789"]
+    samples += [bytes(rng.getrandbits(8) for _ in range(length)) for length in (1, 3, 7, 8, 9, 15, 16, 17, 64, 101)]
+    return samples
+
+
+def test_presets_match_their_check_values():
+    for name, check in CHECK_VALUES.items():
+        engine = get_crc_engine(name)
+        assert engine.compute(b"123456789") == check
+        assert engine.compute_table("123456789") == check
+    assert CRCEngine("CRC-24", **CRC_24).compute(b"123456789") == 0x21CF02
+
+
+def test_slicing_matches_the_bitwise_reference():
+    """Every slice count gives the bitwise result, whatever the length modulo N"""
+    for name, params in list(CRC_PRESETS.items()) + [("CRC-24", CRC_24)]:
+        for slices in (1, 2, 4, 8):
+            engine = CRCEngine(name, slices=slices, **params)
+            for data in _samples():
+                expected = _bitwise_crc(data, **params)
+                assert engine.compute_table(data) == expected, (name, slices, data)
+                assert engine.compute(data) == expected
+
+
+def test_register_wider_than_the_slices_is_covered():
+    engine = CRCEngine("CRC-32", slices=2, **CRC_PRESETS["CRC-32"])
+    assert engine.slices == 4
+    assert engine.compute_table(b"123456789") == CHECK_VALUES["CRC-32"]
+
+
+def test_batches_of_ragged_and_empty_frames():
+    frames = [b"", b"a", b"123456789", "text", b"\x00" * 40, b""]
+    for name, params in list(CRC_PRESETS.items()) + [("CRC-24", CRC_24)]:
+        engine = CRCEngine(name, **params)
+        expected = [engine.compute(frame) for frame in frames]
+        assert expected[0] == expected[-1] == params.get("init", 0) ^ params.get("xorout", 0)
+        assert engine.compute_batch(frames) == expected
+        assert engine.verify_batch(frames, expected) == [True] * len(frames)
+        assert engine.compute_batch([]) == []
+        assert engine.compute_batch([b""]) == [expected[0]]
+
+
+def test_batch_of_equal_rows_from_an_array():
+    engine = get_crc_engine("CRC-32")
+    rows = np.random.default_rng(3).integers(0, 256, size=(5, 33), dtype=np.uint8)
+    assert engine.compute_batch(rows) == [engine.compute(bytes(row)) for row in rows]
+
+
+def test_batch_without_numpy_falls_back_to_a_loop(monkeypatch):
+    engine = get_crc_engine("CRC-16-CCITT")
+    frames = [b"", b"abc", b"123456789"]
+    expected = [engine.compute(frame) for frame in frames]
+    monkeypatch.setattr(crc_engine, "np", None)
+    assert engine.compute_batch(frames) == expected
+
+
+def test_verify_detects_a_flipped_bit():
+    engine = get_crc_engine("CRC-8")
+    data = bytearray(b"hello world")
+    crc = engine.compute(data)
+    assert engine.verify(bytes(data), crc)
+    data[4] ^= 0x10
+    assert not engine.verify(bytes(data), crc)
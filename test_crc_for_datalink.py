@@ -0,0 +1,45 @@
+"""
+Tests for CRC error detection on the data link
+Covers the single-bit error simulation and corruption by a channel model
+"""
+
+import random
+import numpy as np
+from channel_model import BitErrorChannel
+from crc_for_datalink import CRCForDataLink
+
+
+def _bit_difference(a, b):
+    return sum(bin(x ^ y).count("1") for x, y in zip(a.encode("latin-1"), b.encode("latin-1")))
+
+
+def test_random_error_flips_exactly_one_bit():
+    crc = CRCForDataLink(rng=random.Random(4))
+    for _ in range(50):
+        corrupted, introduced = crc.introduce_random_error("hello world", error_probability=1.0)
+        assert introduced
+        assert len(corrupted) == len("hello world")
+        assert _bit_difference("hello world", corrupted) == 1
+    assert crc.introduce_random_error("hello world", error_probability=0.0) == ("hello world", False)
+
+
+def test_channel_replaces_the_single_bit_flip():
+    """A noisy channel flips many bits at once, and the CRC catches the damage"""
+    channel = BitErrorChannel(0.2, generator=np.random.default_rng(1))
+    crc = CRCForDataLink(rng=random.Random(4), channel=channel)
+    text = "the quick brown fox jumps over the lazy dog"
+    corrupted, introduced = crc.introduce_random_error(text, error_probability=0.0)
+    assert introduced
+    assert _bit_difference(text, corrupted) == channel.bit_errors > 1
+
+    received = crc.receiver_code(crc.sender_code(text), probability=0.0)
+    assert CRCForDataLink.is_correct(received)
+
+
+def test_clean_channel_leaves_frames_intact():
+    channel = BitErrorChannel(0.0, generator=np.random.default_rng(1))
+    crc = CRCForDataLink(rng=random.Random(4), channel=channel)
+    frame = crc.sender_code("hello")
+    assert crc.receiver_code(frame, probability=1.0) == frame
+    assert not CRCForDataLink.is_correct(frame)
+    assert channel.bits_sent == 8 * len("hello")
@@ -0,0 +1,45 @@
+"""
+Tests for direct connections between end devices
+Covers frame sizes against the MTU and frame loss from the connection quality
+"""
+
+from address_registry import AddressRegistry, set_address_registry
+from direct_connection import DirectConnection
+from end_devices import EndDevices
+from event_scheduler import EventScheduler, set_scheduler
+
+
+def _pair(**link_options):
+    set_address_registry(AddressRegistry())
+    set_scheduler(EventScheduler())
+    a = EndDevices(1, "a", "10.0.0.1")
+    b = EndDevices(2, "b", "10.0.0.2")
+    a.error_probability = b.error_probability = 0.0
+    return a, b, DirectConnection(a, b, **link_options)
+
+
+def test_long_payloads_pass_without_a_configured_mtu():
+    a, b, connection = _pair()
+    connection.send_data(a, b, "x" * 4000)
+    assert connection.link.frames_sent == 1
+    assert connection.link.bytes_sent == 4000
+
+
+def test_configured_mtu_counts_encoded_bytes():
+    a, b, connection = _pair(mtu=100)
+    connection.send_data(a, b, "é" * 50)
+    assert not connection.send_data(a, b, "é" * 51)
+    assert connection.link.frames_sent == connection.link.frames_oversized == 1
+    assert connection.link.bytes_sent == 100
+
+
+def test_quality_is_the_only_source_of_loss():
+    """A quality of 0.6 loses about 40% of frames, not 1 - 0.6 * 0.6"""
+    a, b, connection = _pair()
+    connection.set_connection_quality(0.6)
+    assert connection.link.loss == connection.link.loss_probability(10) == 1.0 - connection.connection_quality
+    for _ in range(500):
+        connection.send_data(a, b, "ping")
+    assert 150 < connection.link.frames_lost < 250
+    connection.set_connection_quality(1.5)
+    assert abs(connection.connection_quality - 0.6) < 1e-9
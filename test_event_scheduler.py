@@ -0,0 +1,69 @@
+"""
+Tests for the discrete-event scheduler
+Covers event ordering, cancellation, run limits and sleep on the virtual clock
+"""
+
+from event_scheduler import EventScheduler
+
+
+def test_events_run_in_time_then_insertion_order():
+    scheduler = EventScheduler()
+    fired = []
+    scheduler.schedule(2.0, fired.append, "late")
+    scheduler.schedule(1.0, fired.append, "first")
+    scheduler.schedule(1.0, fired.append, "second")
+    scheduler.schedule_at(0.5, fired.append, "earliest")
+    assert scheduler.run() == 4
+    assert fired == ["earliest", "first", "second", "late"]
+    assert scheduler.now == 2.0 and scheduler.events_processed == 4
+
+
+def test_cancelled_events_are_skipped():
+    scheduler = EventScheduler()
+    fired = []
+    event = scheduler.schedule(1.0, fired.append, "cancelled")
+    scheduler.schedule(2.0, fired.append, "kept")
+    scheduler.cancel(event)
+    assert scheduler.peek_time() == 2.0
+    assert scheduler.step()
+    assert not scheduler.step()
+    assert fired == ["kept"]
+
+
+def test_run_stops_at_until_and_max_events():
+    scheduler = EventScheduler()
+    fired = []
+    for n in range(5):
+        scheduler.schedule(n + 1.0, fired.append, n)
+    assert scheduler.run(until=2.5) == 2
+    assert scheduler.now == 2.5
+    assert scheduler.run(max_events=1) == 1
+    assert fired == [0, 1, 2]
+    assert scheduler.pending_events() == 2
+
+
+def test_events_can_schedule_events_and_sleep_advances_the_clock():
+    scheduler = EventScheduler()
+    times = []
+
+    def tick(remaining):
+        times.append(scheduler.now)
+        if remaining:
+            scheduler.schedule(0.5, tick, remaining - 1)
+
+    scheduler.schedule(0.0, tick, 3)
+    assert scheduler.sleep(1.2) == 1.2
+    assert times == [0.0, 0.5, 1.0]
+    scheduler.run()
+    assert times[-1] == 1.5
+
+
+def test_scheduling_in_the_past_is_rejected():
+    scheduler = EventScheduler(start_time=10.0)
+    for schedule in (lambda: scheduler.schedule(-1.0, print), lambda: scheduler.schedule_at(9.0, print)):
+        try:
+            schedule()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
@@ -0,0 +1,78 @@
+"""
+Tests for the forwarding table
+Checks longest-prefix match against a linear scan and that RoutingTable
+stays a consistent dictionary
+"""
+
+import copy
+import pickle
+import random
+from forwarding_table import ForwardingTable, RoutingTable, int_to_ip, ip_to_int, parse_prefix, prefix_mask
+
+
+def _linear_lookup(prefixes, address):
+    best = None
+    for prefix, route in prefixes.items():
+        network, length = parse_prefix(prefix)
+        if address & prefix_mask(length) == network and (best is None or length > best[0]):
+            best = (length, route)
+    return best[1] if best else None
+
+
+def test_longest_prefix_wins():
+    table = ForwardingTable()
+    table.insert("0.0.0.0/0", "default")
+    table.insert("10.0.0.0", "classful /8")
+    table.insert("10.1.0.0/16", "/16")
+    table.insert("10.1.2.0/24", "/24")
+    assert table.lookup("10.1.2.3") == "/24"
+    assert table.lookup("10.1.3.3") == "/16"
+    assert table.lookup("10.2.0.1") == "classful /8"
+    assert table.lookup("192.168.0.1") == "default"
+    assert table.remove("10.1.2.0/24")
+    assert table.lookup("10.1.2.3") == "/16"
+
+
+def test_single_and_batch_lookups_match_a_linear_scan():
+    rng = random.Random(2)
+    table = ForwardingTable()
+    prefixes = {}
+    for route in range(300):
+        length = rng.choice((0, 8, 12, 16, 20, 24, 28, 32))
+        prefix = f"{int_to_ip(rng.getrandbits(32) & prefix_mask(length))}/{length}"
+        table.insert(prefix, route)
+        prefixes[prefix] = route
+    addresses = [rng.getrandbits(32) for _ in range(2000)]
+    # Half of the addresses fall inside a known prefix
+    for prefix in list(prefixes)[:1000]:
+        network, length = parse_prefix(prefix)
+        addresses.append(network | (rng.getrandbits(32) & ~prefix_mask(length) & 0xFFFFFFFF))
+    expected = [_linear_lookup(prefixes, address) for address in addresses]
+    assert [table.lookup(address) for address in addresses] == expected
+    assert table.lookup_batch(addresses) == expected
+    assert table.lookup_batch([int_to_ip(address) for address in addresses]) == expected
+
+
+def test_routing_table_keys_are_normalized():
+    """Two spellings of one prefix are one entry, in the dictionary and in the FIB"""
+    table = RoutingTable()
+    table["10.0.0.0"] = {"next_hop": 1}
+    table["10.0.0.0/8"] = {"next_hop": 2}
+    assert len(table) == len(table.fib) == 1
+    assert list(table) == ["10.0.0.0/8"]
+    assert table["10.0.0.0"] == {"next_hop": 2}
+    assert "10.0.0.0" in table and table.get("10.0.0.0/8") == {"next_hop": 2}
+    del table["10.0.0.0"]
+    assert not table and len(table.fib) == 0
+    assert table.lookup("10.1.1.1") is None
+
+
+def test_routing_table_survives_pickling_and_copying():
+    table = RoutingTable({"10.0.0.0/8": {"next_hop": 1}, "10.1.0.0/16": {"next_hop": 2}})
+    for clone in (pickle.loads(pickle.dumps(table)), copy.deepcopy(table), copy.copy(table), table.copy()):
+        assert isinstance(clone, RoutingTable)
+        assert clone == table
+        assert clone.lookup("10.1.2.3") == {"next_hop": 2}
+        clone["10.1.0.0/16"] = {"next_hop": 3}
+        assert table.lookup("10.1.2.3") == {"next_hop": 2}
+    assert ip_to_int(int_to_ip(0xC0A80101)) == 0xC0A80101
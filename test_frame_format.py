@@ -0,0 +1,44 @@
+"""
+Tests for the binary frame format
+Covers the pack/unpack round trip, header checks and the in-place TTL
+decrement with its incremental checksum update
+"""
+
+from frame_format import DEFAULT_TTL, HEADER_SIZE, MAX_PAYLOAD, Frame, build_frame, is_frame
+
+
+def test_fields_survive_a_round_trip():
+    for payload in (b"", b"x", b"hello world", bytes(range(256)) * 3, "héllo"):
+        frame = Frame(build_frame(payload, seq_num=0x1_0000_0007, flags=5, ttl=9))
+        raw = payload.encode("utf-8") if isinstance(payload, str) else payload
+        assert (frame.version, frame.flags, frame.ttl, frame.seq_num) == (1, 5, 9, 7)
+        assert frame.payload_length == len(raw) and len(frame) == HEADER_SIZE + len(raw)
+        assert bytes(frame.payload) == raw
+        assert frame.verify() and is_frame(bytes(frame))
+    assert Frame(build_frame("hi", 1)).ttl == DEFAULT_TTL
+    assert Frame(build_frame("héllo", 1)).payload_text() == "héllo"
+
+
+def test_damaged_frames_do_not_verify():
+    data = bytearray(build_frame(b"payload", 3))
+    data[-1] ^= 0x20
+    assert is_frame(data) and not Frame(data).verify()
+    assert not is_frame(build_frame(b"payload", 3)[:-1])
+    assert not is_frame("not a frame")
+    try:
+        build_frame(bytes(MAX_PAYLOAD + 1), 0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_ttl_decrement_keeps_the_checksum_valid():
+    for payload in (b"", b"odd", b"even", bytes(range(200))):
+        frame = Frame(bytearray(build_frame(payload, 42, ttl=3)))
+        for expected in (2, 1, 0):
+            assert frame.decrement_ttl() == expected
+            assert frame.verify()
+            assert bytes(frame) == build_frame(payload, 42, ttl=expected)  # Same checksum as a full recompute
+        assert frame.decrement_ttl() == 0 and frame.ttl == 0
+        assert bytes(frame.payload) == payload and frame.seq_num == 42
@@ -0,0 +1,95 @@
+"""
+Tests for the Internet checksum
+Checks the RFC 1071 sum against a word-by-word reference on both summing paths,
+odd lengths, the batch path and the RFC 1624 incremental updates
+"""
+
+import random
+import numpy as np
+import internet_checksum as checksum_module
+from internet_checksum import (NUMPY_THRESHOLD, internet_checksum, internet_checksum_batch, ones_complement_sum,
+                               update_checksum, update_checksum_bytes, verify_checksum)
+
+
+def _reference_sum(data):
+    """One's-complement sum one big-endian word at a time, padding an odd byte with zero"""
+    if len(data) & 1:
+        data = bytes(data) + b"\0"
+    total = 0
+    for i in range(0, len(data), 2):
+        total += (data[i] << 8) | data[i + 1]
+        total = (total & 0xFFFF) + (total >> 16)
+    return total
+
+
+def _random_bytes(length, seed=0):
+    return random.Random(seed).randbytes(length)
+
+
+def test_rfc_1071_example():
+    """RFC 1071 section 3: the words 0001 f203 f4f5 f6f7 sum to ddf2"""
+    data = bytes.fromhex("0001f203f4f5f6f7")
+    assert ones_complement_sum(data) == 0xDDF2
+    assert internet_checksum(data) == 0x220D
+
+
+def test_both_summing_paths_match_the_reference(monkeypatch):
+    samples = [b"", b"\xff", b"\xff\xff", b"\x12\x34\x56"]
+    samples += [_random_bytes(length, length) for length in (1, 2, 7, 64, 1501, NUMPY_THRESHOLD, NUMPY_THRESHOLD + 1, 20000)]
+    expected = [_reference_sum(data) for data in samples]
+    assert [ones_complement_sum(data) for data in samples] == expected
+    monkeypatch.setattr(checksum_module, "np", None)
+    assert [ones_complement_sum(data) for data in samples] == expected
+
+
+def test_odd_trailing_byte_is_padded_with_zero():
+    assert ones_complement_sum(b"\xab") == 0xAB00
+    assert internet_checksum(b"\x01\x02\x03") == internet_checksum(b"\x01\x02\x03\x00")
+    assert internet_checksum("abc") == internet_checksum(b"abc")
+
+
+def test_data_with_its_checksum_verifies():
+    """The checksum field sits on a word boundary; the data after it may have odd length"""
+    for length in (0, 10, 11, 5001):
+        data = bytearray(2) + _random_bytes(length, 3)
+        data[:2] = internet_checksum(data).to_bytes(2, "big")
+        assert verify_checksum(data)
+        data[-1] ^= 0x01
+        assert not verify_checksum(data)
+
+
+def test_batch_matches_single_frames():
+    for width in (8, 9, 64, 65):
+        frames = np.random.default_rng(width).integers(0, 256, size=(6, width), dtype=np.uint8)
+        assert list(internet_checksum_batch(frames)) == [internet_checksum(bytes(row)) for row in frames]
+
+
+def test_rfc_1624_incremental_update():
+    """RFC 1624 section 4: changing 5555 to 3285 under checksum dd2f gives 0000, not ffff"""
+    assert update_checksum(0xDD2F, 0x5555, 0x3285) == 0x0000
+
+    data = bytearray(_random_bytes(40, 5))
+    checksum = internet_checksum(data)
+    old_word = int.from_bytes(data[6:8], "big")
+    data[6:8] = b"\xbe\xef"
+    assert update_checksum(checksum, old_word, 0xBEEF) == internet_checksum(data)
+
+
+def test_incremental_update_of_unaligned_runs():
+    original = _random_bytes(41, 7)
+    checksum = internet_checksum(original)
+    rng = random.Random(8)
+    for offset, length in ((0, 2), (3, 1), (5, 6), (10, 7), (38, 3), (40, 1)):
+        new_bytes = rng.randbytes(length)
+        changed = original[:offset] + new_bytes + original[offset + length:]
+        updated = update_checksum_bytes(checksum, offset, original[offset:offset + length], new_bytes)
+        assert updated == internet_checksum(changed), (offset, length)
+
+
+def test_incremental_update_needs_equal_runs():
+    try:
+        update_checksum_bytes(0, 0, b"ab", b"abc")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
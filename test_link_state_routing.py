@@ -0,0 +1,176 @@
+"""
+Tests for link-state routing
+Checks that incremental SPF always ends up with the same trees as a full
+Dijkstra run over the same link-state database
+"""
+
+import random
+from event_scheduler import EventScheduler
+from link_state_routing import LinkStateRouting, ShortestPathTree
+from network_topology import NetworkTopologyManager, Router, Switch
+
+
+class _Router:
+    """Bare router with just what LinkStateRouting reads and writes"""
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.connected_networks = {f"10.{device_id}.0.0/16"}
+        self.routing_table = {}
+
+
+def _build_domain(rng, count, degree, max_cost):
+    domain = LinkStateRouting(EventScheduler())
+    for router_id in range(count):
+        domain.add_router(_Router(router_id))
+    for router_id in range(1, count):
+        domain.set_link(router_id, rng.randrange(router_id), rng.randint(1, max_cost))
+    for _ in range(count * (degree - 1)):
+        a, b = rng.sample(range(count), 2)
+        domain.set_link(a, b, rng.randint(1, max_cost))
+    domain.converge()
+    return domain
+
+
+def _change_links(rng, domain, count, changes, max_cost):
+    for _ in range(changes):
+        a, b = rng.sample(range(count), 2)
+        if b in domain.routers[a].links and rng.random() < 0.4:
+            domain.remove_link(a, b)
+        else:
+            domain.set_link(a, b, rng.randint(1, max_cost))
+
+
+def _assert_matches_full_run(domain):
+    for router_id, state in domain.routers.items():
+        expected = ShortestPathTree(router_id, domain.lsdb)
+        expected.full_run()
+        assert state.tree.dist == expected.dist, f"distances of router {router_id}"
+        assert state.tree.first_hop == expected.first_hop, f"first hops of router {router_id}"
+        assert state.tree.parent == expected.parent, f"parents of router {router_id}"
+
+
+def test_batched_changes_match_full_dijkstra():
+    """Bursts of link changes applied in one incremental pass give the full-run trees"""
+    for seed in range(6):
+        rng = random.Random(seed)
+        count = 40
+        domain = _build_domain(rng, count, degree=3, max_cost=10 ** 9)
+        for _ in range(40):
+            _change_links(rng, domain, count, rng.randint(1, 10), max_cost=10 ** 9)
+            domain.converge()
+            _assert_matches_full_run(domain)
+        assert domain.incremental_runs > 0
+
+
+def test_equal_cost_first_hops_stay_on_shortest_paths():
+    """With many equal-cost paths every first hop still starts a shortest path"""
+    for seed in range(6):
+        rng = random.Random(seed)
+        count = 40
+        domain = _build_domain(rng, count, degree=3, max_cost=3)
+        for _ in range(40):
+            _change_links(rng, domain, count, rng.randint(1, 10), max_cost=3)
+            domain.converge()
+            full = {}
+            for router_id in domain.routers:
+                full[router_id] = ShortestPathTree(router_id, domain.lsdb)
+                full[router_id].full_run()
+            for router_id, state in domain.routers.items():
+                assert state.tree.dist == full[router_id].dist
+                for destination, first_hop in state.tree.first_hop.items():
+                    if destination == router_id:
+                        continue
+                    via = domain.lsdb.cost(router_id, first_hop) + full[first_hop].dist[destination]
+                    assert via == state.tree.dist[destination], f"router {router_id} -> {destination}"
+
+
+def test_single_link_changes_match_full_dijkstra():
+    """Link changes applied one at a time give the full-run trees"""
+    rng = random.Random(7)
+    count = 30
+    domain = _build_domain(rng, count, degree=2, max_cost=10 ** 9)
+    for _ in range(100):
+        _change_links(rng, domain, count, 1, max_cost=10 ** 9)
+        domain.converge()
+        _assert_matches_full_run(domain)
+
+
+def test_routes_follow_first_hops():
+    """Routing tables point every remote prefix at the tree's first hop"""
+    rng = random.Random(3)
+    count = 20
+    domain = _build_domain(rng, count, degree=3, max_cost=10 ** 9)
+    _change_links(rng, domain, count, 5, max_cost=10 ** 9)
+    domain.converge()
+    for router_id, state in domain.routers.items():
+        for destination, first_hop in state.tree.first_hop.items():
+            if destination == router_id:
+                continue
+            route = state.router.routing_table[f"10.{destination}.0.0/16"]
+            assert route["next_hop"] == first_hop
+            assert route["metric"] == state.tree.dist[destination]
+
+
+def test_shared_prefix_follows_the_closest_advertiser():
+    """A prefix advertised by several routers moves to the next one when the installed one withdraws it or moves away"""
+    domain = LinkStateRouting(EventScheduler())
+    routers = [_Router(router_id) for router_id in range(3)]
+    for router in routers:
+        shared = ["99.0.0.0/8"] if router.device_id else []
+        domain.add_router(router, networks=[f"10.{router.device_id}.0.0/16"] + shared)
+    domain.set_link(0, 1)
+    domain.set_link(1, 2)
+    domain.converge()
+    table = routers[0].routing_table
+    assert (table["99.0.0.0/8"]["next_hop"], table["99.0.0.0/8"]["metric"]) == (1, 1)
+
+    domain.set_networks(1, ["10.1.0.0/16"])
+    domain.converge()
+    assert (table["99.0.0.0/8"]["next_hop"], table["99.0.0.0/8"]["metric"]) == (1, 2)
+
+    domain.set_networks(1, ["10.1.0.0/16", "99.0.0.0/8"])
+    domain.set_link(0, 2, cost=3)
+    domain.converge()
+    assert table["99.0.0.0/8"]["metric"] == 1
+    domain.set_link(0, 1, cost=10)  # Router 1 is now at 4, router 2 at 3
+    domain.converge()
+    assert (table["99.0.0.0/8"]["next_hop"], table["99.0.0.0/8"]["metric"]) == (2, 3)
+
+    domain.set_networks(2, ["10.2.0.0/16"])
+    domain.set_networks(1, ["10.1.0.0/16"])
+    domain.converge()
+    assert "99.0.0.0/8" not in table
+    assert "99.0.0.0/8" not in domain.lsdb.advertisers
+
+
+def test_topology_changes_update_only_touched_routers():
+    """Connecting and disconnecting devices keeps the LSDB links equal to a full rebuild"""
+    rng = random.Random(5)
+    topology = NetworkTopologyManager()
+    routers = [f"R{i}" for i in range(8)]
+    switches = [f"S{i}" for i in range(4)]
+    for index, router_id in enumerate(routers):
+        router = Router(router_id)
+        for port in range(4):
+            router.add_network_interface(f"eth{port}", f"10.{index}.{port}.1", f"10.{index}.{port}.0/24")
+        topology.add_device(router)
+    for switch_id in switches:
+        topology.add_device(Switch(switch_id))
+    domain = topology.enable_link_state_routing(scheduler=EventScheduler())
+    free = {device_id: list(topology.devices[device_id].interfaces) for device_id in routers + switches}
+
+    for _ in range(60):
+        a, b = rng.sample(routers + switches, 2)
+        if b in topology.adjacency[a]:
+            for connection in topology.adjacency[a][b].values():
+                free[connection["device1"]].append(connection["interface1"])
+                free[connection["device2"]].append(connection["interface2"])
+            topology.disconnect_devices(a, b)
+        elif free[a] and free[b]:
+            topology.connect_devices(a, free[a].pop(), b, free[b].pop())
+        expected = topology.get_router_adjacencies()
+        for router_id in routers:
+            assert set(domain.routers[router_id].links) == set(expected[router_id])
+            for destination in domain.routers[router_id].tree.dist:
+                assert topology.find_path(router_id, destination) is not None
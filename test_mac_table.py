@@ -0,0 +1,117 @@
+"""
+Tests for the MAC address table and switch ports
+Covers learning, station moves, static entries, aging, capacity and port
+flushes, and that a switch's ports (and what it learned on them) survive new
+connections
+"""
+
+from address_registry import AddressRegistry, set_address_registry
+from end_devices import EndDevices
+from event_scheduler import EventScheduler, set_scheduler
+from hub import Hub
+from mac_table import LEARNED, MOVED, REFRESHED, TABLE_FULL, MACTable, parse_port
+from switch import Switch
+
+
+def test_learn_refresh_and_station_move():
+    table = MACTable(scheduler=EventScheduler())
+    assert table.learn("aa", 1) == LEARNED
+    assert table.learn("aa", 1) == REFRESHED
+    assert table.learn("aa", "PORT 3") == MOVED
+    assert table.lookup("aa") == 3 == parse_port("PORT 3")
+    assert table.lookup("bb") is None
+
+
+def test_dynamic_entries_age_out_and_static_ones_stay():
+    scheduler = EventScheduler()
+    table = MACTable(aging_time=10.0, scheduler=scheduler)
+    table.learn("aa", 1)
+    table.learn("bb", 2, static=True)
+    scheduler.run(until=5.0)
+    table.learn("aa", 1)  # Traffic restarts the aging timer
+    scheduler.run(until=14.0)
+    assert table.lookup("aa") == 1
+    scheduler.run(until=16.0)
+    assert table.age_out() == 1
+    assert "aa" not in table and table["bb"] == 2
+
+
+def test_full_table_refuses_new_stations_until_a_slot_frees():
+    table = MACTable(capacity=2, scheduler=EventScheduler())
+    table.learn("aa", 1)
+    table.learn("bb", 2)
+    assert table.learn("cc", 3) == TABLE_FULL
+    assert "cc" not in table
+    del table["aa"]
+    assert table.learn("cc", 3) == LEARNED
+    assert len(table) == 2
+
+
+def test_traffic_does_not_move_a_static_entry():
+    table = MACTable(aging_time=10.0, scheduler=EventScheduler())
+    table.learn("aa", 1, static=True)
+    assert table.learn("aa", 2) == REFRESHED
+    assert table.lookup("aa") == 1 and table.moves == 0
+    assert table.items() == [("aa", 1, True)]
+    assert table.learn("aa", 2, static=True) == MOVED  # Reconfiguring it does
+
+
+def test_full_table_scans_for_expired_entries_only_once_one_can_have_expired():
+    scheduler = EventScheduler()
+    table = MACTable(capacity=2, aging_time=10.0, scheduler=scheduler)
+    table.learn("aa", 1)
+    scheduler.run(until=5.0)
+    table.learn("bb", 2)
+    scans = []
+    age_out = table.age_out
+    table.age_out = lambda: scans.append(scheduler.now) or age_out()
+    for _ in range(100):
+        assert table.learn("cc", 3) == TABLE_FULL
+    assert scans == [] and table.overflows == 100
+
+    scheduler.run(until=8.0)
+    table.learn("aa", 1)  # Refreshed: the bound of 10s is now too early
+    scheduler.run(until=11.0)
+    assert table.learn("cc", 3) == TABLE_FULL
+    assert table.learn("cc", 3) == TABLE_FULL
+    assert scans == [11.0]  # One scan finds nothing expired and tightens the bound to 15s
+
+    scheduler.run(until=15.0)
+    assert table.learn("cc", 3) == LEARNED
+    assert scans == [11.0, 15.0]
+    assert "bb" not in table and table.lookup("aa") == 1
+
+
+def test_flush_port_keeps_static_entries():
+    table = MACTable(scheduler=EventScheduler())
+    table.update({"aa": 1, "bb": "PORT 1", "cc": 2})
+    table.learn("dd", 1, static=True)
+    assert table.flush_port(1) == 2
+    assert sorted(mac for mac, _, _ in table.items()) == ["cc", "dd"]
+
+
+def test_switch_ports_are_stable_as_devices_and_hubs_connect():
+    set_address_registry(AddressRegistry())
+    set_scheduler(EventScheduler())
+    switch = Switch(0)
+    a = EndDevices(1, "a", "10.0.0.1")
+    switch.add_to_direct_connection_table(a)
+    hub1, hub2 = Hub(1), Hub(2)
+    switch.store_connected_hubs([hub1])
+    switch.add_to_hub_connected_table(hub1, EndDevices(7, "h", "10.0.0.7"))
+    assert switch.port_of(a) == 1 and switch.port_of(hub1) == 2
+    assert switch.mac_table.lookup(7) == 2
+
+    # A new device and a second hub take new ports; nothing learned is lost
+    b = EndDevices(2, "b", "10.0.0.2")
+    switch.add_to_direct_connection_table(b)
+    switch.store_connected_hubs([hub1, hub2])
+    assert (switch.port_of(b), switch.port_of(hub1), switch.port_of(hub2)) == (3, 2, 4)
+    assert switch.mac_table.lookup(7) == 2
+    assert switch.attached_to(2) is hub1 and switch.connected_via_hub == {7: hub1}
+
+    # Unplugging a hub frees its port and forgets the stations behind it
+    switch.store_connected_hubs([hub2])
+    assert switch.port_of(hub1) is None and switch.attached_to(2) is None
+    assert switch.mac_table.lookup(7) is None
+    assert switch.port_of(hub2) == 4
@@ -0,0 +1,47 @@
+"""
+Tests for the network topology manager
+Checks that parallel links between two devices are kept apart in the
+adjacency index and the connection list
+"""
+
+from network_topology import NetworkTopologyManager, Switch
+
+
+def _pair():
+    topology = NetworkTopologyManager()
+    for device_id in ("S1", "S2"):
+        topology.add_device(Switch(device_id))
+    assert topology.connect_devices("S1", "port1", "S2", "port1", cost=5)
+    assert topology.connect_devices("S1", "port2", "S2", "port2", cost=2)
+    return topology
+
+
+def test_parallel_links_are_both_kept():
+    topology = _pair()
+    assert len(topology.connections) == 2
+    assert topology.adjacency["S1"]["S2"] is not topology.adjacency["S2"]["S1"]
+    assert topology.adjacency["S1"]["S2"].keys() == topology.adjacency["S2"]["S1"].keys() == topology.connections.keys()
+    assert topology.find_path("S1", "S2", weighted=True) == ["S1", "S2"]
+
+
+def test_disconnecting_one_parallel_link_keeps_the_other():
+    topology = _pair()
+    first, second = topology.connections
+    assert topology.disconnect_devices("S1", "S2", connection_id=first)
+    assert list(topology.connections) == [second]
+    assert list(topology.adjacency["S2"]["S1"]) == [second]
+    assert topology.devices["S1"].interfaces["port1"].link is None
+    assert topology.devices["S1"].interfaces["port2"].link is not None
+    assert not topology.disconnect_devices("S1", "S2", connection_id=first)
+
+    assert topology.disconnect_devices("S2", "S1")
+    assert not topology.connections
+    assert topology.adjacency == {"S1": {}, "S2": {}}
+    assert topology.find_path("S1", "S2") is None
+
+
+def test_removing_a_device_drops_all_its_links():
+    topology = _pair()
+    assert topology.remove_device("S2")
+    assert not topology.connections
+    assert topology.adjacency == {"S1": {}}
@@ -0,0 +1,52 @@
+"""
+Tests for parameter sweeps
+Runs small sweeps in this process to check checkpoint/resume and that the
+caller's logging is left as it was
+"""
+
+import json
+import logging
+import sim_logging
+from parameter_sweep import run_sweep
+
+TEMPLATE = {
+    "name": "sweep",
+    "seed": 5,
+    "topology": {"routers": [{"switches": [{"hubs": [2]}]}, {"direct_devices": 2}]},
+    "traffic": [{"source": "A", "destination": "C", "message": "Hello there"}],
+}
+GRID = {"settings.window_size": [1, 4]}
+
+
+def _sweep(path, resume, seed=None, grid=GRID):
+    runs = []
+    table = run_sweep(TEMPLATE, grid, replicates=2, seed=seed, workers=1, chunksize=1,
+                      checkpoint=str(path), resume=resume, progress=lambda done, total: runs.append(done))
+    return table, len(runs)
+
+
+def test_resume_reuses_only_matching_runs(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    table, runs = _sweep(path, resume=False)
+    assert runs == 4
+    assert "fingerprint" not in table
+    assert _sweep(path, resume=True) == (table, 0)
+
+    # A different sweep seed gives every run a different seed, so nothing is reused
+    reseeded, runs = _sweep(path, resume=True, seed=6)
+    assert runs == 4
+    assert reseeded["seed"] != table["seed"]
+
+    # Rows of another grid at the same indices are not taken for this one
+    _, runs = _sweep(path, resume=True, seed=6, grid={"settings.window_size": [1, 8]})
+    assert runs == 2
+    assert all("fingerprint" in json.loads(line) for line in path.read_text().splitlines())
+
+
+def test_in_process_sweep_restores_logging(tmp_path):
+    sim_logging.set_level(sim_logging.WARNING)
+    try:
+        _sweep(tmp_path / "sweep.jsonl", resume=False)
+        assert logging.getLogger(sim_logging.ROOT_LOGGER_NAME).level == sim_logging.WARNING
+    finally:
+        sim_logging.set_level(sim_logging.INFO)
@@ -0,0 +1,69 @@
+"""
+Tests for the queue disciplines
+Covers drop-tail limits, RED and CoDel under overload, DRR sharing and how a
+Router moves its backlog when the discipline changes
+"""
+
+from event_scheduler import EventScheduler, set_scheduler
+from queue_disciplines import make_queue, run_offered_load
+from router import Router
+
+
+def test_drop_tail_drops_arrivals_beyond_the_limit():
+    queue = make_queue("drop_tail", limit=3, scheduler=EventScheduler())
+    assert [queue.enqueue(n, 100) for n in range(5)] == [True, True, True, False, False]
+    assert [queue.dequeue() for _ in range(4)] == [(0, 100), (1, 100), (2, 100), None]
+    assert queue.stats.dropped == 2
+
+
+def test_aqm_keeps_the_queue_shorter_than_drop_tail():
+    """Under overload RED and CoDel hold less standing queue than a full drop-tail buffer"""
+    drop_tail = run_offered_load("drop_tail", load=1.2, duration=5.0, limit=200)
+    red = run_offered_load("red", load=1.2, duration=5.0, limit=200)
+    codel = run_offered_load("codel", load=1.2, duration=5.0, limit=200)
+    assert red["mean_depth"] < drop_tail["mean_depth"] / 2
+    assert codel["mean_sojourn"] < drop_tail["mean_sojourn"]
+    assert red["dropped"] > 0 and codel["dropped"] > 0
+
+
+def test_drr_shares_bytes_by_weight():
+    """A class with twice the weight sends twice the bytes while both are backlogged"""
+    queue = make_queue("drr", limit=100, quantum=500, weights={"gold": 2}, scheduler=EventScheduler())
+    for _ in range(60):
+        queue.enqueue("gold", 500, "gold")
+        queue.enqueue("bronze", 250, "bronze")
+    sent = {"gold": 0, "bronze": 0}
+    for _ in range(60):
+        packet, size = queue.dequeue()
+        sent[packet] += size
+    assert abs(sent["gold"] - 2 * sent["bronze"]) <= 500
+
+
+def test_drain_empties_in_sending_order():
+    queue = make_queue("drr", quantum=100, scheduler=EventScheduler())
+    for n in range(3):
+        queue.enqueue(("a", n), 100, "a")
+        queue.enqueue(("b", n), 100, "b")
+    assert [packet for packet, _ in queue.drain()] == [("a", 0), ("b", 0), ("a", 1), ("b", 1), ("a", 2), ("b", 2)]
+    assert len(queue) == 0 and queue.backlog_bytes == 0
+    assert queue.stats.dropped == queue.stats.dequeued == 0
+
+
+def test_router_moves_its_backlog_to_a_new_discipline():
+    """Switching disciplines keeps queued packets, and each one's on_done still fires exactly once"""
+    scheduler = EventScheduler()
+    set_scheduler(scheduler)
+    router = Router(0, "10.0.0.0")
+    outcomes = {}
+    for n in range(10):
+        router.enqueue_packet("eth0", n, traffic_class=n % 2, on_done=lambda packet, sent: outcomes.setdefault(packet, sent))
+    assert len(router.output_queues["eth0"]) == 9  # One is already on the wire
+
+    router.set_queue_discipline("drr", limit=3)
+    queue = router.output_queues["eth0"]
+    assert queue.name == "drr"
+    assert queue.class_depths() == {0: 3, 1: 3}
+    scheduler.run()
+    assert len(outcomes) == 10
+    assert sum(outcomes.values()) == 7
+    assert router.packets_dropped == 3
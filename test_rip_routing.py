@@ -0,0 +1,100 @@
+"""
+Tests for RIP routing
+Covers convergence after link failures and partitions, split horizon with and
+without poison reverse, and route timeouts followed by garbage collection
+"""
+
+from event_scheduler import EventScheduler
+from rip_routing import INFINITY, RIPDomain
+
+
+class _Router:
+    """Bare router: RIP only needs an ID, connected networks and a routing table"""
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.connected_networks = {f"10.{device_id}.0.0/16"}
+        self.routing_table = {}
+
+
+def _domain(count, links, **options):
+    domain = RIPDomain(EventScheduler(), **options)
+    for router_id in range(count):
+        domain.add_router(_Router(router_id))
+    for link in links:
+        domain.add_link(*link)
+    domain.start()
+    assert domain.converge() is not None
+    return domain
+
+
+def _metrics(domain, router_id):
+    return {prefix: metric for prefix, (metric, _) in domain.processes[router_id].get_routes().items()}
+
+
+def test_ring_reroutes_around_a_failed_link():
+    """Routes lost with a link come back the long way round once periodic updates have run"""
+    domain = _domain(6, [(n, (n + 1) % 6) for n in range(6)])
+    assert _metrics(domain, 0)["10.1.0.0/16"] == 1
+    assert _metrics(domain, 0)["10.3.0.0/16"] == 3
+
+    domain.remove_link(0, 1)
+    assert domain.converge() is not None
+    assert domain.processes[0].get_routes()["10.1.0.0/16"] == (5, 5)
+    assert domain.processes[0].get_routes()["10.2.0.0/16"] == (4, 5)
+    assert domain.processes[1].get_routes()["10.0.0.0/16"] == (5, 2)
+    router = domain.processes[0].router
+    assert router.routing_table["10.1.0.0/16"]["next_hop"] == 5
+
+
+def test_partition_makes_routes_unreachable_then_removes_them():
+    domain = _domain(4, [(0, 1), (1, 2), (2, 3)])
+    domain.remove_link(1, 2)
+    assert domain.converge() is not None
+    for router_id, lost in ((0, ("10.2.0.0/16", "10.3.0.0/16")), (3, ("10.0.0.0/16", "10.1.0.0/16"))):
+        metrics = _metrics(domain, router_id)
+        assert all(metrics[prefix] == INFINITY for prefix in lost)
+        assert not set(lost) & domain.processes[router_id].router.routing_table.keys()
+    assert _metrics(domain, 0)["10.1.0.0/16"] == 1
+
+    scheduler = domain.scheduler
+    scheduler.run(until=scheduler.now + domain.garbage_collection + domain.update_interval * 1.1)
+    assert set(_metrics(domain, 0)) == {"10.0.0.0/16", "10.1.0.0/16"}
+    assert set(_metrics(domain, 3)) == {"10.2.0.0/16", "10.3.0.0/16"}
+
+
+def _update_to(domain, sender, receiver):
+    sent = {}
+    domain.deliver = lambda source, target, entries, triggered=True: sent.setdefault(target.router_id, entries)
+    process = domain.processes[sender]
+    process.send_update(process.routes)
+    return dict(sent[receiver])
+
+
+def test_poison_reverse_advertises_routes_back_as_unreachable():
+    domain = _domain(3, [(0, 1), (1, 2)])
+    assert _update_to(domain, 1, 0) == {"10.0.0.0/16": INFINITY, "10.1.0.0/16": 0, "10.2.0.0/16": 1}
+
+
+def test_split_horizon_leaves_routes_out():
+    domain = _domain(3, [(0, 1), (1, 2)], poison_reverse=False)
+    assert _update_to(domain, 1, 0) == {"10.1.0.0/16": 0, "10.2.0.0/16": 1}
+
+
+def test_silent_neighbor_times_out_and_is_garbage_collected():
+    """A neighbor that stops sending updates loses its routes after the timeout, then they are removed"""
+    domain = _domain(3, [(0, 1), (1, 2)])
+    domain.processes[2].stop()
+    scheduler = domain.scheduler
+    start = scheduler.now
+    scheduler.run(until=start + domain.route_timeout - domain.update_interval)
+    assert _metrics(domain, 1)["10.2.0.0/16"] == 1
+
+    scheduler.run(until=start + domain.route_timeout + domain.update_interval * 1.1 + 10)
+    assert _metrics(domain, 1)["10.2.0.0/16"] == INFINITY
+    assert _metrics(domain, 0)["10.2.0.0/16"] == INFINITY
+    assert "10.2.0.0/16" not in domain.processes[0].router.routing_table
+
+    scheduler.run(until=scheduler.now + domain.garbage_collection + domain.update_interval * 1.1)
+    assert "10.2.0.0/16" not in _metrics(domain, 1)
+    assert "10.2.0.0/16" not in _metrics(domain, 0)
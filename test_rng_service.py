@@ -0,0 +1,47 @@
+"""
+Tests for the random number streams
+Checks that named streams replay from their seed and that scenario runs
+draw only from the streams, never from the global random module
+"""
+
+import random
+from batch_runner import run_scenario
+from cli_utils import CLIUtils
+from event_scheduler import EventScheduler, set_scheduler
+from rng_service import RNGService, get_rng, set_rng_service
+
+SCENARIO = {
+    "name": "two-routers",
+    "seed": 42,
+    "topology": {"routers": [{"switches": [{"hubs": [2]}]}, {"direct_devices": 2}]},
+    "traffic": [{"source": "A", "destination": "C", "message": "Hello there", "count": 2}],
+}
+
+
+def test_streams_are_independent_of_creation_order():
+    first = RNGService(7)
+    a = [first.stream("hub/1").random() for _ in range(3)]
+    second = RNGService(7)
+    second.stream("router/0").random()
+    assert [second.stream("hub/1").random() for _ in range(3)] == a
+    assert RNGService(8).stream("hub/1").random() != a[0]
+
+
+def test_cli_delay_replays_from_the_seed():
+    delays = []
+    for _ in range(2):
+        set_rng_service(RNGService(3))
+        set_scheduler(EventScheduler())
+        delays.append([CLIUtils.simulate_network_delay(0.1, 0.5) for _ in range(3)])
+    assert delays[0] == delays[1]
+    assert all(0.1 <= delay <= 0.5 for delay in delays[0])
+
+
+def test_scenarios_leave_the_global_random_module_alone():
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    first = run_scenario(SCENARIO)
+    assert random.random() == expected
+    assert run_scenario(SCENARIO) == first
+    assert get_rng("cli/delay") is get_rng("cli/delay")
@@ -0,0 +1,167 @@
+"""
+Tests for TCP congestion control
+Covers the window algorithms, the RTO estimator, how a TCPConnection
+uses them for queueing, fast retransmit and fast recovery, and bulk flows
+through a bottleneck
+"""
+
+from bottleneck_bench import run_bottleneck
+from event_scheduler import EventScheduler, set_scheduler
+from tcp_congestion import RTOEstimator, make_congestion_control
+from tcp_state_machine import ConnectionState
+from transport_layer import GoBackNFlowControl, TCPConnection
+
+
+def _connection(arq="gbn", congestion="reno", window_size=16, on_send=None):
+    set_scheduler(EventScheduler())
+    connection = TCPConnection(40000, 80, "10.0.0.2", "client", arq, congestion, on_send, window_size=window_size, seq_space=1000)
+    connection.state = ConnectionState.ESTABLISHED
+    return connection
+
+
+def test_slow_start_then_congestion_avoidance():
+    """Reno doubles per round below ssthresh and grows by about one segment per round above it"""
+    reno = make_congestion_control("reno", initial_cwnd=2)
+    reno.on_ack(2, 0.0)
+    assert reno.window() == 4
+    reno.ssthresh = 4
+    for _ in range(4):
+        reno.on_ack(1, 0.0)
+    assert reno.window() == 4
+    assert 4.9 < reno.cwnd < 5.0
+
+
+def test_timeout_and_fast_recovery_reduce_the_window():
+    """Three duplicate ACKs halve the window; a timeout drops it to one segment"""
+    for name in ("reno", "newreno", "cubic"):
+        algorithm = make_congestion_control(name, initial_cwnd=20)
+        algorithm.enter_recovery(0.0, 20)
+        algorithm.exit_recovery(0.0)
+        assert algorithm.window() < 20
+        algorithm.on_timeout(0.0, 10)
+        assert algorithm.window() == 1
+
+
+def test_unknown_algorithm_is_rejected():
+    try:
+        make_congestion_control("vegas")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_rto_follows_rtt_and_backs_off():
+    """RTO = SRTT + 4 * RTTVAR within bounds, doubled after a timeout"""
+    estimator = RTOEstimator(initial_rto=1.0, min_rto=0.2)
+    estimator.update(0.5)
+    assert estimator.srtt == 0.5
+    assert abs(estimator.rto - 1.5) < 1e-9
+    estimator.backoff()
+    assert abs(estimator.rto - 3.0) < 1e-9
+    for _ in range(50):
+        estimator.update(0.01)
+    assert estimator.rto == 0.2
+
+
+def test_data_beyond_the_window_is_queued_not_lost():
+    """Segments the congestion window does not admit are sent as ACKs arrive"""
+    connection = _connection()
+    data = "".join(f"{n:02d}" * 10 for n in range(10))  # Ten 20-character segments
+    success, segments = connection.send_data(data)
+    assert success
+    assert len(segments) == connection.congestion.window() == 4
+    assert len(connection.send_queue) == 6
+
+    sent = list(segments)
+    ack = 0
+    while connection.send_queue or connection.flow_control.outstanding:
+        _, more = connection.process_ack(ack)
+        sent.extend(more)
+        ack += 1
+    assert len(sent) == 10
+    delivered = "".join(segment.split(b"|", 1)[1].decode("latin-1") for segment in sent)
+    assert all(f"{n:02d}" * 10 in delivered for n in range(10))
+
+
+def test_three_duplicate_acks_trigger_fast_retransmit():
+    """Go-Back-N: the oldest segment is resent after three duplicate ACKs and recovery ends on a new ACK"""
+    connection = _connection()
+    connection.congestion.cwnd = 8.0
+    connection.send_data("x" * 20 * 8)
+    connection.process_ack(0)  # Segment 0 arrives, segment 1 is lost
+    assert connection.dupacks == 0
+
+    retransmitted = []
+    for _ in range(3):
+        _, segments = connection.process_ack(0)
+        retransmitted.extend(segments)
+    assert connection.fast_retransmits == 1
+    assert connection.in_recovery
+    assert len(retransmitted) == 1
+    assert connection.congestion.ssthresh < 8
+
+    connection.process_ack(7)  # Everything up to the recovery point
+    assert not connection.in_recovery
+    assert connection.congestion.cwnd == connection.congestion.ssthresh
+
+
+def test_selective_repeat_acks_above_a_hole_trigger_fast_retransmit():
+    """Selective Repeat: three ACKs of later segments while the first is missing resend it"""
+    connection = _connection(arq="sr")
+    connection.congestion.cwnd = 8.0
+    connection.send_data("y" * 20 * 6)
+    retransmitted = []
+    for seq_num in (1, 2, 3):
+        _, segments = connection.process_ack(seq_num)
+        retransmitted.extend(segments)
+    assert connection.fast_retransmits == 1
+    assert len(retransmitted) == 1
+    assert connection.flow_control.segments_retransmitted == 1
+
+
+def test_timeout_leaves_fast_recovery():
+    """A retransmission timeout ends fast recovery and restarts from one segment"""
+    connection = _connection()
+    connection.congestion.cwnd = 8.0
+    connection.send_data("z" * 20 * 8)
+    connection.process_ack(0)
+    for _ in range(3):
+        connection.process_ack(0)
+    assert connection.in_recovery
+    connection.handle_timeout()
+    assert not connection.in_recovery
+    assert connection.congestion.window() == 1
+
+
+def test_bbr_leaves_startup_on_a_connections_rate_samples():
+    """A BBR connection through a 100 segment/s bottleneck finds its bandwidth and drains the queue"""
+    receiver = GoBackNFlowControl(window_size=400, seq_space=1000)
+    link_free = [0.0]
+
+    def transmit(segments):
+        for segment in segments:
+            link_free[0] = max(scheduler.now, link_free[0]) + 0.01
+            scheduler.schedule_at(link_free[0] + 0.05, acknowledge, segment.split(b"|", 1)[1])
+
+    def acknowledge(frame):
+        ack = receiver.receive_segment(frame)[3]
+        transmit(connection.process_ack(ack)[1])
+
+    connection = _connection(congestion="bbr", window_size=400, on_send=transmit)
+    scheduler = connection.flow_control.scheduler
+    transmit(connection.send_data("b" * 20 * 2000)[1])
+    scheduler.run(until=8.0)
+    bbr = connection.congestion
+    assert bbr.state == "probe_bw"
+    assert 90 < bbr.btl_bw < 120
+    assert abs(bbr.min_rtt - 0.06) < 0.005
+    assert connection.rto.srtt is not None
+
+
+def test_bottleneck_flows_recover_from_drops():
+    """Two connections filling a drop-tail bottleneck keep it busy and recover from its drops"""
+    result = run_bottleneck(("reno", "cubic"), bandwidth=5e6, duration=10.0)
+    assert result["link_utilization"] > 0.9
+    assert result["router_drops"] > 0
+    assert all(flow["fast_retransmits"] > 0 for flow in result["flows"])
@@ -0,0 +1,149 @@
+"""
+Tests for the TCP state machine
+Runs connections through open, data, close, reset and retransmission on a
+private simulation clock
+"""
+
+import random
+from event_scheduler import EventScheduler, set_scheduler
+from tcp_state_machine import ConnectionState, TCPStateMachine
+from transport_layer import ProtocolType, TransportLayer
+
+CLIENT = ("10.0.0.1", 40000)
+SERVER = ("10.0.0.2", 80)
+
+
+def _machine(**options):
+    return TCPStateMachine(EventScheduler(), rng=random.Random(1), **options)
+
+
+def _open(tcp):
+    tcp.listen(*SERVER)
+    client = tcp.connect(*CLIENT, *SERVER)
+    tcp.scheduler.run()
+    server = tcp.lookup(*SERVER, *CLIENT)
+    return client, server
+
+
+def test_three_way_handshake():
+    """Both ends reach ESTABLISHED with each other's sequence numbers"""
+    tcp = _machine()
+    client, server = _open(tcp)
+    assert client.state == server.state == ConnectionState.ESTABLISHED
+    assert client.rcv_nxt == (server.iss + 1) % 2 ** 32
+    assert server.rcv_nxt == (client.iss + 1) % 2 ** 32
+
+
+def test_connection_refused_without_listener():
+    """A SYN to a port nobody listens on is answered with a RST"""
+    tcp = _machine()
+    client = tcp.connect(*CLIENT, *SERVER)
+    tcp.scheduler.run()
+    assert client.state == ConnectionState.CLOSED
+    assert tcp.resets_sent == 1
+    assert not tcp.connections
+
+
+def test_syn_retransmission_gives_up():
+    """A SYN to a silent peer is retransmitted max_retries times with backoff, then dropped"""
+    tcp = _machine(rto=1.0, max_retries=3, output=lambda segment: None)
+    client = tcp.connect(*CLIENT, *SERVER)
+    tcp.scheduler.run()
+    assert client.state == ConnectionState.CLOSED
+    assert client.retries == 3
+    assert tcp.segments_sent == 4
+    assert tcp.scheduler.now == 1.0 + 2.0 + 4.0 + 8.0
+
+
+def test_data_and_graceful_close():
+    """Data is delivered in order and the active closer waits in TIME_WAIT for 2 * MSL"""
+    tcp = _machine(msl=10.0)
+    client, server = _open(tcp)
+    received = []
+    server.on_data = lambda tcb, payload: received.append(payload)
+    tcp.send(client, "hello ")
+    tcp.send(client, b"world")
+    tcp.scheduler.run()
+    assert b"".join(received) == b"hello world"
+
+    tcp.close(client)
+    tcp.scheduler.run(until=tcp.scheduler.now + 1.0)
+    assert client.state == ConnectionState.FIN_WAIT_2
+    assert server.state == ConnectionState.CLOSE_WAIT
+    tcp.close(server)
+    tcp.scheduler.run(until=tcp.scheduler.now + 1.0)
+    assert client.state == ConnectionState.TIME_WAIT
+    assert server.state == ConnectionState.CLOSED
+    tcp.scheduler.run()
+    assert client.state == ConnectionState.CLOSED
+    assert not tcp.connections
+
+
+def test_simultaneous_open():
+    """Two ends that send SYNs to each other both reach ESTABLISHED"""
+    tcp = _machine()
+    a = tcp.connect(*CLIENT, *SERVER)
+    b = tcp.connect(*SERVER, *CLIENT)
+    tcp.scheduler.run()
+    assert a.state == b.state == ConnectionState.ESTABLISHED
+
+
+def test_abort_resets_peer():
+    """Aborting a connection resets the other end"""
+    tcp = _machine()
+    client, server = _open(tcp)
+    tcp.abort(client)
+    tcp.scheduler.run()
+    assert client.state == server.state == ConnectionState.CLOSED
+    assert not tcp.connections
+
+
+def test_time_wait_connection_can_be_reopened():
+    """Connecting again on a 4-tuple in TIME_WAIT starts a new incarnation above the old sequence space"""
+    tcp = _machine()
+    client, server = _open(tcp)
+    tcp.close(client)
+    tcp.scheduler.run(until=tcp.scheduler.now + 1.0)
+    tcp.close(server)
+    tcp.scheduler.run(until=tcp.scheduler.now + 1.0)
+    assert client.state == ConnectionState.TIME_WAIT
+
+    again = tcp.connect(*CLIENT, *SERVER)
+    assert again is not None
+    assert again.iss != client.iss
+    tcp.scheduler.run(until=tcp.scheduler.now + 1.0)
+    assert again.state == ConnectionState.ESTABLISHED
+    assert tcp.lookup(*SERVER, *CLIENT).state == ConnectionState.ESTABLISHED
+
+
+def test_transport_handshake_waits_for_server():
+    """establish_tcp_connection() returns once the server end is ESTABLISHED too"""
+    set_scheduler(EventScheduler())
+    transport = TransportLayer()
+    port = transport.register_process("client", ProtocolType.TCP, device_ip="10.0.0.1")
+    assert transport.establish_tcp_connection("client", "10.0.0.2", 80)
+    server = transport.tcp.lookup("10.0.0.2", 80, "10.0.0.1", port)
+    assert server.state == ConnectionState.ESTABLISHED
+
+
+def test_transport_failed_handshake_leaves_no_connection():
+    """A handshake that times out does not leave a CLOSED connection behind"""
+    set_scheduler(EventScheduler())
+    transport = TransportLayer()
+    transport.register_process("client", ProtocolType.TCP, device_ip="10.0.0.1")
+    transport.tcp.output = lambda segment: None
+    assert not transport.establish_tcp_connection("client", "10.0.0.2", 80)
+    assert transport.get_tcp_connection("client", "10.0.0.2", 80) is None
+    assert not transport.tcp_connections
+    assert not transport.process_connections["client"]
+
+
+def test_transport_reconnect_within_time_wait():
+    """A process can reconnect to the same server right after closing"""
+    set_scheduler(EventScheduler())
+    transport = TransportLayer()
+    transport.register_process("client", ProtocolType.TCP, device_ip="10.0.0.1")
+    assert transport.establish_tcp_connection("client", "10.0.0.2", 80)
+    assert transport.close_tcp_connection("client", "10.0.0.2", 80)
+    assert transport.establish_tcp_connection("client", "10.0.0.2", 80)
+    assert transport.get_tcp_connection("client", "10.0.0.2", 80).state == ConnectionState.ESTABLISHED
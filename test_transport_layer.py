@@ -0,0 +1,227 @@
+"""
+Tests for the transport layer
+Covers port allocation, per-address process tables, TCP connections and
+process messaging on the simulation clock
+"""
+
+from event_scheduler import EventScheduler, set_scheduler
+from transport_layer import (GoBackNFlowControl, Mailbox, PortManager, ProtocolType, SelectiveRepeatFlowControl,
+                             TransportLayer)
+
+
+def _transport(ephemeral_range=None):
+    set_scheduler(EventScheduler())
+    transport = TransportLayer()
+    if ephemeral_range is not None:
+        transport.port_manager = PortManager(ephemeral_range, transport.scheduler)
+    return transport
+
+
+def test_ephemeral_ports_are_unique_per_ip():
+    """Every free port of a range is handed out once per IP, then allocation fails"""
+    manager = PortManager((50000, 50099))
+    ports = [manager.allocate_ephemeral_port("p", "10.0.0.1") for _ in range(100)]
+    assert sorted(ports) == list(range(50000, 50100))
+    assert manager.allocate_ephemeral_port("p", "10.0.0.1") is None
+    assert manager.allocate_ephemeral_port("q", "10.0.0.2") is not None
+
+
+def test_released_port_is_reused():
+    """A deallocated port goes back to the free ports of its IP"""
+    manager = PortManager((50000, 50000))
+    port = manager.allocate_ephemeral_port("p", "10.0.0.1")
+    manager.deallocate_port(port, "p")
+    assert manager.allocate_ephemeral_port("q", "10.0.0.1") == port
+
+
+def test_port_held_in_time_wait_until_it_expires():
+    """A port closed in TIME_WAIT is only handed out again after the hold ends"""
+    scheduler = EventScheduler()
+    manager = PortManager((50000, 50000), scheduler)
+    port = manager.allocate_ephemeral_port("p", "10.0.0.1")
+    manager.hold_port(port, 60.0, "10.0.0.1")
+    manager.deallocate_port(port, "p")
+    assert manager.allocate_ephemeral_port("q", "10.0.0.1") is None
+    scheduler.run(until=60.0)
+    assert manager.allocate_ephemeral_port("q", "10.0.0.1") == port
+
+
+def test_same_port_on_different_ips_does_not_collide():
+    """Processes on different IPs that get the same port keep separate connections and owners"""
+    transport = _transport((50000, 50000))
+    port_a = transport.register_process("a", ProtocolType.TCP, device_ip="10.0.0.1")
+    port_b = transport.register_process("b", ProtocolType.TCP, device_ip="10.0.0.2")
+    assert port_a == port_b == 50000
+
+    connection_a = transport.create_tcp_connection("a", "10.0.0.9", 80)
+    connection_b = transport.create_tcp_connection("b", "10.0.0.9", 80)
+    assert connection_a is not connection_b
+    assert connection_b.process_id == "b"
+    assert transport.get_process_by_port(50000, "10.0.0.1")["process_id"] == "a"
+    assert transport.get_process_by_port(50000, "10.0.0.2")["process_id"] == "b"
+
+    transport.cleanup_process("a")
+    assert transport.get_process_by_port(50000, "10.0.0.1") is None
+    assert transport.get_process_by_port(50000, "10.0.0.2")["process_id"] == "b"
+    assert transport.get_tcp_connection("b", "10.0.0.9", 80) is connection_b
+
+
+def test_udp_sockets_are_per_address():
+    """UDP sockets bound to the same port on different IPs are distinct"""
+    transport = _transport((50000, 50000))
+    transport.register_process("a", ProtocolType.UDP, device_ip="10.0.0.1")
+    transport.register_process("b", ProtocolType.UDP, device_ip="10.0.0.2")
+    socket_a = transport.create_udp_socket("a")
+    socket_b = transport.create_udp_socket("b")
+    assert socket_a is not socket_b
+    assert socket_b.process_id == "b"
+
+
+def test_blocking_get_waits_in_simulated_time():
+    """A blocking get runs the simulation until a message is put"""
+    scheduler = EventScheduler()
+    mailbox = Mailbox(scheduler=scheduler)
+    scheduler.schedule(2.0, mailbox.put, "hello")
+    assert mailbox.get(block=True) == "hello"
+    assert scheduler.now == 2.0
+
+
+def test_blocking_get_times_out_on_the_simulation_clock():
+    """A timed-out get leaves the clock at its deadline; with nothing pending it returns at once"""
+    scheduler = EventScheduler()
+    mailbox = Mailbox(scheduler=scheduler)
+    scheduler.schedule(10.0, mailbox.put, "late")
+    assert mailbox.get(block=True, timeout=3.0) is None
+    assert scheduler.now == 3.0
+    assert mailbox.get(block=True) == "late"
+    assert mailbox.get(block=True) is None
+    assert scheduler.now == 10.0
+
+
+def test_blocking_put_waits_for_receiver_to_drain():
+    """A sender to a full mailbox is released once a receiver drains it to the low-water mark"""
+    scheduler = EventScheduler()
+    mailbox = Mailbox(capacity=2, low_water=0, scheduler=scheduler)
+    assert mailbox.put("a") and mailbox.put("b")
+    assert not mailbox.put("c")
+    assert mailbox.refused == 1
+    scheduler.schedule(1.0, mailbox.get_batch)
+    assert mailbox.put("c", block=True)
+    assert scheduler.now == 1.0
+    assert mailbox.get_batch() == ["c"]
+
+
+def test_process_messages_use_simulated_time():
+    """Message timestamps come from the simulation clock and connection IDs never repeat"""
+    transport = _transport()
+    transport.register_process("client", ProtocolType.TCP, device_ip="10.0.0.1")
+    transport.register_process("server", ProtocolType.TCP, well_known_port=80, device_ip="10.0.0.2")
+    manager = transport.process_comm_manager
+    first = manager.establish_connection("client", "server")
+    second = manager.establish_connection("client", "server")
+    assert first != second
+    transport.scheduler.run(until=5.0)
+    assert manager.send_message("client", "server", "ping")
+    assert manager.receive_message("server")["timestamp"] == 5.0
+
+
+def test_go_back_n_resends_the_whole_window_on_timeout():
+    """Cumulative ACKs slide the window; a timeout resends every unacknowledged segment"""
+    set_scheduler(EventScheduler())
+    sender = GoBackNFlowControl(window_size=4, seq_space=8)
+    for n in range(4):
+        assert sender.send_segment(f"segment {n}")[0]
+    assert not sender.can_send()
+    sender.process_ack(1)
+    assert sender.send_base == 2 and sender.can_send()
+    assert [seq_num for seq_num, _, _ in sender.handle_timeout()] == [2, 3]
+
+
+def test_go_back_n_wraps_around_the_sequence_space():
+    """Sequence numbers wrap modulo seq_space while the receiver keeps accepting in order"""
+    set_scheduler(EventScheduler())
+    sender = GoBackNFlowControl(window_size=3, seq_space=5)
+    receiver = GoBackNFlowControl(window_size=3, seq_space=5)
+    delivered, seq_nums = [], []
+    for n in range(12):
+        _, segment, seq_num = sender.send_segment(f"segment {n}")
+        seq_nums.append(seq_num)
+        accepted, _, data, ack = receiver.receive_segment(segment)
+        assert accepted
+        delivered.append(data)
+        assert sender.process_ack(ack) == [seq_num]
+    assert seq_nums == [n % 5 for n in range(12)]
+    assert delivered == [f"segment {n}" for n in range(12)]
+    assert sender.acked_total == 12 and sender.outstanding == 0
+
+
+def test_go_back_n_acks_are_cumulative_across_the_wrap():
+    set_scheduler(EventScheduler())
+    sender = GoBackNFlowControl(window_size=4, seq_space=6)
+    for n in range(4):
+        sender.send_segment(f"segment {n}")
+    sender.process_ack(2)
+    for n in range(4, 7):
+        sender.send_segment(f"segment {n}")
+    assert sender.get_window_status()["unacknowledged_segments"] == [3, 4, 5, 0]
+    assert sender.process_ack(0) == [3, 4, 5, 0]
+    assert sender.send_base == 1 and not sender.is_timer_running
+    assert sender.process_ack(0) == []  # Stale ACK outside the window
+    assert sender.process_ack("ACK9") == []
+
+
+def test_go_back_n_aborts_after_max_retries():
+    """Once the oldest segment ran out of retries the next timeout aborts the transfer"""
+    scheduler = EventScheduler()
+    set_scheduler(scheduler)
+    failures = []
+    sender = GoBackNFlowControl(window_size=4, timeout=1.0, max_retries=2, seq_space=8, on_failure=failures.append)
+    for n in range(3):
+        sender.send_segment(f"segment {n}")
+    for _ in range(2):
+        assert [seq_num for seq_num, _, _ in sender.handle_timeout()] == [0, 1, 2]
+    assert sender.handle_timeout() == []
+    assert failures == [0]
+    assert sender.failed and sender.segments_failed == 1
+    assert sender.segments_retransmitted == 6
+    assert not sender.is_timer_running and not sender.check_timeout()
+    assert not sender.can_send()
+    assert sender.send_segment("more") == (False, None, None)
+    assert sender.process_ack(2) == []
+    assert sender.retransmit_oldest() is None
+    assert sender.handle_timeout() == [] and failures == [0]
+
+
+def test_selective_repeat_delivers_in_order_after_a_gap():
+    """Segments after a lost one are buffered and delivered once it arrives"""
+    set_scheduler(EventScheduler())
+    sender = SelectiveRepeatFlowControl(window_size=4, seq_space=8)
+    receiver = SelectiveRepeatFlowControl(window_size=4, seq_space=8)
+    segments = [sender.send_segment(f"segment {n}")[1] for n in range(4)]
+    for segment in segments[1:]:
+        assert receiver.receive_segment(segment)[0]
+    assert receiver.read_delivered() == []
+    receiver.receive_segment(segments[0])
+    assert receiver.read_delivered() == [f"segment {n}" for n in range(4)]
+
+
+def test_selective_repeat_aborts_after_max_retries():
+    """A segment that is never acknowledged aborts the transfer instead of being skipped"""
+    scheduler = EventScheduler()
+    set_scheduler(scheduler)
+    failures = []
+    sender = SelectiveRepeatFlowControl(window_size=4, timeout=1.0, max_retries=2, seq_space=8,
+                                        on_retransmit=lambda *segment: None, on_failure=failures.append)
+    for n in range(3):
+        sender.send_segment(f"segment {n}")
+    sender.process_ack(1)
+    sender.process_ack(2)
+    scheduler.run()
+    assert failures == [0]
+    assert sender.failed
+    assert sender.segments_retransmitted == 2
+    assert sender.send_base == 0  # The window did not slide past the lost segment
+    assert not sender.can_send()
+    assert sender.send_segment("more") == (False, None, None)
+    assert sender.process_ack(0) == []
+    assert scheduler.peek_time() is None  # No timers left running
@@ -3,38 +3,92 @@ Transport Layer implementation for Network Simulator
 Implements TCP and UDP protocols with proper port management and flow control
 """
 
-import random
-import time
+import heapq
+import itertools
+from array import array
+from collections import deque
 from enum import Enum
 from checksum_for_datalink import ChecksumForDataLink
+from event_scheduler import get_scheduler
+from rng_service import get_rng
+from sim_logging import get_logger
+from tcp_congestion import RTOEstimator, make_congestion_control
+from tcp_state_machine import WILDCARD_IP, ConnectionState, TCPFlags, TCPStateMachine
+
+_log = get_logger("TRANSPORT")
+_go_back_n_log = get_logger("GO-BACK-N")
+_go_back_n_demo_log = get_logger("GO-BACK-N DEMO")
+_selective_repeat_log = get_logger("SELECTIVE-REPEAT")
+_process_comm_log = get_logger("PROCESS-COMM")
+_tcp_log = get_logger("TCP")
+_udp_log = get_logger("UDP")
 
 class ProtocolType(Enum):
     TCP = 6
     UDP = 17
 
-class ConnectionState(Enum):
-    CLOSED = "CLOSED"
-    SYN_SENT = "SYN_SENT"
-    SYN_RECEIVED = "SYN_RECEIVED"
-    ESTABLISHED = "ESTABLISHED"
-    FIN_WAIT_1 = "FIN_WAIT_1"
-    FIN_WAIT_2 = "FIN_WAIT_2"
-    CLOSE_WAIT = "CLOSE_WAIT"
-    CLOSING = "CLOSING"
-    LAST_ACK = "LAST_ACK"
-    TIME_WAIT = "TIME_WAIT"
-
-class TCPFlags:
-    """TCP Flag constants"""
-    SYN = 0x02
-    ACK = 0x10
-    FIN = 0x01
-    RST = 0x04
-    PSH = 0x08
-    URG = 0x20
+class _PortSpace:
+    """
+    Free ephemeral ports of one IP address
+    
+    The free ports are the first count slots of a virtual array that starts
+    out as a shared template of every ephemeral port. Only slots whose port
+    differs from the template are stored, so a new space costs nothing and
+    its memory grows with the ports in use rather than with the range.
+    """
+    
+    __slots__ = ("template", "template_slot", "count", "slots", "slot_of_port")
+    
+    def __init__(self, template, template_slot):
+        self.template = template  # array('H') of the ephemeral ports
+        self.template_slot = template_slot  # array('i') of each port's slot in the template (-1 if not ephemeral)
+        self.count = len(template)
+        self.slots = {}  # Maps slot to port where it differs from the template
+        self.slot_of_port = {}  # Maps port to slot where it differs from the template (-1 if not free)
+    
+    def port_at(self, slot):
+        """Get the port in a slot"""
+        port = self.slots.get(slot)
+        return self.template[slot] if port is None else port
+    
+    def slot_of(self, port):
+        """Get the slot of a port (-1 if it is not an ephemeral port or is in use)"""
+        slot = self.slot_of_port.get(port)
+        return self.template_slot[port] if slot is None else slot
+    
+    def take(self, port):
+        """Remove a free port by moving the last free port into its slot"""
+        slot = self.slot_of(port)
+        if slot < 0:
+            return
+        last_slot = self.count - 1
+        if slot != last_slot:
+            last = self.port_at(last_slot)
+            self.slots[slot] = last
+            self.slot_of_port[last] = slot
+        self.slots.pop(last_slot, None)
+        self.slot_of_port[port] = -1
+        self.count = last_slot
+    
+    def give_back(self, port):
+        """Append an ephemeral port that is not free to the free slots"""
+        if self.template_slot[port] < 0 or self.slot_of(port) >= 0:
+            return
+        self.slots[self.count] = port
+        self.slot_of_port[port] = self.count
+        self.count += 1
 
 class PortManager:
-    """Manages port allocation for processes"""
+    """
+    Manages port allocation for processes
+    
+    Every IP address has its own port space (_PortSpace). Free ephemeral
+    ports are kept as the first slots of an array with an index of each
+    port's slot, so a random free port is taken, and a port given back, in
+    O(1) until the range is exhausted. A port whose connection is still in TIME_WAIT is held back
+    until TIME_WAIT ends, so a new connection cannot receive segments
+    meant for the old one.
+    """
     
     # Well-known ports (0-1023)
     WELL_KNOWN_PORTS = {
@@ -54,98 +108,200 @@ class PortManager:
         995: "POP3S"
     }
     
-    def __init__(self):
-        self.allocated_ports = set()
-        self.ephemeral_range = (1024, 65535)
-        self.process_port_map = {}  # Maps process_id to allocated ports
+    def __init__(self, ephemeral_range=(1024, 65535), scheduler=None):
+        """
+        Initialize the port manager
         
-    def allocate_ephemeral_port(self, process_id):
+        Args:
+            ephemeral_range (tuple): Lowest and highest ephemeral port
+            scheduler (EventScheduler, optional): Clock for TIME_WAIT holds (default: the shared one)
+        """
+        self.rng = get_rng("transport/ports")
+        self.scheduler = scheduler or get_scheduler()
+        self.allocated_ports = set()  # (ip, port) pairs in use
+        self.ephemeral_range = ephemeral_range
+        self.process_port_map = {}  # Maps process_id to {port: ip} of its allocated ports
+        self._spaces = {}  # Maps ip to its _PortSpace
+        self._template = None  # Ephemeral ports and their slots, shared by every _PortSpace
+        self._time_wait = []  # Heap of (release_time, ip, port) held back from reuse
+        self._hold_until = {}  # Maps (ip, port) to the end of TIME_WAIT of its last connection
+    
+    def _port_space(self, ip):
+        """Get the port space of an IP, creating it on first use"""
+        space = self._spaces.get(ip)
+        if space is None:
+            if self._template is None:
+                low, high = self.ephemeral_range
+                ports = array('H', (port for port in range(low, high + 1) if port not in self.WELL_KNOWN_PORTS))
+                slots = array('i', [-1]) * 65536
+                for slot, port in enumerate(ports):
+                    slots[port] = slot
+                self._template = (ports, slots)
+            space = self._spaces[ip] = _PortSpace(*self._template)
+        return space
+    
+    def _release_expired(self):
+        """Return ports whose TIME_WAIT has ended to the free arrays"""
+        heap, now = self._time_wait, self.scheduler.now
+        while heap and heap[0][0] <= now:
+            _, ip, port = heapq.heappop(heap)
+            if self._hold_until.get((ip, port), 0.0) <= now:
+                self._hold_until.pop((ip, port), None)
+                if (ip, port) not in self.allocated_ports:
+                    self._port_space(ip).give_back(port)
+    
+    def _assign(self, ip, port, process_id):
+        """Record a port as allocated to a process"""
+        self.allocated_ports.add((ip, port))
+        self.process_port_map.setdefault(process_id, {})[port] = ip
+    
+    def allocate_ephemeral_port(self, process_id, ip=WILDCARD_IP):
         """
         Allocate an ephemeral port for a process
         
         Args:
             process_id (str): Process identifier
-            
+            ip (str): Local IP address whose port space is used
+        
         Returns:
             int: Allocated port number, None if no ports available
         """
-        for attempt in range(100):  # Try up to 100 times
-            port = random.randint(*self.ephemeral_range)
-            if port not in self.allocated_ports and port not in self.WELL_KNOWN_PORTS:
-                self.allocated_ports.add(port)
-                if process_id not in self.process_port_map:
-                    self.process_port_map[process_id] = []
-                self.process_port_map[process_id].append(port)
-                print(f"[TRANSPORT] ▶ Allocated ephemeral port {port} to process {process_id}")
-                return port
-        
-        print(f"[TRANSPORT] ❌ No available ephemeral ports for process {process_id}")
-        return None
+        self._release_expired()
+        space = self._port_space(ip)
+        if not space.count:
+            _log.error("[TRANSPORT] ❌ No available ephemeral ports on {} for process {} ({} in TIME_WAIT)", ip, process_id, len(self._time_wait))
+            return None
+        
+        port = space.port_at(self.rng.randrange(space.count))
+        space.take(port)
+        self._assign(ip, port, process_id)
+        _log.info("[TRANSPORT] ▶ Allocated ephemeral port {} to process {}", port, process_id)
+        return port
     
-    def allocate_well_known_port(self, port, process_id):
+    def allocate_well_known_port(self, port, process_id, ip=WILDCARD_IP):
         """
         Allocate a well-known port for a service
         
         Args:
             port (int): Well-known port number
             process_id (str): Process identifier
-            
+            ip (str): Local IP address whose port space is used
+        
         Returns:
             bool: True if successful, False if port unavailable
         """
-        if port in self.allocated_ports:
-            print(f"[TRANSPORT] ❌ Port {port} already in use")
+        if (ip, port) in self.allocated_ports:
+            _log.error("[TRANSPORT] ❌ Port {} already in use", port)
             return False
-            
+        
         if port not in self.WELL_KNOWN_PORTS:
-            print(f"[TRANSPORT] ⚠ Port {port} is not a well-known port")
-            
-        self.allocated_ports.add(port)
-        if process_id not in self.process_port_map:
-            self.process_port_map[process_id] = []
-        self.process_port_map[process_id].append(port)
+            _log.warning("[TRANSPORT] ⚠ Port {} is not a well-known port", port)
+        
+        # Servers bind with address reuse, so a port in TIME_WAIT is taken at once
+        self._port_space(ip).take(port)
+        self._assign(ip, port, process_id)
         
         service_name = self.WELL_KNOWN_PORTS.get(port, "UNKNOWN")
-        print(f"[TRANSPORT] ▶ Allocated well-known port {port} ({service_name}) to process {process_id}")
+        _log.info("[TRANSPORT] ▶ Allocated well-known port {} ({}) to process {}", port, service_name, process_id)
         return True
     
-    def deallocate_port(self, port, process_id):
+    def hold_port(self, port, until, ip=WILDCARD_IP):
+        """
+        Keep a port from reuse until a time, e.g. the end of TIME_WAIT
+        
+        The hold takes effect once the port is deallocated.
+        
+        Args:
+            port (int): Port number
+            until (float): Simulation time the port may be reused from
+            ip (str): Local IP address of the port
+        """
+        key = (ip, port)
+        if until > self._hold_until.get(key, 0.0):
+            self._hold_until[key] = until
+    
+    def deallocate_port(self, port, process_id, ip=None):
         """
         Deallocate a port from a process
         
         Args:
             port (int): Port number to deallocate
             process_id (str): Process identifier
+            ip (str, optional): Local IP address of the port (default: the one it was allocated on)
         """
-        if port in self.allocated_ports:
-            self.allocated_ports.remove(port)
-            if process_id in self.process_port_map and port in self.process_port_map[process_id]:
-                self.process_port_map[process_id].remove(port)
-                print(f"[TRANSPORT] ▶ Deallocated port {port} from process {process_id}")
+        ports = self.process_port_map.get(process_id)
+        if not ports or port not in ports:
+            return
+        if ip is None:
+            ip = ports[port]
+        if (ip, port) not in self.allocated_ports:
+            return
+        self.allocated_ports.discard((ip, port))
+        del ports[port]
+        
+        until = self._hold_until.get((ip, port), 0.0)
+        if until > self.scheduler.now:
+            heapq.heappush(self._time_wait, (until, ip, port))
+            _log.info("[TRANSPORT] ▶ Deallocated port {} from process {} (held in TIME_WAIT until {:.1f}s)", port, process_id, until)
+        else:
+            self._hold_until.pop((ip, port), None)
+            self._port_space(ip).give_back(port)
+            _log.info("[TRANSPORT] ▶ Deallocated port {} from process {}", port, process_id)
     
     def get_process_ports(self, process_id):
         """Get all ports allocated to a process"""
-        return self.process_port_map.get(process_id, [])
+        return list(self.process_port_map.get(process_id, ()))
     
-    def is_port_available(self, port):
+    def is_port_available(self, port, ip=WILDCARD_IP):
         """Check if a port is available"""
-        return port not in self.allocated_ports
+        return (ip, port) not in self.allocated_ports and self._hold_until.get((ip, port), 0.0) <= self.scheduler.now
 
 class GoBackNFlowControl:
     """
     Go-Back-N Sliding Window Flow Control Protocol Implementation
     This is a proper implementation of Go-Back-N ARQ for transport layer
+    
+    In-flight segments are kept in fixed-size ring buffers indexed by
+    sequence % window_size, and ACKs are plain integers (the last segment
+    received in order), so sending, cumulative ACKs and timeouts cost at most
+    O(window) whatever the window or sequence space size.
+    A timeout while the oldest segment has already been retransmitted
+    max_retries times aborts the transfer: the timer stops and nothing more is sent.
     """
     
-    def __init__(self, window_size=4, timeout=2.0, max_retries=3):
+    name = "Go-Back-N"
+    
+    def __init__(self, window_size=4, timeout=2.0, max_retries=3, seq_space=1000, on_failure=None):
+        """
+        Initialize Go-Back-N flow control
+        
+        Args:
+            window_size (int): Maximum number of unacknowledged segments
+            timeout (float): Retransmission timeout in seconds
+            max_retries (int): Retransmissions of a segment before the transfer is aborted
+            seq_space (int): Sequence numbers run from 0 to seq_space - 1 and then
+                wrap; must be larger than the window
+            on_failure (callable, optional): Called as on_failure(seq_num) when the
+                transfer is aborted because segment seq_num ran out of retries
+        """
+        if not 0 < window_size < seq_space:
+            raise ValueError(f"Window size must be between 1 and seq_space - 1 (got {window_size} with seq_space {seq_space})")
         self.window_size = window_size
         self.timeout = timeout
         self.max_retries = max_retries
-        
-        # Sender state variables
-        self.send_base = 0  # Oldest unacknowledged sequence number
-        self.next_seq_num = 0  # Next sequence number to be sent
-        self.send_buffer = {}  # Buffer for sent but unacknowledged segments
+        self.seq_space = seq_space
+        self.on_failure = on_failure
+        self.failed = False  # Set once a segment ran out of retries
+        
+        # Sender state: unwrapped sequence counters; sequence numbers on the
+        # wire are these modulo seq_space
+        self._base = 0  # Oldest unacknowledged segment
+        self._next = 0  # Next segment to be sent
+        # Ring buffers for sent but unacknowledged segments, slot = sequence % window_size
+        self._segments = [None] * window_size
+        self._data = [None] * window_size
+        self._sent_at = array('d', bytes(8 * window_size))
+        self._retries = array('i', bytes(4 * window_size))
         self.timer_start_time = None
         self.is_timer_running = False
         
@@ -157,23 +313,47 @@ class GoBackNFlowControl:
         self.segments_sent = 0
         self.segments_retransmitted = 0
         self.segments_received = 0
+        self.segments_failed = 0
         self.acks_sent = 0
         
         # Use checksum handler for error detection
         self.checksum_handler = ChecksumForDataLink()
         
+        # Timers run on the simulation clock
+        self.scheduler = get_scheduler()
+    
+    @property
+    def send_base(self):
+        """Sequence number of the oldest unacknowledged segment"""
+        return self._base % self.seq_space
+    
+    @property
+    def next_seq_num(self):
+        """Sequence number of the next segment to be sent"""
+        return self._next % self.seq_space
+    
+    @property
+    def outstanding(self):
+        """Number of sent but unacknowledged segments"""
+        return self._next - self._base
+    
+    @property
+    def sent_total(self):
+        """Number of segments sent so far (retransmissions not counted)"""
+        return self._next
+    
+    @property
+    def acked_total(self):
+        """Number of segments acknowledged so far, up to the first one still missing"""
+        return self._base
+        
     def is_in_window(self, seq_num):
         """Check if sequence number is within the current window"""
-        return (self.send_base <= seq_num < self.send_base + self.window_size) or \
-               (self.send_base > 1000 - self.window_size and 
-                (seq_num >= self.send_base or seq_num < (self.send_base + self.window_size) % 1000))
+        return (seq_num - self._base) % self.seq_space < self.window_size
     
     def can_send(self):
         """Check if we can send more segments within the window"""
-        window_used = (self.next_seq_num - self.send_base) % 1000
-        if window_used < 0:
-            window_used += 1000
-        return window_used < self.window_size
+        return not self.failed and self._next - self._base < self.window_size
     
     def send_segment(self, data, seq_num=None):
         """
@@ -181,42 +361,42 @@ class GoBackNFlowControl:
         
         Args:
             data (str): Data to send
-            seq_num (int, optional): Sequence number (auto-assigned if None)
+            seq_num (int, optional): Sequence number; must be the next one if given
             
         Returns:
             tuple: (success, segment, seq_num)
         """
+        if self.failed:
+            _go_back_n_log.error("[GO-BACK-N] ❌ Cannot send - the transfer was aborted")
+            return False, None, None
         if not self.can_send():
-            print(f"[GO-BACK-N] ⚠ Cannot send - window full")
-            print(f"[GO-BACK-N] ▶ Send base: {self.send_base}, Next seq: {self.next_seq_num}, Window size: {self.window_size}")
+            _go_back_n_log.warning("[GO-BACK-N] ⚠ Cannot send - window full")
+            _go_back_n_log.info("[GO-BACK-N] ▶ Send base: {}, Next seq: {}, Window size: {}", self.send_base, self.next_seq_num, self.window_size)
             return False, None, None
         
-        # Use provided sequence number or assign next
         if seq_num is None:
             seq_num = self.next_seq_num
+        elif seq_num != self.next_seq_num:
+            _go_back_n_log.warning("[GO-BACK-N] ⚠ Cannot send segment {} out of order (next is {})", seq_num, self.next_seq_num)
+            return False, None, None
             
         # Create segment with checksum
         segment = self.checksum_handler.create_frame(data, seq_num)
         
-        # Store in send buffer for potential retransmission
-        self.send_buffer[seq_num] = {
-            'segment': segment,
-            'data': data,
-            'timestamp': time.time(),
-            'retransmit_count': 0
-        }
+        # Store in the ring buffer for potential retransmission
+        slot = self._next % self.window_size
+        self._segments[slot] = segment
+        self._data[slot] = data
+        self._sent_at[slot] = self.scheduler.now
+        self._retries[slot] = 0
+        self._next += 1
         
         # Start timer if this is the first unacknowledged segment
         if not self.is_timer_running:
             self.start_timer()
             
         self.segments_sent += 1
-        print(f"[GO-BACK-N] ▶ Sent segment {seq_num}: '{data[:20]}...' (Total sent: {self.segments_sent})")
-        
-        # Advance next sequence number if this was the expected next
-        if seq_num == self.next_seq_num:
-            self.next_seq_num = (self.next_seq_num + 1) % 1000
-            
+        _go_back_n_log.info("[GO-BACK-N] ▶ Sent segment {}: '{}...' (Total sent: {})", seq_num, data[:20], self.segments_sent)
         return True, segment, seq_num
     
     def receive_segment(self, segment):
@@ -224,142 +404,178 @@ class GoBackNFlowControl:
         Process received segment using Go-Back-N protocol
         
         Args:
-            segment (str): Received segment
+            segment (bytes): Received segment (binary frame)
             
         Returns:
-            tuple: (is_valid, seq_num, data, ack_to_send)
+            tuple: (is_valid, seq_num, data, ack_to_send) where ack_to_send is the
+                sequence number to acknowledge, or None
         """
         # Verify segment integrity
         is_valid, seq_num, data = self.checksum_handler.verify_frame(segment)
         
         if not is_valid:
-            print(f"[GO-BACK-N] ❌ Corrupted segment received - discarding")
+            _go_back_n_log.error("[GO-BACK-N] ❌ Corrupted segment received - discarding")
             # Send duplicate ACK for last correctly received segment
             if self.last_ack_sent >= 0:
-                ack_to_send = f"ACK{self.last_ack_sent}"
                 self.acks_sent += 1
-                return False, -1, None, ack_to_send
+                return False, -1, None, self.last_ack_sent
             return False, -1, None, None
         
         self.segments_received += 1
-        print(f"[GO-BACK-N] ▶ Received segment {seq_num}: '{data[:20]}...' (Expected: {self.expected_seq_num})")
+        _go_back_n_log.info("[GO-BACK-N] ▶ Received segment {}: '{}...' (Expected: {})", seq_num, data[:20], self.expected_seq_num)
         
         if seq_num == self.expected_seq_num:
             # This is the expected segment - accept it
-            print(f"[GO-BACK-N] ✓ Segment {seq_num} accepted (in order)")
-            self.expected_seq_num = (self.expected_seq_num + 1) % 1000
+            _go_back_n_log.info("[GO-BACK-N] ✓ Segment {} accepted (in order)", seq_num)
+            self.expected_seq_num = (self.expected_seq_num + 1) % self.seq_space
             self.last_ack_sent = seq_num
-            ack_to_send = f"ACK{seq_num}"
             self.acks_sent += 1
-            print(f"[GO-BACK-N] ▶ Sending {ack_to_send}")
-            return True, seq_num, data, ack_to_send
+            _go_back_n_log.info("[GO-BACK-N] ▶ Sending ACK {}", seq_num)
+            return True, seq_num, data, seq_num
             
         else:
             # Out of order segment - discard and send duplicate ACK
-            print(f"[GO-BACK-N] ❌ Out-of-order segment {seq_num} discarded")
+            _go_back_n_log.error("[GO-BACK-N] ❌ Out-of-order segment {} discarded", seq_num)
             if self.last_ack_sent >= 0:
-                ack_to_send = f"ACK{self.last_ack_sent}"
                 self.acks_sent += 1
-                print(f"[GO-BACK-N] ▶ Sending duplicate {ack_to_send}")
-                return False, seq_num, data, ack_to_send
+                _go_back_n_log.info("[GO-BACK-N] ▶ Sending duplicate ACK {}", self.last_ack_sent)
+                return False, seq_num, data, self.last_ack_sent
             return False, seq_num, data, None
     
+    @staticmethod
+    def parse_ack(ack):
+        """
+        Read the sequence number of an ACK
+        
+        Args:
+            ack (int or str): ACK number, or a legacy "ACK5" string
+            
+        Returns:
+            int: Acknowledged sequence number, or None if the ACK is malformed
+        """
+        if isinstance(ack, int):
+            return ack
+        if isinstance(ack, str) and ack.startswith("ACK") and ack[3:].isdigit():
+            return int(ack[3:])
+        return None
+    
     def process_ack(self, ack):
         """
         Process received ACK using Go-Back-N protocol
         
+        ACKs are cumulative: an ACK for segment n acknowledges every outstanding
+        segment up to and including n. ACKs for segments outside the window
+        (duplicates and stale ACKs) change nothing.
+        
         Args:
-            ack (str): ACK message (e.g., "ACK5")
+            ack (int or str): Sequence number of the last segment received in
+                order (a legacy "ACK5" string is accepted too)
             
         Returns:
-            list: List of acknowledged sequence numbers
+            list: List of acknowledged sequence numbers (empty once the transfer
+                was aborted)
         """
-        if not ack.startswith("ACK"):
-            print(f"[GO-BACK-N] ⚠ Invalid ACK format: {ack}")
+        if self.failed:
             return []
-            
-        try:
-            ack_num = int(ack[3:])
-            print(f"[GO-BACK-N] ▶ Processing {ack} (current send_base: {self.send_base})")
-            
-            # Go-Back-N uses cumulative ACKs
-            acked_segments = []
-            
-            # Calculate which segments are acknowledged
-            if ack_num >= self.send_base:
-                # Normal case: no wrap-around
-                for seq in range(self.send_base, ack_num + 1):
-                    if seq in self.send_buffer:
-                        acked_segments.append(seq)
-            else:
-                # Handle sequence number wrap-around
-                for seq in range(self.send_base, 1000):
-                    if seq in self.send_buffer:
-                        acked_segments.append(seq)
-                for seq in range(0, ack_num + 1):
-                    if seq in self.send_buffer:
-                        acked_segments.append(seq)
-            
-            # Remove acknowledged segments from buffer
-            for seq in acked_segments:
-                if seq in self.send_buffer:
-                    del self.send_buffer[seq]
-                    print(f"[GO-BACK-N] ✓ Segment {seq} acknowledged and removed from buffer")
-            
-            # Update send base to ack_num + 1
-            self.send_base = (ack_num + 1) % 1000
-            print(f"[GO-BACK-N] ▶ Updated send_base to {self.send_base}")
-            
-            # Restart timer if there are still unacknowledged segments
-            if self.send_buffer:
-                self.start_timer()
-                print(f"[GO-BACK-N] ▶ Timer restarted - {len(self.send_buffer)} segments still unacknowledged")
-            else:
-                self.stop_timer()
-                print(f"[GO-BACK-N] ✓ All segments acknowledged - timer stopped")
-            
-            return acked_segments
-            
-        except Exception as e:
-            print(f"[GO-BACK-N] ⚠ Error processing ACK: {e}")
+        ack_num = self.parse_ack(ack)
+        if ack_num is None:
+            _go_back_n_log.warning("[GO-BACK-N] ⚠ Invalid ACK format: {}", ack)
             return []
+        _go_back_n_log.info("[GO-BACK-N] ▶ Processing ACK {} (current send_base: {})", ack_num, self.send_base)
+        
+        # Position of the acknowledged segment in the window
+        acked_count = (ack_num - self._base) % self.seq_space + 1
+        if acked_count > self._next - self._base:
+            _go_back_n_log.info("[GO-BACK-N] ⓘ ACK {} is outside the window - ignored", ack_num)
+            return []
+        
+        acked_segments = []
+        for sequence in range(self._base, self._base + acked_count):
+            slot = sequence % self.window_size
+            self._segments[slot] = None
+            self._data[slot] = None
+            acked_segments.append(sequence % self.seq_space)
+        self._base += acked_count
+        _go_back_n_log.info("[GO-BACK-N] ✓ {} segment(s) acknowledged, send_base now {}", acked_count, self.send_base)
+        
+        # Restart timer if there are still unacknowledged segments
+        if self._next > self._base:
+            self.start_timer()
+            _go_back_n_log.info("[GO-BACK-N] ▶ Timer restarted - {} segments still unacknowledged", self._next - self._base)
+        else:
+            self.stop_timer()
+            _go_back_n_log.info("[GO-BACK-N] ✓ All segments acknowledged - timer stopped")
+        
+        return acked_segments
+    
+    def is_duplicate_ack(self, ack):
+        """Check if an ACK repeats the last cumulative ACK while segments are outstanding"""
+        ack_num = self.parse_ack(ack)
+        return ack_num is not None and self._next > self._base and ack_num == (self._base - 1) % self.seq_space
+    
+    def retransmit_oldest(self):
+        """
+        Resend only the oldest unacknowledged segment (fast retransmit)
+        
+        Returns:
+            tuple: (seq_num, segment, data), or None if nothing is outstanding
+        """
+        if self._next == self._base or self.failed:
+            return None
+        slot = self._base % self.window_size
+        self._sent_at[slot] = self.scheduler.now
+        self.segments_retransmitted += 1
+        self.start_timer()
+        return self.send_base, self._segments[slot], self._data[slot]
     
     def handle_timeout(self):
         """
         Handle timeout event - retransmit ALL unacknowledged segments (Go-Back-N behavior)
         
+        The oldest segment has been retransmitted on every timeout, so it is the
+        first to run out of retries; the transfer is then aborted.
+        
         Returns:
-            list: List of segments to retransmit
+            list: List of (seq_num, segment, data) to retransmit, oldest first
+                (empty once the transfer was aborted)
         """
-        if not self.send_buffer:
+        if self._next == self._base or self.failed:
+            return []
+        if self._retries[self._base % self.window_size] >= self.max_retries:
+            self._abort(self.send_base)
             return []
             
-        print(f"[GO-BACK-N] ⚠ TIMEOUT! Retransmitting all unacknowledged segments")
+        _go_back_n_log.warning("[GO-BACK-N] ⚠ TIMEOUT! Retransmitting all unacknowledged segments")
         
         segments_to_retransmit = []
-        current_time = time.time()
-        
-        # Sort segments by sequence number for retransmission
-        sorted_segments = sorted(self.send_buffer.items())
-        
-        for seq_num, segment_info in sorted_segments:
-            if segment_info['retransmit_count'] < self.max_retries:
-                segments_to_retransmit.append((seq_num, segment_info['segment'], segment_info['data']))
-                segment_info['retransmit_count'] += 1
-                segment_info['timestamp'] = current_time
-                self.segments_retransmitted += 1
-                print(f"[GO-BACK-N] ▶ Retransmitting segment {seq_num} (attempt {segment_info['retransmit_count']})")
-            else:
-                print(f"[GO-BACK-N] ❌ Segment {seq_num} exceeded max retries - connection may be lost")
+        current_time = self.scheduler.now
+        
+        for sequence in range(self._base, self._next):
+            slot = sequence % self.window_size
+            seq_num = sequence % self.seq_space
+            segments_to_retransmit.append((seq_num, self._segments[slot], self._data[slot]))
+            self._retries[slot] += 1
+            self._sent_at[slot] = current_time
+            self.segments_retransmitted += 1
+            _go_back_n_log.info("[GO-BACK-N] ▶ Retransmitting segment {} (attempt {})", seq_num, self._retries[slot])
         
         # Restart timer
         self.start_timer()
         
         return segments_to_retransmit
     
+    def _abort(self, seq_num):
+        """Stop the transfer after segment seq_num ran out of retries; the window stays where it is"""
+        _go_back_n_log.error("[GO-BACK-N] ❌ Segment {} exceeded max retries - aborting the transfer", seq_num)
+        self.failed = True
+        self.segments_failed += 1
+        self.stop_timer()
+        if self.on_failure is not None:
+            self.on_failure(seq_num)
+    
     def start_timer(self):
         """Start the retransmission timer"""
-        self.timer_start_time = time.time()
+        self.timer_start_time = self.scheduler.now
         self.is_timer_running = True
         
     def stop_timer(self):
@@ -371,7 +587,7 @@ class GoBackNFlowControl:
         """Check if timeout has occurred"""
         if not self.is_timer_running or self.timer_start_time is None:
             return False
-        return (time.time() - self.timer_start_time) >= self.timeout
+        return (self.scheduler.now - self.timer_start_time) >= self.timeout
     
     def get_window_status(self):
         """Get current window status for debugging"""
@@ -379,7 +595,8 @@ class GoBackNFlowControl:
             'send_base': self.send_base,
             'next_seq_num': self.next_seq_num,
             'window_size': self.window_size,
-            'unacknowledged_segments': list(self.send_buffer.keys()),
+            'seq_space': self.seq_space,
+            'unacknowledged_segments': [sequence % self.seq_space for sequence in range(self._base, self._next)],
             'expected_seq_num': self.expected_seq_num,
             'last_ack_sent': self.last_ack_sent
         }
@@ -390,23 +607,522 @@ class GoBackNFlowControl:
             'segments_sent': self.segments_sent,
             'segments_retransmitted': self.segments_retransmitted,
             'segments_received': self.segments_received,
+            'segments_failed': self.segments_failed,
+            'failed': self.failed,
             'acks_sent': self.acks_sent,
             'window_size': self.window_size,
             'current_send_base': self.send_base,
             'current_next_seq': self.next_seq_num,
-            'unacknowledged_count': len(self.send_buffer),
+            'unacknowledged_count': self._next - self._base,
+            'expected_seq_num': self.expected_seq_num
+        }
+
+class SelectiveRepeatFlowControl:
+    """
+    Selective Repeat ARQ Flow Control Protocol Implementation
+    
+    Every segment has its own retransmission timer on the simulation clock and
+    is acknowledged individually, so a loss costs one retransmission instead
+    of the rest of the window. The receiver buffers out-of-order segments in a
+    window-sized ring and delivers them in order once the gaps are filled.
+    A segment that is still unacknowledged after max_retries retransmissions
+    aborts the transfer: every timer is stopped and nothing more is sent.
+    """
+    
+    name = "Selective Repeat"
+    
+    def __init__(self, window_size=4, timeout=2.0, max_retries=3, seq_space=1000, on_retransmit=None, on_failure=None):
+        """
+        Initialize Selective Repeat flow control
+        
+        Args:
+            window_size (int): Maximum number of unacknowledged segments, and of
+                segments buffered by the receiver
+            timeout (float): Retransmission timeout of each segment in seconds
+            max_retries (int): Retransmissions of a segment before the transfer is aborted
+            seq_space (int): Sequence numbers run from 0 to seq_space - 1 and then
+                wrap; must be at least twice the window
+            on_retransmit (callable, optional): Called as on_retransmit(seq_num, segment, data)
+                when a timer expires; without it expired segments are collected
+                for handle_timeout()
+            on_failure (callable, optional): Called as on_failure(seq_num) when the
+                transfer is aborted because segment seq_num ran out of retries
+        """
+        if not 0 < window_size <= seq_space // 2:
+            raise ValueError(f"Window size must be between 1 and seq_space / 2 (got {window_size} with seq_space {seq_space})")
+        self.window_size = window_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.seq_space = seq_space
+        self.on_retransmit = on_retransmit
+        self.on_failure = on_failure
+        self.failed = False  # Set once a segment ran out of retries
+        
+        # Sender state: unwrapped sequence counters, ring buffers indexed by sequence % window_size
+        self._base = 0
+        self._next = 0
+        self._segments = [None] * window_size
+        self._data = [None] * window_size
+        self._timers = [None] * window_size
+        self._acked = bytearray(window_size)
+        self._retries = array('i', bytes(4 * window_size))
+        self._due = []  # Expired segments waiting for handle_timeout()
+        
+        # Receiver state: ring buffer of out-of-order segments
+        self._rcv_base = 0
+        self._received = [None] * window_size
+        self.delivered = deque()  # Data delivered in order, for the application to read
+        
+        # Statistics
+        self.segments_sent = 0
+        self.segments_retransmitted = 0
+        self.segments_received = 0
+        self.segments_buffered = 0
+        self.segments_failed = 0
+        self.acks_sent = 0
+        
+        # Use checksum handler for error detection
+        self.checksum_handler = ChecksumForDataLink()
+        
+        # Timers run on the simulation clock
+        self.scheduler = get_scheduler()
+    
+    @property
+    def send_base(self):
+        """Sequence number of the oldest unacknowledged segment"""
+        return self._base % self.seq_space
+    
+    @property
+    def next_seq_num(self):
+        """Sequence number of the next segment to be sent"""
+        return self._next % self.seq_space
+    
+    @property
+    def expected_seq_num(self):
+        """Sequence number of the next segment the receiver delivers"""
+        return self._rcv_base % self.seq_space
+    
+    @property
+    def outstanding(self):
+        """Number of sent segments not yet acknowledged"""
+        return sum(1 for sequence in range(self._base, self._next) if not self._acked[sequence % self.window_size])
+    
+    @property
+    def sent_total(self):
+        """Number of segments sent so far (retransmissions not counted)"""
+        return self._next
+    
+    @property
+    def acked_total(self):
+        """Number of segments acknowledged so far, up to the first one still missing"""
+        return self._base
+    
+    def can_send(self):
+        """Check if we can send more segments within the window"""
+        return not self.failed and self._next - self._base < self.window_size
+    
+    def send_segment(self, data, seq_num=None):
+        """
+        Send a segment and start its timer
+        
+        Args:
+            data (str): Data to send
+            seq_num (int, optional): Sequence number; must be the next one if given
+            
+        Returns:
+            tuple: (success, segment, seq_num)
+        """
+        if self.failed:
+            _selective_repeat_log.error("[SELECTIVE-REPEAT] ❌ Cannot send - the transfer was aborted")
+            return False, None, None
+        if not self.can_send():
+            _selective_repeat_log.warning("[SELECTIVE-REPEAT] ⚠ Cannot send - window full (base={}, next={}, size={})", self.send_base, self.next_seq_num, self.window_size)
+            return False, None, None
+        
+        if seq_num is None:
+            seq_num = self.next_seq_num
+        elif seq_num != self.next_seq_num:
+            _selective_repeat_log.warning("[SELECTIVE-REPEAT] ⚠ Cannot send segment {} out of order (next is {})", seq_num, self.next_seq_num)
+            return False, None, None
+        
+        segment = self.checksum_handler.create_frame(data, seq_num)
+        slot = self._next % self.window_size
+        self._segments[slot] = segment
+        self._data[slot] = data
+        self._acked[slot] = 0
+        self._retries[slot] = 0
+        self._timers[slot] = self.scheduler.schedule(self.timeout, self._expire, self._next)
+        self._next += 1
+        
+        self.segments_sent += 1
+        _selective_repeat_log.info("[SELECTIVE-REPEAT] ▶ Sent segment {}: '{}...' (Total sent: {})", seq_num, data[:20], self.segments_sent)
+        return True, segment, seq_num
+    
+    def _expire(self, sequence):
+        """Timer callback: retransmit one segment, or abort the transfer"""
+        slot = sequence % self.window_size
+        seq_num = sequence % self.seq_space
+        self._timers[slot] = None
+        if self._retries[slot] >= self.max_retries:
+            self._abort(seq_num)
+            return
+        
+        self._retries[slot] += 1
+        self.segments_retransmitted += 1
+        self._timers[slot] = self.scheduler.schedule(self.timeout, self._expire, sequence)
+        _selective_repeat_log.warning("[SELECTIVE-REPEAT] ⚠ Timeout for segment {} - retransmitting (attempt {})", seq_num, self._retries[slot])
+        if self.on_retransmit is not None:
+            self.on_retransmit(seq_num, self._segments[slot], self._data[slot])
+        else:
+            self._due.append((seq_num, self._segments[slot], self._data[slot]))
+    
+    def _abort(self, seq_num):
+        """Stop the transfer after segment seq_num ran out of retries; the window stays where it is"""
+        _selective_repeat_log.error("[SELECTIVE-REPEAT] ❌ Segment {} exceeded max retries - aborting the transfer", seq_num)
+        self.failed = True
+        self.segments_failed += 1
+        for slot, timer in enumerate(self._timers):
+            if timer is not None:
+                timer.cancel()
+                self._timers[slot] = None
+        self._due = []
+        if self.on_failure is not None:
+            self.on_failure(seq_num)
+    
+    def _release(self, slot):
+        """Mark a sender slot as done and free its segment"""
+        self._acked[slot] = 1
+        self._segments[slot] = None
+        self._data[slot] = None
+        if self._timers[slot] is not None:
+            self._timers[slot].cancel()
+            self._timers[slot] = None
+    
+    def _slide(self):
+        """Advance the send window past every acknowledged segment at its base"""
+        while self._base < self._next and self._acked[self._base % self.window_size]:
+            self._base += 1
+    
+    def process_ack(self, ack):
+        """
+        Process the ACK of one segment
+        
+        Args:
+            ack (int or str): Acknowledged sequence number (a legacy "ACK5" string
+                is accepted too)
+            
+        Returns:
+            list: The acknowledged sequence number, or an empty list for a
+                duplicate or out-of-window ACK, or once the transfer was aborted
+        """
+        if self.failed:
+            return []
+        ack_num = GoBackNFlowControl.parse_ack(ack)
+        if ack_num is None:
+            _selective_repeat_log.warning("[SELECTIVE-REPEAT] ⚠ Invalid ACK format: {}", ack)
+            return []
+        
+        offset = (ack_num - self._base) % self.seq_space
+        if offset >= self._next - self._base or self._acked[(self._base + offset) % self.window_size]:
+            _selective_repeat_log.info("[SELECTIVE-REPEAT] ⓘ ACK {} is a duplicate or outside the window - ignored", ack_num)
+            return []
+        
+        self._release((self._base + offset) % self.window_size)
+        self._slide()
+        _selective_repeat_log.info("[SELECTIVE-REPEAT] ✓ Segment {} acknowledged, send_base now {}", ack_num, self.send_base)
+        return [ack_num]
+    
+    def is_duplicate_ack(self, ack):
+        """ACKs are not cumulative, so none repeats another (ACKs of later segments signal a loss instead)"""
+        return False
+    
+    def retransmit_oldest(self):
+        """
+        Resend the oldest unacknowledged segment now and restart its timer (fast retransmit)
+        
+        Returns:
+            tuple: (seq_num, segment, data), or None if nothing is outstanding
+        """
+        if self._next == self._base or self.failed:
+            return None
+        slot = self._base % self.window_size
+        if self._timers[slot] is not None:
+            self._timers[slot].cancel()
+        self._timers[slot] = self.scheduler.schedule(self.timeout, self._expire, self._base)
+        self.segments_retransmitted += 1
+        return self.send_base, self._segments[slot], self._data[slot]
+    
+    def receive_segment(self, segment):
+        """
+        Process a received segment, buffering it if it arrived out of order
+        
+        Args:
+            segment (bytes): Received segment (binary frame)
+            
+        Returns:
+            tuple: (is_valid, seq_num, data, ack_to_send) where ack_to_send is the
+                sequence number to acknowledge, or None; data delivered in order
+                is appended to self.delivered
+        """
+        is_valid, seq_num, data = self.checksum_handler.verify_frame(segment)
+        if not is_valid:
+            _selective_repeat_log.error("[SELECTIVE-REPEAT] ❌ Corrupted segment received - discarding")
+            return False, -1, None, None
+        
+        self.segments_received += 1
+        offset = (seq_num - self._rcv_base) % self.seq_space
+        if offset < self.window_size:
+            slot = (self._rcv_base + offset) % self.window_size
+            if self._received[slot] is None:
+                self._received[slot] = data
+                if offset:
+                    self.segments_buffered += 1
+                    _selective_repeat_log.info("[SELECTIVE-REPEAT] ▶ Segment {} buffered (expected {})", seq_num, self.expected_seq_num)
+            # Deliver the in-order run starting at the receive base
+            while self._received[self._rcv_base % self.window_size] is not None:
+                slot = self._rcv_base % self.window_size
+                self.delivered.append(self._received[slot])
+                self._received[slot] = None
+                self._rcv_base += 1
+        elif offset < self.seq_space - self.window_size:
+            _selective_repeat_log.warning("[SELECTIVE-REPEAT] ⚠ Segment {} outside the receive window - discarded", seq_num)
+            return False, seq_num, data, None
+        else:
+            # From the previous window: our ACK was lost, so acknowledge it again
+            _selective_repeat_log.info("[SELECTIVE-REPEAT] ⓘ Duplicate segment {}", seq_num)
+        
+        self.acks_sent += 1
+        _selective_repeat_log.info("[SELECTIVE-REPEAT] ▶ Sending ACK {}", seq_num)
+        return True, seq_num, data, seq_num
+    
+    def read_delivered(self):
+        """
+        Take the data delivered in order so far
+        
+        Returns:
+            list: Delivered data, oldest first
+        """
+        data = list(self.delivered)
+        self.delivered.clear()
+        return data
+    
+    def handle_timeout(self):
+        """
+        Take the segments whose timers expired since the last call
+        
+        Only segments whose own timer fired are returned; their timers have
+        already been restarted.
+        
+        Returns:
+            list: List of (seq_num, segment, data) to retransmit
+        """
+        due, self._due = self._due, []
+        return due
+    
+    def check_timeout(self):
+        """Check if any segment is waiting to be retransmitted"""
+        return bool(self._due)
+    
+    def get_window_status(self):
+        """Get current window status for debugging"""
+        return {
+            'send_base': self.send_base,
+            'next_seq_num': self.next_seq_num,
+            'window_size': self.window_size,
+            'seq_space': self.seq_space,
+            'unacknowledged_segments': [sequence % self.seq_space for sequence in range(self._base, self._next)
+                                        if not self._acked[sequence % self.window_size]],
+            'expected_seq_num': self.expected_seq_num,
+            'buffered_segments': sum(1 for data in self._received if data is not None)
+        }
+    
+    def get_statistics(self):
+        """Get protocol statistics"""
+        return {
+            'segments_sent': self.segments_sent,
+            'segments_retransmitted': self.segments_retransmitted,
+            'segments_received': self.segments_received,
+            'segments_buffered': self.segments_buffered,
+            'segments_failed': self.segments_failed,
+            'failed': self.failed,
+            'acks_sent': self.acks_sent,
+            'window_size': self.window_size,
+            'current_send_base': self.send_base,
+            'current_next_seq': self.next_seq_num,
+            'unacknowledged_count': self.outstanding,
             'expected_seq_num': self.expected_seq_num
         }
 
+
+# Flow control classes selectable per connection
+ARQ_MODES = {"gbn": GoBackNFlowControl, "sr": SelectiveRepeatFlowControl}
+
+
+def make_flow_control(arq="gbn", **options):
+    """
+    Create the flow control of a connection
+    
+    Args:
+        arq (str): "gbn" (Go-Back-N) or "sr" (Selective Repeat)
+        **options: Constructor arguments (window_size, timeout, max_retries, seq_space, on_failure)
+        
+    Returns:
+        GoBackNFlowControl or SelectiveRepeatFlowControl: Flow control instance
+    """
+    if arq not in ARQ_MODES:
+        raise ValueError(f"Unknown ARQ mode: {arq} (choose from {', '.join(ARQ_MODES)})")
+    return ARQ_MODES[arq](**options)
+
+class Mailbox:
+    """
+    Bounded FIFO message queue of one process
+    
+    Messages are kept in a deque, so sending and receiving are O(1). When
+    the mailbox fills up to its capacity (the high-water mark) it refuses
+    further messages until receivers drain it down to the low-water mark,
+    which pushes back on senders instead of letting the queue grow without
+    bound. Blocking calls wait in simulated time: they run simulation events
+    until another party has queued or taken a message, the timeout has
+    passed on the simulation clock, or nothing is left that could help.
+    """
+    
+    def __init__(self, capacity=10000, low_water=None, scheduler=None):
+        """
+        Initialize the mailbox
+        
+        Args:
+            capacity (int): Maximum number of queued messages (high-water mark)
+            low_water (int, optional): Queue length at which senders may resume
+                after the mailbox filled up (default: half the capacity)
+            scheduler (EventScheduler, optional): Simulation clock blocking calls
+                wait on (default: the shared one)
+        """
+        if capacity < 1:
+            raise ValueError(f"Mailbox capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.low_water = capacity // 2 if low_water is None else min(low_water, capacity - 1)
+        self.throttled = False  # True from reaching capacity until drained to low_water
+        self.delivered = 0
+        self.refused = 0
+        self.peak = 0
+        self._queue = deque()
+        self.scheduler = scheduler or get_scheduler()
+    
+    def __len__(self):
+        return len(self._queue)
+    
+    def put(self, message, block=False, timeout=None):
+        """
+        Add a message
+        
+        Args:
+            message: Message to queue
+            block (bool): Wait while the mailbox is throttled instead of refusing
+            timeout (float, optional): Longest wait in simulated seconds when blocking
+        
+        Returns:
+            bool: True if queued, False if refused by backpressure
+        """
+        if self.throttled:
+            if not block or not self._wait_for(lambda: not self.throttled, timeout):
+                self.refused += 1
+                return False
+        queue = self._queue
+        queue.append(message)
+        if len(queue) > self.peak:
+            self.peak = len(queue)
+        if len(queue) >= self.capacity:
+            self.throttled = True
+        return True
+    
+    def get(self, block=False, timeout=None):
+        """
+        Take the oldest message
+        
+        Args:
+            block (bool): Wait for a message if the mailbox is empty
+            timeout (float, optional): Longest wait in simulated seconds when blocking
+        
+        Returns:
+            Message, or None if there is none
+        """
+        if not self._queue:
+            if not block or not self._wait_for(lambda: self._queue, timeout):
+                return None
+        message = self._queue.popleft()
+        self._drained(1)
+        return message
+    
+    def get_batch(self, max_messages=None):
+        """
+        Take up to max_messages of the oldest messages at once
+        
+        Args:
+            max_messages (int, optional): Most messages to take (default: all)
+        
+        Returns:
+            list: Messages, oldest first
+        """
+        queue = self._queue
+        count = len(queue) if max_messages is None else min(max_messages, len(queue))
+        if count == len(queue):
+            messages = list(queue)
+            queue.clear()
+        else:
+            popleft = queue.popleft
+            messages = [popleft() for _ in range(count)]
+        self._drained(count)
+        return messages
+    
+    def _wait_for(self, ready, timeout):
+        """
+        Run simulation events until ready() holds
+        
+        Returns:
+            bool: True if ready() holds, False once the timeout has passed on the
+                simulation clock (which is then left at the deadline) or no
+                events are left to run
+        """
+        scheduler = self.scheduler
+        deadline = None if timeout is None else scheduler.now + timeout
+        while not ready():
+            next_time = scheduler.peek_time()
+            if next_time is None or (deadline is not None and next_time > deadline):
+                if deadline is not None:
+                    scheduler.run(until=deadline)
+                return False
+            scheduler.step()
+        return True
+    
+    def _drained(self, count):
+        """Account for taken messages and release senders below the low-water mark"""
+        self.delivered += count
+        if self.throttled and len(self._queue) <= self.low_water:
+            self.throttled = False
+
 class ProcessCommunicationManager:
     """
     Manages process-to-process communication with proper addressing
     """
     
-    def __init__(self):
+    def __init__(self, mailbox_capacity=10000, low_water=None, scheduler=None):
+        """
+        Initialize the communication manager
+        
+        Args:
+            mailbox_capacity (int): Messages each process may have waiting (see Mailbox)
+            low_water (int, optional): Queue length at which senders to a full mailbox may resume
+            scheduler (EventScheduler, optional): Simulation clock for timestamps and
+                blocking mailbox calls (default: the shared one)
+        """
         self.processes = {}  # Maps process_id to ProcessInfo
         self.active_connections = {}  # Maps connection_id to connection details
-        self.message_queue = {}  # Per-process message queues
+        self.message_queue = {}  # Maps process_id to its Mailbox
+        self.mailbox_capacity = mailbox_capacity
+        self.low_water = low_water
+        self.scheduler = scheduler or get_scheduler()
+        self._message_ids = itertools.count(1)  # Unique, increasing message IDs
+        self._connection_ids = itertools.count(1)  # Unique connection ID suffixes
         
     def register_process(self, process_id, process_name, device_ip, protocol_type=ProtocolType.TCP):
         """
@@ -429,13 +1145,13 @@ class ProcessCommunicationManager:
             'allocated_ports': [],
             'active_connections': [],
             'message_queue': [],
-            'registration_time': time.time()
+            'registration_time': self.scheduler.now
         }
         
         self.processes[process_id] = process_info
-        self.message_queue[process_id] = []
+        self.message_queue[process_id] = Mailbox(self.mailbox_capacity, self.low_water, self.scheduler)
         
-        print(f"[PROCESS-COMM] ▶ Registered process '{process_name}' (ID: {process_id}) on {device_ip}")
+        _process_comm_log.info("[PROCESS-COMM] ▶ Registered process '{}' (ID: {}) on {}", process_name, process_id, device_ip)
         return process_info
     
     def establish_connection(self, client_process_id, server_process_id, service_port=None):
@@ -451,17 +1167,17 @@ class ProcessCommunicationManager:
             str: Connection ID if successful, None otherwise
         """
         if client_process_id not in self.processes:
-            print(f"[PROCESS-COMM] ❌ Client process {client_process_id} not registered")
+            _process_comm_log.error("[PROCESS-COMM] ❌ Client process {} not registered", client_process_id)
             return None
             
         if server_process_id not in self.processes:
-            print(f"[PROCESS-COMM] ❌ Server process {server_process_id} not registered")
+            _process_comm_log.error("[PROCESS-COMM] ❌ Server process {} not registered", server_process_id)
             return None
         
         client_info = self.processes[client_process_id]
         server_info = self.processes[server_process_id]
         
-        connection_id = f"{client_process_id}_to_{server_process_id}_{int(time.time())}"
+        connection_id = f"{client_process_id}_to_{server_process_id}_{next(self._connection_ids)}"
         
         connection_info = {
             'connection_id': connection_id,
@@ -470,7 +1186,7 @@ class ProcessCommunicationManager:
             'client_device_ip': client_info['device_ip'],
             'server_device_ip': server_info['device_ip'],
             'service_port': service_port or 80,
-            'established_time': time.time(),
+            'established_time': self.scheduler.now,
             'state': 'ESTABLISHING'
         }
         
@@ -480,13 +1196,13 @@ class ProcessCommunicationManager:
         client_info['active_connections'].append(connection_id)
         server_info['active_connections'].append(connection_id)
         
-        print(f"[PROCESS-COMM] ▶ Establishing connection: {client_info['process_name']} → {server_info['process_name']}")
-        print(f"[PROCESS-COMM] ▶ Connection ID: {connection_id}")
-        print(f"[PROCESS-COMM] ▶ Route: {client_info['device_ip']} → {server_info['device_ip']}:{connection_info['service_port']}")
+        _process_comm_log.info("[PROCESS-COMM] ▶ Establishing connection: {} → {}", client_info['process_name'], server_info['process_name'])
+        _process_comm_log.info("[PROCESS-COMM] ▶ Connection ID: {}", connection_id)
+        _process_comm_log.info("[PROCESS-COMM] ▶ Route: {} → {}:{}", client_info['device_ip'], server_info['device_ip'], connection_info['service_port'])
         
         return connection_id
     
-    def send_message(self, sender_process_id, receiver_process_id, message, connection_id=None):
+    def send_message(self, sender_process_id, receiver_process_id, message, connection_id=None, block=False, timeout=None):
         """
         Send message from one process to another
         
@@ -495,44 +1211,50 @@ class ProcessCommunicationManager:
             receiver_process_id (str): Receiver process ID
             message (str): Message to send
             connection_id (str, optional): Existing connection ID
+            block (bool): Wait while the receiver's mailbox is full instead of failing
+            timeout (float, optional): Longest wait in simulated seconds when blocking
             
         Returns:
-            bool: Success status
+            bool: Success status (False if the receiver's mailbox pushed back)
         """
         if sender_process_id not in self.processes:
-            print(f"[PROCESS-COMM] ❌ Sender process {sender_process_id} not registered")
+            _process_comm_log.error("[PROCESS-COMM] ❌ Sender process {} not registered", sender_process_id)
             return False
             
         if receiver_process_id not in self.processes:
-            print(f"[PROCESS-COMM] ❌ Receiver process {receiver_process_id} not registered")
+            _process_comm_log.error("[PROCESS-COMM] ❌ Receiver process {} not registered", receiver_process_id)
             return False
         
         sender_info = self.processes[sender_process_id]
         receiver_info = self.processes[receiver_process_id]
         
         message_info = {
-            'message_id': f"msg_{int(time.time() * 1000)}",
+            'message_id': f"msg_{next(self._message_ids)}",
             'sender_process': sender_info,
             'receiver_process': receiver_info,
             'message': message,
-            'timestamp': time.time(),
+            'timestamp': self.scheduler.now,
             'connection_id': connection_id
         }
         
         # Add to receiver's message queue
-        self.message_queue[receiver_process_id].append(message_info)
+        if not self.message_queue[receiver_process_id].put(message_info, block, timeout):
+            _process_comm_log.warning("[PROCESS-COMM] ⚠ Mailbox of {} is full - message refused", receiver_info['process_name'])
+            return False
         
-        print(f"[PROCESS-COMM] ▶ Message sent: {sender_info['process_name']} → {receiver_info['process_name']}")
-        print(f"[PROCESS-COMM] ▶ Message: '{message[:50]}...' (ID: {message_info['message_id']})")
+        _process_comm_log.info("[PROCESS-COMM] ▶ Message sent: {} → {}", sender_info['process_name'], receiver_info['process_name'])
+        _process_comm_log.info("[PROCESS-COMM] ▶ Message: '{}...' (ID: {})", message[:50], message_info['message_id'])
         
         return True
     
-    def receive_message(self, process_id):
+    def receive_message(self, process_id, block=False, timeout=None):
         """
         Receive message for a process
         
         Args:
             process_id (str): Process ID
+            block (bool): Wait for a message if none is queued
+            timeout (float, optional): Longest wait in simulated seconds when blocking
             
         Returns:
             dict: Message info or None if no messages
@@ -540,27 +1262,46 @@ class ProcessCommunicationManager:
         if process_id not in self.message_queue:
             return None
             
-        if not self.message_queue[process_id]:
+        message = self.message_queue[process_id].get(block, timeout)
+        if message is None:
             return None
             
-        message = self.message_queue[process_id].pop(0)
-        print(f"[PROCESS-COMM] ▶ Message delivered to {self.processes[process_id]['process_name']}")
+        _process_comm_log.info("[PROCESS-COMM] ▶ Message delivered to {}", self.processes[process_id]['process_name'])
         return message
     
+    def receive_messages(self, process_id, max_messages=None):
+        """
+        Receive all (or up to max_messages) queued messages for a process at once
+        
+        Args:
+            process_id (str): Process ID
+            max_messages (int, optional): Most messages to receive
+            
+        Returns:
+            list: Message infos, oldest first
+        """
+        if process_id not in self.message_queue:
+            return []
+            
+        messages = self.message_queue[process_id].get_batch(max_messages)
+        if messages:
+            _process_comm_log.info("[PROCESS-COMM] ▶ {} messages delivered to {}", len(messages), self.processes[process_id]['process_name'])
+        return messages
+    
     def get_process_info(self, process_id):
         """Get information about a registered process"""
         return self.processes.get(process_id)
     
     def list_active_processes(self):
         """List all active processes"""
-        print(f"[PROCESS-COMM] === ACTIVE PROCESSES ===")
+        _process_comm_log.info("[PROCESS-COMM] === ACTIVE PROCESSES ===")
         for process_id, info in self.processes.items():
-            print(f"[PROCESS-COMM] ▶ {info['process_name']} (ID: {process_id})")
-            print(f"[PROCESS-COMM]   Device: {info['device_ip']}")
-            print(f"[PROCESS-COMM]   Protocol: {info['protocol_type'].name}")
-            print(f"[PROCESS-COMM]   Ports: {info['allocated_ports']}")
-            print(f"[PROCESS-COMM]   Connections: {len(info['active_connections'])}")
-            print(f"[PROCESS-COMM]   Pending messages: {len(self.message_queue.get(process_id, []))}")
+            _process_comm_log.info("[PROCESS-COMM] ▶ {} (ID: {})", info['process_name'], process_id)
+            _process_comm_log.info("[PROCESS-COMM]   Device: {}", info['device_ip'])
+            _process_comm_log.info("[PROCESS-COMM]   Protocol: {}", info['protocol_type'].name)
+            _process_comm_log.info("[PROCESS-COMM]   Ports: {}", info['allocated_ports'])
+            _process_comm_log.info("[PROCESS-COMM]   Connections: {}", len(info['active_connections']))
+            _process_comm_log.info("[PROCESS-COMM]   Pending messages: {}", len(self.message_queue.get(process_id, [])))
 
 class SlidingWindowFlowControl:
     """
@@ -588,6 +1329,9 @@ class SlidingWindowFlowControl:
         # Use checksum handler for error detection
         self.checksum_handler = ChecksumForDataLink()
         
+        # Timers run on the simulation clock
+        self.scheduler = get_scheduler()
+        
     def can_send(self):
         """Check if we can send more segments within the window"""
         return (self.next_seq_num - self.send_base) < self.window_size
@@ -604,7 +1348,7 @@ class SlidingWindowFlowControl:
             tuple: (success, segment, seq_num)
         """
         if not self.can_send():
-            print(f"[TRANSPORT] ⚠ Cannot send - window full (base={self.send_base}, next={self.next_seq_num}, size={self.window_size})")
+            _log.warning("[TRANSPORT] ⚠ Cannot send - window full (base={}, next={}, size={})", self.send_base, self.next_seq_num, self.window_size)
             return False, None, None
         
         if seq_num is None:
@@ -617,12 +1361,12 @@ class SlidingWindowFlowControl:
         self.send_buffer[seq_num] = {
             'segment': segment,
             'data': data,
-            'timestamp': time.time(),
+            'timestamp': self.scheduler.now,
             'retransmit_count': 0
         }
         
-        print(f"[TRANSPORT] ▶ Sending segment {seq_num}: {data}")
-        print(f"[TRANSPORT] ▶ Window: base={self.send_base}, next={self.next_seq_num+1}, size={self.window_size}")
+        _log.info("[TRANSPORT] ▶ Sending segment {}: {}", seq_num, data)
+        _log.info("[TRANSPORT] ▶ Window: base={}, next={}, size={}", self.send_base, self.next_seq_num+1, self.window_size)
         
         # Advance next sequence number
         if seq_num == self.next_seq_num:
@@ -639,7 +1383,7 @@ class SlidingWindowFlowControl:
         Process received segment with flow control
         
         Args:
-            segment (str): Received segment
+            segment (bytes): Received segment (binary frame)
             
         Returns:
             tuple: (is_valid, seq_num, data, ack_to_send)
@@ -648,16 +1392,16 @@ class SlidingWindowFlowControl:
         is_valid, seq_num, data = self.checksum_handler.verify_frame(segment)
         
         if not is_valid:
-            print(f"[TRANSPORT] ❌ Invalid segment received")
+            _log.error("[TRANSPORT] ❌ Invalid segment received")
             # Send duplicate ACK for last correctly received segment
             ack_to_send = f"ACK{self.last_ack_sent}" if self.last_ack_sent >= 0 else None
             return False, -1, None, ack_to_send
         
-        print(f"[TRANSPORT] ▶ Received segment {seq_num}: {data}")
+        _log.info("[TRANSPORT] ▶ Received segment {}: {}", seq_num, data)
         
         if seq_num == self.expected_seq_num:
             # Expected segment - accept it
-            print(f"[TRANSPORT] ✓ Segment {seq_num} is in order")
+            _log.info("[TRANSPORT] ✓ Segment {} is in order", seq_num)
             self.receive_buffer[seq_num] = data
             self.last_ack_sent = seq_num
             self.expected_seq_num = (self.expected_seq_num + 1) % 1000
@@ -665,23 +1409,23 @@ class SlidingWindowFlowControl:
             # Check if we can deliver more segments from buffer
             while self.expected_seq_num in self.receive_buffer:
                 delivered_seq = self.expected_seq_num
-                print(f"[TRANSPORT] ✓ Delivering buffered segment {delivered_seq}")
+                _log.info("[TRANSPORT] ✓ Delivering buffered segment {}", delivered_seq)
                 self.expected_seq_num = (self.expected_seq_num + 1) % 1000
             
             ack_to_send = f"ACK{self.last_ack_sent}"
-            print(f"[TRANSPORT] ▶ Sending {ack_to_send}")
+            _log.info("[TRANSPORT] ▶ Sending {}", ack_to_send)
             return True, seq_num, data, ack_to_send
         
         elif seq_num < self.expected_seq_num:
             # Duplicate segment - send ACK again
-            print(f"[TRANSPORT] ⚠ Duplicate segment {seq_num} (expected {self.expected_seq_num})")
+            _log.warning("[TRANSPORT] ⚠ Duplicate segment {} (expected {})", seq_num, self.expected_seq_num)
             ack_to_send = f"ACK{seq_num}"
-            print(f"[TRANSPORT] ▶ Sending duplicate {ack_to_send}")
+            _log.info("[TRANSPORT] ▶ Sending duplicate {}", ack_to_send)
             return True, seq_num, data, ack_to_send
         
         else:
             # Out-of-order segment - buffer it but don't ACK
-            print(f"[TRANSPORT] ⚠ Out-of-order segment {seq_num} (expected {self.expected_seq_num})")
+            _log.warning("[TRANSPORT] ⚠ Out-of-order segment {} (expected {})", seq_num, self.expected_seq_num)
             self.receive_buffer[seq_num] = data
             # Send ACK for last in-order segment
             ack_to_send = f"ACK{self.last_ack_sent}" if self.last_ack_sent >= 0 else None
@@ -698,14 +1442,14 @@ class SlidingWindowFlowControl:
             list: List of acknowledged sequence numbers
         """
         if not ack.startswith("ACK"):
-            print(f"[TRANSPORT] ⚠ Invalid ACK format: {ack}")
+            _log.warning("[TRANSPORT] ⚠ Invalid ACK format: {}", ack)
             return []
             
         try:
             ack_num = int(ack[3:])
             acked_segments = []
             
-            print(f"[TRANSPORT] ▶ Received {ack} (send_base={self.send_base})")
+            _log.info("[TRANSPORT] ▶ Received {} (send_base={})", ack, self.send_base)
             
             # Cumulative ACK - remove all segments up to ack_num
             segments_to_remove = []
@@ -716,22 +1460,22 @@ class SlidingWindowFlowControl:
             
             for seq in segments_to_remove:
                 del self.send_buffer[seq]
-                print(f"[TRANSPORT] ✓ Segment {seq} acknowledged and removed from buffer")
+                _log.info("[TRANSPORT] ✓ Segment {} acknowledged and removed from buffer", seq)
             
             # Update send base
             if acked_segments:
                 self.send_base = max(acked_segments) + 1
-                print(f"[TRANSPORT] ▶ Updated send_base to {self.send_base}")
+                _log.info("[TRANSPORT] ▶ Updated send_base to {}", self.send_base)
                 
                 # Stop timer if no more unacknowledged segments
                 if not self.send_buffer:
                     self.timer_running = False
-                    print(f"[TRANSPORT] ▶ All segments acknowledged, stopping timer")
+                    _log.info("[TRANSPORT] ▶ All segments acknowledged, stopping timer")
             
             return acked_segments
             
         except Exception as e:
-            print(f"[TRANSPORT] ⚠ Error processing ACK: {e}")
+            _log.warning("[TRANSPORT] ⚠ Error processing ACK: {}", e)
             return []
     
     def handle_timeout(self):
@@ -744,10 +1488,10 @@ class SlidingWindowFlowControl:
         if not self.send_buffer:
             return []
             
-        print(f"[TRANSPORT] ⚠ Timeout occurred - retransmitting unacknowledged segments")
+        _log.warning("[TRANSPORT] ⚠ Timeout occurred - retransmitting unacknowledged segments")
         
         segments_to_retransmit = []
-        current_time = time.time()
+        current_time = self.scheduler.now
         
         for seq_num in sorted(self.send_buffer.keys()):
             segment_info = self.send_buffer[seq_num]
@@ -756,9 +1500,9 @@ class SlidingWindowFlowControl:
                     segments_to_retransmit.append((seq_num, segment_info['segment'], segment_info['data']))
                     segment_info['retransmit_count'] += 1
                     segment_info['timestamp'] = current_time
-                    print(f"[TRANSPORT] ▶ Retransmitting segment {seq_num} (attempt {segment_info['retransmit_count']})")
+                    _log.info("[TRANSPORT] ▶ Retransmitting segment {} (attempt {})", seq_num, segment_info['retransmit_count'])
                 else:
-                    print(f"[TRANSPORT] ❌ Segment {seq_num} exceeded max retries, dropping")
+                    _log.error("[TRANSPORT] ❌ Segment {} exceeded max retries, dropping", seq_num)
                     del self.send_buffer[seq_num]
         
         return segments_to_retransmit
@@ -791,21 +1535,63 @@ class SlidingWindowFlowControl:
             'expected_seq_num': self.expected_seq_num
         }
 
+DUPACK_THRESHOLD = 3  # Duplicate ACKs that trigger a fast retransmit
+
 class TCPConnection:
     """TCP Connection management"""
     
-    def __init__(self, local_port, remote_port, remote_ip, process_id):
+    def __init__(self, local_port, remote_port, remote_ip, process_id, arq="gbn", congestion="reno", on_send=None, **flow_options):
+        """
+        Initialize a TCP connection
+        
+        Args:
+            local_port (int): Local port
+            remote_port (int): Remote port
+            remote_ip (str): Remote IP address
+            process_id (str): Owning process
+            arq (str or object): Flow control, "gbn" (Go-Back-N) or "sr" (Selective
+                Repeat), or a flow control object with the same interface
+            congestion (str): Congestion control, "reno", "newreno", "cubic" or "bbr"
+            on_send (callable, optional): Called as on_send(segments) with segments
+                sent later on the simulation clock; only with it are segments
+                paced at the congestion control's pacing rate, and retransmission
+                timeouts handled without handle_timeout() being polled
+            **flow_options: Flow control options (window_size, timeout, max_retries, seq_space)
+        """
         self.local_port = local_port
         self.remote_port = remote_port
         self.remote_ip = remote_ip
         self.process_id = process_id
         self.state = ConnectionState.CLOSED
-        self.flow_control = GoBackNFlowControl(window_size=4)  # Use Go-Back-N instead
+        flow_options.setdefault("window_size", 4)
+        self.flow_control = make_flow_control(arq, **flow_options) if isinstance(arq, str) else arq
+        self.congestion = make_congestion_control(congestion)
+        self.rto = RTOEstimator(initial_rto=self.flow_control.timeout)
+        self.mss = 20  # Simplified MSS, in characters of data per segment
+        self.send_queue = deque()  # Segment payloads waiting for the windows to open
+        self.dupacks = 0  # Duplicate ACKs since the last new ACK
+        self.in_recovery = False
+        self.recover = 0  # Segments sent when fast recovery started; it ends once they are all acknowledged
+        self.fast_retransmits = 0
+        self.timeouts = 0
+        self.on_send = on_send
+        self.next_send_time = 0.0  # Earliest time the pacing rate lets the next segment go
+        self._send_wakeup = None
+        self._timer_event = None
+        if on_send is not None and getattr(self.flow_control, "on_retransmit", False) is None:
+            self.flow_control.on_retransmit = self._retransmit_expired
+        
+        # Delivery-rate samples: segments known to have reached the receiver,
+        # and the state at each send (sequence -> (delivered, time, retransmitted))
+        self._delivered = 0
+        self._dupack_credit = 0  # Segments counted from duplicate ACKs but not yet acknowledged
+        self._sent_state = {}
         
         # TCP-specific sequence numbers
-        self.initial_seq_num = random.randint(0, 4294967295)  # 32-bit sequence number
+        self.initial_seq_num = get_rng(f"transport/tcp/{local_port}").randint(0, 4294967295)  # 32-bit sequence number
         self.seq_num = self.initial_seq_num
         self.ack_num = 0
+        self.tcb = None  # Connection state in the transport layer's TCPStateMachine
         
     def create_tcp_header(self, flags, data_length=0):
         """
@@ -828,86 +1614,315 @@ class TCPConnection:
                  f"DataLen={data_length}")
         return header
     
-    def send_syn(self):
-        """Initiate TCP connection (SYN)"""
-        self.state = ConnectionState.SYN_SENT
-        header = self.create_tcp_header(TCPFlags.SYN)
-        segment = f"{header}|"  # No data in SYN
-        self.seq_num += 1  # SYN consumes one sequence number
-        
-        print(f"[TCP] ▶ Sending SYN to {self.remote_ip}:{self.remote_port}")
-        print(f"[TCP] ▶ State: {self.state.value}")
-        return segment
-    
-    def process_syn(self, received_segment):
-        """Process received SYN"""
-        self.state = ConnectionState.SYN_RECEIVED
-        # Extract sequence number from received SYN
-        # In real implementation, would parse the header
-        self.ack_num = self.seq_num + 1  # Acknowledge the SYN
-        
-        header = self.create_tcp_header(TCPFlags.SYN | TCPFlags.ACK)
-        segment = f"{header}|"  # No data in SYN-ACK
-        self.seq_num += 1  # SYN consumes one sequence number
-        
-        print(f"[TCP] ▶ Received SYN, sending SYN-ACK")
-        print(f"[TCP] ▶ State: {self.state.value}")
-        return segment
-    
-    def process_syn_ack(self, received_segment):
-        """Process received SYN-ACK"""
-        self.state = ConnectionState.ESTABLISHED
-        self.ack_num += 1  # Acknowledge the SYN-ACK
-        
-        header = self.create_tcp_header(TCPFlags.ACK)
-        segment = f"{header}|"  # No data in ACK
-        
-        print(f"[TCP] ▶ Received SYN-ACK, sending ACK")
-        print(f"[TCP] ▶ Connection established!")
-        print(f"[TCP] ▶ State: {self.state.value}")
-        return segment
+    def attach(self, tcb):
+        """
+        Bind this connection to its state in the TCP state machine
+        
+        The connection state then follows every transition of the TCB, and the
+        sequence numbers start from the TCB's after the handshake.
+        
+        Args:
+            tcb (TCB): Connection state from TCPStateMachine.connect()
+        """
+        self.tcb = tcb
+        tcb.owner = self.process_id
+        tcb.on_state = self._on_state
+        self.state = tcb.state
+    
+    def _on_state(self, tcb, old_state):
+        """Follow a transition of the TCB"""
+        self.state = tcb.state
+        if old_state in (ConnectionState.SYN_SENT, ConnectionState.SYN_RECEIVED) and tcb.state == ConnectionState.ESTABLISHED:
+            self.initial_seq_num = tcb.iss
+            self.seq_num = tcb.snd_nxt
+            self.ack_num = tcb.rcv_nxt
+        _tcp_log.info("[TCP] ▶ {}:{} state: {} → {}", self.remote_ip, self.remote_port, old_state.value, tcb.state.value)
     
     def send_data(self, data):
         """
         Send data over established TCP connection
         
+        The data is cut into segments. Segments that the flow control window
+        or the congestion window does not admit yet are queued, and
+        process_ack() sends them as ACKs open the windows.
+        
         Args:
             data (str): Data to send
             
         Returns:
-            tuple: (success, segments)
+            tuple: (success, segments) where segments are the TCP segments sent
+                now; success is False only if the connection cannot send
         """
         if self.state != ConnectionState.ESTABLISHED:
-            print(f"[TCP] ❌ Cannot send data - connection not established (state: {self.state.value})")
+            _tcp_log.error("[TCP] ❌ Cannot send data - connection not established (state: {})", self.state.value)
             return False, []
         
         # Split data into segments if too large
-        max_segment_size = 20  # Simplified MSS
+        mss = self.mss
+        for i in range(0, len(data), mss):
+            self.send_queue.append(data[i:i+mss])
+        
+        segments = self._send_queued()
+        if self.send_queue:
+            _tcp_log.info("[TCP] ▶ {} segment(s) queued until the window opens ({} in flight, cwnd {})",
+                          len(self.send_queue), self.flow_control.outstanding, self.congestion.window())
+        if self.on_send is not None:
+            self._arm_timer()
+        return True, segments
+    
+    def _with_header(self, segment, data_length):
+        """Prepend the TCP header to a flow control frame; the frame itself is not rebuilt"""
+        header = self.create_tcp_header(TCPFlags.PSH | TCPFlags.ACK, data_length)
+        return header.encode('ascii') + b"|" + segment
+    
+    def _send_queued(self):
+        """Send queued segments while both windows (and the pacing rate) allow"""
+        flow_control = self.flow_control
+        now = flow_control.scheduler.now
+        pacing_rate = self.congestion.pacing_rate if self.on_send is not None else None
         segments = []
+        while self.send_queue and flow_control.can_send() and flow_control.outstanding < self.congestion.window():
+            if pacing_rate:
+                if now < self.next_send_time:
+                    if self._send_wakeup is None:
+                        self._send_wakeup = flow_control.scheduler.schedule_at(self.next_send_time, self._paced_send)
+                    break
+                self.next_send_time = max(now, self.next_send_time) + 1 / pacing_rate
+            segment_data = self.send_queue[0]
+            success, segment, seq_num = flow_control.send_segment(segment_data)
+            if not success:
+                break
+            self.send_queue.popleft()
+            self.record_send(flow_control.sent_total - 1)
+            segments.append(self._with_header(segment, len(segment_data)))
+            self.seq_num += len(segment_data)
+        return segments
+    
+    def record_send(self, sequence):
+        """
+        Remember when a segment was sent, for the RTT and delivery-rate samples
+        of its ACK; send_data() does this itself, senders that number their own
+        segments (see async_sockets) call it
+        
+        Args:
+            sequence (int): Segments sent before this one
+        """
+        self._sent_state[sequence] = (self._delivered, self.flow_control.scheduler.now, False)
+    
+    def _paced_send(self):
+        """Pacing timer: send what the pacing rate now admits through on_send"""
+        self._send_wakeup = None
+        segments = self._send_queued()
+        if segments:
+            self.on_send(segments)
+            self._arm_timer()
+    
+    def _arm_timer(self):
+        """Run the Go-Back-N retransmission timer on the simulation clock (with on_send)"""
+        flow_control = self.flow_control
+        if self._timer_event is None and getattr(flow_control, "is_timer_running", False):
+            deadline = max(flow_control.scheduler.now, flow_control.timer_start_time + flow_control.timeout)
+            self._timer_event = flow_control.scheduler.schedule_at(deadline, self._on_timer)
+    
+    def _on_timer(self):
+        """Timer event: retransmit through on_send if the timer really expired, else wait for its new deadline"""
+        self._timer_event = None
+        flow_control = self.flow_control
+        if flow_control.is_timer_running and flow_control.scheduler.now >= flow_control.timer_start_time + flow_control.timeout:
+            segments = [self._with_header(segment, len(data)) for _, segment, data in self.handle_timeout()]
+            segments.extend(self._send_queued())
+            if segments:
+                self.on_send(segments)
+        self._arm_timer()
+    
+    def _retransmit_expired(self, seq_num, segment, data):
+        """Selective Repeat timer callback (with on_send): the oldest segment's expiry is a retransmission timeout"""
+        if seq_num == self.flow_control.send_base:
+            self._on_timeout()
+        self._mark_retransmitted(seq_num)
+        self.on_send([self._with_header(segment, len(data))])
+    
+    def _sequence(self, seq_num):
+        """Unwrapped sequence number of an unacknowledged segment"""
+        base = self.flow_control.acked_total
+        return base + (seq_num - base) % self.flow_control.seq_space
+    
+    def _mark_retransmitted(self, seq_num):
+        """Keep a resent segment out of RTT samples (Karn's rule) and restart its rate sample"""
+        sequence = self._sequence(seq_num)
+        if sequence in self._sent_state:
+            self._sent_state[sequence] = (self._delivered, self.flow_control.scheduler.now, True)
+    
+    def _take_sample(self, base, seq_num, newly_acked, now):
+        """
+        Measure the delivery rate, and the RTT, from the segment an ACK names
         
-        for i in range(0, len(data), max_segment_size):
-            segment_data = data[i:i+max_segment_size]
+        The delivery rate is the number of segments that reached the receiver
+        between sending the segment and receiving its ACK, over that interval.
+        No RTT is taken from a retransmitted segment.
+        
+        Args:
+            base (int): Segments acknowledged before this ACK
+            seq_num (int): Sequence number the ACK names
+            newly_acked (int): Segments the ACK acknowledged
+            now (float): Current time
             
-            # Use flow control to send
-            success, segment, seq_num = self.flow_control.send_segment(segment_data)
-            if success:
-                # Add TCP header
-                header = self.create_tcp_header(TCPFlags.PSH | TCPFlags.ACK, len(segment_data))
-                tcp_segment = f"{header}|{segment}"
-                segments.append(tcp_segment)
-                self.seq_num += len(segment_data)
+        Returns:
+            tuple: (rtt, rate) in seconds and segments per second; either is
+                None if no sample could be taken
+        """
+        credited = min(newly_acked, self._dupack_credit)
+        self._dupack_credit -= credited
+        self._delivered += newly_acked - credited
+        sent = self._sent_state.get(base + (seq_num - base) % self.flow_control.seq_space)
+        for sequence in range(base, self.flow_control.acked_total):
+            self._sent_state.pop(sequence, None)
+        if sent is None or now <= sent[1]:
+            return None, None
+        delivered, sent_time, retransmitted = sent
+        return (None if retransmitted else now - sent_time), (self._delivered - delivered) / (now - sent_time)
+    
+    def _retransmit_oldest(self):
+        """Resend the oldest unacknowledged segment (fast retransmit)"""
+        retransmission = self.flow_control.retransmit_oldest()
+        if retransmission is None:
+            return []
+        seq_num, segment, data = retransmission
+        self._mark_retransmitted(seq_num)
+        _tcp_log.warning("[TCP] ⚠ Fast retransmit of segment {} after {} duplicate ACKs - cwnd {}", seq_num, self.dupacks, self.congestion.window())
+        return [self._with_header(segment, len(data))]
+    
+    def process_ack(self, ack, rtt=None):
+        """
+        Process an ACK: grow the congestion window, recover from losses and
+        send queued segments the windows now admit
+        
+        Three duplicate ACKs retransmit the oldest unacknowledged segment at
+        once (fast retransmit) and reduce the window without slow start (fast
+        recovery). With Selective Repeat, whose ACKs are not cumulative, ACKs
+        of later segments while the oldest is still missing count as
+        duplicates. Recovery ends once every segment sent before it started
+        is acknowledged; with NewReno-style algorithms a partial ACK before
+        that retransmits the next missing segment.
+        
+        Every new ACK also yields a delivery-rate sample for the congestion
+        control, and an RTT sample unless the caller measured one.
+        
+        Args:
+            ack (int or str): ACK for the flow control (see GoBackNFlowControl.process_ack())
+            rtt (float, optional): Round-trip time measured for the acknowledged
+                segment (default: the time since it was sent, if it was not resent)
+            
+        Returns:
+            tuple: (acked, segments) - acknowledged sequence numbers, and TCP
+                segments to send now (retransmissions and queued data)
+        """
+        flow_control = self.flow_control
+        congestion = self.congestion
+        now = flow_control.scheduler.now
+        base = flow_control.acked_total
+        acked = flow_control.process_ack(ack)
+        segments = []
+        
+        newly_acked = flow_control.acked_total - base
+        if newly_acked:
+            self.dupacks = 0
+            measured_rtt, rate = self._take_sample(base, acked[-1], newly_acked, now)
+            if rtt is None:
+                rtt = measured_rtt
+            if rtt is not None:
+                self.rto.update(rtt)
+                flow_control.timeout = self.rto.rto
+            if self.in_recovery:
+                if flow_control.acked_total >= self.recover or not congestion.newreno:
+                    self.in_recovery = False
+                    congestion.exit_recovery(now)
+                else:
+                    # Partial ACK: the next segment was lost too
+                    segments.extend(self._retransmit_oldest())
+                    congestion.on_partial_ack(newly_acked, now)
             else:
-                print(f"[TCP] ⚠ Flow control prevented sending segment")
-                break
+                congestion.on_ack(newly_acked, now, rtt, flow_control.outstanding, rate)
+        elif flow_control.outstanding and (acked or flow_control.is_duplicate_ack(ack)):
+            self.dupacks += 1
+            # Each duplicate ACK means one more segment reached the receiver
+            self._delivered += 1
+            self._dupack_credit += 1
+            if self.dupacks == DUPACK_THRESHOLD and not self.in_recovery and flow_control.acked_total >= self.recover:
+                self.in_recovery = True
+                self.recover = flow_control.sent_total
+                self.fast_retransmits += 1
+                congestion.enter_recovery(now, flow_control.outstanding)
+                segments.extend(self._retransmit_oldest())
+            elif self.in_recovery:
+                congestion.on_dup_ack(now)
+        
+        segments.extend(self._send_queued())
+        if self.on_send is not None:
+            self._arm_timer()
+        return acked, segments
+    
+    def _on_timeout(self):
+        """Shrink the congestion window, back off the RTO and leave fast recovery"""
+        self.timeouts += 1
+        self.congestion.on_timeout(self.flow_control.scheduler.now, self.flow_control.outstanding)
+        self.rto.backoff()
+        self.flow_control.timeout = self.rto.rto
+        self.in_recovery = False
+        self.dupacks = 0
+        self.recover = self.flow_control.sent_total
+        self._dupack_credit = 0
+        _tcp_log.warning("[TCP] ⚠ Retransmission timeout - cwnd {}, RTO {:.3f}s", self.congestion.window(), self.rto.rto)
+    
+    def handle_timeout(self):
+        """
+        Handle a retransmission timeout: shrink the congestion window and back off
         
-        return len(segments) > 0, segments
+        Returns:
+            list: Segments to retransmit (see the flow control's handle_timeout())
+        """
+        self._on_timeout()
+        retransmissions = self.flow_control.handle_timeout()
+        for seq_num, _, _ in retransmissions:
+            self._mark_retransmitted(seq_num)
+        return retransmissions
 
 class UDPSocket:
-    """UDP Socket implementation"""
+    """
+    UDP Socket implementation
+    
+    Datagrams that arrive for the socket are passed to on_datagram(data, source)
+    when a callback is set, and otherwise queued for receive_datagram().
+    """
     
-    def __init__(self, local_port, process_id):
+    def __init__(self, local_port, process_id, local_ip=WILDCARD_IP, on_datagram=None):
         self.local_port = local_port
         self.process_id = process_id
+        self.local_ip = local_ip
+        self.on_datagram = on_datagram
+        self.received = deque()  # (data, (source_ip, source_port)) waiting to be read
+        
+    def deliver(self, data, source):
+        """
+        Accept a datagram that arrived for this socket
+        
+        Args:
+            data (bytes or str): Payload
+            source (tuple): (ip, port) of the sender
+        """
+        if self.on_datagram is not None:
+            self.on_datagram(data, source)
+        else:
+            self.received.append((data, source))
+    
+    def receive_datagram(self):
+        """
+        Take the oldest queued datagram
+        
+        Returns:
+            tuple: (data, (source_ip, source_port)), or None if nothing arrived
+        """
+        return self.received.popleft() if self.received else None
         
     def create_udp_header(self, remote_port, data_length):
         """
@@ -942,8 +1957,8 @@ class UDPSocket:
         header = self.create_udp_header(remote_port, len(data))
         datagram = f"{header}|{data}"
         
-        print(f"[UDP] ▶ Sending datagram to {remote_ip}:{remote_port}")
-        print(f"[UDP] ▶ Data: {data}")
+        _udp_log.info("[UDP] ▶ Sending datagram to {}:{}", remote_ip, remote_port)
+        _udp_log.info("[UDP] ▶ Data: {}", data)
         return datagram
 
 class TransportLayer:
@@ -952,11 +1967,15 @@ class TransportLayer:
     """
     
     def __init__(self):
-        self.port_manager = PortManager()
-        self.tcp_connections = {}  # Maps (local_port, remote_ip, remote_port) to TCPConnection
-        self.udp_sockets = {}  # Maps local_port to UDPSocket
+        self.scheduler = get_scheduler()  # Simulation clock for network delays
+        self.port_manager = PortManager(scheduler=self.scheduler)
+        self.tcp_connections = {}  # Maps (local_ip, local_port, remote_ip, remote_port) to TCPConnection
+        self.udp_sockets = {}  # Maps (local_ip, local_port) to UDPSocket
         self.process_registry = {}  # Maps process_id to protocol info
-        self.process_comm_manager = ProcessCommunicationManager()  # New process communication manager
+        self.process_comm_manager = ProcessCommunicationManager(scheduler=self.scheduler)  # New process communication manager
+        self.tcp = TCPStateMachine(self.scheduler, delay=0.1)  # Handshakes and teardowns of every TCP connection
+        self.port_owners = {}  # Maps (ip, port) to process_id
+        self.process_connections = {}  # Maps process_id to its keys in tcp_connections
         
     def register_process(self, process_id, protocol_type, well_known_port=None, process_name=None, device_ip=None):
         """
@@ -974,12 +1993,12 @@ class TransportLayer:
         """
         # Allocate port
         if well_known_port:
-            success = self.port_manager.allocate_well_known_port(well_known_port, process_id)
+            success = self.port_manager.allocate_well_known_port(well_known_port, process_id, device_ip or WILDCARD_IP)
             if not success:
                 return None
             allocated_port = well_known_port
         else:
-            allocated_port = self.port_manager.allocate_ephemeral_port(process_id)
+            allocated_port = self.port_manager.allocate_ephemeral_port(process_id, device_ip or WILDCARD_IP)
             if not allocated_port:
                 return None
         
@@ -990,6 +2009,11 @@ class TransportLayer:
             'process_name': process_name or process_id,
             'device_ip': device_ip
         }
+        self.port_owners[(device_ip or WILDCARD_IP, allocated_port)] = process_id
+        
+        # Services on well-known TCP ports accept connections
+        if well_known_port and protocol_type == ProtocolType.TCP:
+            self.tcp.listen(device_ip or WILDCARD_IP, allocated_port)
         
         # Register in communication manager
         if device_ip:
@@ -1001,10 +2025,31 @@ class TransportLayer:
             )
             self.process_comm_manager.processes[process_id]['allocated_ports'].append(allocated_port)
         
-        print(f"[TRANSPORT] ▶ Enhanced registration: {process_name or process_id} ({protocol_type.name}) on port {allocated_port}")
+        _log.info("[TRANSPORT] ▶ Enhanced registration: {} ({}) on port {}", process_name or process_id, protocol_type.name, allocated_port)
         return allocated_port
     
-    def create_tcp_connection(self, process_id, remote_ip, remote_port):
+    def _local_address(self, process_id):
+        """Get the (ip, port) a registered process is bound to"""
+        process_info = self.process_registry[process_id]
+        return process_info.get('device_ip') or WILDCARD_IP, process_info['port']
+    
+    def get_tcp_connection(self, process_id, remote_ip, remote_port):
+        """
+        Get the TCP connection of a process to a remote endpoint
+        
+        Args:
+            process_id (str): Process identifier
+            remote_ip (str): Remote IP address
+            remote_port (int): Remote port
+            
+        Returns:
+            TCPConnection: The connection, or None if there is none
+        """
+        if process_id not in self.process_registry:
+            return None
+        return self.tcp_connections.get(self._local_address(process_id) + (remote_ip, remote_port))
+    
+    def create_tcp_connection(self, process_id, remote_ip, remote_port, arq="gbn", **flow_options):
         """
         Create TCP connection (client-side)
         
@@ -1012,30 +2057,40 @@ class TransportLayer:
             process_id (str): Process identifier
             remote_ip (str): Remote IP address
             remote_port (int): Remote port
+            arq (str): Flow control, "gbn" (Go-Back-N) or "sr" (Selective Repeat)
+            **flow_options: Flow control options (window_size, timeout, max_retries, seq_space)
             
         Returns:
             TCPConnection: TCP connection object
         """
         if process_id not in self.process_registry:
-            print(f"[TRANSPORT] ❌ Process {process_id} not registered")
+            _log.error("[TRANSPORT] ❌ Process {} not registered", process_id)
             return None
             
         process_info = self.process_registry[process_id]
         if process_info['protocol'] != ProtocolType.TCP:
-            print(f"[TRANSPORT] ❌ Process {process_id} not registered for TCP")
+            _log.error("[TRANSPORT] ❌ Process {} not registered for TCP", process_id)
             return None
         
-        local_port = process_info['port']
-        connection_key = (local_port, remote_ip, remote_port)
+        local_ip, local_port = self._local_address(process_id)
+        connection_key = (local_ip, local_port, remote_ip, remote_port)
         
         if connection_key in self.tcp_connections:
-            print(f"[TRANSPORT] ⚠ Connection already exists")
+            _log.warning("[TRANSPORT] ⚠ Connection already exists")
             return self.tcp_connections[connection_key]
         
-        connection = TCPConnection(local_port, remote_port, remote_ip, process_id)
+        connection = TCPConnection(local_port, remote_port, remote_ip, process_id, arq, **flow_options)
         self.tcp_connections[connection_key] = connection
+        self.process_connections.setdefault(process_id, []).append(connection_key)
         
-        print(f"[TRANSPORT] ▶ Created TCP connection: {local_port} → {remote_ip}:{remote_port}")
+        _log.info("[TRANSPORT] ▶ Created TCP connection: {} → {}:{} ({})", local_port, remote_ip, remote_port, connection.flow_control.name)
+        return connection
+    
+    def _forget_tcp_connection(self, process_id, connection_key):
+        """Drop a connection from the connection tables and return it (None if unknown)"""
+        connection = self.tcp_connections.pop(connection_key, None)
+        if connection is not None:
+            self.process_connections[process_id].remove(connection_key)
         return connection
     
     def create_udp_socket(self, process_id):
@@ -1049,30 +2104,89 @@ class TransportLayer:
             UDPSocket: UDP socket object
         """
         if process_id not in self.process_registry:
-            print(f"[TRANSPORT] ❌ Process {process_id} not registered")
+            _log.error("[TRANSPORT] ❌ Process {} not registered", process_id)
             return None
             
         process_info = self.process_registry[process_id]
         if process_info['protocol'] != ProtocolType.UDP:
-            print(f"[TRANSPORT] ❌ Process {process_id} not registered for UDP")
+            _log.error("[TRANSPORT] ❌ Process {} not registered for UDP", process_id)
             return None
         
-        local_port = process_info['port']
+        local_address = self._local_address(process_id)
+        local_port = local_address[1]
         
-        if local_port in self.udp_sockets:
-            print(f"[TRANSPORT] ⚠ UDP socket already exists on port {local_port}")
-            return self.udp_sockets[local_port]
+        if local_address in self.udp_sockets:
+            _log.warning("[TRANSPORT] ⚠ UDP socket already exists on port {}", local_port)
+            return self.udp_sockets[local_address]
         
-        socket = UDPSocket(local_port, process_id)
-        self.udp_sockets[local_port] = socket
+        socket = self.bind_udp_socket(process_id, *local_address)
+        _log.info("[TRANSPORT] ▶ Created UDP socket on port {}", local_port)
+        return socket
+    
+    def bind_udp_socket(self, owner, ip, port, on_datagram=None):
+        """
+        Bind a UDP socket to an address, whether or not its owner is a registered process
         
-        print(f"[TRANSPORT] ▶ Created UDP socket on port {local_port}")
+        Args:
+            owner (str): Owner recorded on the socket (process ID or endpoint name)
+            ip (str): Local IP, or WILDCARD_IP for every address
+            port (int): Local port
+            on_datagram (callable, optional): Called as on_datagram(data, source) for each arriving datagram
+            
+        Returns:
+            UDPSocket: The bound socket, or None if the address is taken
+        """
+        if (ip, port) in self.udp_sockets:
+            return None
+        socket = UDPSocket(port, owner, ip, on_datagram)
+        self.udp_sockets[(ip, port)] = socket
         return socket
     
+    def close_udp_socket(self, socket):
+        """
+        Unbind a UDP socket; datagrams still in flight to it are dropped
+        
+        Args:
+            socket (UDPSocket): Socket returned by bind_udp_socket() or create_udp_socket()
+        """
+        address = (socket.local_ip, socket.local_port)
+        if self.udp_sockets.get(address) is socket:
+            del self.udp_sockets[address]
+    
+    def send_udp_datagram(self, socket, data, remote_ip, remote_port):
+        """
+        Send a datagram from a socket; it arrives after the one-way delay
+        
+        Args:
+            socket (UDPSocket): Sending socket
+            data (bytes or str): Payload
+            remote_ip (str): Destination IP
+            remote_port (int): Destination port
+            
+        Returns:
+            str: UDP datagram
+        """
+        datagram = socket.send_datagram(data, remote_ip, remote_port)
+        self.scheduler.schedule(self.tcp.delay, self._deliver_udp, data, (socket.local_ip, socket.local_port), (remote_ip, remote_port))
+        return datagram
+    
+    def _deliver_udp(self, data, source, destination):
+        """Hand a datagram to the socket bound on its destination (dropped if there is none)"""
+        ip, port = destination
+        socket = self.udp_sockets.get((ip, port)) or self.udp_sockets.get((WILDCARD_IP, port))
+        if socket is None:
+            _udp_log.debug("[UDP] ⚠ Port {}:{} unreachable, datagram dropped", ip, port)
+            return
+        socket.deliver(data, source)
+    
     def establish_tcp_connection(self, client_process_id, server_ip, server_port):
         """
         Perform TCP three-way handshake
         
+        The SYN, SYN-ACK and ACK are exchanged by the TCP state machine on the
+        simulation clock. A server that is not registered with this transport
+        layer is simulated by listening on its address.
+        
         Args:
             client_process_id (str): Client process ID
             server_ip (str): Server IP address
@@ -1081,32 +2195,85 @@ class TransportLayer:
         Returns:
             bool: True if connection established successfully
         """
-        print(f"[TRANSPORT] === TCP THREE-WAY HANDSHAKE ===")
+        _log.info("[TRANSPORT] === TCP THREE-WAY HANDSHAKE ===")
         
         # Create client connection
         connection = self.create_tcp_connection(client_process_id, server_ip, server_port)
         if not connection:
             return False
+        if connection.tcb is not None and connection.state == ConnectionState.ESTABLISHED:
+            return True
         
-        # Step 1: Client sends SYN
-        syn_segment = connection.send_syn()
-        print(f"[TRANSPORT] ▶ Step 1: Client → Server SYN")
+        if (server_ip, server_port) not in self.tcp.listeners and (WILDCARD_IP, server_port) not in self.tcp.listeners:
+            self.tcp.listen(server_ip, server_port)
         
-        # Simulate network delay
-        time.sleep(0.1)
+        local_ip, local_port = self._local_address(client_process_id)
+        connection_key = (local_ip, local_port, server_ip, server_port)
+        tcb = self.tcp.connect(local_ip, local_port, server_ip, server_port)
+        if tcb is None:
+            self._forget_tcp_connection(client_process_id, connection_key)
+            return False
+        connection.attach(tcb)
+        _log.info("[TRANSPORT] ▶ Client → Server SYN")
+        
+        # Run the simulation until both ends have completed the handshake or it failed
+        opening = (ConnectionState.SYN_SENT, ConnectionState.SYN_RECEIVED)
+        while True:
+            server = self.tcp.lookup(server_ip, server_port, local_ip, local_port)
+            if tcb.state not in opening and (server is None or server.state not in opening):
+                break
+            if not self.scheduler.step():
+                break
         
-        # Step 2: Server responds with SYN-ACK (simulated)
-        print(f"[TRANSPORT] ▶ Step 2: Server → Client SYN-ACK")
-        syn_ack_segment = connection.process_syn(syn_segment)
+        if tcb.state != ConnectionState.ESTABLISHED:
+            _log.error("[TRANSPORT] ❌ TCP handshake with {}:{} failed (state: {})", server_ip, server_port, tcb.state.value)
+            self._forget_tcp_connection(client_process_id, connection_key)
+            return False
+        _log.info("[TRANSPORT] ✓ TCP connection established successfully")
+        return True
+    
+    def close_tcp_connection(self, process_id, remote_ip, remote_port):
+        """
+        Close a TCP connection with a FIN exchange
         
-        # Simulate network delay
-        time.sleep(0.1)
+        The local endpoint then stays in TIME_WAIT inside the state machine
+        for twice the maximum segment lifetime.
         
-        # Step 3: Client sends ACK
-        print(f"[TRANSPORT] ▶ Step 3: Client → Server ACK")
-        ack_segment = connection.process_syn_ack(syn_ack_segment)
+        Args:
+            process_id (str): Process identifier
+            remote_ip (str): Remote IP
+            remote_port (int): Remote port
+            
+        Returns:
+            bool: True if the connection was closed
+        """
+        if process_id not in self.process_registry:
+            _log.error("[TRANSPORT] ❌ Process {} not registered", process_id)
+            return False
         
-        print(f"[TRANSPORT] ✓ TCP connection established successfully")
+        connection_key = self._local_address(process_id) + (remote_ip, remote_port)
+        connection = self._forget_tcp_connection(process_id, connection_key)
+        if connection is None:
+            _log.error("[TRANSPORT] ❌ No TCP connection found for {}", connection_key)
+            return False
+        
+        tcb = connection.tcb
+        if tcb is None:
+            connection.state = ConnectionState.CLOSED
+        else:
+            self.tcp.close(tcb)
+            # Run the simulation until both FINs are acknowledged; a server
+            # simulated by this transport layer closes as soon as it sees our FIN
+            closing = (ConnectionState.FIN_WAIT_1, ConnectionState.FIN_WAIT_2, ConnectionState.CLOSING, ConnectionState.LAST_ACK)
+            while tcb.state in closing:
+                peer = self.tcp.lookup(tcb.remote_ip, tcb.remote_port, tcb.local_ip, tcb.local_port)
+                if peer is not None and peer.owner is None and peer.state == ConnectionState.CLOSE_WAIT:
+                    self.tcp.close(peer)
+                if not self.scheduler.step():
+                    break
+            if tcb.state == ConnectionState.TIME_WAIT:
+                self.port_manager.hold_port(tcb.local_port, self.scheduler.now + 2 * self.tcp.msl, tcb.local_ip)
+        _log.info("[TRANSPORT] ✓ Closed TCP connection {} (state: {})", connection_key, connection.state.value)
         return True
     
     def send_tcp_data(self, process_id, remote_ip, remote_port, data):
@@ -1123,23 +2290,22 @@ class TransportLayer:
             tuple: (success, segments)
         """
         if process_id not in self.process_registry:
-            print(f"[TRANSPORT] ❌ Process {process_id} not registered")
+            _log.error("[TRANSPORT] ❌ Process {} not registered", process_id)
             return False, []
         
-        local_port = self.process_registry[process_id]['port']
-        connection_key = (local_port, remote_ip, remote_port)
+        connection_key = self._local_address(process_id) + (remote_ip, remote_port)
         
         if connection_key not in self.tcp_connections:
-            print(f"[TRANSPORT] ❌ No TCP connection found for {connection_key}")
+            _log.error("[TRANSPORT] ❌ No TCP connection found for {}", connection_key)
             return False, []
         
         connection = self.tcp_connections[connection_key]
         success, segments = connection.send_data(data)
         
         if success:
-            print(f"[TRANSPORT] ✓ Sent {len(segments)} TCP segments")
+            _log.info("[TRANSPORT] ✓ Sent {} TCP segments", len(segments))
             for i, segment in enumerate(segments):
-                print(f"[TRANSPORT] ▶ Segment {i+1}: {segment[:50]}...")
+                _log.info("[TRANSPORT] ▶ Segment {}: {}...", i+1, segment[:50])
         
         return success, segments
     
@@ -1157,34 +2323,46 @@ class TransportLayer:
             str: UDP datagram
         """
         if process_id not in self.process_registry:
-            print(f"[TRANSPORT] ❌ Process {process_id} not registered")
+            _log.error("[TRANSPORT] ❌ Process {} not registered", process_id)
             return None
         
-        local_port = self.process_registry[process_id]['port']
-        
-        if local_port not in self.udp_sockets:
+        socket = self.udp_sockets.get(self._local_address(process_id))
+        if socket is None:
             socket = self.create_udp_socket(process_id)
             if not socket:
                 return None
-        else:
-            socket = self.udp_sockets[local_port]
         
-        datagram = socket.send_datagram(data, remote_ip, remote_port)
-        print(f"[TRANSPORT] ✓ Sent UDP datagram")
+        datagram = self.send_udp_datagram(socket, data, remote_ip, remote_port)
+        _log.info("[TRANSPORT] ✓ Sent UDP datagram")
         return datagram
     
+    def receive_udp_data(self, process_id):
+        """
+        Receive the oldest datagram that arrived for a process
+        
+        Args:
+            process_id (str): Process identifier
+            
+        Returns:
+            tuple: (data, (source_ip, source_port)), or None if nothing arrived
+        """
+        if process_id not in self.process_registry:
+            return None
+        socket = self.udp_sockets.get(self._local_address(process_id))
+        return socket.receive_datagram() if socket is not None else None
+    
     def display_port_allocation(self):
         """Display current port allocation status"""
-        print(f"\n[TRANSPORT] === PORT ALLOCATION STATUS ===")
-        print(f"[TRANSPORT] ▶ Total allocated ports: {len(self.port_manager.allocated_ports)}")
+        _log.info("\n[TRANSPORT] === PORT ALLOCATION STATUS ===")
+        _log.info("[TRANSPORT] ▶ Total allocated ports: {}", len(self.port_manager.allocated_ports))
         
         for process_id, ports in self.port_manager.process_port_map.items():
             protocol = self.process_registry.get(process_id, {}).get('protocol', 'UNKNOWN')
             protocol_name = protocol.name if hasattr(protocol, 'name') else str(protocol)
-            print(f"[TRANSPORT] ▶ Process {process_id} ({protocol_name}): ports {ports}")
+            _log.info("[TRANSPORT] ▶ Process {} ({}): ports {}", process_id, protocol_name, list(ports))
         
-        print(f"[TRANSPORT] ▶ Active TCP connections: {len(self.tcp_connections)}")
-        print(f"[TRANSPORT] ▶ Active UDP sockets: {len(self.udp_sockets)}")
+        _log.info("[TRANSPORT] ▶ Active TCP connections: {}", len(self.tcp_connections))
+        _log.info("[TRANSPORT] ▶ Active UDP sockets: {}", len(self.udp_sockets))
     
     def cleanup_process(self, process_id):
         """
@@ -1201,26 +2379,25 @@ class TransportLayer:
         for port in ports:
             self.port_manager.deallocate_port(port, process_id)
         
-        # Close TCP connections
-        connections_to_remove = []
-        for conn_key, connection in self.tcp_connections.items():
-            if connection.process_id == process_id:
-                connections_to_remove.append(conn_key)
-        
-        for conn_key in connections_to_remove:
-            del self.tcp_connections[conn_key]
+        # Reset TCP connections
+        for conn_key in self.process_connections.pop(process_id, []):
+            connection = self.tcp_connections.pop(conn_key)
+            if connection.tcb is not None:
+                self.tcp.abort(connection.tcb)
         
-        # Remove UDP sockets
-        process_port = self.process_registry[process_id]['port']
-        if process_port in self.udp_sockets:
-            del self.udp_sockets[process_port]
+        # Remove UDP sockets and listening sockets
+        local_address = self._local_address(process_id)
+        self.udp_sockets.pop(local_address, None)
+        self.tcp.unlisten(*local_address)
         
         # Remove from registry
         del self.process_registry[process_id]
+        if self.port_owners.get(local_address) == process_id:
+            del self.port_owners[local_address]
         
-        print(f"[TRANSPORT] ▶ Cleaned up resources for process {process_id}")
+        _log.info("[TRANSPORT] ▶ Cleaned up resources for process {}", process_id)
     
-    def establish_process_connection(self, client_process_id, server_process_id, service_port=None):
+    def establish_process_connection(self, client_process_id, server_process_id, service_port=None, arq="gbn", **flow_options):
         """
         Establish connection between two processes
         
@@ -1228,6 +2405,8 @@ class TransportLayer:
             client_process_id (str): Client process ID
             server_process_id (str): Server process ID
             service_port (int, optional): Service port
+            arq (str): Flow control of the TCP connection, "gbn" or "sr"
+            **flow_options: Flow control options (window_size, timeout, max_retries, seq_space)
             
         Returns:
             str: Connection ID if successful
@@ -1247,10 +2426,12 @@ class TransportLayer:
                     tcp_connection = self.create_tcp_connection(
                         client_process_id, 
                         server_device_ip, 
-                        service_port or 80
+                        service_port or 80,
+                        arq,
+                        **flow_options
                     )
                     if tcp_connection:
-                        print(f"[TRANSPORT] ✓ TCP connection layer established for process connection")
+                        _log.info("[TRANSPORT] ✓ TCP connection layer established for process connection")
         
         return connection_id
     
@@ -1262,7 +2443,7 @@ class TransportLayer:
             sender_process_id (str): Sender process ID
             receiver_process_id (str): Receiver process ID
             message (str): Message to send
-            use_flow_control (bool): Whether to use Go-Back-N flow control
+            use_flow_control (bool): Whether to use the connection's flow control (Go-Back-N or Selective Repeat)
             
         Returns:
             bool: Success status
@@ -1273,41 +2454,39 @@ class TransportLayer:
         )
         
         if success and use_flow_control:
-            # Also demonstrate Go-Back-N flow control
+            # Also demonstrate the connection's flow control
             sender_info = self.process_registry.get(sender_process_id)
             if sender_info and sender_info['protocol'] == ProtocolType.TCP:
-                print(f"[TRANSPORT] ▶ Using Go-Back-N flow control for reliable delivery")
-                
                 # Find existing TCP connection
-                connection_key = None
-                for key, conn in self.tcp_connections.items():
-                    if conn.process_id == sender_process_id:
-                        connection_key = key
-                        break
+                connection_keys = self.process_connections.get(sender_process_id)
                 
-                if connection_key:
-                    connection = self.tcp_connections[connection_key]
-                    # Simulate sending with Go-Back-N
+                if connection_keys:
+                    connection = self.tcp_connections[connection_keys[0]]
+                    protocol_name = connection.flow_control.name
+                    _log.info("[TRANSPORT] ▶ Using {} flow control for reliable delivery", protocol_name)
+                    # Simulate sending with the connection's flow control
                     flow_success, segments = connection.send_data(message)
                     if flow_success:
-                        print(f"[TRANSPORT] ✓ Message sent with Go-Back-N reliability guarantees")
+                        _log.info("[TRANSPORT] ✓ Message sent with {} reliability guarantees", protocol_name)
                         # Show flow control statistics
                         stats = connection.flow_control.get_statistics()
-                        print(f"[TRANSPORT] ▶ Flow control stats: {stats}")
+                        _log.info("[TRANSPORT] ▶ Flow control stats: {}", stats)
         
         return success
     
-    def receive_process_message(self, process_id):
+    def receive_process_message(self, process_id, block=False, timeout=None):
         """
         Receive message for a process
         
         Args:
             process_id (str): Process ID
+            block (bool): Wait for a message if none is queued
+            timeout (float, optional): Longest wait in simulated seconds when blocking
             
         Returns:
             dict: Message information or None
         """
-        return self.process_comm_manager.receive_message(process_id)
+        return self.process_comm_manager.receive_message(process_id, block, timeout)
     
     def demonstrate_go_back_n(self, connection_id, test_data_list, simulate_errors=True):
         """
@@ -1321,7 +2500,7 @@ class TransportLayer:
         Returns:
             dict: Demonstration results
         """
-        print(f"\n[GO-BACK-N DEMO] === DEMONSTRATING GO-BACK-N PROTOCOL ===")
+        _go_back_n_demo_log.info("\n[GO-BACK-N DEMO] === DEMONSTRATING GO-BACK-N PROTOCOL ===")
         
         # Find the TCP connection
         tcp_connection = None
@@ -1343,45 +2522,44 @@ class TransportLayer:
             'final_statistics': {}
         }
         
-        print(f"[GO-BACK-N DEMO] Window size: {flow_control.window_size}")
-        print(f"[GO-BACK-N DEMO] Timeout: {flow_control.timeout}s")
+        _go_back_n_demo_log.info("[GO-BACK-N DEMO] Window size: {}", flow_control.window_size)
+        _go_back_n_demo_log.info("[GO-BACK-N DEMO] Timeout: {}s", flow_control.timeout)
         
         # Send all segments
         for i, data in enumerate(test_data_list):
             success, segment, seq_num = flow_control.send_segment(data)
             if success:
                 results['segments_sent'] += 1
-                print(f"[GO-BACK-N DEMO] Sent: {data}")
+                _go_back_n_demo_log.info("[GO-BACK-N DEMO] Sent: {}", data)
                 
                 # Simulate some ACKs (not all to demonstrate retransmission)
                 if not simulate_errors or i % 3 != 1:  # Skip every 3rd ACK to simulate loss
                     # Simulate ACK reception
-                    ack = f"ACK{seq_num}"
-                    acked_segments = flow_control.process_ack(ack)
+                    acked_segments = flow_control.process_ack(seq_num)
                     results['segments_acknowledged'] += len(acked_segments)
             else:
-                print(f"[GO-BACK-N DEMO] Cannot send: {data} (window full)")
+                _go_back_n_demo_log.info("[GO-BACK-N DEMO] Cannot send: {} (window full)", data)
         
         # Simulate timeout and retransmission
         if simulate_errors:
-            print(f"[GO-BACK-N DEMO] Simulating timeout...")
-            flow_control.timer_start_time = time.time() - flow_control.timeout - 1  # Force timeout
+            _go_back_n_demo_log.info("[GO-BACK-N DEMO] Simulating timeout...")
+            flow_control.timer_start_time = flow_control.scheduler.now - flow_control.timeout - 1  # Force timeout
             if flow_control.check_timeout():
                 retransmit_list = flow_control.handle_timeout()
                 results['retransmissions'] = len(retransmit_list)
-                print(f"[GO-BACK-N DEMO] Retransmitted {len(retransmit_list)} segments")
+                _go_back_n_demo_log.info("[GO-BACK-N DEMO] Retransmitted {} segments", len(retransmit_list))
         
         # Get final statistics
         results['final_statistics'] = flow_control.get_statistics()
         
-        print(f"[GO-BACK-N DEMO] === DEMONSTRATION COMPLETE ===")
-        print(f"[GO-BACK-N DEMO] Results: {results}")
+        _go_back_n_demo_log.info("[GO-BACK-N DEMO] === DEMONSTRATION COMPLETE ===")
+        _go_back_n_demo_log.info("[GO-BACK-N DEMO] Results: {}", results)
         
         return results
     
     def display_enhanced_status(self):
         """Display comprehensive transport layer status"""
-        print(f"\n[TRANSPORT] === ENHANCED TRANSPORT LAYER STATUS ===")
+        _log.info("\n[TRANSPORT] === ENHANCED TRANSPORT LAYER STATUS ===")
         
         # Port allocation status
         self.display_port_allocation()
@@ -1390,22 +2568,22 @@ class TransportLayer:
         self.process_comm_manager.list_active_processes()
         
         # Connection status
-        print(f"[TRANSPORT] === CONNECTION STATUS ===")
-        print(f"[TRANSPORT] ▶ Active TCP connections: {len(self.tcp_connections)}")
+        _log.info("[TRANSPORT] === CONNECTION STATUS ===")
+        _log.info("[TRANSPORT] ▶ Active TCP connections: {}", len(self.tcp_connections))
         for conn_key, connection in self.tcp_connections.items():
-            print(f"[TRANSPORT]   {conn_key}: State={connection.state.value}")
+            _log.info("[TRANSPORT]   {}: State={}", conn_key, connection.state.value)
             if hasattr(connection.flow_control, 'get_statistics'):
                 stats = connection.flow_control.get_statistics()
-                print(f"[TRANSPORT]   Flow Control: {stats}")
+                _log.info("[TRANSPORT]   Flow Control: {}", stats)
         
-        print(f"[TRANSPORT] ▶ Active UDP sockets: {len(self.udp_sockets)}")
+        _log.info("[TRANSPORT] ▶ Active UDP sockets: {}", len(self.udp_sockets))
         
         # Active connections from communication manager
-        print(f"[TRANSPORT] ▶ Process connections: {len(self.process_comm_manager.active_connections)}")
+        _log.info("[TRANSPORT] ▶ Process connections: {}", len(self.process_comm_manager.active_connections))
         for conn_id, conn_info in self.process_comm_manager.active_connections.items():
             client_name = conn_info['client_process']['process_name']
             server_name = conn_info['server_process']['process_name']
-            print(f"[TRANSPORT]   {conn_id}: {client_name} → {server_name}")
+            _log.info("[TRANSPORT]   {}: {} → {}", conn_id, client_name, server_name)
     
     def register_device(self, device_name, device_ip, device_mac):
         """
@@ -1425,24 +2603,29 @@ class TransportLayer:
             'processes': []
         }
         
-        print(f"[TRANSPORT] ▶ Registered device: {device_name} (IP: {device_ip}, MAC: {device_mac})")
+        _log.info("[TRANSPORT] ▶ Registered device: {} (IP: {}, MAC: {})", device_name, device_ip, device_mac)
     
-    def get_process_by_port(self, port):
+    def get_process_by_port(self, port, ip=WILDCARD_IP):
         """
         Get process information by port number
         
         Args:
             port (int): Port number
+            ip (str): Local IP address the port belongs to; a process bound to
+                the wildcard address matches any IP
             
         Returns:
             dict: Process information or None if not found
         """
-        for process_id, process_info in self.process_registry.items():
-            if process_info['port'] == port:
-                return {
-                    'process_id': process_id,
-                    'process_name': process_info.get('process_name', process_id),
-                    'protocol': process_info['protocol'],
-                    'device_ip': process_info.get('device_ip')
-                }
-        return None
+        process_id = self.port_owners.get((ip, port))
+        if process_id is None:
+            process_id = self.port_owners.get((WILDCARD_IP, port))
+        if process_id is None:
+            return None
+        process_info = self.process_registry[process_id]
+        return {
+            'process_id': process_id,
+            'process_name': process_info.get('process_name', process_id),
+            'protocol': process_info['protocol'],
+            'device_ip': process_info.get('device_ip')
+        }